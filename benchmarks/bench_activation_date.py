@@ -0,0 +1,69 @@
+"""
+Бенчмарк поиска даты активации в проекте с большим количеством файлов .swift.
+
+Сравнивает прежний поиск (чтение и декодирование каждого файла + re.search)
+с find_activation_date_files (поиск подстроки по байтам/mmap в пуле потоков).
+
+Запуск:
+    python benchmarks/bench_activation_date.py [--files 5000] [--size 8192] [--repeat 5]
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram_xcode_bot.services.project_workspace import scan_workspace  # noqa: E402
+from telegram_xcode_bot.services.xcode_service import find_activation_date_files  # noqa: E402
+
+
+def legacy_find(swift_files):
+    """Прежняя реализация: декодирование и regex по каждому файлу."""
+    matches = []
+    for swift_file in swift_files:
+        with open(swift_file, 'r', encoding='utf-8') as f:
+            content = f.read()
+        match = re.search(r'\.date\(from:\s*"([^"]*)"\)', content)
+        if match:
+            matches.append((swift_file, match.group(1)))
+    return matches
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=5000, help='Количество файлов .swift')
+    parser.add_argument('--size', type=int, default=8192, help='Размер файла в байтах')
+    parser.add_argument('--repeat', type=int, default=5, help='Количество повторов')
+    args = parser.parse_args()
+    
+    body = ("    let value = compute(input) // строка кода\n" * (args.size // 48 + 1))[:args.size]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        sources = os.path.join(temp_dir, 'App', 'Sources')
+        os.makedirs(sources)
+        for i in range(args.files):
+            with open(os.path.join(sources, f'File{i:05d}.swift'), 'w', encoding='utf-8') as f:
+                f.write(body)
+                if i == args.files // 2:
+                    f.write('let date = formatter.date(from: "2026/01/31")\n')
+        
+        workspace = scan_workspace(temp_dir)
+        swift_files = workspace.get_swift_files()
+        assert legacy_find(swift_files) == find_activation_date_files(temp_dir, workspace=workspace)
+        
+        legacy = min(timeit.repeat(lambda: legacy_find(swift_files), number=1, repeat=args.repeat))
+        scanner = min(timeit.repeat(
+            lambda: find_activation_date_files(temp_dir, workspace=workspace), number=1, repeat=args.repeat
+        ))
+    
+    print(f"файлов .swift: {args.files} по {args.size} байт")
+    print(f"legacy (decode + re.search): {legacy * 1000:.1f} мс")
+    print(f"find_activation_date_files:  {scanner * 1000:.1f} мс")
+    print(f"ускорение: x{legacy / scanner:.2f}")
+
+
+if __name__ == '__main__':
+    main()
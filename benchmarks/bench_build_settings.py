@@ -0,0 +1,134 @@
+"""
+Микро-бенчмарк чтения build settings из project.pbxproj.
+
+Сравнивает прежнюю реализацию (отдельный re.search на каждый ключ и повторное
+чтение файла для TARGETED_DEVICE_FAMILY) с read_project_settings (одно чтение,
+поиск ключей через str.find) и с вариантом на одном regex-альтернативе.
+
+Запуск:
+    python benchmarks/bench_build_settings.py [--targets 8000] [--repeat 20]
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram_xcode_bot.services.xcode_service import (  # noqa: E402
+    KNOWN_BUILD_SETTINGS,
+    read_project_settings,
+)
+
+_ALTERNATION_RE = re.compile(r'(' + '|'.join(KNOWN_BUILD_SETTINGS) + r')\s*=\s*([^;]+);')
+
+
+def make_pbxproj(targets: int) -> str:
+    """Генерирует project.pbxproj с заданным количеством конфигураций сборки."""
+    parts = ["// !$*UTF8*$!\n{\n\tobjects = {\n"]
+    for index in range(targets):
+        parts.append(
+            f"\t\t{index:024X} /* Debug */ = {{\n"
+            "\t\t\tisa = XCBuildConfiguration;\n"
+            "\t\t\tbuildSettings = {\n"
+            "\t\t\t\tASSETCATALOG_COMPILER_APPICON_NAME = AppIcon;\n"
+            "\t\t\t\tCODE_SIGN_STYLE = Automatic;\n"
+            "\t\t\t\tENABLE_PREVIEWS = YES;\n"
+            "\t\t\t\tGENERATE_INFOPLIST_FILE = YES;\n"
+            "\t\t\t\tLD_RUNPATH_SEARCH_PATHS = (\n"
+            "\t\t\t\t\t\"$(inherited)\",\n"
+            "\t\t\t\t\t\"@executable_path/Frameworks\",\n"
+            "\t\t\t\t);\n"
+            "\t\t\t\tSWIFT_VERSION = 5.0;\n"
+            "\t\t\t};\n"
+            "\t\t\tname = Debug;\n"
+            "\t\t};\n"
+        )
+    # Настройки приложения в конце файла, как у многоцелевых проектов
+    parts.append(
+        "\t\tAAAAAAAAAAAAAAAAAAAAAAAA /* Release */ = {\n"
+        "\t\t\tisa = XCBuildConfiguration;\n"
+        "\t\t\tbuildSettings = {\n"
+        "\t\t\t\tCURRENT_PROJECT_VERSION = 7;\n"
+        "\t\t\t\tINFOPLIST_KEY_CFBundleDisplayName = \"Bench App\";\n"
+        "\t\t\t\tMARKETING_VERSION = 1.4;\n"
+        "\t\t\t\tPRODUCT_BUNDLE_IDENTIFIER = com.example.bench;\n"
+        "\t\t\t\tTARGETED_DEVICE_FAMILY = 1;\n"
+        "\t\t\t};\n"
+        "\t\t\tname = Release;\n"
+        "\t\t};\n"
+    )
+    parts.append("\t};\n}\n")
+    return "".join(parts)
+
+
+def legacy_read(project_path: str):
+    """Прежняя реализация: read_project_info + read_device_family."""
+    with open(project_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    values = []
+    for key in (
+        'MARKETING_VERSION',
+        'CURRENT_PROJECT_VERSION',
+        'INFOPLIST_KEY_CFBundleDisplayName',
+        'PRODUCT_BUNDLE_IDENTIFIER',
+    ):
+        match = re.search(key + r'\s*=\s*([^;]+);', content)
+        values.append(match.group(1).strip().strip('"') if match else None)
+    
+    with open(project_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    match = re.search(r'TARGETED_DEVICE_FAMILY\s*=\s*([^;]+);', content)
+    values.append(match.group(1).strip().strip('"') if match else None)
+    return values
+
+
+def alternation_read(project_path: str):
+    """Один проход regex-альтернативой по всем ключам."""
+    with open(project_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    settings = {}
+    for match in _ALTERNATION_RE.finditer(content):
+        settings.setdefault(match.group(1), match.group(2).strip().strip('"'))
+        if len(settings) == len(KNOWN_BUILD_SETTINGS):
+            break
+    return settings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--targets', type=int, default=8000, help='Количество конфигураций в файле')
+    parser.add_argument('--repeat', type=int, default=20, help='Количество повторов')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        project_path = os.path.join(temp_dir, 'project.pbxproj')
+        with open(project_path, 'w', encoding='utf-8') as f:
+            f.write(make_pbxproj(args.targets))
+        size_mb = os.path.getsize(project_path) / (1024 * 1024)
+        
+        info, device_family = read_project_settings(project_path)
+        assert legacy_read(project_path) == [
+            info.marketing_version,
+            info.build_version,
+            info.display_name,
+            info.bundle_id,
+            '1' if device_family == 'iPhone' else None,
+        ]
+        
+        legacy = min(timeit.repeat(lambda: legacy_read(project_path), number=1, repeat=args.repeat))
+        alternation = min(timeit.repeat(lambda: alternation_read(project_path), number=1, repeat=args.repeat))
+        scanner = min(timeit.repeat(lambda: read_project_settings(project_path), number=1, repeat=args.repeat))
+    
+    print(f"project.pbxproj: {size_mb:.1f} МБ")
+    print(f"legacy (5 x re.search, 2 чтения): {legacy * 1000:.2f} мс")
+    print(f"regex-альтернатива (1 проход):     {alternation * 1000:.2f} мс")
+    print(f"read_project_settings (1 чтение):  {scanner * 1000:.2f} мс")
+    print(f"ускорение: x{legacy / scanner:.2f}")
+
+
+if __name__ == '__main__':
+    main()
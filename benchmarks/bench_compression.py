@@ -0,0 +1,113 @@
+"""
+Бенчмарк политики сжатия выходного архива: время CPU и размер по профилям.
+
+Сравнивает прежнее поведение (ZIP_DEFLATED с уровнем по умолчанию для всех
+файлов) с CompressionPolicy в профилях fast, balanced и small. Без --archive
+собирается проект-фикстура: исходники, project.pbxproj, JSON, PNG иконки,
+скомпилированный каталог ассетов (.car) и вложенный zip фреймворка.
+С --archive используется распакованный реальный проект.
+
+Запуск:
+    python benchmarks/bench_compression.py [--archive project.zip] [--scale 4] [--repeat 3]
+"""
+
+import argparse
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image  # noqa: E402
+
+from telegram_xcode_bot.config import COMPRESSION_PROFILES  # noqa: E402
+from telegram_xcode_bot.services.archive_service import create_archive  # noqa: E402
+from telegram_xcode_bot.services.compression_policy import CompressionPolicy  # noqa: E402
+
+
+def _write(path, data):
+    """Записывает файл, создавая директории."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def build_fixture(root, scale):
+    """Собирает проект с типичным для iOS приложений набором файлов."""
+    rng = random.Random(42)
+    app = os.path.join(root, 'App')
+    swift = "    let value = compute(input) // строка кода\n".encode('utf-8')
+    for i in range(200 * scale):
+        _write(os.path.join(app, 'Sources', f'File{i:04d}.swift'), swift * rng.randint(50, 300))
+    _write(os.path.join(app, 'App.xcodeproj', 'project.pbxproj'), b"\t\tisa = PBXBuildFile;\n" * 20000 * scale)
+    _write(os.path.join(app, 'Resources', 'data.json'), b'{"id": 1, "title": "item"}\n' * 20000 * scale)
+    for i in range(20 * scale):
+        image = Image.merge('RGB', [Image.effect_noise((256, 256), 32 + channel * 16) for channel in range(3)])
+        buffer = io.BytesIO()
+        image.save(buffer, 'PNG')
+        _write(os.path.join(app, 'Assets.xcassets', f'Image{i}.imageset', 'image.png'), buffer.getvalue())
+    _write(os.path.join(app, 'Build', 'Assets.car'), rng.randbytes(4 * 1024 * 1024 * scale))
+    framework = io.BytesIO()
+    with zipfile.ZipFile(framework, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('Lib.framework/Lib', rng.randbytes(1024 * 1024) + swift * 20000)
+    _write(os.path.join(app, 'Vendor', 'Lib.framework.zip'), framework.getvalue() * scale)
+
+
+def legacy_create_archive(source_dir, output_path):
+    """Прежняя реализация: все файлы сжимаются deflate с уровнем по умолчанию."""
+    with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zip_out:
+        for root, dirs, files in os.walk(source_dir):
+            for file in files:
+                file_path = os.path.join(root, file)
+                zip_out.write(file_path, os.path.relpath(file_path, source_dir))
+
+
+def measure(func, source_dir, output_path, repeat):
+    """Лучшее процессорное время из repeat запусков и размер архива."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.process_time()
+        func(source_dir, output_path)
+        best = min(best, time.process_time() - start)
+    return best, os.path.getsize(output_path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--archive', help='Zip архив реального проекта вместо фикстуры')
+    parser.add_argument('--scale', type=int, default=1, help='Множитель размера фикстуры')
+    parser.add_argument('--repeat', type=int, default=3, help='Количество повторов')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source_dir = os.path.join(temp_dir, 'source')
+        if args.archive:
+            with zipfile.ZipFile(args.archive) as zf:
+                zf.extractall(source_dir)
+        else:
+            build_fixture(source_dir, args.scale)
+        input_bytes = sum(
+            os.path.getsize(os.path.join(root, name))
+            for root, _, files in os.walk(source_dir) for name in files
+        )
+        output_path = os.path.join(temp_dir, 'output.zip')
+        
+        rows = [('legacy (deflate -1)',) + measure(legacy_create_archive, source_dir, output_path, args.repeat)]
+        for profile, level in COMPRESSION_PROFILES.items():
+            policy = CompressionPolicy(level=level)
+            rows.append((f'policy {profile} (level {level})',) + measure(
+                lambda src, out: create_archive(src, out, policy), source_dir, output_path, args.repeat
+            ))
+    
+    print(f"исходные файлы: {input_bytes / 1024 / 1024:.1f} МБ")
+    legacy_time = rows[0][1]
+    for name, cpu, size in rows:
+        print(f"{name:28} CPU {cpu * 1000:8.1f} мс (x{legacy_time / cpu:.2f})  размер {size / 1024 / 1024:7.2f} МБ")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Бенчмарк параллельного сжатия записей при сборке выходного архива.
+
+Сравнивает последовательное сжатие (один поток) с compress_entries в пуле
+потоков на наборе сжимаемых файлов общим объёмом --size-mb. Архивы обоих
+вариантов должны совпадать побайтно.
+
+Запуск:
+    python benchmarks/bench_parallel_deflate.py [--size-mb 100] [--files 400] [--workers 8] [--repeat 3]
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import sys
+import tempfile
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram_xcode_bot.services import zip_rewriter  # noqa: E402
+from telegram_xcode_bot.services.compression_policy import CompressionPolicy  # noqa: E402
+from telegram_xcode_bot.services.zip_rewriter import write_file_entries  # noqa: E402
+
+
+def build_files(root, size_mb, count):
+    """Создаёт сжимаемые файлы (исходники со случайными идентификаторами)."""
+    rng = random.Random(1)
+    file_size = size_mb * 1024 * 1024 // count
+    paths = []
+    for i in range(count):
+        lines = []
+        total = 0
+        while total < file_size:
+            line = f"    let value{rng.randrange(10 ** 6)} = compute(input{rng.randrange(100)})\n"
+            lines.append(line)
+            total += len(line)
+        path = os.path.join(root, f'File{i:04d}.swift')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(''.join(lines))
+        paths.append(path)
+    return paths
+
+
+def build_archive(paths, output_path, workers):
+    """Собирает архив и возвращает время сборки и хеш."""
+    entries = [(path, zipfile.ZipInfo(os.path.basename(path), date_time=(2020, 1, 1, 0, 0, 0))) for path in paths]
+    start = time.perf_counter()
+    with zipfile.ZipFile(output_path, 'w') as zf:
+        write_file_entries(zf, entries, CompressionPolicy(), workers=workers)
+    elapsed = time.perf_counter() - start
+    with open(output_path, 'rb') as f:
+        return elapsed, hashlib.sha256(f.read()).hexdigest()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=100, help='Суммарный размер файлов в МБ')
+    parser.add_argument('--files', type=int, default=400, help='Количество файлов')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Потоков сжатия')
+    parser.add_argument('--repeat', type=int, default=3, help='Количество повторов')
+    args = parser.parse_args()
+    
+    # Параллельный режим включается для любого объёма
+    zip_rewriter.ARCHIVE_PARALLEL_MIN_BYTES = 0
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = build_files(temp_dir, args.size_mb, args.files)
+        output_path = os.path.join(temp_dir, 'output.zip')
+        results = {}
+        for workers in (1, args.workers):
+            runs = [build_archive(paths, output_path, workers) for _ in range(args.repeat)]
+            results[workers] = (min(run[0] for run in runs), runs[0][1])
+    
+    sequential, parallel = results[1], results[args.workers]
+    assert sequential[1] == parallel[1], "архивы различаются"
+    print(f"файлов: {args.files}, всего {args.size_mb} МБ, ядер: {os.cpu_count()}")
+    print(f"последовательно:       {sequential[0] * 1000:8.1f} мс")
+    print(f"параллельно ({args.workers} потоков): {parallel[0] * 1000:8.1f} мс (x{sequential[0] / parallel[0]:.2f})")
+
+
+if __name__ == '__main__':
+    main()
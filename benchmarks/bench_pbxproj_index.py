@@ -0,0 +1,128 @@
+"""
+Бенчмарк построения индекса project.pbxproj.
+
+Генерирует многоцелевой проект заданного размера (по умолчанию ~5 МБ) и измеряет
+build_index (быстрый путь), полный разбор parse_plist и чтение из кеша.
+
+Запуск:
+    python benchmarks/bench_pbxproj_index.py [--files 20000] [--targets 40] [--repeat 5]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram_xcode_bot.services.pbxproj_parser import (  # noqa: E402
+    build_index,
+    get_pbxproj_index,
+    parse_plist,
+    pbxproj_index_cache,
+)
+
+
+def _object_id(prefix: str, index: int) -> str:
+    return f"{prefix}{index:022X}"
+
+
+def make_project(files: int, targets: int) -> bytes:
+    """Генерирует project.pbxproj в формате Xcode."""
+    lines = ["// !$*UTF8*$!", "{", "\tarchiveVersion = 1;", "\tclasses = {", "\t};",
+             "\tobjectVersion = 56;", "\tobjects = {", "", "/* Begin PBXBuildFile section */"]
+    for i in range(files):
+        lines.append(
+            f"\t\t{_object_id('BF', i)} /* File{i}.swift in Sources */ = "
+            f"{{isa = PBXBuildFile; fileRef = {_object_id('FR', i)} /* File{i}.swift */; }};"
+        )
+    lines.append("/* End PBXBuildFile section */")
+    lines.append("/* Begin PBXFileReference section */")
+    for i in range(files):
+        lines.append(
+            f"\t\t{_object_id('FR', i)} /* File{i}.swift */ = {{isa = PBXFileReference; "
+            f"lastKnownFileType = sourcecode.swift; path = \"File{i}.swift\"; sourceTree = \"<group>\"; }};"
+        )
+    lines.append("/* End PBXFileReference section */")
+    
+    lines.append("/* Begin PBXNativeTarget section */")
+    for t in range(targets):
+        product_type = "com.apple.product-type.application" if t == 0 else "com.apple.product-type.framework"
+        lines += [
+            f"\t\t{_object_id('NT', t)} /* Target{t} */ = {{",
+            "\t\t\tisa = PBXNativeTarget;",
+            f"\t\t\tbuildConfigurationList = {_object_id('CL', t)} "
+            f"/* Build configuration list for PBXNativeTarget \"Target{t}\" */;",
+            "\t\t\tbuildPhases = (",
+            "\t\t\t);",
+            f"\t\t\tname = Target{t};",
+            f"\t\t\tproductType = \"{product_type}\";",
+            "\t\t};",
+        ]
+    lines.append("/* End PBXNativeTarget section */")
+    
+    lines.append("/* Begin XCBuildConfiguration section */")
+    for t in range(targets):
+        for c, name in enumerate(("Debug", "Release")):
+            lines += [
+                f"\t\t{_object_id('BC', t * 2 + c)} /* {name} */ = {{",
+                "\t\t\tisa = XCBuildConfiguration;",
+                "\t\t\tbuildSettings = {",
+                "\t\t\t\tCURRENT_PROJECT_VERSION = 7;",
+                f"\t\t\t\tINFOPLIST_KEY_CFBundleDisplayName = \"Target {t}\";",
+                "\t\t\t\tLD_RUNPATH_SEARCH_PATHS = (",
+                "\t\t\t\t\t\"$(inherited)\",",
+                "\t\t\t\t\t\"@executable_path/Frameworks\",",
+                "\t\t\t\t);",
+                "\t\t\t\tMARKETING_VERSION = 1.4;",
+                f"\t\t\t\tPRODUCT_BUNDLE_IDENTIFIER = com.example.target{t};",
+                "\t\t\t\tTARGETED_DEVICE_FAMILY = 1;",
+                "\t\t\t};",
+                f"\t\t\tname = {name};",
+                "\t\t};",
+            ]
+    lines.append("/* End XCBuildConfiguration section */")
+    
+    lines.append("/* Begin XCConfigurationList section */")
+    for t in range(targets):
+        lines += [
+            f"\t\t{_object_id('CL', t)} /* Build configuration list */ = {{",
+            "\t\t\tisa = XCConfigurationList;",
+            "\t\t\tbuildConfigurations = (",
+            f"\t\t\t\t{_object_id('BC', t * 2)} /* Debug */,",
+            f"\t\t\t\t{_object_id('BC', t * 2 + 1)} /* Release */,",
+            "\t\t\t);",
+            "\t\t\tdefaultConfigurationName = Release;",
+            "\t\t};",
+        ]
+    lines.append("/* End XCConfigurationList section */")
+    lines += ["\t};", "\trootObject = 00000000000000000000000000;", "}", ""]
+    return "\n".join(lines).encode('utf-8')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=20000, help='Количество файлов в проекте')
+    parser.add_argument('--targets', type=int, default=40, help='Количество целей')
+    parser.add_argument('--repeat', type=int, default=5, help='Количество повторов')
+    args = parser.parse_args()
+    
+    data = make_project(args.files, args.targets)
+    index = build_index(data)
+    assert len(index.targets) == args.targets
+    assert index.find_setting('PRODUCT_BUNDLE_IDENTIFIER') == 'com.example.target0'
+    
+    fast = min(timeit.repeat(lambda: build_index(data), number=1, repeat=args.repeat))
+    full = min(timeit.repeat(lambda: parse_plist(data), number=1, repeat=args.repeat))
+    pbxproj_index_cache.clear()
+    get_pbxproj_index(data)
+    cached = min(timeit.repeat(lambda: get_pbxproj_index(data), number=1, repeat=args.repeat))
+    
+    print(f"project.pbxproj: {len(data) / (1024 * 1024):.1f} МБ, целей: {args.targets}")
+    print(f"build_index (быстрый путь): {fast * 1000:.1f} мс")
+    print(f"parse_plist (полный разбор): {full * 1000:.1f} мс")
+    print(f"get_pbxproj_index (из кеша): {cached * 1000:.1f} мс")
+
+
+if __name__ == '__main__':
+    main()
@@ -6,6 +6,10 @@ from telegram.ext import Application, CommandHandler, MessageHandler, filters, C
 from telegram_xcode_bot.config import BOT_TOKEN, LOG_BOT_TOKEN_MISSING, LOG_BOT_STARTED
 from telegram_xcode_bot.logger import logger
 from telegram_xcode_bot.exceptions import ConfigurationError
+from telegram_xcode_bot.services.compression_policy import check_compression_profile
+from telegram_xcode_bot.utils.process_pool import archive_pool
+from telegram_xcode_bot.utils.loop_monitor import loop_monitor
+from telegram_xcode_bot.utils.update_processor import UserSerializedUpdateProcessor
 from telegram_xcode_bot.handlers import (
     start_handler,
     handle_document,
@@ -17,6 +21,7 @@ from telegram_xcode_bot.handlers import (
     change_date_callback,
     add_ipad_callback,
     get_archive_callback,
+    cancel_job_callback,
     project_info_callback,
     back_callback,
     reset_callback,
@@ -24,6 +29,18 @@ from telegram_xcode_bot.handlers import (
 )
 
 
+async def post_init(application: Application) -> None:
+    """Запускает пул обработки архивов и мониторинг event loop до начала приёма обновлений."""
+    await archive_pool.start()
+    loop_monitor.start()
+
+
+async def post_shutdown(application: Application) -> None:
+    """Останавливает мониторинг event loop и пул обработки архивов."""
+    await loop_monitor.stop()
+    await archive_pool.shutdown()
+
+
 def main() -> None:
     """Запуск бота."""
     # Проверяем наличие токена
@@ -31,8 +48,23 @@ def main() -> None:
         logger.error(LOG_BOT_TOKEN_MISSING)
         raise ConfigurationError(LOG_BOT_TOKEN_MISSING)
     
-    # Создаем приложение
-    application = Application.builder().token(BOT_TOKEN).build()
+    # Опечатка в профиле сжатия не должна незаметно менять уровень сжатия
+    try:
+        check_compression_profile()
+    except ConfigurationError as e:
+        logger.error(str(e))
+        raise
+    
+    # Создаем приложение: пользователи обслуживаются параллельно,
+    # обновления одного пользователя - по очереди
+    application = (
+        Application.builder()
+        .token(BOT_TOKEN)
+        .concurrent_updates(UserSerializedUpdateProcessor())
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
     
     # Регистрируем обработчики команд
     application.add_handler(CommandHandler("start", start_handler))
@@ -57,6 +89,7 @@ def main() -> None:
     application.add_handler(CallbackQueryHandler(add_ipad_callback, pattern="^add_ipad_"))
     application.add_handler(CallbackQueryHandler(project_info_callback, pattern="^project_info_"))
     application.add_handler(CallbackQueryHandler(get_archive_callback, pattern="^get_archive_"))
+    application.add_handler(CallbackQueryHandler(cancel_job_callback, pattern="^cancel_job_"))
     application.add_handler(CallbackQueryHandler(reset_callback, pattern="^reset_"))
     application.add_handler(CallbackQueryHandler(back_callback, pattern="^back_"))
     
@@ -1,7 +1,8 @@
 """Конфигурация и константы для Telegram Xcode Bot."""
 
 import os
-from typing import Final, Optional
+import tempfile
+from typing import Dict, Final, FrozenSet, Optional, Tuple
 
 # ============================================================================
 # ПЕРЕМЕННЫЕ ОКРУЖЕНИЯ
@@ -21,6 +22,166 @@ ICON_REQUIRED_SIZE: Final[int] = 1024  # Требуемый размер ико
 # Тайм-ауты
 DOWNLOAD_TIMEOUT_SECONDS: Final[int] = 300  # 5 минут
 PROCESS_TIMEOUT_SECONDS: Final[int] = 600   # 10 минут
+INSPECT_TIMEOUT_SECONDS: Final[int] = 120   # Чтение информации о проекте из архива
+FILE_OPERATION_TIMEOUT_SECONDS: Final[int] = 30  # Удаление, чтение файлов, проверка изображений
+
+# Мониторинг задержки event loop
+LOOP_MONITOR_INTERVAL_SECONDS: Final[float] = 0.5  # Период проверки
+LOOP_LAG_WARNING_SECONDS: Final[float] = 0.2  # Задержка, при которой пишется предупреждение
+
+# Параллельная обработка обновлений: обновления одного пользователя
+# выполняются по очереди, разных пользователей - одновременно
+MAX_CONCURRENT_UPDATES: Final[int] = int(os.getenv("MAX_CONCURRENT_UPDATES", "256"))
+
+# Пул процессов для обработки архивов
+# По умолчанию не меньше двух процессов: один всегда остаётся для малых архивов
+# (см. JOB_LARGE_LANE_SLOTS), даже на одноядерной машине
+ARCHIVE_POOL_WORKERS: Final[int] = int(os.getenv("ARCHIVE_POOL_WORKERS", "0")) or max(2, os.cpu_count() or 1)
+ARCHIVE_POOL_MAX_QUEUE: Final[int] = 16  # Сколько задач может ждать свободного процесса
+ARCHIVE_POOL_MAX_TASKS_PER_CHILD: Final[int] = 50  # После стольких задач процесс пересоздаётся
+ARCHIVE_POOL_START_METHOD: Final[str] = os.getenv("ARCHIVE_POOL_START_METHOD", "forkserver")
+
+# Планировщик задач обработки архивов: общий лимит и отдельные очереди
+# для малых и больших архивов (по размеру документа)
+JOB_MAX_CONCURRENT: Final[int] = ARCHIVE_POOL_WORKERS  # Одновременно обрабатываемых архивов
+JOB_LARGE_ARCHIVE_BYTES: Final[int] = 20 * 1024 * 1024  # С этого размера архив считается большим
+# Хотя бы один слот остаётся малым. Исключение - явно заданный ARCHIVE_POOL_WORKERS=1:
+# единственный слот общий, и малый архив ждёт завершения большого
+JOB_LARGE_LANE_SLOTS: Final[int] = max(1, JOB_MAX_CONCURRENT - 1)
+JOB_MAX_QUEUED: Final[int] = 32  # Сколько задач может ждать в очередях
+JOB_STATUS_INTERVAL_SECONDS: Final[float] = 5.0  # Период обновления позиции в очереди
+JOB_DEFAULT_DURATION_SMALL_SECONDS: Final[float] = 5.0  # Начальная оценка длительности задач
+JOB_DEFAULT_DURATION_LARGE_SECONDS: Final[float] = 30.0
+
+# Отмена задач обработки архивов
+JOB_CANCEL_GRACE_SECONDS: Final[float] = 5.0  # Сколько ждать добровольной остановки перед завершением процесса
+JOB_CANCEL_CHECK_INTERVAL_SECONDS: Final[float] = 0.05  # Как часто процесс проверяет флаг отмены
+JOB_TEMP_PREFIX: Final[str] = "xcode-bot-job-"  # Префикс временных файлов и директорий задач
+# Рабочие директории задач в памяти (tmpfs): задача, распакованные файлы которой
+# помещаются в бюджет вместе с уже выполняющимися, работает в JOB_RAM_DIR,
+# остальные - во временной директории на диске. Пустой JOB_RAM_DIR - только диск
+JOB_RAM_DIR: Final[str] = os.getenv("JOB_RAM_DIR", "/dev/shm")
+JOB_RAM_BUDGET_BYTES: Final[int] = int(os.getenv("JOB_RAM_BUDGET_MB", "512")) * 1024 * 1024
+JOB_RAM_MARGIN_BYTES: Final[int] = 16 * 1024 * 1024  # Запас на файлы, которые создаёт задача (иконки)
+# Входные и выходные архивы до этого размера хранятся в JOB_RAM_DIR (в памяти),
+# большие - во временной директории на диске. 0 - все архивы на диске
+SMALL_ARCHIVE_MEMORY_BYTES: Final[int] = int(os.getenv("SMALL_ARCHIVE_MEMORY_MB", "16")) * 1024 * 1024
+# Файлы в памяти занимают не больше SMALL_ARCHIVE_MEMORY_TOTAL_BYTES (сверх бюджета задач),
+# а файлы брошенных сессий удаляются через SMALL_ARCHIVE_MEMORY_TTL_SECONDS после
+# последнего использования (архив можно отправить заново: он берётся из хранилища)
+SMALL_ARCHIVE_MEMORY_TOTAL_BYTES: Final[int] = int(os.getenv("SMALL_ARCHIVE_MEMORY_TOTAL_MB", "128")) * 1024 * 1024
+SMALL_ARCHIVE_MEMORY_TTL_SECONDS: Final[int] = 2 * 60 * 60  # 2 часа
+# Кнопки, нажатия которых обрабатываются без очереди пользователя
+UNSERIALIZED_CALLBACK_PREFIXES: Final[Tuple[str, ...]] = ("cancel_job_",)
+
+# Кеш снимков проектов (информация, прочитанная из архива)
+SNAPSHOT_CACHE_MAX_ENTRIES: Final[int] = 256
+SNAPSHOT_CACHE_MAX_BYTES: Final[int] = 16 * 1024 * 1024  # 16 МБ
+
+# Сжатие пересжимаемых записей выходного архива. Профиль выбирается
+# для развёртывания: fast - меньше CPU, small - меньше размер для загрузки.
+# Уровень фиксирован, чтобы одинаковые входные данные давали побайтно одинаковый архив
+COMPRESSION_PROFILES: Final[Dict[str, int]] = {"fast": 1, "balanced": 6, "small": 9}
+ARCHIVE_COMPRESSION_PROFILE: Final[str] = os.getenv("ARCHIVE_COMPRESSION_PROFILE", "balanced")
+# Неизвестный профиль - ошибка конфигурации при запуске (см. check_compression_profile)
+ARCHIVE_COMPRESSION_LEVEL: Final[int] = COMPRESSION_PROFILES.get(ARCHIVE_COMPRESSION_PROFILE, 6)
+# Уже сжатые форматы сохраняются без сжатия
+COMPRESSION_STORED_EXTENSIONS: Final[FrozenSet[str]] = frozenset({
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".heic",
+    ".car", ".zip", ".ipa", ".jar", ".gz", ".tgz", ".bz2", ".xz", ".7z",
+    ".mp3", ".m4a", ".aac", ".mp4", ".mov", ".m4v",
+})
+COMPRESSION_SAMPLE_MIN_BYTES: Final[int] = 64 * 1024  # Меньшие файлы сжимаются без оценки
+COMPRESSION_SAMPLE_BYTES: Final[int] = 16 * 1024  # Размер каждого из трёх фрагментов выборки
+COMPRESSION_MIN_SAVINGS: Final[float] = 0.05  # Файл сжимается, если выборка уменьшилась хотя бы на 5%
+
+# Параллельное сжатие записей: потоков сжатия (zlib освобождает GIL),
+# минимальный объём пересжимаемых данных для пула и лимит данных в работе.
+# Потоки и буфер задаются на задачу и по умолчанию делятся между процессами
+# пула: при полной загрузке всего около os.cpu_count() потоков и 128 МБ данных
+ARCHIVE_COMPRESS_WORKERS: Final[int] = int(os.getenv("ARCHIVE_COMPRESS_WORKERS", "0")) or max(
+    1, (os.cpu_count() or 1) // ARCHIVE_POOL_WORKERS
+)
+ARCHIVE_PARALLEL_MIN_BYTES: Final[int] = 4 * 1024 * 1024  # 4 МБ
+ARCHIVE_PARALLEL_MAX_BUFFER_BYTES: Final[int] = max(
+    ARCHIVE_PARALLEL_MIN_BYTES, 128 * 1024 * 1024 // ARCHIVE_POOL_WORKERS
+)
+
+# Защита от zip-бомб: лимиты проверяются по центральному каталогу до распаковки
+# и повторно по фактически записанным байтам во время распаковки
+ARCHIVE_MAX_UNCOMPRESSED_BYTES: Final[int] = int(os.getenv("ARCHIVE_MAX_UNCOMPRESSED_MB", "2048")) * 1024 * 1024
+ARCHIVE_MAX_ENTRIES: Final[int] = int(os.getenv("ARCHIVE_MAX_ENTRIES", "100000"))
+ARCHIVE_MAX_COMPRESSION_RATIO: Final[int] = 200  # Во сколько раз запись может быть больше сжатой
+ARCHIVE_RATIO_MIN_BYTES: Final[int] = 1024 * 1024  # Коэффициент проверяется для записей от 1 МБ
+ARCHIVE_MAX_PATH_DEPTH: Final[int] = 64  # Максимальная вложенность директорий в архиве
+
+# Дисковый кеш готовых архивов, ключ - хеш исходного архива и набора действий
+RESULT_CACHE_DIR: Final[str] = os.getenv("RESULT_CACHE_DIR") or os.path.join(
+    tempfile.gettempdir(), "xcode-bot-results"
+)
+RESULT_CACHE_MAX_BYTES: Final[int] = int(os.getenv("RESULT_CACHE_MAX_MB", "1024")) * 1024 * 1024  # 0 - отключён
+RESULT_CACHE_TTL_SECONDS: Final[int] = 24 * 60 * 60  # 24 часа
+
+# Распакованные копии исходных архивов (project.pbxproj, .swift, иконки) на время
+# сессии: повторная обработка того же архива не распаковывает его, а связывает
+# файлы жёсткими ссылками. Время жизни отсчитывается от последнего использования.
+# Ссылки возможны только в пределах одной файловой системы, поэтому по умолчанию
+# копии хранятся рядом с рабочими директориями задач в памяти (JOB_RAM_DIR) с
+# отдельным лимитом сверх бюджета задач; без JOB_RAM_DIR - на диске. Задача с
+# готовой копией работает на её файловой системе (см. JobWorkspaces.reserve)
+_EXTRACT_CACHE_IN_RAM: Final[bool] = (
+    not os.getenv("EXTRACT_CACHE_DIR")
+    and bool(JOB_RAM_DIR)
+    and JOB_RAM_BUDGET_BYTES > 0
+    and os.path.isdir(JOB_RAM_DIR)
+    and os.access(JOB_RAM_DIR, os.W_OK)
+)
+EXTRACT_CACHE_DIR: Final[str] = os.getenv("EXTRACT_CACHE_DIR") or os.path.join(
+    JOB_RAM_DIR if _EXTRACT_CACHE_IN_RAM else tempfile.gettempdir(), "xcode-bot-extracted"
+)
+EXTRACT_CACHE_MAX_BYTES: Final[int] = int(  # 0 - отключён
+    os.getenv("EXTRACT_CACHE_MAX_MB", "128" if _EXTRACT_CACHE_IN_RAM else "1024")
+) * 1024 * 1024
+EXTRACT_CACHE_TTL_SECONDS: Final[int] = 2 * 60 * 60  # 2 часа
+
+# Хранилище полученных архивов: повторная загрузка того же файла Telegram
+# (file_unique_id) берётся с диска без скачивания
+CONTENT_STORE_DIR: Final[str] = os.getenv("CONTENT_STORE_DIR") or os.path.join(
+    tempfile.gettempdir(), "xcode-bot-uploads"
+)
+CONTENT_STORE_MAX_BYTES: Final[int] = int(os.getenv("CONTENT_STORE_MAX_MB", "2048")) * 1024 * 1024  # 0 - отключено
+CONTENT_STORE_TTL_SECONDS: Final[int] = 24 * 60 * 60  # 24 часа
+
+# Сколько file_id отправленных архивов запоминать (повторная отправка без загрузки)
+SENT_FILES_MAX_ENTRIES: Final[int] = 4096
+
+# Кеш индексов project.pbxproj (граф объектов), ключ - хеш содержимого файла
+PBXPROJ_INDEX_CACHE_MAX_ENTRIES: Final[int] = 64
+PBXPROJ_INDEX_CACHE_MAX_BYTES: Final[int] = 32 * 1024 * 1024  # 32 МБ
+
+# Поиск даты активации в файлах .swift
+DATE_SCAN_WORKERS: Final[int] = 8  # Потоков для параллельного чтения файлов
+DATE_SCAN_PARALLEL_MIN_FILES: Final[int] = 16  # Меньше файлов - читаем последовательно
+DATE_SCAN_MMAP_MIN_BYTES: Final[int] = 64 * 1024  # Файлы меньше читаются целиком, без mmap
+
+# Директории, которые сканеры проекта не открывают (зависимости, артефакты сборки,
+# VCS). Файлы внутри них переносятся в выходной архив без изменений.
+# Переопределяется переменной окружения SCAN_IGNORED_DIRS (через запятую).
+DEFAULT_SCAN_IGNORED_DIRS: Final[FrozenSet[str]] = frozenset({
+    "Pods",
+    ".git",
+    "DerivedData",
+    "build",
+    "xcuserdata",
+    "Carthage",
+    ".build",
+    "SourcePackages",
+})
+SCAN_IGNORED_DIRS: Final[FrozenSet[str]] = (
+    frozenset(name.strip() for name in os.environ["SCAN_IGNORED_DIRS"].split(",") if name.strip())
+    if "SCAN_IGNORED_DIRS" in os.environ
+    else DEFAULT_SCAN_IGNORED_DIRS
+)
 
 # Rate limiting
 RATE_LIMIT_MAX_REQUESTS: Final[int] = 5  # Максимум запросов
@@ -44,6 +205,20 @@ MSG_RATE_LIMIT_EXCEEDED: Final[str] = "⚠️ Слишком много запр
 
 MSG_PROCESSING: Final[str] = "⏳ Обрабатываю архив..."
 
+MSG_QUEUE_STATUS: Final[str] = "Место в очереди: {}\nОжидаемое начало: {}"
+
+MSG_JOB_CANCELLED: Final[str] = "🛑 Обработка отменена.\n\nАрхив и выбранные действия сохранены."
+
+MSG_JOB_CANCELLING: Final[str] = "Отменяю обработку..."
+
+MSG_NO_ACTIVE_JOB: Final[str] = "Нет архива в обработке"
+
+MSG_JOB_ALREADY_RUNNING: Final[str] = "Архив уже обрабатывается"
+
+MSG_ARCHIVE_ALREADY_SENT: Final[str] = "Архив уже отправлен"
+
+MSG_SERVER_BUSY: Final[str] = "⏳ Сейчас обрабатывается слишком много архивов.\n\nПопробуй через пару минут."
+
 MSG_SUCCESS: Final[str] = "✅ Архив обновлен!\n\nНовая версия: {}\nНовый билд: {}"
 
 MSG_ACTION_ADDED: Final[str] = "✅ Действие добавлено!\n\n{}\n\nВыбери ещё действия или получи обновлённый архив."
@@ -124,6 +299,7 @@ BUTTON_PROJECT_INFO: Final[str] = "ℹ️ Информация о проекте
 BUTTON_GET_ARCHIVE: Final[str] = "📥 ПОЛУЧИТЬ ОБНОВЛЁННЫЙ АРХИВ"
 BUTTON_BACK: Final[str] = "⬅️ Назад"
 BUTTON_RESET: Final[str] = "🔄 Сбросить все изменения"
+BUTTON_CANCEL_JOB: Final[str] = "🛑 Отменить обработку"
 
 MSG_ERROR_PREFIX: Final[str] = "❌ Произошла ошибка при обработке архива:\n"
 MSG_ERROR_SUFFIX: Final[str] = (
@@ -137,6 +313,7 @@ ERROR_NO_FILES_UPDATED: Final[str] = "Не удалось обновить ни
 
 # Сообщения в логах
 LOG_BOT_TOKEN_MISSING: Final[str] = "BOT_TOKEN не установлен! Установите переменную окружения BOT_TOKEN в Railway."
+LOG_COMPRESSION_PROFILE_UNKNOWN: Final[str] = "Неизвестный ARCHIVE_COMPRESSION_PROFILE: {}. Допустимые значения: {}"
 LOG_FILE_UPLOADED: Final[str] = "Загружен файл: {}"
 LOG_FILE_UPDATED: Final[str] = "Обновлен файл: {}"
 LOG_FILE_UPDATE_ERROR: Final[str] = "Ошибка при обновлении {}: {}"
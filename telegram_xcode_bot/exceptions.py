@@ -27,11 +27,31 @@ class XcodeProjectError(BotError):
     pass
 
 
+class PbxprojParseError(XcodeProjectError):
+    """Ошибка разбора project.pbxproj."""
+    pass
+
+
 class ArchiveProcessingError(BotError):
     """Ошибка при обработке архива."""
     pass
 
 
+class WorkerPoolBusyError(ArchiveProcessingError):
+    """Очередь задач обработки архивов переполнена."""
+    pass
+
+
+class ArchiveLimitError(ArchiveProcessingError):
+    """Архив превышает допустимые размеры (защита от zip-бомб)."""
+    pass
+
+
+class JobCancelledError(ArchiveProcessingError):
+    """Обработка архива отменена пользователем или по тайм-ауту."""
+    pass
+
+
 class ValidationError(BotError):
     """Ошибка валидации данных."""
     pass
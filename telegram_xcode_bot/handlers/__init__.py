@@ -13,6 +13,7 @@ from telegram_xcode_bot.handlers.callback_handlers import (
     change_date_callback,
     add_ipad_callback,
     get_archive_callback,
+    cancel_job_callback,
     project_info_callback,
     back_callback,
     reset_callback,
@@ -35,6 +36,7 @@ __all__ = [
     "change_date_callback",
     "add_ipad_callback",
     "get_archive_callback",
+    "cancel_job_callback",
     "project_info_callback",
     "back_callback",
     "reset_callback",
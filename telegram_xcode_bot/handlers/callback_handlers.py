@@ -1,11 +1,5 @@
 """Обработчики callback запросов от inline кнопок."""
 
-import os
-import tempfile
-import shutil
-import zipfile
-from pathlib import Path
-
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 
@@ -20,18 +14,41 @@ from telegram_xcode_bot.config import (
     MSG_DATE_NOT_FOUND,
     MSG_IPAD_ALREADY_SUPPORTED,
     MSG_RATE_LIMIT_EXCEEDED,
+    MSG_SERVER_BUSY,
+    MSG_JOB_CANCELLED,
+    MSG_JOB_CANCELLING,
+    MSG_NO_ACTIVE_JOB,
+    MSG_JOB_ALREADY_RUNNING,
+    MSG_ARCHIVE_ALREADY_SENT,
     MSG_ERROR_PREFIX,
     MSG_ERROR_SUFFIX,
     BUTTON_BACK,
+    BUTTON_CANCEL_JOB,
     LOG_FILE_SENT,
     LOG_ARCHIVE_ERROR,
 )
 from telegram_xcode_bot.logger import get_logger
-from telegram_xcode_bot.services.archive_service import process_archive_with_actions
-from telegram_xcode_bot.services.xcode_service import read_project_info, find_activation_date_in_project, read_device_family
+from telegram_xcode_bot.services.async_service import (
+    create_temp_path,
+    remove_files,
+    pin_files,
+    touch_session_file,
+    load_project_snapshot,
+    process_archive_job,
+    archive_job_key,
+    load_cached_result,
+    run_shared_archive_job,
+)
+from telegram_xcode_bot.services.archive_service import ArchiveProcessResult
 from telegram_xcode_bot.utils.rate_limiter import rate_limiter
-from telegram_xcode_bot.utils.async_helpers import run_blocking_io
-from telegram_xcode_bot.handlers.helpers import show_actions_menu
+from telegram_xcode_bot.utils.job_scheduler import QueueStatus, job_scheduler
+from telegram_xcode_bot.utils.cancellation import CancellationToken, active_jobs
+from telegram_xcode_bot.exceptions import JobCancelledError, WorkerPoolBusyError
+from telegram_xcode_bot.handlers.helpers import (
+    show_actions_menu,
+    format_processing_message,
+    reply_with_archive,
+)
 
 logger = get_logger(__name__)
 
@@ -60,7 +77,7 @@ async def increment_version_callback(update: Update, context: ContextTypes.DEFAU
     
     # Проверяем наличие файла в user_data
     archive_path = context.user_data.get(f'archive_{user_id}')
-    if not archive_path or not os.path.exists(archive_path):
+    if not await touch_session_file(archive_path):
         await query.edit_message_text(MSG_FILE_NOT_FOUND)
         return
     
@@ -95,7 +112,7 @@ async def change_name_callback(update: Update, context: ContextTypes.DEFAULT_TYP
     
     # Проверяем наличие файла в user_data
     archive_path = context.user_data.get(f'archive_{user_id}')
-    if not archive_path or not os.path.exists(archive_path):
+    if not await touch_session_file(archive_path):
         await query.edit_message_text(MSG_FILE_NOT_FOUND)
         return
     
@@ -133,7 +150,7 @@ async def change_bundle_id_callback(update: Update, context: ContextTypes.DEFAUL
     
     # Проверяем наличие файла в user_data
     archive_path = context.user_data.get(f'archive_{user_id}')
-    if not archive_path or not os.path.exists(archive_path):
+    if not await touch_session_file(archive_path):
         await query.edit_message_text(MSG_FILE_NOT_FOUND)
         return
     
@@ -171,7 +188,7 @@ async def change_icon_callback(update: Update, context: ContextTypes.DEFAULT_TYP
     
     # Проверяем наличие файла в user_data
     archive_path = context.user_data.get(f'archive_{user_id}')
-    if not archive_path or not os.path.exists(archive_path):
+    if not await touch_session_file(archive_path):
         await query.edit_message_text(MSG_FILE_NOT_FOUND)
         return
     
@@ -209,21 +226,16 @@ async def change_date_callback(update: Update, context: ContextTypes.DEFAULT_TYP
     
     # Проверяем наличие файла в user_data
     archive_path = context.user_data.get(f'archive_{user_id}')
-    if not archive_path or not os.path.exists(archive_path):
+    if not await touch_session_file(archive_path):
         await query.edit_message_text(MSG_FILE_NOT_FOUND)
         return
     
-    # Ищем дату активации в проекте
-    temp_dir = tempfile.mkdtemp()
+    # Ищем дату активации в проекте прямо в архиве
     try:
-        # Распаковываем архив временно для поиска даты
-        with zipfile.ZipFile(archive_path, 'r') as zip_ref:
-            zip_ref.extractall(temp_dir)
+        snapshot = await load_project_snapshot(archive_path, context.user_data.get(f'archive_hash_{user_id}'))
+        current_date = snapshot.activation_date
         
-        # Ищем дату активации
-        found, current_date, file_path, _ = find_activation_date_in_project(temp_dir)
-        
-        if not found:
+        if not current_date:
             # Дата не найдена
             keyboard = [[InlineKeyboardButton(BUTTON_BACK, callback_data=f"back_{user_id}")]]
             reply_markup = InlineKeyboardMarkup(keyboard)
@@ -238,14 +250,12 @@ async def change_date_callback(update: Update, context: ContextTypes.DEFAULT_TYP
         
         message = f"{MSG_WAITING_DATE}\n\n📌 Текущая дата: {current_date}"
         await query.edit_message_text(message, reply_markup=reply_markup)
-        
+    
     except Exception as e:
         logger.error(f"Ошибка при поиске даты активации: {e}", exc_info=True)
         keyboard = [[InlineKeyboardButton(BUTTON_BACK, callback_data=f"back_{user_id}")]]
         reply_markup = InlineKeyboardMarkup(keyboard)
         await query.edit_message_text("❌ Ошибка при чтении проекта", reply_markup=reply_markup)
-    finally:
-        shutil.rmtree(temp_dir, ignore_errors=True)
 
 
 async def get_archive_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -260,11 +270,22 @@ async def get_archive_callback(update: Update, context: ContextTypes.DEFAULT_TYP
     if not query or not query.message:
         return
     
-    await query.answer()
-    
     # Извлекаем user_id из callback_data
     user_id = int(query.data.split('_')[2])
     
+    # Повторное нажатие (двойной тап) не запускает новую обработку и не расходует
+    # rate limit. Обновления пользователя обрабатываются по очереди, поэтому обычно
+    # оно приходит после завершения первого запроса, который уже отправил архив
+    if query.from_user.id == user_id:
+        if active_jobs.is_active(user_id):
+            await query.answer(MSG_JOB_ALREADY_RUNNING)
+            return
+        if context.user_data.get(f'archive_sent_message_{user_id}') == query.message.message_id:
+            await query.answer(MSG_ARCHIVE_ALREADY_SENT)
+            return
+    
+    await query.answer()
+    
     # Проверяем, что это запрос от того же пользователя
     if query.from_user.id != user_id:
         await query.edit_message_text(MSG_WRONG_USER)
@@ -277,7 +298,7 @@ async def get_archive_callback(update: Update, context: ContextTypes.DEFAULT_TYP
     
     # Проверяем наличие файла в user_data
     archive_path = context.user_data.get(f'archive_{user_id}')
-    if not archive_path or not os.path.exists(archive_path):
+    if not archive_path:
         await query.edit_message_text(MSG_FILE_NOT_FOUND)
         return
     
@@ -297,24 +318,83 @@ async def get_archive_callback(update: Update, context: ContextTypes.DEFAULT_TYP
         await query.answer("Не выбрано ни одного действия!", show_alert=True)
         return
     
-    # Обновляем сообщение - показываем процесс обработки
-    await query.edit_message_text(MSG_PROCESSING)
+    cancel_token = CancellationToken()
+    active_jobs.register(user_id, cancel_token)
     
+    # Обновляем сообщение - показываем процесс обработки с кнопкой отмены
+    cancel_markup = InlineKeyboardMarkup(
+        [[InlineKeyboardButton(BUTTON_CANCEL_JOB, callback_data=f"cancel_job_{user_id}")]]
+    )
+    input_path = icon_path = None
     try:
-        temp_output = tempfile.NamedTemporaryFile(delete=False, suffix='.zip')
+        # Запрос работает со своими ссылками на архив и иконку: после отмены (она
+        # выполняется вне очереди) новый архив или сброс не удаляют его входные файлы
+        try:
+            input_path, icon_path = await pin_files(archive_path, actions['new_icon_path'])
+        except FileNotFoundError:
+            await query.edit_message_text(MSG_FILE_NOT_FOUND)
+            return
+        job_actions = dict(actions, new_icon_path=icon_path)
+        
+        await query.edit_message_text(MSG_PROCESSING, reply_markup=cancel_markup)
+        
+        archive_size = context.user_data.get(f'archive_size_{user_id}', 0)
+        # Результат для небольшого архива (размером примерно как исходный) хранится в памяти
+        temp_output = await create_temp_path(suffix='.zip', size=archive_size or None)
         
         try:
-            # Обрабатываем архив со всеми действиями с тайм-аутом
+            # Снимок проекта уже в кеше: распаковываются только нужные файлы
+            snapshot = await load_project_snapshot(input_path, context.user_data.get(f'archive_hash_{user_id}'))
+            
+            queue_shown = False
+            
+            async def show_queue_status(status: QueueStatus) -> None:
+                nonlocal queue_shown
+                if cancel_token.cancelled:
+                    # Пользователь отменил запрос, но задачу ждут другие участники
+                    return
+                queue_shown = True
+                await query.edit_message_text(format_processing_message(status), reply_markup=cancel_markup)
+            
+            async def run_job(output_path: str, job_token: CancellationToken) -> ArchiveProcessResult:
+                # Общая задача держит свои ссылки на входные файлы: запустивший её
+                # участник может отменить запрос и удалить свои, пока задачу ждут другие
+                job_archive, job_icon = await pin_files(input_path, icon_path)
+                try:
+                    # Ждём слот планировщика (очередь зависит от размера архива) и обрабатываем
+                    # архив со всеми действиями в пуле процессов с тайм-аутом
+                    async with job_scheduler.slot(archive_size, on_status=show_queue_status, cancel_token=job_token):
+                        if queue_shown and not cancel_token.cancelled:
+                            await query.edit_message_text(MSG_PROCESSING, reply_markup=cancel_markup)
+                        return await process_archive_job(
+                            job_archive, output_path, dict(actions, new_icon_path=job_icon),
+                            snapshot=snapshot, cancel_token=job_token, cache_key=job_key
+                        )
+                finally:
+                    await remove_files(job_archive, job_icon)
+            
+            # Повторный запрос берётся из кеша готовых архивов, а одинаковые
+            # одновременные запросы (тот же архив и действия) обрабатываются один раз
             try:
-                result = await run_blocking_io(
-                    process_archive_with_actions,
-                    archive_path,
-                    temp_output.name,
-                    actions
-                )
+                job_key = await archive_job_key(snapshot.archive_hash, job_actions)
+                result = await load_cached_result(job_key, temp_output)
+                if result is None:
+                    result = await run_shared_archive_job(
+                        job_key, temp_output, run_job, cancel_token=cancel_token, output_size=archive_size or None
+                    )
+            except JobCancelledError:
+                # Процесс пула остановлен, временные файлы задачи удалены; архив и действия сохраняются
+                await remove_files(temp_output)
+                keyboard = [[InlineKeyboardButton(BUTTON_BACK, callback_data=f"back_{user_id}")]]
+                await query.edit_message_text(MSG_JOB_CANCELLED, reply_markup=InlineKeyboardMarkup(keyboard))
+                return
+            except WorkerPoolBusyError:
+                # Архив и выбранные действия сохраняются: пользователь может повторить запрос
+                await remove_files(temp_output)
+                await query.edit_message_text(MSG_SERVER_BUSY)
+                return
             except TimeoutError as te:
-                if os.path.exists(temp_output.name):
-                    os.unlink(temp_output.name)
+                await remove_files(temp_output)
                 await query.edit_message_text(
                     f"❌ {str(te)}\n\nАрхив слишком большой или операция занимает слишком много времени."
                 )
@@ -323,6 +403,9 @@ async def get_archive_callback(update: Update, context: ContextTypes.DEFAULT_TYP
             if not result.success:
                 raise ValueError(result.error_message or "Не удалось обработать архив")
             
+            # Отменять больше нечего: убираем кнопку
+            await query.edit_message_reply_markup(reply_markup=None)
+            
             info = result.project_info
             
             # Определяем статус поддержки iPad
@@ -343,47 +426,81 @@ async def get_archive_callback(update: Update, context: ContextTypes.DEFAULT_TYP
                 f"Дата активации: {info.activation_date or 'не обнаружена'}\n"
                 f"iPad: {ipad_status}"
             )
+            if result.output_hash:
+                success_message += f"\nSHA-256: {result.output_hash}"
             
             # Отправляем обратно с фиксированным именем
             output_filename = "source.zip"
             
-            with open(temp_output.name, 'rb') as output_file:
-                await query.message.reply_document(
-                    document=output_file,
-                    filename=output_filename,
-                    caption=success_message
-                )
+            # Повторно отправляемый одинаковый архив не загружается заново
+            await reply_with_archive(
+                query.message, temp_output, output_filename, success_message, content_hash=result.output_hash
+            )
             logger.info(LOG_FILE_SENT.format(output_filename))
+            # Повторное нажатие на кнопку этого сообщения получит ответ, что архив уже отправлен
+            context.user_data[f'archive_sent_message_{user_id}'] = query.message.message_id
             
             # Удаляем временные файлы
-            if os.path.exists(archive_path):
-                os.unlink(archive_path)
-            if os.path.exists(temp_output.name):
-                os.unlink(temp_output.name)
-            
-            # Очищаем user_data
-            context.user_data.pop(f'archive_{user_id}', None)
-            context.user_data.pop(f'file_name_{user_id}', None)
-            context.user_data.pop(f'action_increment_version_{user_id}', None)
-            context.user_data.pop(f'action_new_name_{user_id}', None)
-            context.user_data.pop(f'action_new_bundle_id_{user_id}', None)
-            context.user_data.pop(f'action_new_activation_date_{user_id}', None)
-            context.user_data.pop(f'action_add_ipad_{user_id}', None)
-            # Удаляем временный файл иконки
-            icon_path = context.user_data.pop(f'action_new_icon_{user_id}', None)
-            if icon_path and os.path.exists(icon_path):
-                os.unlink(icon_path)
+            await remove_files(temp_output)
             
+            # Сессия очищается, только если она по-прежнему относится к обработанному архиву
+            if context.user_data.get(f'archive_{user_id}') == archive_path:
+                await remove_files(archive_path)
+                
+                # Очищаем user_data
+                context.user_data.pop(f'archive_{user_id}', None)
+                context.user_data.pop(f'archive_hash_{user_id}', None)
+                context.user_data.pop(f'archive_size_{user_id}', None)
+                context.user_data.pop(f'file_name_{user_id}', None)
+                context.user_data.pop(f'action_increment_version_{user_id}', None)
+                context.user_data.pop(f'action_new_name_{user_id}', None)
+                context.user_data.pop(f'action_new_bundle_id_{user_id}', None)
+                context.user_data.pop(f'action_new_activation_date_{user_id}', None)
+                context.user_data.pop(f'action_add_ipad_{user_id}', None)
+                # Удаляем временный файл иконки
+                await remove_files(context.user_data.pop(f'action_new_icon_{user_id}', None))
+        
         except Exception as e:
             logger.error(LOG_ARCHIVE_ERROR.format(e), exc_info=True)
             await query.edit_message_text(MSG_ERROR_PREFIX + str(e) + MSG_ERROR_SUFFIX)
             # Удаляем временные файлы при ошибке
-            if os.path.exists(temp_output.name):
-                os.unlink(temp_output.name)
-                
+            await remove_files(temp_output)
+    
     except Exception as e:
         logger.error(LOG_ARCHIVE_ERROR.format(e), exc_info=True)
         await query.edit_message_text(MSG_ERROR_PREFIX + str(e) + MSG_ERROR_SUFFIX)
+    finally:
+        active_jobs.unregister(user_id, cancel_token)
+        await remove_files(input_path, icon_path)
+
+
+async def cancel_job_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Обработчик нажатия на кнопку 'Отменить обработку'.
+    
+    Выполняется вне очереди обновлений пользователя (см. UNSERIALIZED_CALLBACK_PREFIXES),
+    пока get_archive_callback этого пользователя ждёт результат.
+    
+    Args:
+        update: Telegram Update объект
+        context: Контекст обработчика
+    """
+    query = update.callback_query
+    if not query:
+        return
+    
+    # Извлекаем user_id из callback_data
+    user_id = int(query.data.split('_')[2])
+    
+    # Проверяем, что это запрос от того же пользователя
+    if query.from_user.id != user_id:
+        await query.answer(MSG_WRONG_USER, show_alert=True)
+        return
+    
+    if active_jobs.cancel(user_id):
+        await query.answer(MSG_JOB_CANCELLING)
+    else:
+        await query.answer(MSG_NO_ACTIVE_JOB)
 
 
 async def project_info_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -410,29 +527,23 @@ async def project_info_callback(update: Update, context: ContextTypes.DEFAULT_TY
     
     # Проверяем наличие файла в user_data
     archive_path = context.user_data.get(f'archive_{user_id}')
-    if not archive_path or not os.path.exists(archive_path):
+    if not await touch_session_file(archive_path):
         await query.edit_message_text(MSG_FILE_NOT_FOUND)
         return
     
-    # Читаем информацию из архива
-    temp_dir = tempfile.mkdtemp()
+    # Читаем информацию прямо из архива, без распаковки
     try:
-        # Распаковываем архив временно для чтения информации
-        with zipfile.ZipFile(archive_path, 'r') as zip_ref:
-            zip_ref.extractall(temp_dir)
-        
-        # Ищем первый project.pbxproj файл
-        project_files = list(Path(temp_dir).rglob('project.pbxproj'))
+        snapshot = await load_project_snapshot(archive_path, context.user_data.get(f'archive_hash_{user_id}'))
         
-        if not project_files:
+        if not snapshot.project_files:
             await query.answer("Не найдено файлов project.pbxproj", show_alert=True)
             return
         
-        # Читаем информацию из первого найденного файла
-        info = read_project_info(str(project_files[0]))
+        # Информация из первого найденного файла
+        info = snapshot.project_info
         
         # Проверяем поддержку iPad
-        device_family = read_device_family(str(project_files[0]))
+        device_family = snapshot.device_family
         ipad_support = "неизвестно"
         if device_family == "Universal" or device_family == "iPad":
             ipad_support = "поддерживается"
@@ -455,12 +566,10 @@ async def project_info_callback(update: Update, context: ContextTypes.DEFAULT_TY
         reply_markup = InlineKeyboardMarkup(keyboard)
         
         await query.edit_message_text(info_message, reply_markup=reply_markup)
-        
+    
     except Exception as e:
         logger.error(f"Ошибка при чтении информации о проекте: {e}", exc_info=True)
         await query.answer("Ошибка при чтении информации", show_alert=True)
-    finally:
-        shutil.rmtree(temp_dir, ignore_errors=True)
 
 
 async def back_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -493,7 +602,7 @@ async def back_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     
     # Проверяем наличие файла в user_data
     archive_path = context.user_data.get(f'archive_{user_id}')
-    if not archive_path or not os.path.exists(archive_path):
+    if not await touch_session_file(archive_path):
         await query.edit_message_text(MSG_FILE_NOT_FOUND)
         return
     
@@ -530,9 +639,7 @@ async def reset_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     context.user_data.pop(f'action_new_activation_date_{user_id}', None)
     context.user_data.pop(f'action_add_ipad_{user_id}', None)
     # Удаляем временный файл иконки если есть
-    icon_path = context.user_data.pop(f'action_new_icon_{user_id}', None)
-    if icon_path and os.path.exists(icon_path):
-        os.unlink(icon_path)
+    await remove_files(context.user_data.pop(f'action_new_icon_{user_id}', None))
     
     # Показываем меню заново
     await show_actions_menu(query, context, user_id, is_query=True)
@@ -562,28 +669,21 @@ async def add_ipad_callback(update: Update, context: ContextTypes.DEFAULT_TYPE)
     
     # Проверяем наличие файла в user_data
     archive_path = context.user_data.get(f'archive_{user_id}')
-    if not archive_path or not os.path.exists(archive_path):
+    if not await touch_session_file(archive_path):
         await query.edit_message_text(MSG_FILE_NOT_FOUND)
         return
     
     # Проверяем текущее состояние поддержки устройств
-    temp_dir = tempfile.mkdtemp()
-    try:
-        with zipfile.ZipFile(archive_path, 'r') as zip_ref:
-            zip_ref.extractall(temp_dir)
-        
-        project_files = list(Path(temp_dir).rglob('project.pbxproj'))
-        if project_files:
-            device_family = read_device_family(str(project_files[0]))
-            if device_family == "Universal" or device_family == "iPad":
-                # iPad уже поддерживается - показываем сообщение с кнопкой Назад
-                await query.answer()
-                keyboard = [[InlineKeyboardButton(BUTTON_BACK, callback_data=f"back_{user_id}")]]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.edit_message_text(MSG_IPAD_ALREADY_SUPPORTED, reply_markup=reply_markup)
-                return
-    finally:
-        shutil.rmtree(temp_dir, ignore_errors=True)
+    snapshot = await load_project_snapshot(archive_path, context.user_data.get(f'archive_hash_{user_id}'))
+    if snapshot.project_files:
+        device_family = snapshot.device_family
+        if device_family == "Universal" or device_family == "iPad":
+            # iPad уже поддерживается - показываем сообщение с кнопкой Назад
+            await query.answer()
+            keyboard = [[InlineKeyboardButton(BUTTON_BACK, callback_data=f"back_{user_id}")]]
+            reply_markup = InlineKeyboardMarkup(keyboard)
+            await query.edit_message_text(MSG_IPAD_ALREADY_SUPPORTED, reply_markup=reply_markup)
+            return
     
     # Добавляем действие в список
     context.user_data[f'action_add_ipad_{user_id}'] = True
@@ -1,12 +1,6 @@
 """Обработчики документов и изображений."""
 
-import os
-import tempfile
-import shutil
-import zipfile
 import asyncio
-from pathlib import Path
-from PIL import Image
 
 from telegram import Update
 from telegram.ext import ContextTypes
@@ -25,8 +19,16 @@ from telegram_xcode_bot.config import (
     DOWNLOAD_TIMEOUT_SECONDS,
 )
 from telegram_xcode_bot.logger import get_logger
-from telegram_xcode_bot.services.xcode_service import read_project_info
-from telegram_xcode_bot.services.icon_service import convert_png_to_jpeg
+from telegram_xcode_bot.services.async_service import (
+    create_temp_path,
+    remove_files,
+    touch_session_file,
+    load_project_snapshot,
+    fetch_received_archive,
+    store_received_archive,
+    inspect_image,
+    convert_icon_to_jpeg,
+)
 from telegram_xcode_bot.utils.validators import validate_icon_format, validate_icon_size
 from telegram_xcode_bot.utils.rate_limiter import rate_limiter
 from telegram_xcode_bot.handlers.helpers import create_actions_keyboard
@@ -72,33 +74,45 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         return
     
     try:
-        # Скачиваем файл во временное хранилище с тайм-аутом
-        file = await context.bot.get_file(document.file_id)
-        temp_input = tempfile.NamedTemporaryFile(delete=False, suffix='.zip')
+        # Небольшой архив скачивается в память (tmpfs), большой - на диск
+        temp_input = await create_temp_path(suffix='.zip', size=document.file_size)
         
-        try:
-            await asyncio.wait_for(
-                file.download_to_drive(temp_input.name),
-                timeout=DOWNLOAD_TIMEOUT_SECONDS
-            )
-        except asyncio.TimeoutError:
-            os.unlink(temp_input.name)
-            await update.message.reply_text(
-                "❌ Превышено время ожидания загрузки файла. Попробуйте еще раз."
-            )
-            return
+        # Тот же файл Telegram уже получали: берём его из локального хранилища
+        archive_hash = await fetch_received_archive(document.file_unique_id, temp_input)
+        
+        if archive_hash is None:
+            # Скачиваем файл во временное хранилище с тайм-аутом
+            try:
+                file = await context.bot.get_file(document.file_id)
+                await asyncio.wait_for(
+                    file.download_to_drive(temp_input),
+                    timeout=DOWNLOAD_TIMEOUT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                await remove_files(temp_input)
+                await update.message.reply_text(
+                    "❌ Превышено время ожидания загрузки файла. Попробуйте еще раз."
+                )
+                return
+            except Exception:
+                await remove_files(temp_input)
+                raise
         
-        # Удаляем предыдущий архив если он есть
-        old_archive = context.user_data.get(f'archive_{user_id}')
-        if old_archive and os.path.exists(old_archive):
-            os.unlink(old_archive)
-            logger.info(f"Удален предыдущий архив: {old_archive}")
+        # Читаем текущую информацию прямо из архива, без распаковки (вне event loop).
+        # Хеш содержимого - ключ кеша информации о проекте. Архив проверяется
+        # (в том числе на zip-бомбу) до замены сессии: отклонённый архив удаляется,
+        # а предыдущий архив и выбранные действия остаются
+        try:
+            snapshot = await load_project_snapshot(temp_input, archive_hash)
+        except Exception:
+            await remove_files(temp_input)
+            raise
         
-        # Удаляем старую иконку если она есть
-        old_icon = context.user_data.get(f'action_new_icon_{user_id}')
-        if old_icon and os.path.exists(old_icon):
-            os.unlink(old_icon)
-            logger.info(f"Удалена предыдущая иконка: {old_icon}")
+        # Удаляем предыдущий архив и старую иконку если они есть
+        await remove_files(
+            context.user_data.get(f'archive_{user_id}'),
+            context.user_data.get(f'action_new_icon_{user_id}')
+        )
         
         # Очищаем все действия при загрузке нового архива
         context.user_data.pop(f'action_increment_version_{user_id}', None)
@@ -112,52 +126,42 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         context.user_data.pop(f'waiting_icon_{user_id}', None)
         context.user_data.pop(f'waiting_date_{user_id}', None)
         
-        context.user_data[f'archive_{user_id}'] = temp_input.name
+        context.user_data[f'archive_{user_id}'] = temp_input
+        context.user_data[f'archive_hash_{user_id}'] = snapshot.archive_hash
         context.user_data[f'file_name_{user_id}'] = document.file_name
+        context.user_data[f'archive_size_{user_id}'] = document.file_size or 0
         
         logger.info(LOG_FILE_UPLOADED.format(document.file_name))
         
-        # Читаем текущую информацию из архива
-        temp_dir = tempfile.mkdtemp()
-        try:
-            # Распаковываем архив временно для чтения информации
-            with zipfile.ZipFile(temp_input.name, 'r') as zip_ref:
-                zip_ref.extractall(temp_dir)
-            
-            # Ищем первый project.pbxproj файл
-            project_files = list(Path(temp_dir).rglob('project.pbxproj'))
-            
-            marketing_version = "неизвестно"
-            build_version = "неизвестно"
-            display_name = "неизвестно"
-            bundle_id = "неизвестно"
-            activation_date = "не обнаружена"
-            ipad_support = "неизвестно"
+        if archive_hash is None:
+            await store_received_archive(snapshot.archive_hash, temp_input, document.file_unique_id)
+        
+        marketing_version = "неизвестно"
+        build_version = "неизвестно"
+        display_name = "неизвестно"
+        bundle_id = "неизвестно"
+        activation_date = "не обнаружена"
+        ipad_support = "неизвестно"
+        
+        if snapshot.project_files:
+            info = snapshot.project_info
+            if info.marketing_version:
+                marketing_version = info.marketing_version
+            if info.build_version:
+                build_version = info.build_version
+            if info.display_name:
+                display_name = info.display_name
+            if info.bundle_id:
+                bundle_id = info.bundle_id
+            if info.activation_date:
+                activation_date = info.activation_date
             
-            if project_files:
-                # Читаем всю информацию из первого найденного файла
-                info = read_project_info(str(project_files[0]))
-                if info.marketing_version:
-                    marketing_version = info.marketing_version
-                if info.build_version:
-                    build_version = info.build_version
-                if info.display_name:
-                    display_name = info.display_name
-                if info.bundle_id:
-                    bundle_id = info.bundle_id
-                if info.activation_date:
-                    activation_date = info.activation_date
-                
-                # Проверяем поддержку iPad
-                from telegram_xcode_bot.services.xcode_service import read_device_family
-                device_family = read_device_family(str(project_files[0]))
-                if device_family == "Universal" or device_family == "iPad":
-                    ipad_support = "поддерживается"
-                elif device_family == "iPhone":
-                    ipad_support = "не поддерживается"
-        finally:
-            # Удаляем временную директорию
-            shutil.rmtree(temp_dir, ignore_errors=True)
+            # Проверяем поддержку iPad
+            device_family = snapshot.device_family
+            if device_family == "Universal" or device_family == "iPad":
+                ipad_support = "поддерживается"
+            elif device_family == "iPhone":
+                ipad_support = "не поддерживается"
         
         # Создаем кнопки действий
         reply_markup = create_actions_keyboard(context.user_data, user_id)
@@ -178,7 +182,7 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             archive_message,
             reply_markup=reply_markup
         )
-        
+    
     except Exception as e:
         logger.error(LOG_ARCHIVE_ERROR.format(e), exc_info=True)
         await update.message.reply_text(
@@ -205,7 +209,7 @@ async def handle_photo_or_document(update: Update, context: ContextTypes.DEFAULT
     
     # Проверяем наличие архива
     archive_path = context.user_data.get(f'archive_{user_id}')
-    if not archive_path or not os.path.exists(archive_path):
+    if not await touch_session_file(archive_path):
         from telegram_xcode_bot.config import MSG_FILE_NOT_FOUND
         await update.message.reply_text(MSG_FILE_NOT_FOUND)
         context.user_data.pop(f'waiting_icon_{user_id}', None)
@@ -244,15 +248,15 @@ async def handle_photo_or_document(update: Update, context: ContextTypes.DEFAULT
             return
         
         # Скачиваем файл с тайм-аутом
-        temp_image = tempfile.NamedTemporaryFile(delete=False, suffix='.jpg')
+        temp_image = await create_temp_path(suffix='.jpg')
         
         try:
             await asyncio.wait_for(
-                file.download_to_drive(temp_image.name),
+                file.download_to_drive(temp_image),
                 timeout=DOWNLOAD_TIMEOUT_SECONDS
             )
         except asyncio.TimeoutError:
-            os.unlink(temp_image.name)
+            await remove_files(temp_image)
             await update.message.reply_text(
                 "❌ Превышено время ожидания загрузки изображения. Попробуйте еще раз."
             )
@@ -262,11 +266,9 @@ async def handle_photo_or_document(update: Update, context: ContextTypes.DEFAULT
         
         # Проверяем изображение
         try:
-            img = Image.open(temp_image.name)
-            width, height = img.size
-            img_format = img.format
+            img_format, width, height, img_mode = await inspect_image(temp_image)
             
-            logger.info(f"Получено изображение: формат={img_format}, размер={width}x{height}, режим={img.mode}")
+            logger.info(f"Получено изображение: формат={img_format}, размер={width}x{height}, режим={img_mode}")
             
             from telegram import InlineKeyboardButton, InlineKeyboardMarkup
             from telegram_xcode_bot.config import BUTTON_BACK, MSG_ICON_INVALID_SIZE
@@ -279,7 +281,7 @@ async def handle_photo_or_document(update: Update, context: ContextTypes.DEFAULT
                     MSG_ICON_INVALID_FORMAT.format(img_format or "неизвестный"),
                     reply_markup=reply_markup
                 )
-                os.unlink(temp_image.name)
+                await remove_files(temp_image)
                 return
             
             # Проверяем размер
@@ -291,22 +293,22 @@ async def handle_photo_or_document(update: Update, context: ContextTypes.DEFAULT
                     MSG_ICON_INVALID_SIZE.format(width, height),
                     reply_markup=reply_markup
                 )
-                os.unlink(temp_image.name)
+                await remove_files(temp_image)
                 return
             
             # Конвертируем PNG в JPEG если нужно
             if img_format == 'PNG':
                 logger.info(f"Конвертация PNG в JPEG для пользователя {user_id}")
-                convert_png_to_jpeg(temp_image.name, temp_image.name, quality=95)
+                await convert_icon_to_jpeg(temp_image, quality=95)
             
             # Все проверки пройдены
             context.user_data.pop(f'waiting_icon_{user_id}', None)
-            context.user_data[f'action_new_icon_{user_id}'] = temp_image.name
+            context.user_data[f'action_new_icon_{user_id}'] = temp_image
             
             # Показываем обновленное меню
             from telegram_xcode_bot.handlers.helpers import show_actions_menu
             await show_actions_menu(update.message, context, user_id, is_query=False)
-                
+        
         except Exception as e:
             logger.error(f"Ошибка при проверке изображения: {e}", exc_info=True)
             from telegram import InlineKeyboardButton, InlineKeyboardMarkup
@@ -317,9 +319,8 @@ async def handle_photo_or_document(update: Update, context: ContextTypes.DEFAULT
                 MSG_ICON_INVALID_FORMAT.format("неизвестный"),
                 reply_markup=reply_markup
             )
-            if os.path.exists(temp_image.name):
-                os.unlink(temp_image.name)
-                
+            await remove_files(temp_image)
+    
     except Exception as e:
         logger.error(f"Ошибка при обработке изображения: {e}", exc_info=True)
         await update.message.reply_text("❌ Ошибка при обработке изображения")
@@ -1,7 +1,8 @@
 """Вспомогательные функции для handlers."""
 
-from typing import Dict, Any
-from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from typing import Dict, Any, Optional
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Message
+from telegram.error import BadRequest
 from telegram.ext import ContextTypes
 
 from telegram_xcode_bot.config import (
@@ -20,7 +21,15 @@ from telegram_xcode_bot.config import (
     MSG_ICON_WILL_CHANGE,
     MSG_DATE_WILL_CHANGE,
     MSG_IPAD_WILL_ADD,
+    MSG_PROCESSING,
+    MSG_QUEUE_STATUS,
 )
+from telegram_xcode_bot.logger import get_logger
+from telegram_xcode_bot.services.async_service import file_content_hash, read_file_bytes
+from telegram_xcode_bot.services.sent_files import sent_files
+from telegram_xcode_bot.utils.job_scheduler import QueueStatus
+
+logger = get_logger(__name__)
 
 
 def get_pending_actions_summary(user_data: Dict[str, Any], user_id: int) -> str:
@@ -64,6 +73,34 @@ def get_pending_actions_summary(user_data: Dict[str, Any], user_id: int) -> str:
     return "Запланированные действия:\n" + "\n".join(actions)
 
 
+def format_eta(seconds: float) -> str:
+    """
+    Форматирует оценку времени ожидания.
+    
+    Args:
+        seconds: Время в секундах
+    
+    Returns:
+        Строка вида "через ~40 сек" или "через ~3 мин"
+    """
+    if seconds < 60:
+        return f"через ~{max(5, int(round(seconds / 5)) * 5)} сек"
+    return f"через ~{int(round(seconds / 60))} мин"
+
+
+def format_processing_message(status: QueueStatus) -> str:
+    """
+    Формирует сообщение об обработке с положением в очереди.
+    
+    Args:
+        status: Положение задачи в очереди
+    
+    Returns:
+        Текст сообщения
+    """
+    return MSG_PROCESSING + "\n\n" + MSG_QUEUE_STATUS.format(status.position, format_eta(status.eta_seconds))
+
+
 def create_actions_keyboard(user_data: Dict[str, Any], user_id: int) -> InlineKeyboardMarkup:
     """
     Создает клавиатуру с действиями.
@@ -127,3 +164,41 @@ async def show_actions_menu(
     else:
         await query_or_message.reply_text(message_text, reply_markup=reply_markup)
 
+
+async def reply_with_archive(
+    message: Message,
+    archive_path: str,
+    filename: str,
+    caption: str,
+    content_hash: Optional[str] = None
+) -> None:
+    """
+    Отправляет архив ответом на сообщение.
+    
+    Архив, байт в байт совпадающий с уже отправленным, отправляется по file_id
+    без повторной загрузки; после первой загрузки file_id запоминается.
+    
+    Args:
+        message: Сообщение, на которое отправляется ответ
+        archive_path: Путь к архиву
+        filename: Имя файла для пользователя
+        caption: Подпись к документу
+        content_hash: SHA-256 архива (вычисляется, если не передан)
+    """
+    if content_hash is None:
+        content_hash = await file_content_hash(archive_path)
+    file_id = sent_files.get(content_hash)
+    if file_id is not None:
+        try:
+            await message.reply_document(document=file_id, caption=caption)
+            logger.info(f"Архив {content_hash[:12]} отправлен по file_id без загрузки")
+            return
+        except BadRequest as e:
+            logger.warning(f"Не удалось отправить архив по file_id: {e}")
+            sent_files.invalidate(content_hash)
+    
+    # Файл читается в потоке: InputFile читает файловый объект синхронно
+    output_data = await read_file_bytes(archive_path)
+    sent = await message.reply_document(document=output_data, filename=filename, caption=caption)
+    if sent.document is not None:
+        sent_files.put(content_hash, sent.document.file_id)
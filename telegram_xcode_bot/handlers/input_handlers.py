@@ -1,6 +1,5 @@
 """Обработчики текстового ввода пользователей."""
 
-import os
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 
@@ -11,6 +10,7 @@ from telegram_xcode_bot.config import (
     BUTTON_BACK,
 )
 from telegram_xcode_bot.logger import get_logger
+from telegram_xcode_bot.services.async_service import touch_session_file
 from telegram_xcode_bot.utils.validators import validate_bundle_id, validate_date_format
 from telegram_xcode_bot.handlers.helpers import show_actions_menu
 
@@ -60,7 +60,7 @@ async def handle_name_input(update: Update, context: ContextTypes.DEFAULT_TYPE,
     
     # Проверяем наличие файла
     archive_path = context.user_data.get(f'archive_{user_id}')
-    if not archive_path or not os.path.exists(archive_path):
+    if not await touch_session_file(archive_path):
         await update.message.reply_text(MSG_FILE_NOT_FOUND)
         context.user_data.pop(f'waiting_name_{user_id}', None)
         return
@@ -98,7 +98,7 @@ async def handle_bundle_id_input(update: Update, context: ContextTypes.DEFAULT_T
     
     # Проверяем наличие файла
     archive_path = context.user_data.get(f'archive_{user_id}')
-    if not archive_path or not os.path.exists(archive_path):
+    if not await touch_session_file(archive_path):
         await update.message.reply_text(MSG_FILE_NOT_FOUND)
         context.user_data.pop(f'waiting_bundle_id_{user_id}', None)
         return
@@ -137,7 +137,7 @@ async def handle_activation_date_input(update: Update, context: ContextTypes.DEF
     
     # Проверяем наличие файла
     archive_path = context.user_data.get(f'archive_{user_id}')
-    if not archive_path or not os.path.exists(archive_path):
+    if not await touch_session_file(archive_path):
         await update.message.reply_text(MSG_FILE_NOT_FOUND)
         context.user_data.pop(f'waiting_date_{user_id}', None)
         return
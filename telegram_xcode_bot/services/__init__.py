@@ -3,6 +3,7 @@
 from telegram_xcode_bot.services.xcode_service import (
     read_project_info,
     read_project_versions,
+    read_project_settings,
     update_project_file,
     update_display_name,
     update_bundle_id,
@@ -10,16 +11,21 @@ from telegram_xcode_bot.services.xcode_service import (
     update_activation_date,
     read_device_family,
     add_ipad_support,
+    ProjectEditPlan,
+    apply_edit_plan,
 )
 from telegram_xcode_bot.services.archive_service import (
     process_archive_with_actions,
     process_archive,
+    inspect_archive,
+    get_project_snapshot,
 )
 from telegram_xcode_bot.services.icon_service import replace_app_icon
 
 __all__ = [
     "read_project_info",
     "read_project_versions",
+    "read_project_settings",
     "update_project_file",
     "update_display_name",
     "update_bundle_id",
@@ -27,8 +33,12 @@ __all__ = [
     "update_activation_date",
     "read_device_family",
     "add_ipad_support",
+    "ProjectEditPlan",
+    "apply_edit_plan",
     "process_archive_with_actions",
     "process_archive",
+    "inspect_archive",
+    "get_project_snapshot",
     "replace_app_icon",
 ]
 
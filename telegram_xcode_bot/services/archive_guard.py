@@ -0,0 +1,150 @@
+"""Защита от zip-бомб: лимиты размера, количества и вложенности записей архива."""
+
+import os
+import zipfile
+from typing import Sequence
+
+from telegram_xcode_bot.config import (
+    ARCHIVE_MAX_UNCOMPRESSED_BYTES,
+    ARCHIVE_MAX_ENTRIES,
+    ARCHIVE_MAX_COMPRESSION_RATIO,
+    ARCHIVE_RATIO_MIN_BYTES,
+    ARCHIVE_MAX_PATH_DEPTH,
+)
+from telegram_xcode_bot.exceptions import ArchiveLimitError
+from telegram_xcode_bot.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Размер блока при распаковке записи
+EXTRACT_CHUNK_SIZE = 1024 * 1024
+
+
+def _path_depth(name: str) -> int:
+    """Количество компонентов пути записи архива."""
+    return len([part for part in name.split('/') if part])
+
+
+class ArchiveGuard:
+    """
+    Проверяет архив до распаковки и считает байты во время распаковки.
+    
+    Центральный каталог проверяется целиком: количество записей, суммарный
+    распакованный размер, коэффициент сжатия каждой записи и глубина путей.
+    Заявленным в каталоге размерам нельзя доверять полностью, поэтому при
+    распаковке записанные байты считаются заново, и распаковка прерывается,
+    как только лимит превышен.
+    """
+    
+    def __init__(
+        self,
+        max_total_bytes: int = ARCHIVE_MAX_UNCOMPRESSED_BYTES,
+        max_entries: int = ARCHIVE_MAX_ENTRIES,
+        max_ratio: int = ARCHIVE_MAX_COMPRESSION_RATIO,
+        ratio_min_bytes: int = ARCHIVE_RATIO_MIN_BYTES,
+        max_depth: int = ARCHIVE_MAX_PATH_DEPTH
+    ):
+        """
+        Args:
+            max_total_bytes: Максимальный суммарный распакованный размер
+            max_entries: Максимальное количество записей
+            max_ratio: Максимальное отношение распакованного размера записи к сжатому
+            ratio_min_bytes: Коэффициент сжатия проверяется для записей не меньше этого размера
+            max_depth: Максимальное количество компонентов пути записи
+        """
+        self.max_total_bytes = max_total_bytes
+        self.max_entries = max_entries
+        self.max_ratio = max_ratio
+        self.ratio_min_bytes = ratio_min_bytes
+        self.max_depth = max_depth
+    
+    def _check_ratio(self, name: str, size: int, compress_size: int) -> None:
+        """Проверяет коэффициент сжатия записи."""
+        if size >= self.ratio_min_bytes and size > max(compress_size, 1) * self.max_ratio:
+            raise ArchiveLimitError(
+                f"Подозрительно высокая степень сжатия файла в архиве: {name}",
+                f"{compress_size} байт распаковываются в {size}"
+            )
+    
+    def _check_total(self, total: int) -> None:
+        """Проверяет суммарный распакованный размер."""
+        if total > self.max_total_bytes:
+            raise ArchiveLimitError(
+                "Архив слишком большой в распакованном виде",
+                f"больше {self.max_total_bytes // (1024 * 1024)} МБ"
+            )
+    
+    def check(self, infos: Sequence[zipfile.ZipInfo]) -> None:
+        """
+        Проверяет записи центрального каталога.
+        
+        Args:
+            infos: Записи архива (ZipFile.infolist())
+        
+        Raises:
+            ArchiveLimitError: Если архив превышает один из лимитов
+        """
+        if len(infos) > self.max_entries:
+            raise ArchiveLimitError(
+                "Слишком много файлов в архиве",
+                f"{len(infos)}, допустимо не больше {self.max_entries}"
+            )
+        total = 0
+        for info in infos:
+            if _path_depth(info.filename) > self.max_depth:
+                raise ArchiveLimitError(f"Слишком глубокая вложенность директорий в архиве: {info.filename[:200]}")
+            self._check_ratio(info.filename, info.file_size, info.compress_size)
+            total += info.file_size
+        self._check_total(total)
+    
+    def extract_member(
+        self,
+        zip_ref: zipfile.ZipFile,
+        info: zipfile.ZipInfo,
+        extract_dir: str,
+        written: int = 0
+    ) -> int:
+        """
+        Распаковывает запись, считая записанные байты.
+        
+        Пути записей должны быть проверены заранее (см. _check_member_paths).
+        Недописанный файл удаляется при превышении лимита.
+        
+        Args:
+            zip_ref: Открытый архив
+            info: Запись для распаковки
+            extract_dir: Директория для распаковки
+            written: Сколько байт уже распаковано из этого архива
+        
+        Returns:
+            Количество распакованных байт с учётом written
+        
+        Raises:
+            ArchiveLimitError: Если запись или архив превышает лимиты
+        """
+        target_path = os.path.join(extract_dir, *[part for part in info.filename.split('/') if part])
+        if info.is_dir():
+            os.makedirs(target_path, exist_ok=True)
+            return written
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        
+        size = 0
+        try:
+            with zip_ref.open(info) as source, open(target_path, 'wb') as dest:
+                while True:
+                    chunk = source.read(EXTRACT_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    self._check_ratio(info.filename, size, info.compress_size)
+                    self._check_total(written + size)
+                    dest.write(chunk)
+        except ArchiveLimitError:
+            logger.warning(f"Распаковка прервана на {info.filename}: превышен лимит")
+            os.unlink(target_path)
+            raise
+        return written + size
+
+
+# Глобальная защита с лимитами из конфигурации
+archive_guard = ArchiveGuard()
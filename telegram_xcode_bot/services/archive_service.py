@@ -1,30 +1,63 @@
 """Сервис для работы с архивами проектов."""
 
+import json
 import os
 import tempfile
 import shutil
 import zipfile
-from pathlib import Path
-from typing import Dict, Any, Optional
-from dataclasses import dataclass
+from typing import Dict, Any, Optional, Callable, Tuple, Set, List
+from dataclasses import asdict, dataclass, field
 
 from telegram_xcode_bot.logger import get_logger
-from telegram_xcode_bot.exceptions import ArchiveProcessingError
-from telegram_xcode_bot.config import ERROR_NO_PBXPROJ_FILES, ERROR_NO_FILES_UPDATED
+from telegram_xcode_bot.exceptions import ArchiveProcessingError, JobCancelledError
+from telegram_xcode_bot.config import (
+    ERROR_NO_PBXPROJ_FILES,
+    ERROR_NO_FILES_UPDATED,
+    EXTRACT_CACHE_DIR,
+    EXTRACT_CACHE_MAX_BYTES,
+    EXTRACT_CACHE_TTL_SECONDS,
+    RESULT_CACHE_DIR,
+    RESULT_CACHE_MAX_BYTES,
+    RESULT_CACHE_TTL_SECONDS,
+)
 from telegram_xcode_bot.services.xcode_service import (
     update_project_file,
-    update_display_name,
-    update_bundle_id,
-    read_project_info,
+    read_project_settings,
     ProjectInfo,
+    ProjectEditPlan,
+    apply_edit_plan,
     update_activation_date,
-    add_ipad_support,
-    read_device_family,
+    find_activation_date_files,
+    find_activation_date_in_project,
+    get_project_root,
+)
+from telegram_xcode_bot.services.zip_fs import ZipFileSystem, normalize_zip_path
+from telegram_xcode_bot.services.project_workspace import (
+    ProjectWorkspace,
+    scan_workspace,
+    is_ignored_path,
 )
+from telegram_xcode_bot.services.snapshot_cache import snapshot_cache
+from telegram_xcode_bot.utils.hashing import compute_file_hash, compute_bytes_hash
+from telegram_xcode_bot.utils.cancellation import CancellationToken, raise_if_cancelled
+from telegram_xcode_bot.utils.disk_cache import DirectoryCache, DiskCache, link_or_copy
 from telegram_xcode_bot.services.icon_service import replace_app_icon
+from telegram_xcode_bot.services.archive_guard import archive_guard
+from telegram_xcode_bot.services.compression_policy import CompressionPolicy
+from telegram_xcode_bot.services.zip_rewriter import rewrite_archive, file_matches_entry, write_file_entries
 
 logger = get_logger(__name__)
 
+# Кеш готовых архивов: ключ - make_job_key (хеш исходного архива и действий)
+result_cache = DiskCache(
+    RESULT_CACHE_DIR, RESULT_CACHE_MAX_BYTES, RESULT_CACHE_TTL_SECONDS, name="готовые архивы"
+)
+
+# Распакованные копии исходных архивов: ключ - хеш содержимого архива
+extract_cache = DirectoryCache(
+    EXTRACT_CACHE_DIR, EXTRACT_CACHE_MAX_BYTES, EXTRACT_CACHE_TTL_SECONDS, name="распакованные архивы"
+)
+
 
 @dataclass
 class ArchiveProcessResult:
@@ -33,33 +66,229 @@ class ArchiveProcessResult:
     project_info: ProjectInfo
     device_family: Optional[str] = None
     error_message: Optional[str] = None
+    # SHA-256 выходного архива (архив детерминирован, хеш можно показывать пользователю)
+    output_hash: Optional[str] = None
+
+
+@dataclass
+class ProjectSnapshot:
+    """Информация о проекте, прочитанная из архива без распаковки."""
+    project_info: ProjectInfo = field(default_factory=ProjectInfo)
+    device_family: Optional[str] = None
+    # Пути project.pbxproj внутри архива
+    project_files: List[str] = field(default_factory=list)
+    # Файлы .swift, содержащие .date(from: "...")
+    date_files: List[str] = field(default_factory=list)
+    # Первая найденная в архиве дата активации
+    activation_date: Optional[str] = None
+    # Директории Assets.xcassets/AppIcon.appiconset
+    appiconset_dirs: List[str] = field(default_factory=list)
+    archive_hash: Optional[str] = None
+    # Распакованный размер файлов, которые может изменить обработка
+    work_bytes: int = 0
+
+
+def inspect_archive(archive_path: str) -> ProjectSnapshot:
+    """
+    Читает информацию о проекте напрямую из архива.
+    
+    Распаковываются в память только первый project.pbxproj и файлы .swift,
+    остальные записи не читаются.
+    
+    Args:
+        archive_path: Путь к архиву
+    
+    Returns:
+        ProjectSnapshot (пустой, если в архиве нет project.pbxproj)
+    
+    Raises:
+        ArchiveLimitError: Если архив превышает лимиты размера
+        ArchiveProcessingError: Если архив повреждён
+    """
+    with ZipFileSystem.open(archive_path) as fs:
+        # Враждебный архив отклоняется сразу после загрузки, до чтения записей
+        archive_guard.check(fs.zip_ref.infolist())
+        # Индекс строится по центральному каталогу, без обхода файлов
+        workspace = ProjectWorkspace.from_names(fs.files())
+        project_files = workspace.get_project_files()
+        date_matches = find_activation_date_files('', fs, workspace)
+        snapshot = ProjectSnapshot(
+            project_files=project_files,
+            date_files=[path for path, _ in date_matches],
+            activation_date=date_matches[0][1] if date_matches else None,
+            appiconset_dirs=workspace.get_appiconset_dirs(),
+        )
+        # Оценка объёма рабочей директории задачи (см. process_archive_with_actions)
+        wanted = set(snapshot.project_files) | set(snapshot.date_files)
+        icon_prefixes = tuple(path + '/' for path in snapshot.appiconset_dirs)
+        snapshot.work_bytes = sum(
+            fs.get_info(name).file_size for name in fs.files()
+            if name in wanted or name.startswith(icon_prefixes)
+        )
+        if project_files:
+            info, device_family = read_project_settings(project_files[0], fs)
+            # Дата активации ищется только внутри проекта первого project.pbxproj
+            project_root = normalize_zip_path(get_project_root(project_files[0]))
+            for path, date in date_matches:
+                if not project_root or path.startswith(project_root + '/'):
+                    info.activation_date = date
+                    break
+            snapshot.project_info = info
+            snapshot.device_family = device_family
+        return snapshot
+
+
+def get_project_snapshot(archive_path: str, archive_hash: Optional[str] = None) -> ProjectSnapshot:
+    """
+    Возвращает снимок проекта из кеша или читает его из архива.
+    
+    Args:
+        archive_path: Путь к архиву
+        archive_hash: Хеш содержимого архива (вычисляется, если не передан)
+    
+    Returns:
+        ProjectSnapshot (не должен изменяться вызывающим кодом)
+    
+    Raises:
+        ArchiveProcessingError: Если архив повреждён
+    """
+    if archive_hash is None:
+        archive_hash = compute_file_hash(archive_path)
+    
+    snapshot = snapshot_cache.get(archive_hash)
+    if snapshot is not None:
+        return snapshot
+    
+    snapshot = inspect_archive(archive_path)
+    snapshot.archive_hash = archive_hash
+    snapshot_cache.put(archive_hash, snapshot)
+    return snapshot
+
+
+def canonical_actions(actions: Dict[str, Any], icon_hash: Optional[str] = None) -> str:
+    """
+    Возвращает каноническое представление действий.
+    
+    Невыбранные действия отбрасываются, флаги приводятся к bool, путь
+    к иконке заменяется хешем её содержимого (временные пути иконок
+    у одинаковых запросов различаются).
+    
+    Args:
+        actions: Словарь действий (см. process_archive_with_actions)
+        icon_hash: Хеш содержимого новой иконки
+    
+    Returns:
+        JSON с отсортированными ключами
+    """
+    normalized: Dict[str, Any] = {}
+    for name, value in actions.items():
+        if not value:
+            continue
+        if name == 'new_icon_path':
+            normalized['new_icon_hash'] = icon_hash
+        elif name in ('increment_version', 'add_ipad'):
+            normalized[name] = True
+        else:
+            normalized[name] = value
+    return json.dumps(normalized, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+
+
+def make_job_key(archive_hash: str, actions: Dict[str, Any], icon_hash: Optional[str] = None) -> str:
+    """
+    Вычисляет ключ задачи обработки: одинаковые ключи дают одинаковый результат.
+    
+    Args:
+        archive_hash: Хеш содержимого исходного архива
+        actions: Словарь действий
+        icon_hash: Хеш содержимого новой иконки
+    
+    Returns:
+        SHA-256 в шестнадцатеричном виде
+    """
+    return compute_bytes_hash(f"{archive_hash}\n{canonical_actions(actions, icon_hash)}".encode('utf-8'))
+
+
+def get_cached_result(cache_key: str, output_path: str) -> Optional[ArchiveProcessResult]:
+    """
+    Возвращает результат обработки из кеша готовых архивов.
+    
+    Args:
+        cache_key: Ключ задачи (см. make_job_key)
+        output_path: Путь, по которому нужно получить готовый архив
+    
+    Returns:
+        ArchiveProcessResult или None, если результата нет в кеше
+    """
+    metadata = result_cache.get(cache_key, output_path)
+    if metadata is None:
+        return None
+    logger.info(f"Готовый архив {cache_key[:12]} взят из кеша")
+    return ArchiveProcessResult(
+        success=True,
+        project_info=ProjectInfo(**metadata.get('project_info', {})),
+        device_family=metadata.get('device_family'),
+        output_hash=metadata.get('output_hash'),
+    )
+
+
+def _store_result(cache_key: str, output_path: str, result: ArchiveProcessResult) -> None:
+    """Сохраняет успешный результат в кеш; ошибки кеша не влияют на обработку."""
+    metadata = {
+        'project_info': asdict(result.project_info),
+        'device_family': result.device_family,
+        'output_hash': result.output_hash,
+    }
+    try:
+        result_cache.put(cache_key, output_path, metadata)
+    except OSError as e:
+        logger.warning(f"Не удалось сохранить архив {cache_key[:12]} в кеш: {e}")
+
+
+def _check_member_paths(zip_ref: zipfile.ZipFile, extract_dir: str) -> None:
+    """
+    Проверяет записи архива на path traversal атаки.
+    
+    Args:
+        zip_ref: Открытый архив
+        extract_dir: Директория для распаковки
+    
+    Raises:
+        ArchiveProcessingError: Если найден опасный путь
+    """
+    extract_dir_abs = os.path.abspath(extract_dir)
+    for member in zip_ref.namelist():
+        member_path = os.path.normpath(os.path.join(extract_dir, member))
+        member_path_abs = os.path.abspath(member_path)
+        if not member_path_abs.startswith(extract_dir_abs):
+            raise ArchiveProcessingError(
+                f"Обнаружен потенциально опасный путь в архиве: {member}"
+            )
 
 
 def extract_archive(archive_path: str, extract_dir: str) -> None:
     """
-    Распаковывает архив в указанную директорию с защитой от path traversal атак.
+    Распаковывает архив в указанную директорию с защитой от path traversal атак
+    и zip-бомб.
     
     Args:
         archive_path: Путь к архиву
         extract_dir: Директория для распаковки
-        
+    
     Raises:
+        ArchiveLimitError: Если архив превышает лимиты размера
         ArchiveProcessingError: При ошибке распаковки
     """
     try:
         with zipfile.ZipFile(archive_path, 'r') as zip_ref:
             # Проверяем на path traversal атаки
-            extract_dir_abs = os.path.abspath(extract_dir)
-            for member in zip_ref.namelist():
-                member_path = os.path.normpath(os.path.join(extract_dir, member))
-                member_path_abs = os.path.abspath(member_path)
-                if not member_path_abs.startswith(extract_dir_abs):
-                    raise ArchiveProcessingError(
-                        f"Обнаружен потенциально опасный путь в архиве: {member}"
-                    )
+            _check_member_paths(zip_ref, extract_dir)
+            # Проверяем заявленные размеры до записи на диск
+            archive_guard.check(zip_ref.infolist())
             
-            # Если все проверки прошли, распаковываем
-            zip_ref.extractall(extract_dir)
+            # Если все проверки прошли, распаковываем, считая записанные байты
+            written = 0
+            for info in zip_ref.infolist():
+                written = archive_guard.extract_member(zip_ref, info, extract_dir, written)
         logger.info(f"Архив распакован в {extract_dir}")
     except zipfile.BadZipFile:
         logger.error("Поврежденный zip архив")
@@ -72,38 +301,290 @@ def extract_archive(archive_path: str, extract_dir: str) -> None:
         raise ArchiveProcessingError(f"Не удалось распаковать архив: {str(e)}")
 
 
-def create_archive(source_dir: str, output_path: str) -> None:
+def extract_members(
+    archive_path: str,
+    extract_dir: str,
+    predicate: Callable[[str], bool],
+    cancel_token: Optional[CancellationToken] = None
+) -> Dict[str, zipfile.ZipInfo]:
+    """
+    Распаковывает только записи архива, имена которых удовлетворяют predicate.
+    
+    Args:
+        archive_path: Путь к архиву
+        extract_dir: Директория для распаковки
+        predicate: Функция отбора по имени записи
+        cancel_token: Токен отмены, проверяется перед каждой записью
+    
+    Returns:
+        Словарь имя записи -> ZipInfo для распакованных файлов
+    
+    Raises:
+        ArchiveLimitError: Если архив превышает лимиты размера
+        ArchiveProcessingError: При ошибке распаковки
+        JobCancelledError: Если задача отменена
+    """
+    try:
+        with zipfile.ZipFile(archive_path, 'r') as zip_ref:
+            _check_member_paths(zip_ref, extract_dir)
+            archive_guard.check(zip_ref.infolist())
+            
+            extracted = {}
+            written = 0
+            for info in zip_ref.infolist():
+                if info.is_dir() or not predicate(info.filename):
+                    continue
+                raise_if_cancelled(cancel_token)
+                written = archive_guard.extract_member(zip_ref, info, extract_dir, written)
+                extracted[info.filename] = info
+        logger.info(f"Распаковано файлов: {len(extracted)} в {extract_dir}")
+        return extracted
+    except zipfile.BadZipFile:
+        logger.error("Поврежденный zip архив")
+        raise ArchiveProcessingError("Поврежденный zip архив")
+    except ArchiveProcessingError:
+        raise
+    except Exception as e:
+        logger.error(f"Ошибка при распаковке архива: {e}")
+        raise ArchiveProcessingError(f"Не удалось распаковать архив: {str(e)}")
+
+
+def create_archive(
+    source_dir: str,
+    output_path: str,
+    policy: Optional[CompressionPolicy] = None
+) -> None:
     """
     Создает zip архив из указанной директории.
     
+    Файлы добавляются в отсортированном порядке, время и права берутся из
+    файлов, поэтому архив не зависит от порядка обхода файловой системы.
+    Способ сжатия каждого файла выбирает политика сжатия.
+    
     Args:
         source_dir: Директория с файлами
         output_path: Путь для создания архива
-        
+        policy: Политика сжатия (по умолчанию compression_policy)
+    
     Raises:
         ArchiveProcessingError: При ошибке создания архива
     """
     try:
+        entries = []
+        for root, dirs, files in os.walk(source_dir):
+            dirs.sort()
+            for file in sorted(files):
+                file_path = os.path.join(root, file)
+                arc_name = os.path.relpath(file_path, source_dir)
+                entries.append((file_path, zipfile.ZipInfo.from_file(file_path, arc_name)))
         with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zip_out:
-            for root, dirs, files in os.walk(source_dir):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    arc_name = os.path.relpath(file_path, source_dir)
-                    zip_out.write(file_path, arc_name)
+            # При большом объёме файлы сжимаются в пуле потоков, порядок записей сохраняется
+            write_file_entries(zip_out, entries, policy)
         logger.info(f"Создан архив: {output_path}")
     except Exception as e:
         logger.error(f"Ошибка при создании архива: {e}")
         raise ArchiveProcessingError(f"Не удалось создать архив: {str(e)}")
 
 
+def _is_project_file(name: str) -> bool:
+    """Проверяет, является ли запись архива файлом project.pbxproj вне игнорируемых директорий."""
+    return name.rsplit('/', 1)[-1] == 'project.pbxproj' and not is_ignored_path(name)
+
+
+def _is_swift_file(name: str) -> bool:
+    """Проверяет, является ли запись архива файлом .swift вне игнорируемых директорий."""
+    return name.endswith('.swift') and not is_ignored_path(name)
+
+
+def _is_app_icon_file(name: str) -> bool:
+    """Проверяет, лежит ли запись архива в Assets.xcassets/AppIcon.appiconset."""
+    return '/Assets.xcassets/AppIcon.appiconset/' in '/' + name and not is_ignored_path(name)
+
+
+def _is_pristine_member(name: str) -> bool:
+    """Проверяет, может ли запись изменить какое-либо действие (такие записи хранит extract_cache)."""
+    return _is_project_file(name) or _is_swift_file(name) or _is_app_icon_file(name)
+
+
+def _clear_dir(path: str) -> None:
+    """Удаляет содержимое директории."""
+    for name in os.listdir(path):
+        entry_path = os.path.join(path, name)
+        if os.path.isdir(entry_path) and not os.path.islink(entry_path):
+            shutil.rmtree(entry_path)
+        else:
+            os.unlink(entry_path)
+
+
+def extracted_copy_device(archive_hash: str) -> Optional[int]:
+    """
+    Возвращает st_dev файловой системы распакованной копии архива (выполняется вне event loop).
+    
+    Args:
+        archive_hash: Хеш содержимого архива
+    
+    Returns:
+        st_dev или None, если копии нет
+    """
+    if not extract_cache.enabled:
+        return None
+    pristine_dir = extract_cache.get(archive_hash)
+    if pristine_dir is None:
+        return None
+    try:
+        return os.stat(pristine_dir).st_dev
+    except OSError:
+        return None
+
+
+def _link_members(
+    archive_path: str,
+    archive_hash: str,
+    work_dir: str,
+    predicate: Callable[[str], bool],
+    cancel_token: Optional[CancellationToken] = None
+) -> Optional[Dict[str, zipfile.ZipInfo]]:
+    """
+    Заполняет work_dir жёсткими ссылками на распакованную копию архива из extract_cache.
+    
+    Копия создаётся при первой обработке архива и содержит все записи, которые
+    может изменить какое-либо действие. Файлы копии изменяются только заменой
+    (write_file_atomic), поэтому ссылки на них безопасны.
+    
+    Args:
+        archive_path: Путь к архиву
+        archive_hash: Хеш содержимого архива
+        work_dir: Пустая директория для файлов задачи
+        predicate: Функция отбора по имени записи
+        cancel_token: Токен отмены
+    
+    Returns:
+        Словарь имя записи -> ZipInfo (как у extract_members) или None, если
+        копию использовать нельзя и архив нужно распаковать
+    
+    Raises:
+        ArchiveProcessingError: При ошибке распаковки копии
+        JobCancelledError: Если задача отменена
+    """
+    if not extract_cache.enabled:
+        return None
+    try:
+        with zipfile.ZipFile(archive_path, 'r') as zip_ref:
+            infos = [info for info in zip_ref.infolist() if not info.is_dir()]
+    except zipfile.BadZipFile:
+        return None
+    if sum(info.file_size for info in infos if _is_pristine_member(info.filename)) > extract_cache.max_bytes:
+        return None
+    
+    pristine_dir = extract_cache.get_or_create(
+        archive_hash,
+        lambda target: extract_members(archive_path, target, _is_pristine_member, cancel_token),
+    )
+    if pristine_dir is None:
+        return None
+    
+    extracted = {}
+    try:
+        for info in infos:
+            if not predicate(info.filename):
+                continue
+            raise_if_cancelled(cancel_token)
+            parts = info.filename.split('/')
+            target_path = os.path.join(work_dir, *parts)
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            link_or_copy(os.path.join(pristine_dir, *parts), target_path)
+            extracted[info.filename] = info
+    except OSError as e:
+        # Копию одновременно вытеснил другой процесс: ссылки убираются, архив распаковывается
+        logger.warning(f"Не удалось использовать распакованную копию архива: {e}")
+        _clear_dir(work_dir)
+        return None
+    logger.info(f"Файлов связано с распакованной копией архива: {len(extracted)}")
+    return extracted
+
+
+def _collect_changes(
+    work_dir: str,
+    extracted: Dict[str, zipfile.ZipInfo],
+    cancel_token: Optional[CancellationToken] = None
+) -> Tuple[Dict[str, str], Set[str], List[str]]:
+    """
+    Сравнивает распакованные файлы с исходными записями архива.
+    
+    Args:
+        work_dir: Директория с распакованными и изменёнными файлами
+        extracted: Распакованные записи исходного архива
+        cancel_token: Токен отмены, проверяется перед каждым файлом
+    
+    Returns:
+        Tuple (замены имя -> путь, удалённые имена, новые имена)
+    """
+    current_files = scan_workspace(work_dir).files
+    current_names = set(current_files)
+    
+    replacements: Dict[str, str] = {}
+    removed: Set[str] = set()
+    for name, info in extracted.items():
+        if name not in current_names:
+            removed.add(name)
+            continue
+        raise_if_cancelled(cancel_token)
+        file_path = os.path.join(work_dir, *name.split('/'))
+        if not file_matches_entry(file_path, info):
+            replacements[name] = file_path
+    
+    added = [name for name in current_files if name not in extracted]
+    
+    return replacements, removed, added
+
+
+def _rewrite_from_work_dir(
+    archive_path: str,
+    output_path: str,
+    work_dir: str,
+    extracted: Dict[str, zipfile.ZipInfo],
+    cancel_token: Optional[CancellationToken] = None
+) -> None:
+    """
+    Собирает выходной архив: изменённые файлы берутся из work_dir,
+    остальные записи копируются из исходного архива без пересжатия.
+    
+    Args:
+        archive_path: Путь к исходному архиву
+        output_path: Путь для сохранения обработанного архива
+        work_dir: Директория с распакованными и изменёнными файлами
+        extracted: Распакованные записи исходного архива
+        cancel_token: Токен отмены
+    """
+    replacements, removed, added = _collect_changes(work_dir, extracted, cancel_token)
+    rewrite_archive(
+        archive_path,
+        output_path,
+        replacements,
+        removed=removed,
+        added=added,
+        source_dir=work_dir,
+        cancel_token=cancel_token,
+    )
+
+
 def process_archive_with_actions(
     archive_path: str,
     output_path: str,
-    actions: Dict[str, Any]
+    actions: Dict[str, Any],
+    snapshot: Optional[ProjectSnapshot] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    cache_key: Optional[str] = None
 ) -> ArchiveProcessResult:
     """
     Обрабатывает архив, применяя все запланированные действия.
     
+    Распаковываются только файлы, которые могут измениться или нужны для чтения
+    информации о проекте; остальные записи переносятся в новый архив без пересжатия.
+    Если известен хеш архива (snapshot.archive_hash), файлы связываются с
+    распакованной копией архива из extract_cache, и повторная обработка того
+    же архива его не распаковывает.
+    
     Args:
         archive_path: Путь к исходному архиву
         output_path: Путь для сохранения обработанного архива
@@ -114,66 +595,117 @@ def process_archive_with_actions(
             - new_icon_path: str | None
             - new_activation_date: str | None
             - add_ipad: bool
+        snapshot: Снимок проекта, уже прочитанный из архива
+        cancel_token: Токен отмены, проверяется между записями архива и файлами
+        cache_key: Ключ задачи (см. make_job_key): готовый архив берётся из кеша
+            или сохраняется в него после успешной обработки
     
     Returns:
         ArchiveProcessResult с результатом обработки
+    
+    Raises:
+        JobCancelledError: Если задача отменена (частичный результат удаляется)
     """
-    temp_dir = tempfile.mkdtemp()
+    if cache_key is not None:
+        cached = get_cached_result(cache_key, output_path)
+        if cached is not None:
+            return cached
+    
+    temp_dir = cancel_token.make_temp_dir() if cancel_token is not None else tempfile.mkdtemp()
     try:
-        # Распаковываем архив
-        extract_archive(archive_path, temp_dir)
+        replace_icon = bool(actions.get('new_icon_path'))
+        
+        if snapshot is not None:
+            # Снимок уже знает, какие файлы затронут действия
+            wanted = set(snapshot.project_files) | set(snapshot.date_files)
+            icon_prefixes = tuple(path + '/' for path in snapshot.appiconset_dirs)
+            
+            def needs_member(name: str) -> bool:
+                if name in wanted:
+                    return True
+                return replace_icon and name.startswith(icon_prefixes)
+        else:
+            def needs_member(name: str) -> bool:
+                # Swift файлы нужны всегда: по ним определяется дата активации
+                if _is_project_file(name) or _is_swift_file(name):
+                    return True
+                return replace_icon and _is_app_icon_file(name)
+        
+        # Файлы берутся из распакованной копии архива (жёсткими ссылками),
+        # иначе распаковываются только нужные файлы
+        extracted = None
+        if snapshot is not None and snapshot.archive_hash:
+            extracted = _link_members(archive_path, snapshot.archive_hash, temp_dir, needs_member, cancel_token)
+        if extracted is None:
+            extracted = extract_members(archive_path, temp_dir, needs_member, cancel_token)
+        
+        # Индекс распакованных файлов строится по именам записей, без обхода диска
+        workspace = ProjectWorkspace.from_names(extracted, root=temp_dir)
         
         # Ищем все project.pbxproj файлы
-        project_files = list(Path(temp_dir).rglob('project.pbxproj'))
+        project_files = workspace.get_project_files()
         
         if not project_files:
             raise ArchiveProcessingError(ERROR_NO_PBXPROJ_FILES)
         
         project_info = ProjectInfo()
         
-        # Применяем все действия к каждому файлу
-        for project_file in project_files:
-            project_path = str(project_file)
-            
-            # Увеличиваем версию если нужно
-            if actions.get('increment_version'):
-                success, m_version, b_version = update_project_file(project_path)
-                if success and project_info.marketing_version is None:
-                    project_info.marketing_version = m_version
-                    project_info.build_version = b_version
-            
-            # Меняем название если указано
-            if actions.get('new_name'):
-                update_display_name(project_path, actions['new_name'])
-            
-            # Меняем Bundle ID если указан
-            if actions.get('new_bundle_id'):
-                update_bundle_id(project_path, actions['new_bundle_id'])
-            
-            # Добавляем поддержку iPad если указано
-            if actions.get('add_ipad'):
-                add_ipad_support(project_path)
+        # Все изменения build settings применяются к файлу за одно чтение и одну запись
+        edit_plan = ProjectEditPlan(
+            increment_version=bool(actions.get('increment_version')),
+            new_name=actions.get('new_name'),
+            new_bundle_id=actions.get('new_bundle_id'),
+            add_ipad=bool(actions.get('add_ipad')),
+        )
+        if not edit_plan.is_empty():
+            for project_path in project_files:
+                raise_if_cancelled(cancel_token)
+                edit_result = apply_edit_plan(project_path, edit_plan)
+                if edit_result.version_updated and project_info.marketing_version is None:
+                    project_info.marketing_version = edit_result.marketing_version
+                    project_info.build_version = edit_result.build_version
         
         # Меняем иконку если указана
-        if actions.get('new_icon_path'):
-            replace_app_icon(temp_dir, actions['new_icon_path'])
+        if replace_icon:
+            raise_if_cancelled(cancel_token)
+            replace_app_icon(temp_dir, actions['new_icon_path'], workspace)
         
         # Меняем дату активации если указана
         if actions.get('new_activation_date'):
-            update_activation_date(temp_dir, actions['new_activation_date'])
+            raise_if_cancelled(cancel_token)
+            update_activation_date(temp_dir, actions['new_activation_date'], workspace)
         
         # Читаем финальную информацию из обработанного файла
         device_family = None
         if project_files:
-            project_info = read_project_info(str(project_files[0]))
-            device_family = read_device_family(str(project_files[0]))
+            project_info, device_family = read_project_settings(project_files[0])
+            found, activation_date, _, _ = find_activation_date_in_project(
+                get_project_root(project_files[0]), workspace=workspace
+            )
+            if found:
+                project_info.activation_date = activation_date
         
-        # Создаем новый архив
-        create_archive(temp_dir, output_path)
+        # Создаем новый архив: пересжимаются только изменённые файлы
+        raise_if_cancelled(cancel_token)
+        _rewrite_from_work_dir(archive_path, output_path, temp_dir, extracted, cancel_token)
         
         logger.info(f"Обработан архив с действиями: {actions}")
-        return ArchiveProcessResult(success=True, project_info=project_info, device_family=device_family)
-        
+        result = ArchiveProcessResult(
+            success=True,
+            project_info=project_info,
+            device_family=device_family,
+            output_hash=compute_file_hash(output_path),
+        )
+        if cache_key is not None:
+            _store_result(cache_key, output_path, result)
+        return result
+    
+    except JobCancelledError:
+        logger.info(f"Обработка архива отменена: {archive_path}")
+        # Недописанный архив не должен остаться на диске
+        if os.path.exists(output_path):
+            os.unlink(output_path)
+        raise
     except Exception as e:
         logger.error(f"Ошибка при обработке архива: {e}", exc_info=True)
         return ArchiveProcessResult(
@@ -187,7 +719,7 @@ def process_archive_with_actions(
 
 def process_archive(archive_path: str, output_path: str) -> ArchiveProcessResult:
     """
-    Обрабатывает архив: распаковывает, обновляет версии, запаковывает обратно.
+    Обрабатывает архив: распаковывает project.pbxproj, обновляет версии, собирает архив обратно.
     
     Args:
         archive_path: Путь к исходному архиву
@@ -198,11 +730,11 @@ def process_archive(archive_path: str, output_path: str) -> ArchiveProcessResult
     """
     temp_dir = tempfile.mkdtemp()
     try:
-        # Распаковываем архив
-        extract_archive(archive_path, temp_dir)
+        # Распаковываем только project.pbxproj файлы
+        extracted = extract_members(archive_path, temp_dir, _is_project_file)
         
         # Ищем все project.pbxproj файлы
-        project_files = list(Path(temp_dir).rglob('project.pbxproj'))
+        project_files = ProjectWorkspace.from_names(extracted, root=temp_dir).get_project_files()
         
         if not project_files:
             raise ArchiveProcessingError(ERROR_NO_PBXPROJ_FILES)
@@ -211,7 +743,7 @@ def process_archive(archive_path: str, output_path: str) -> ArchiveProcessResult
         project_info = ProjectInfo()
         
         for project_file in project_files:
-            success, m_version, b_version = update_project_file(str(project_file))
+            success, m_version, b_version = update_project_file(project_file)
             if success:
                 updated_count += 1
                 # Сохраняем версии из первого успешно обновленного файла
@@ -223,11 +755,11 @@ def process_archive(archive_path: str, output_path: str) -> ArchiveProcessResult
             raise ArchiveProcessingError(ERROR_NO_FILES_UPDATED)
         
         # Создаем новый архив
-        create_archive(temp_dir, output_path)
+        _rewrite_from_work_dir(archive_path, output_path, temp_dir, extracted)
         
         logger.info(f"Обработано файлов project.pbxproj: {updated_count}")
         return ArchiveProcessResult(success=True, project_info=project_info)
-        
+    
     except Exception as e:
         logger.error(f"Ошибка при обработке архива: {e}", exc_info=True)
         return ArchiveProcessResult(
@@ -237,4 +769,3 @@ def process_archive(archive_path: str, output_path: str) -> ArchiveProcessResult
         )
     finally:
         shutil.rmtree(temp_dir, ignore_errors=True)
-
@@ -0,0 +1,488 @@
+"""
+Асинхронный слой над блокирующими операциями с архивами и файлами.
+
+Handlers не работают с архивами и файловой системой напрямую: чтение архивов,
+хеширование, удаление и чтение файлов выполняются в потоках с тайм-аутом,
+обработка архива с действиями - в пуле процессов.
+"""
+
+import os
+import tempfile
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from telegram_xcode_bot.config import (
+    INSPECT_TIMEOUT_SECONDS,
+    FILE_OPERATION_TIMEOUT_SECONDS,
+    PROCESS_TIMEOUT_SECONDS,
+)
+from telegram_xcode_bot.logger import get_logger
+from telegram_xcode_bot.services.archive_service import (
+    ArchiveProcessResult,
+    ProjectSnapshot,
+    extracted_copy_device,
+    get_cached_result,
+    get_project_snapshot,
+    make_job_key,
+    process_archive_with_actions,
+)
+from telegram_xcode_bot.services.content_store import content_store
+from telegram_xcode_bot.services.icon_service import convert_png_to_jpeg, read_image_info
+from telegram_xcode_bot.utils.async_helpers import run_blocking_io
+from telegram_xcode_bot.utils.cancellation import CancellationToken
+from telegram_xcode_bot.utils.disk_cache import link_or_copy
+from telegram_xcode_bot.utils.hashing import compute_file_hash
+from telegram_xcode_bot.utils.job_workspace import job_workspaces
+from telegram_xcode_bot.utils.process_pool import archive_pool
+from telegram_xcode_bot.utils.single_flight import SingleFlight
+
+logger = get_logger(__name__)
+
+# Выполняющиеся задачи обработки архивов по ключу (архив + действия)
+archive_job_flights = SingleFlight()
+
+
+def _create_temp_path(suffix: str, size: Optional[int] = None) -> str:
+    """Создаёт пустой временный файл (небольшой - в памяти) и возвращает его путь."""
+    directory = job_workspaces.file_dir(size)
+    try:
+        fd, path = tempfile.mkstemp(suffix=suffix, dir=directory)
+    except OSError:
+        if directory is None:
+            raise
+        fd, path = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    return path
+
+
+def _remove_paths(paths: Tuple[Optional[str], ...]) -> None:
+    """Удаляет существующие файлы из списка, пропуская пустые пути."""
+    for path in paths:
+        if not path:
+            continue
+        try:
+            os.unlink(path)
+            logger.info(f"Удалён временный файл: {path}")
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Не удалось удалить файл {path}: {e}")
+
+
+def _pin_paths(paths: Tuple[Optional[str], ...]) -> Tuple[Optional[str], ...]:
+    """Создаёт рядом с каждым файлом жёсткую ссылку (или копию) с уникальным именем."""
+    pinned: List[Optional[str]] = []
+    try:
+        for path in paths:
+            if not path:
+                pinned.append(None)
+                continue
+            fd, pin_path = tempfile.mkstemp(suffix=os.path.splitext(path)[1], dir=os.path.dirname(path) or None)
+            os.close(fd)
+            pinned.append(pin_path)
+            link_or_copy(path, pin_path)
+    except BaseException:
+        _remove_paths(tuple(pinned))
+        raise
+    return tuple(pinned)
+
+
+def _read_file(path: str) -> bytes:
+    """Читает файл целиком."""
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+async def path_exists(path: Optional[str], timeout: float = FILE_OPERATION_TIMEOUT_SECONDS) -> bool:
+    """
+    Проверяет существование файла.
+    
+    Args:
+        path: Путь к файлу (None считается отсутствующим файлом)
+        timeout: Тайм-аут в секундах
+    
+    Returns:
+        True, если файл существует
+    """
+    if not path:
+        return False
+    return await run_blocking_io(os.path.exists, path, timeout=timeout)
+
+
+def _touch_path(path: str) -> bool:
+    """Обновляет время изменения файла; False, если файла нет."""
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+async def touch_session_file(path: Optional[str], timeout: float = FILE_OPERATION_TIMEOUT_SECONDS) -> bool:
+    """
+    Проверяет существование файла сессии и отмечает его использование.
+    
+    Файлы сессий в памяти удаляются по времени последнего использования
+    (см. JobWorkspaces), поэтому каждое действие пользователя его обновляет.
+    
+    Args:
+        path: Путь к файлу (None считается отсутствующим файлом)
+        timeout: Тайм-аут в секундах
+    
+    Returns:
+        True, если файл существует
+    """
+    if not path:
+        return False
+    return await run_blocking_io(_touch_path, path, timeout=timeout)
+
+
+async def create_temp_path(
+    suffix: str = '',
+    size: Optional[int] = None,
+    timeout: float = FILE_OPERATION_TIMEOUT_SECONDS
+) -> str:
+    """
+    Создаёт пустой временный файл.
+    
+    Файл ожидаемым размером не больше SMALL_ARCHIVE_MEMORY_BYTES создаётся
+    в памяти (JOB_RAM_DIR), остальные - во временной директории на диске.
+    
+    Args:
+        suffix: Расширение файла
+        size: Ожидаемый размер файла (None - неизвестен, файл на диске)
+        timeout: Тайм-аут в секундах
+    
+    Returns:
+        Путь к файлу (удаляется вызывающим кодом через remove_files)
+    """
+    return await run_blocking_io(_create_temp_path, suffix, size, timeout=timeout)
+
+
+async def remove_files(*paths: Optional[str], timeout: float = FILE_OPERATION_TIMEOUT_SECONDS) -> None:
+    """
+    Удаляет файлы, если они существуют.
+    
+    Args:
+        *paths: Пути к файлам (None пропускаются)
+        timeout: Тайм-аут в секундах
+    """
+    if any(paths):
+        await run_blocking_io(_remove_paths, paths, timeout=timeout)
+
+
+async def pin_files(
+    *paths: Optional[str],
+    timeout: float = FILE_OPERATION_TIMEOUT_SECONDS
+) -> Tuple[Optional[str], ...]:
+    """
+    Закрепляет файлы за задачей: создаёт собственные ссылки на них.
+    
+    Исходные файлы можно удалить или заменить (новый архив, сброс), пока задача
+    работает со своими ссылками. Ссылки удаляются через remove_files.
+    
+    Args:
+        *paths: Пути к файлам (None пропускаются)
+        timeout: Тайм-аут в секундах
+    
+    Returns:
+        Пути ссылок в том же порядке (None для пропущенных путей)
+    
+    Raises:
+        FileNotFoundError: Если файл уже удалён
+    """
+    return await run_blocking_io(_pin_paths, paths, timeout=timeout)
+
+
+async def read_file_bytes(path: str, timeout: float = FILE_OPERATION_TIMEOUT_SECONDS) -> bytes:
+    """
+    Читает файл целиком (например, готовый архив перед отправкой).
+    
+    Args:
+        path: Путь к файлу
+        timeout: Тайм-аут в секундах
+    
+    Returns:
+        Содержимое файла
+    """
+    return await run_blocking_io(_read_file, path, timeout=timeout)
+
+
+async def fetch_received_archive(
+    file_unique_id: str,
+    destination: str,
+    timeout: float = FILE_OPERATION_TIMEOUT_SECONDS
+) -> Optional[str]:
+    """
+    Получает ранее загруженный архив из локального хранилища вместо скачивания.
+    
+    Args:
+        file_unique_id: Постоянный идентификатор файла Telegram
+        destination: Путь, по которому нужно получить архив
+        timeout: Тайм-аут в секундах
+    
+    Returns:
+        Хеш содержимого архива или None, если архив нужно скачать
+    """
+    try:
+        return await run_blocking_io(content_store.get, file_unique_id, destination, timeout=timeout)
+    except (OSError, TimeoutError) as e:
+        logger.warning(f"Не удалось прочитать архив из хранилища: {e}")
+        return None
+
+
+async def store_received_archive(
+    archive_hash: str,
+    archive_path: str,
+    file_unique_id: Optional[str],
+    timeout: float = FILE_OPERATION_TIMEOUT_SECONDS
+) -> None:
+    """
+    Сохраняет скачанный архив в локальное хранилище; ошибки хранилища не прерывают работу.
+    
+    Args:
+        archive_hash: Хеш содержимого архива
+        archive_path: Путь к архиву
+        file_unique_id: Постоянный идентификатор файла Telegram
+        timeout: Тайм-аут в секундах
+    """
+    try:
+        await run_blocking_io(content_store.put, archive_hash, archive_path, file_unique_id, timeout=timeout)
+    except (OSError, TimeoutError) as e:
+        logger.warning(f"Не удалось сохранить архив в хранилище: {e}")
+
+
+async def file_content_hash(path: str, timeout: float = FILE_OPERATION_TIMEOUT_SECONDS) -> str:
+    """
+    Вычисляет SHA-256 содержимого файла в отдельном потоке.
+    
+    Args:
+        path: Путь к файлу
+        timeout: Тайм-аут в секундах
+    
+    Returns:
+        Хеш в шестнадцатеричном виде
+    """
+    return await run_blocking_io(compute_file_hash, path, timeout=timeout)
+
+
+async def load_project_snapshot(
+    archive_path: str,
+    archive_hash: Optional[str] = None,
+    timeout: float = INSPECT_TIMEOUT_SECONDS
+) -> ProjectSnapshot:
+    """
+    Возвращает снимок проекта из кеша или читает архив в отдельном потоке.
+    
+    Если хеш не передан, он вычисляется в том же потоке и сохраняется
+    в snapshot.archive_hash.
+    
+    Args:
+        archive_path: Путь к архиву
+        archive_hash: Хеш содержимого архива
+        timeout: Тайм-аут в секундах
+    
+    Returns:
+        ProjectSnapshot (не должен изменяться вызывающим кодом)
+    
+    Raises:
+        ArchiveProcessingError: Если архив повреждён
+        TimeoutError: Если чтение превысило тайм-аут
+    """
+    return await run_blocking_io(get_project_snapshot, archive_path, archive_hash, timeout=timeout)
+
+
+async def process_archive_job(
+    archive_path: str,
+    output_path: str,
+    actions: Dict[str, Any],
+    snapshot: Optional[ProjectSnapshot] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    cache_key: Optional[str] = None,
+    timeout: float = PROCESS_TIMEOUT_SECONDS
+) -> ArchiveProcessResult:
+    """
+    Обрабатывает архив со всеми действиями в пуле процессов.
+    
+    Рабочая директория задачи создаётся в памяти (tmpfs), если распакованные
+    файлы из snapshot.work_bytes помещаются в бюджет, иначе - на диске. Задача,
+    для архива которой уже есть распакованная копия на другой файловой системе,
+    работает на диске, чтобы связать файлы с копией без копирования. После
+    завершения (в том числе отмены или тайм-аута) временные директории задачи
+    удаляются, даже если процесс пула был завершён принудительно.
+    
+    Args:
+        archive_path: Путь к исходному архиву
+        output_path: Путь для сохранения результата
+        actions: Словарь действий (см. process_archive_with_actions)
+        snapshot: Снимок проекта, уже прочитанный из архива
+        cancel_token: Токен отмены задачи
+        cache_key: Ключ задачи для кеша готовых архивов (см. archive_job_key)
+        timeout: Тайм-аут в секундах
+    
+    Returns:
+        ArchiveProcessResult
+    
+    Raises:
+        WorkerPoolBusyError: Если очередь пула заполнена
+        JobCancelledError: Если задача отменена
+        TimeoutError: Если обработка превысила тайм-аут
+    """
+    # Без снимка объём распаковки неизвестен, задача работает на диске
+    expected_bytes = snapshot.work_bytes if snapshot is not None and cancel_token is not None else None
+    link_device = None
+    if expected_bytes is not None and snapshot.archive_hash:
+        # Файлы связываются с распакованной копией архива жёсткими ссылками: если
+        # копия на другой файловой системе, задача работает рядом с ней, на диске
+        link_device = await run_blocking_io(
+            extracted_copy_device, snapshot.archive_hash, timeout=FILE_OPERATION_TIMEOUT_SECONDS
+        )
+    with job_workspaces.reserve(expected_bytes, link_device=link_device) as temp_root:
+        if cancel_token is not None:
+            cancel_token.temp_root = temp_root
+        try:
+            return await archive_pool.run(
+                process_archive_with_actions,
+                archive_path,
+                output_path,
+                actions,
+                snapshot=snapshot,
+                cancel_token=cancel_token,
+                cache_key=cache_key,
+                timeout=timeout
+            )
+        finally:
+            if cancel_token is not None:
+                await run_blocking_io(cancel_token.cleanup, timeout=FILE_OPERATION_TIMEOUT_SECONDS)
+
+
+async def load_cached_result(
+    cache_key: str,
+    output_path: str,
+    timeout: float = FILE_OPERATION_TIMEOUT_SECONDS
+) -> Optional[ArchiveProcessResult]:
+    """
+    Получает готовый архив из кеша в отдельном потоке, без очереди и пула процессов.
+    
+    Args:
+        cache_key: Ключ задачи (см. archive_job_key)
+        output_path: Путь, по которому нужно получить готовый архив
+        timeout: Тайм-аут в секундах
+    
+    Returns:
+        ArchiveProcessResult или None, если результата нет в кеше
+    """
+    return await run_blocking_io(get_cached_result, cache_key, output_path, timeout=timeout)
+
+
+async def inspect_image(
+    image_path: str,
+    timeout: float = FILE_OPERATION_TIMEOUT_SECONDS
+) -> Tuple[Optional[str], int, int, str]:
+    """
+    Читает формат, размер и режим изображения в отдельном потоке.
+    
+    Args:
+        image_path: Путь к изображению
+        timeout: Тайм-аут в секундах
+    
+    Returns:
+        Tuple (формат, ширина, высота, режим)
+    
+    Raises:
+        IconProcessingError: Если файл не является изображением
+    """
+    return await run_blocking_io(read_image_info, image_path, timeout=timeout)
+
+
+async def convert_icon_to_jpeg(
+    image_path: str,
+    quality: int = 95,
+    timeout: float = FILE_OPERATION_TIMEOUT_SECONDS
+) -> None:
+    """
+    Конвертирует PNG иконку в JPEG на месте в отдельном потоке.
+    
+    Args:
+        image_path: Путь к изображению
+        quality: Качество JPEG (0-100)
+        timeout: Тайм-аут в секундах
+    
+    Raises:
+        IconProcessingError: При ошибке конвертации
+    """
+    await run_blocking_io(convert_png_to_jpeg, image_path, image_path, quality=quality, timeout=timeout)
+
+
+async def archive_job_key(
+    archive_hash: str,
+    actions: Dict[str, Any],
+    timeout: float = FILE_OPERATION_TIMEOUT_SECONDS
+) -> str:
+    """
+    Вычисляет ключ задачи обработки; хеш иконки считается в отдельном потоке.
+    
+    Args:
+        archive_hash: Хеш содержимого исходного архива
+        actions: Словарь действий
+        timeout: Тайм-аут в секундах
+    
+    Returns:
+        Ключ задачи (см. make_job_key)
+    """
+    icon_hash = None
+    if actions.get('new_icon_path'):
+        icon_hash = await file_content_hash(actions['new_icon_path'], timeout=timeout)
+    return make_job_key(archive_hash, actions, icon_hash)
+
+
+async def run_shared_archive_job(
+    job_key: str,
+    output_path: str,
+    run_job: Callable[[str, CancellationToken], Awaitable[ArchiveProcessResult]],
+    cancel_token: Optional[CancellationToken] = None,
+    output_size: Optional[int] = None
+) -> ArchiveProcessResult:
+    """
+    Выполняет задачу обработки один раз для всех одновременных запросов с тем же ключом.
+    
+    Первый запрос запускает run_job, остальные ждут его результат. Задача пишет
+    архив в общий временный файл, который каждый участник получает по своему
+    пути output_path (жёсткой ссылкой или копией); общий файл удаляется, когда
+    результат получили все участники. Отмена одного участника не прерывает
+    задачу для остальных.
+    
+    Args:
+        job_key: Ключ задачи (см. archive_job_key)
+        output_path: Путь для сохранения результата этого участника
+        run_job: Корутина обработки: получает путь общего результата и токен отмены задачи
+        cancel_token: Токен отмены участника
+        output_size: Ожидаемый размер результата (небольшой результат хранится в памяти)
+    
+    Returns:
+        ArchiveProcessResult
+    
+    Raises:
+        JobCancelledError: Если участник отменил запрос или задача отменена
+        WorkerPoolBusyError: Если очередь обработки заполнена
+        TimeoutError: Если обработка превысила тайм-аут
+    """
+    async def start(job_token: CancellationToken) -> Tuple[ArchiveProcessResult, str]:
+        shared_output = await create_temp_path(suffix='.zip', size=output_size)
+        try:
+            return await run_job(shared_output, job_token), shared_output
+        except BaseException:
+            await remove_files(shared_output)
+            raise
+    
+    async def deliver(shared: Tuple[ArchiveProcessResult, str]) -> None:
+        result, shared_output = shared
+        if result.success:
+            await run_blocking_io(link_or_copy, shared_output, output_path, timeout=FILE_OPERATION_TIMEOUT_SECONDS)
+    
+    async def finalize(shared: Tuple[ArchiveProcessResult, str]) -> None:
+        await remove_files(shared[1])
+    
+    result, _ = await archive_job_flights.do(
+        job_key, start, cancel_token=cancel_token, deliver=deliver, finalize=finalize
+    )
+    return result
@@ -0,0 +1,145 @@
+"""Выбор способа сжатия записей выходного архива."""
+
+import os
+import zipfile
+import zlib
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from telegram_xcode_bot.config import (
+    ARCHIVE_COMPRESSION_LEVEL,
+    ARCHIVE_COMPRESSION_PROFILE,
+    COMPRESSION_PROFILES,
+    LOG_COMPRESSION_PROFILE_UNKNOWN,
+    COMPRESSION_STORED_EXTENSIONS,
+    COMPRESSION_SAMPLE_MIN_BYTES,
+    COMPRESSION_SAMPLE_BYTES,
+    COMPRESSION_MIN_SAVINGS,
+)
+from telegram_xcode_bot.exceptions import ConfigurationError
+
+# Уровень zlib для пробного сжатия выборки (оценка сжимаемости, а не результат)
+_SAMPLE_LEVEL = 1
+
+# Атрибут уровня сжатия ZipInfo (в Python 3.13 _compresslevel переименован в compress_level)
+_COMPRESS_LEVEL_ATTR = 'compress_level' if 'compress_level' in zipfile.ZipInfo.__slots__ else '_compresslevel'
+
+
+def set_compress_level(info: zipfile.ZipInfo, level: Optional[int]) -> None:
+    """
+    Задаёт уровень сжатия, с которым ZipFile.open(info, 'w') сожмёт запись.
+    
+    Args:
+        info: Заголовок записи
+        level: Уровень deflate (None - уровень архива)
+    """
+    setattr(info, _COMPRESS_LEVEL_ATTR, level)
+
+
+def check_compression_profile(
+    profile: str = ARCHIVE_COMPRESSION_PROFILE,
+    profiles: Dict[str, int] = COMPRESSION_PROFILES
+) -> int:
+    """
+    Проверяет профиль сжатия из конфигурации (вызывается при запуске бота).
+    
+    Args:
+        profile: Название профиля
+        profiles: Профили и их уровни zlib
+    
+    Returns:
+        Уровень сжатия профиля
+    
+    Raises:
+        ConfigurationError: Если профиль неизвестен
+    """
+    if profile not in profiles:
+        raise ConfigurationError(LOG_COMPRESSION_PROFILE_UNKNOWN.format(profile, ", ".join(profiles)))
+    return profiles[profile]
+
+
+class CompressionPolicy:
+    """
+    Решает, сжимать ли файл и с каким уровнем.
+    
+    Уже сжатые форматы (изображения, скомпилированные каталоги ассетов,
+    вложенные архивы) сохраняются без сжатия. Для файлов неизвестного типа
+    сжимаемость оценивается по выборке из начала, середины и конца файла.
+    Решение зависит только от имени и содержимого, поэтому архив остаётся
+    детерминированным.
+    """
+    
+    def __init__(
+        self,
+        level: int = ARCHIVE_COMPRESSION_LEVEL,
+        stored_extensions: FrozenSet[str] = COMPRESSION_STORED_EXTENSIONS,
+        sample_min_bytes: int = COMPRESSION_SAMPLE_MIN_BYTES,
+        sample_bytes: int = COMPRESSION_SAMPLE_BYTES,
+        min_savings: float = COMPRESSION_MIN_SAVINGS
+    ):
+        """
+        Args:
+            level: Уровень deflate для сжимаемых файлов
+            stored_extensions: Расширения (в нижнем регистре, с точкой), которые не сжимаются
+            sample_min_bytes: Файлы меньше этого размера сжимаются без оценки
+            sample_bytes: Размер каждого из трёх фрагментов выборки
+            min_savings: Минимальная доля экономии на выборке, при которой файл сжимается
+        """
+        self.level = level
+        self.stored_extensions = stored_extensions
+        self.sample_min_bytes = sample_min_bytes
+        self.sample_bytes = sample_bytes
+        self.min_savings = min_savings
+    
+    def _read_sample(self, file_path: str, size: int) -> bytes:
+        """Читает фрагменты из начала, середины и конца файла."""
+        chunk = self.sample_bytes
+        with open(file_path, 'rb') as f:
+            if size <= chunk * 3:
+                return f.read()
+            parts = [f.read(chunk)]
+            for offset in ((size - chunk) // 2, size - chunk):
+                f.seek(offset)
+                parts.append(f.read(chunk))
+        return b''.join(parts)
+    
+    def is_compressible(self, file_path: str, size: Optional[int] = None) -> bool:
+        """
+        Оценивает, уменьшится ли файл при сжатии.
+        
+        Args:
+            file_path: Путь к файлу
+            size: Размер файла (читается с диска, если не передан)
+        
+        Returns:
+            True, если выборка сжимается хотя бы на min_savings
+        """
+        if size is None:
+            size = os.path.getsize(file_path)
+        if size < self.sample_min_bytes:
+            return True
+        sample = self._read_sample(file_path, size)
+        if not sample:
+            return True
+        savings = 1 - len(zlib.compress(sample, _SAMPLE_LEVEL)) / len(sample)
+        return savings >= self.min_savings
+    
+    def choose(self, name: str, file_path: str) -> Tuple[int, Optional[int]]:
+        """
+        Выбирает метод и уровень сжатия записи.
+        
+        Args:
+            name: Имя записи в архиве
+            file_path: Путь к файлу с содержимым
+        
+        Returns:
+            Tuple (метод сжатия zipfile, уровень или None для ZIP_STORED)
+        """
+        if os.path.splitext(name)[1].lower() in self.stored_extensions:
+            return zipfile.ZIP_STORED, None
+        if self.level <= 0 or not self.is_compressible(file_path):
+            return zipfile.ZIP_STORED, None
+        return zipfile.ZIP_DEFLATED, self.level
+
+
+# Политика сжатия по умолчанию (профиль ARCHIVE_COMPRESSION_PROFILE)
+compression_policy = CompressionPolicy()
@@ -0,0 +1,117 @@
+"""Локальное хранилище полученных архивов: повторная загрузка того же файла не скачивается."""
+
+import os
+import re
+import time
+import uuid
+from typing import Optional
+
+from telegram_xcode_bot.config import (
+    CONTENT_STORE_DIR,
+    CONTENT_STORE_MAX_BYTES,
+    CONTENT_STORE_TTL_SECONDS,
+)
+from telegram_xcode_bot.logger import get_logger
+from telegram_xcode_bot.utils.disk_cache import DiskCache
+
+logger = get_logger(__name__)
+
+# Допустимые символы file_unique_id (используется как имя файла)
+_FILE_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,128}$')
+
+
+class ContentStore:
+    """
+    Архивы по хешу содержимого и индекс file_unique_id Telegram -> хеш.
+    
+    Одинаковое содержимое хранится один раз, даже если пришло под разными
+    file_unique_id. Записи индекса, чей архив уже вытеснен, удаляются при
+    обращении и по истечении срока жизни.
+    """
+    
+    def __init__(
+        self,
+        directory: str = CONTENT_STORE_DIR,
+        max_bytes: int = CONTENT_STORE_MAX_BYTES,
+        ttl_seconds: float = CONTENT_STORE_TTL_SECONDS
+    ):
+        """
+        Args:
+            directory: Директория хранилища
+            max_bytes: Дисковый бюджет для архивов (0 - хранилище отключено)
+            ttl_seconds: Время жизни архива и записи индекса
+        """
+        self.blobs = DiskCache(os.path.join(directory, 'blobs'), max_bytes, ttl_seconds, name="полученные архивы")
+        self.ids_dir = os.path.join(directory, 'ids')
+        self.ttl_seconds = ttl_seconds
+    
+    def _id_path(self, file_unique_id: str) -> Optional[str]:
+        """Путь записи индекса или None, если идентификатор нельзя использовать как имя файла."""
+        if not file_unique_id or not _FILE_ID_PATTERN.match(file_unique_id):
+            return None
+        return os.path.join(self.ids_dir, file_unique_id)
+    
+    def get(self, file_unique_id: str, destination: str) -> Optional[str]:
+        """
+        Копирует ранее полученный архив в destination.
+        
+        Args:
+            file_unique_id: Постоянный идентификатор файла Telegram
+            destination: Путь, по которому нужно получить архив
+        
+        Returns:
+            Хеш содержимого архива или None, если архива нет в хранилище
+        """
+        id_path = self._id_path(file_unique_id)
+        if id_path is None or not self.blobs.enabled:
+            return None
+        try:
+            with open(id_path, 'r', encoding='ascii') as f:
+                content_hash = f.read().strip()
+        except (OSError, ValueError):
+            return None
+        if self.blobs.get(content_hash, destination) is None:
+            # Архив вытеснен или устарел: запись индекса больше не нужна
+            try:
+                os.unlink(id_path)
+            except OSError:
+                pass
+            return None
+        logger.info(f"Архив {file_unique_id} взят из хранилища без скачивания")
+        return content_hash
+    
+    def put(self, content_hash: str, source: str, file_unique_id: Optional[str] = None) -> None:
+        """
+        Сохраняет архив и связывает с ним file_unique_id.
+        
+        Args:
+            content_hash: Хеш содержимого архива
+            source: Путь к архиву
+            file_unique_id: Постоянный идентификатор файла Telegram
+        """
+        if not self.blobs.put(content_hash, source):
+            return
+        id_path = self._id_path(file_unique_id)
+        if id_path is None:
+            return
+        os.makedirs(self.ids_dir, exist_ok=True)
+        temp_path = f"{id_path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, 'w', encoding='ascii') as f:
+            f.write(content_hash)
+        os.replace(temp_path, id_path)
+        self._prune_ids()
+    
+    def _prune_ids(self) -> None:
+        """Удаляет устаревшие записи индекса."""
+        deadline = time.time() - self.ttl_seconds
+        for name in os.listdir(self.ids_dir):
+            path = os.path.join(self.ids_dir, name)
+            try:
+                if os.path.getmtime(path) < deadline:
+                    os.unlink(path)
+            except OSError:
+                pass
+
+
+# Глобальное хранилище полученных архивов
+content_store = ContentStore()
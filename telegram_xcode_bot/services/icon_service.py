@@ -1,5 +1,6 @@
 """Сервис для работы с иконками приложения."""
 
+import io
 import json
 from pathlib import Path
 from typing import Optional, Tuple
@@ -7,11 +8,24 @@ from PIL import Image
 
 from telegram_xcode_bot.logger import get_logger
 from telegram_xcode_bot.exceptions import IconProcessingError
+from telegram_xcode_bot.services.project_workspace import ProjectWorkspace, scan_workspace
+from telegram_xcode_bot.utils.disk_cache import write_file_atomic
 
 logger = get_logger(__name__)
 
 
-def replace_app_icon(project_dir: str, new_icon_path: str) -> bool:
+def _save_png(img: Image.Image, path: Path) -> None:
+    """Сохраняет PNG, заменяя файл (он может быть жёсткой ссылкой на распакованную копию архива)."""
+    buffer = io.BytesIO()
+    img.save(buffer, 'PNG')
+    write_file_atomic(str(path), buffer.getvalue())
+
+
+def replace_app_icon(
+    project_dir: str,
+    new_icon_path: str,
+    workspace: Optional[ProjectWorkspace] = None
+) -> bool:
     """
     Заменяет иконку приложения в проекте.
     
@@ -21,17 +35,19 @@ def replace_app_icon(project_dir: str, new_icon_path: str) -> bool:
     Args:
         project_dir: Путь к директории проекта
         new_icon_path: Путь к новой иконке
+        workspace: Готовый индекс файлов проекта (без повторного обхода)
     
     Returns:
         True если успешно заменено
-        
+    
     Raises:
         IconProcessingError: При ошибке обработки иконки
     """
     try:
         # Ищем Assets.xcassets/AppIcon.appiconset
-        project_path = Path(project_dir)
-        appiconset_paths = list(project_path.rglob('Assets.xcassets/AppIcon.appiconset'))
+        if workspace is None:
+            workspace = scan_workspace(project_dir)
+        appiconset_paths = [Path(path) for path in workspace.get_appiconset_dirs(project_dir)]
         
         if not appiconset_paths:
             logger.warning("Не найдена папка AppIcon.appiconset")
@@ -97,15 +113,14 @@ def replace_app_icon(project_dir: str, new_icon_path: str) -> bool:
                     
                     # Сохраняем иконку с нужным именем
                     target_icon = appiconset_path / filename
-                    img.save(str(target_icon), 'PNG')
+                    _save_png(img, target_icon)
                     
                     logger.info(f"Создан файл иконки: {filename}")
                     updated_count += 1
             
             # Сохраняем обновленный Contents.json
             if updated_count > 0:
-                with open(contents_json_path, 'w', encoding='utf-8') as f:
-                    json.dump(contents, f, indent=2)
+                write_file_atomic(str(contents_json_path), json.dumps(contents, indent=2).encode('utf-8'))
                 
                 logger.info(f"Обновлено {updated_count} иконок в {appiconset_path}")
                 icon_replaced = True
@@ -113,7 +128,7 @@ def replace_app_icon(project_dir: str, new_icon_path: str) -> bool:
                 # Если не нашли записи 1024x1024, просто сохраняем как AppIcon-1024.png
                 logger.warning(f"Не найдены записи 1024x1024 в Contents.json, сохраняем как AppIcon-1024.png")
                 target_icon = appiconset_path / 'AppIcon-1024.png'
-                img.save(str(target_icon), 'PNG')
+                _save_png(img, target_icon)
                 icon_replaced = True
         
         return icon_replaced
@@ -130,7 +145,7 @@ def convert_png_to_jpeg(image_path: str, output_path: str, quality: int = 95) ->
         image_path: Путь к PNG изображению
         output_path: Путь для сохранения JPEG
         quality: Качество JPEG (0-100)
-        
+    
     Raises:
         IconProcessingError: При ошибке конвертации
     """
@@ -156,6 +171,28 @@ def convert_png_to_jpeg(image_path: str, output_path: str, quality: int = 95) ->
         raise IconProcessingError(f"Не удалось конвертировать изображение: {str(e)}")
 
 
+def read_image_info(image_path: str) -> Tuple[Optional[str], int, int, str]:
+    """
+    Читает формат, размер и режим изображения (без декодирования пикселей).
+    
+    Args:
+        image_path: Путь к изображению
+    
+    Returns:
+        Tuple (формат, ширина, высота, режим)
+    
+    Raises:
+        IconProcessingError: Если файл не является изображением
+    """
+    try:
+        with Image.open(image_path) as img:
+            width, height = img.size
+            return img.format, width, height, img.mode
+    except Exception as e:
+        logger.error(f"Ошибка при чтении изображения: {e}")
+        raise IconProcessingError(f"Не удалось прочитать изображение: {str(e)}")
+
+
 def validate_icon(image_path: str) -> Tuple[bool, Optional[str]]:
     """
     Проверяет изображение на соответствие требованиям иконки.
@@ -0,0 +1,127 @@
+"""Параллельное сжатие файлов для записи в zip архив."""
+
+import os
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Deque, Iterator, List, Optional, Sequence, Tuple
+
+from telegram_xcode_bot.config import ARCHIVE_COMPRESS_WORKERS, ARCHIVE_PARALLEL_MAX_BUFFER_BYTES
+from telegram_xcode_bot.services.compression_policy import CompressionPolicy, set_compress_level
+from telegram_xcode_bot.utils.cancellation import CancellationToken, raise_if_cancelled
+
+# Размер блока чтения файла при сжатии
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass
+class CompressedEntry:
+    """Сжатая запись, готовая к записи в архив."""
+    # Заголовок с заполненными методом сжатия, CRC и размерами
+    info: zipfile.ZipInfo
+    data: bytes
+
+
+def compress_file(file_path: str, compress_type: int, level: Optional[int]) -> Tuple[bytes, int, int]:
+    """
+    Сжимает файл так же, как ZipFile.write (raw deflate, wbits=-15).
+    
+    Args:
+        file_path: Путь к файлу
+        compress_type: ZIP_DEFLATED или ZIP_STORED
+        level: Уровень deflate (None - уровень zlib по умолчанию)
+    
+    Returns:
+        Tuple (сжатые данные, CRC32, исходный размер)
+    """
+    compressor = None
+    if compress_type == zipfile.ZIP_DEFLATED:
+        compressor = zlib.compressobj(
+            zlib.Z_DEFAULT_COMPRESSION if level is None else level, zlib.DEFLATED, -15
+        )
+    parts = []
+    crc = 0
+    size = 0
+    with open(file_path, 'rb') as f:
+        while True:
+            chunk = f.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+            parts.append(compressor.compress(chunk) if compressor is not None else chunk)
+    if compressor is not None:
+        parts.append(compressor.flush())
+    return b''.join(parts), crc, size
+
+
+def compress_entry(file_path: str, info: zipfile.ZipInfo, policy: CompressionPolicy) -> CompressedEntry:
+    """
+    Выбирает способ сжатия по политике и сжимает файл.
+    
+    Args:
+        file_path: Путь к файлу
+        info: Заголовок записи (время, права; метод сжатия заполняется здесь)
+        policy: Политика сжатия
+    
+    Returns:
+        CompressedEntry
+    """
+    compress_type, level = policy.choose(info.filename, file_path)
+    data, crc, size = compress_file(file_path, compress_type, level)
+    info.compress_type = compress_type
+    set_compress_level(info, level)
+    info.CRC = crc
+    info.file_size = size
+    info.compress_size = len(data)
+    return CompressedEntry(info=info, data=data)
+
+
+def compress_entries(
+    entries: Sequence[Tuple[str, zipfile.ZipInfo]],
+    policy: CompressionPolicy,
+    workers: int = ARCHIVE_COMPRESS_WORKERS,
+    max_buffer_bytes: int = ARCHIVE_PARALLEL_MAX_BUFFER_BYTES,
+    cancel_token: Optional[CancellationToken] = None
+) -> Iterator[CompressedEntry]:
+    """
+    Сжимает файлы в пуле потоков и отдаёт результаты в исходном порядке.
+    
+    zlib освобождает GIL на время сжатия, поэтому записи сжимаются на разных
+    ядрах. Одновременно в работе не больше max_buffer_bytes исходных данных
+    (но всегда хотя бы одна запись), что ограничивает расход памяти.
+    
+    Args:
+        entries: Пары (путь к файлу, заголовок записи) в порядке записи в архив
+        policy: Политика сжатия
+        workers: Количество потоков
+        max_buffer_bytes: Лимит суммарного размера сжимаемых одновременно файлов
+        cancel_token: Токен отмены, проверяется перед каждой записью
+    
+    Yields:
+        CompressedEntry в порядке entries
+    
+    Raises:
+        JobCancelledError: Если задача отменена
+    """
+    pending: Deque[Tuple[int, "Future[CompressedEntry]"]] = deque()
+    buffered = 0
+    next_index = 0
+    sizes: List[int] = [os.path.getsize(path) for path, _ in entries]
+    executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='deflate')
+    try:
+        while next_index < len(entries) or pending:
+            while next_index < len(entries) and (not pending or buffered + sizes[next_index] <= max_buffer_bytes):
+                path, info = entries[next_index]
+                pending.append((sizes[next_index], executor.submit(compress_entry, path, info, policy)))
+                buffered += sizes[next_index]
+                next_index += 1
+            size, future = pending.popleft()
+            raise_if_cancelled(cancel_token)
+            entry = future.result()
+            buffered -= size
+            yield entry
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,468 @@
+"""Разбор project.pbxproj (OpenStep plist) в индексированный граф объектов."""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from telegram_xcode_bot.config import PBXPROJ_INDEX_CACHE_MAX_ENTRIES, PBXPROJ_INDEX_CACHE_MAX_BYTES
+from telegram_xcode_bot.exceptions import PbxprojParseError
+from telegram_xcode_bot.logger import get_logger
+from telegram_xcode_bot.services.snapshot_cache import SnapshotCache
+from telegram_xcode_bot.utils.hashing import compute_bytes_hash
+
+logger = get_logger(__name__)
+
+# Пробелы и комментарии между токенами
+_SKIP_RE = re.compile(rb'(?:\s+|/\*.*?\*/|//[^\n]*)*', re.S)
+
+# Токены OpenStep plist: строка в кавычках, строка без кавычек, данные <...>, пунктуация
+_TOKEN_RE = re.compile(
+    rb'(?P<quoted>"(?:[^"\\]|\\.)*")'
+    rb'|(?P<word>[A-Za-z0-9_$+/:.\-]+)'
+    rb'|(?P<data><[0-9A-Fa-f\s]*>)'
+    rb'|(?P<punct>[{}();=,])',
+    re.S
+)
+
+# Escape-последовательности внутри строк в кавычках
+_ESCAPE_RE = re.compile(r'\\(.)', re.S)
+_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r'}
+
+# Значения, которые можно записать без кавычек
+_UNQUOTED_RE = re.compile(r'[A-Za-z0-9_$+/:.\-]+')
+
+# Объекты графа, нужные для индекса. Xcode всегда пишет isa первым ключом объекта
+_INDEXED_ISA_RE = re.compile(
+    rb'isa\s*=\s*(PBXProject|PBXNativeTarget|XCConfigurationList|XCBuildConfiguration)\s*;'
+)
+
+# Символы идентификатора объекта без кавычек
+_OBJECT_ID_CHARS = frozenset(b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_')
+
+# Сколько байт перед '{' просматривать в поисках идентификатора объекта
+_HEADER_WINDOW = 256
+
+APPLICATION_PRODUCT_TYPE = 'com.apple.product-type.application'
+
+
+class PlistDict(dict):
+    """
+    Словарь plist с позициями значений в исходных байтах.
+    
+    spans[key] - (start, end) значения ключа, включая кавычки или скобки.
+    start/end - позиции '{' и байта после '}'.
+    """
+    
+    def __init__(self, start: int = 0):
+        super().__init__()
+        self.spans: Dict[str, Tuple[int, int]] = {}
+        self.start = start
+        self.end = start
+
+
+def _decode_quoted(raw: bytes) -> str:
+    """Декодирует строку в кавычках с escape-последовательностями."""
+    text = raw[1:-1].decode('utf-8')
+    if '\\' not in text:
+        return text
+    return _ESCAPE_RE.sub(lambda m: _ESCAPES.get(m.group(1), m.group(1)), text)
+
+
+def quote_value(value: str, force_quotes: bool = False) -> str:
+    """
+    Форматирует строку для записи в pbxproj.
+    
+    Args:
+        value: Значение
+        force_quotes: Всегда заключать в кавычки
+    
+    Returns:
+        Значение без кавычек, если это допустимо, иначе в кавычках с экранированием
+    """
+    if not force_quotes and _UNQUOTED_RE.fullmatch(value):
+        return value
+    escaped = value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return f'"{escaped}"'
+
+
+class _Parser:
+    """Рекурсивный разбор OpenStep plist, работающий с байтами."""
+    
+    def __init__(self, data: bytes):
+        self.data = data
+    
+    def _token(self, pos: int) -> Tuple[str, bytes, int, int]:
+        """Возвращает (тип, текст, начало, конец) следующего токена после pos."""
+        pos = _SKIP_RE.match(self.data, pos).end()
+        match = _TOKEN_RE.match(self.data, pos)
+        if match is None:
+            if pos >= len(self.data):
+                raise PbxprojParseError("Неожиданный конец project.pbxproj")
+            raise PbxprojParseError(f"Неожиданный символ в project.pbxproj на позиции {pos}")
+        return match.lastgroup, match.group(), pos, match.end()
+    
+    def _expect(self, pos: int, punct: bytes) -> int:
+        """Проверяет, что следующий токен - punct, и возвращает позицию после него."""
+        kind, text, start, end = self._token(pos)
+        if kind != 'punct' or text != punct:
+            raise PbxprojParseError(
+                f"Ожидался '{punct.decode()}' на позиции {start}, найдено '{text.decode('utf-8', 'replace')}'"
+            )
+        return end
+    
+    def parse_value(self, pos: int) -> Tuple[Any, int, int]:
+        """
+        Разбирает значение, начинающееся после pos.
+        
+        Returns:
+            Tuple (значение, начало, конец)
+        """
+        kind, text, start, end = self._token(pos)
+        if kind == 'quoted':
+            return _decode_quoted(text), start, end
+        if kind == 'word':
+            return text.decode('utf-8'), start, end
+        if kind == 'data':
+            return bytes.fromhex(text[1:-1].decode('ascii')), start, end
+        if text == b'{':
+            value = self.parse_dict_body(start)
+            return value, start, value.end
+        if text == b'(':
+            return self.parse_array_body(start)
+        raise PbxprojParseError(f"Неожиданный токен '{text.decode()}' на позиции {start}")
+    
+    def parse_dict_body(self, brace: int) -> PlistDict:
+        """Разбирает словарь, открывающая скобка которого стоит в позиции brace."""
+        result = PlistDict(brace)
+        pos = brace + 1
+        while True:
+            kind, text, start, end = self._token(pos)
+            if kind == 'punct' and text == b'}':
+                result.end = end
+                return result
+            if kind == 'quoted':
+                key = _decode_quoted(text)
+            elif kind == 'word':
+                key = text.decode('utf-8')
+            else:
+                raise PbxprojParseError(f"Ожидался ключ словаря на позиции {start}")
+            pos = self._expect(end, b'=')
+            value, value_start, value_end = self.parse_value(pos)
+            result[key] = value
+            result.spans[key] = (value_start, value_end)
+            pos = self._expect(value_end, b';')
+    
+    def parse_array_body(self, paren: int) -> Tuple[List[Any], int, int]:
+        """Разбирает массив, открывающая скобка которого стоит в позиции paren."""
+        items: List[Any] = []
+        pos = paren + 1
+        while True:
+            kind, text, start, end = self._token(pos)
+            if kind == 'punct' and text == b')':
+                return items, paren, end
+            value, _, value_end = self.parse_value(pos)
+            items.append(value)
+            kind, text, start, end = self._token(value_end)
+            if kind == 'punct' and text == b',':
+                pos = end
+            elif kind == 'punct' and text == b')':
+                return items, paren, end
+            else:
+                raise PbxprojParseError(f"Ожидалась ',' или ')' на позиции {start}")
+
+
+def parse_plist(data: bytes) -> Any:
+    """
+    Полностью разбирает OpenStep plist.
+    
+    Args:
+        data: Содержимое файла
+    
+    Returns:
+        Корневое значение (для pbxproj - PlistDict)
+    
+    Raises:
+        PbxprojParseError: Если файл не является корректным plist
+    """
+    try:
+        value, _, _ = _Parser(data).parse_value(0)
+    except (RecursionError, UnicodeDecodeError, ValueError) as e:
+        raise PbxprojParseError(f"Не удалось разобрать project.pbxproj: {e}")
+    return value
+
+
+@dataclass
+class BuildConfiguration:
+    """XCBuildConfiguration: именованный набор build settings."""
+    object_id: str
+    name: Optional[str]
+    settings: PlistDict
+    
+    def get(self, key: str) -> Any:
+        """Возвращает значение build setting или None."""
+        return self.settings.get(key)
+    
+    def span(self, key: str) -> Optional[Tuple[int, int]]:
+        """Возвращает (start, end) значения build setting в байтах файла."""
+        return self.settings.spans.get(key)
+
+
+@dataclass
+class ConfigurationList:
+    """XCConfigurationList: конфигурации цели или проекта."""
+    object_id: str
+    configurations: List[BuildConfiguration] = field(default_factory=list)
+    default_name: Optional[str] = None
+
+
+@dataclass
+class NativeTarget:
+    """PBXNativeTarget: цель сборки."""
+    object_id: str
+    name: Optional[str]
+    product_type: Optional[str]
+    configuration_list: Optional[ConfigurationList] = None
+    
+    @property
+    def configurations(self) -> List[BuildConfiguration]:
+        """Конфигурации сборки цели."""
+        return self.configuration_list.configurations if self.configuration_list else []
+
+
+@dataclass
+class PbxprojIndex:
+    """
+    Граф PBXNativeTarget -> XCConfigurationList -> XCBuildConfiguration -> buildSettings.
+    
+    Позиции значений указаны в байтах исходного файла, поэтому изменения можно
+    вставлять через splice() без повторной сериализации.
+    """
+    targets: List[NativeTarget] = field(default_factory=list)
+    project_configuration_list: Optional[ConfigurationList] = None
+    # Все XCBuildConfiguration в порядке следования в файле
+    configurations: Dict[str, BuildConfiguration] = field(default_factory=dict)
+    
+    def application_targets(self) -> List[NativeTarget]:
+        """Возвращает цели, собирающие приложение."""
+        return [t for t in self.targets if t.product_type == APPLICATION_PRODUCT_TYPE]
+    
+    def _ordered_configurations(self) -> Iterator[BuildConfiguration]:
+        """Конфигурации целей-приложений, затем остальные в порядке файла."""
+        seen = set()
+        for target in self.application_targets():
+            for configuration in target.configurations:
+                seen.add(configuration.object_id)
+                yield configuration
+        for object_id, configuration in self.configurations.items():
+            if object_id not in seen:
+                yield configuration
+    
+    def find_setting(self, key: str) -> Optional[str]:
+        """
+        Возвращает строковое значение build setting, предпочитая цели-приложения.
+        
+        Args:
+            key: Имя build setting
+        
+        Returns:
+            Значение или None
+        """
+        for configuration in self._ordered_configurations():
+            value = configuration.get(key)
+            if isinstance(value, str):
+                return value
+        return None
+    
+    def iter_settings(self, key: str) -> Iterator[Tuple[BuildConfiguration, Any, Tuple[int, int]]]:
+        """
+        Перебирает все вхождения build setting в порядке файла.
+        
+        Yields:
+            Tuple (конфигурация, значение, (start, end))
+        """
+        for configuration in self.configurations.values():
+            span = configuration.span(key)
+            if span is not None:
+                yield configuration, configuration.get(key), span
+
+
+def _object_id_before(data: bytes, brace: int) -> Optional[str]:
+    """
+    Находит идентификатор объекта, записанный перед открывающей скобкой.
+    
+    Заголовок 'ID /* комментарий */ = {' разбирается с конца, без regex-поиска по окну.
+    """
+    window = data[max(0, brace - _HEADER_WINDOW):brace].rstrip()
+    if not window.endswith(b'='):
+        return None
+    window = window[:-1].rstrip()
+    if window.endswith(b'*/'):
+        comment = window.rfind(b'/*')
+        if comment == -1:
+            return None
+        window = window[:comment].rstrip()
+    if window.endswith(b'"'):
+        quote = window.rfind(b'"', 0, len(window) - 1)
+        return _decode_quoted(window[quote:]) if quote != -1 else None
+    pos = len(window)
+    while pos and window[pos - 1] in _OBJECT_ID_CHARS:
+        pos -= 1
+    return window[pos:].decode('ascii') if pos < len(window) else None
+
+
+def _find_indexed_objects(data: bytes) -> Optional[Dict[str, PlistDict]]:
+    """
+    Быстрый путь: разбирает только объекты нужных типов, находя их по 'isa = ...;'.
+    
+    Returns:
+        Словарь id -> объект или None, если структура файла не подходит для быстрого пути
+    """
+    parser = _Parser(data)
+    objects: Dict[str, PlistDict] = {}
+    for match in _INDEXED_ISA_RE.finditer(data):
+        brace = data.rfind(b'{', 0, match.start())
+        # isa должен быть первым ключом объекта: между '{' и isa только пробелы
+        if brace == -1 or data[brace + 1:match.start()].strip():
+            return None
+        object_id = _object_id_before(data, brace)
+        if object_id is None:
+            return None
+        objects[object_id] = parser.parse_dict_body(brace)
+    return objects
+
+
+def _find_all_objects(data: bytes) -> Dict[str, PlistDict]:
+    """Медленный путь: полный разбор файла и выбор секции objects."""
+    root = parse_plist(data)
+    objects = root.get('objects') if isinstance(root, dict) else None
+    if not isinstance(objects, dict):
+        raise PbxprojParseError("В project.pbxproj нет секции objects")
+    return {k: v for k, v in objects.items() if isinstance(v, PlistDict)}
+
+
+def _configuration_list(
+    objects: Dict[str, PlistDict],
+    configurations: Dict[str, BuildConfiguration],
+    list_id: Any
+) -> Optional[ConfigurationList]:
+    """Собирает XCConfigurationList по идентификатору."""
+    obj = objects.get(list_id) if isinstance(list_id, str) else None
+    if obj is None or obj.get('isa') != 'XCConfigurationList':
+        return None
+    configuration_list = ConfigurationList(
+        object_id=list_id,
+        default_name=obj.get('defaultConfigurationName'),
+    )
+    for configuration_id in obj.get('buildConfigurations') or []:
+        configuration = configurations.get(configuration_id)
+        if configuration is not None:
+            configuration_list.configurations.append(configuration)
+    return configuration_list
+
+
+def build_index(data: bytes) -> PbxprojIndex:
+    """
+    Строит индекс целей и конфигураций сборки project.pbxproj.
+    
+    Разбираются только объекты PBXProject, PBXNativeTarget, XCConfigurationList
+    и XCBuildConfiguration; если их не удаётся найти по 'isa', файл разбирается целиком.
+    
+    Args:
+        data: Содержимое project.pbxproj
+    
+    Returns:
+        PbxprojIndex
+    
+    Raises:
+        PbxprojParseError: Если файл не удалось разобрать
+    """
+    try:
+        objects = _find_indexed_objects(data)
+    except (PbxprojParseError, RecursionError, UnicodeDecodeError, ValueError) as e:
+        logger.info(f"Быстрый разбор project.pbxproj не удался ({e}), выполняется полный разбор")
+        objects = None
+    if objects is None:
+        objects = _find_all_objects(data)
+    
+    index = PbxprojIndex()
+    for object_id, obj in objects.items():
+        if obj.get('isa') == 'XCBuildConfiguration':
+            settings = obj.get('buildSettings')
+            if not isinstance(settings, PlistDict):
+                settings = PlistDict()
+            index.configurations[object_id] = BuildConfiguration(
+                object_id=object_id,
+                name=obj.get('name'),
+                settings=settings,
+            )
+    
+    for object_id, obj in objects.items():
+        isa = obj.get('isa')
+        if isa == 'PBXNativeTarget':
+            index.targets.append(NativeTarget(
+                object_id=object_id,
+                name=obj.get('name'),
+                product_type=obj.get('productType'),
+                configuration_list=_configuration_list(
+                    objects, index.configurations, obj.get('buildConfigurationList')
+                ),
+            ))
+        elif isa == 'PBXProject':
+            index.project_configuration_list = _configuration_list(
+                objects, index.configurations, obj.get('buildConfigurationList')
+            )
+    return index
+
+
+# Глобальный кеш индексов: один и тот же файл не разбирается повторно
+pbxproj_index_cache = SnapshotCache(
+    max_entries=PBXPROJ_INDEX_CACHE_MAX_ENTRIES,
+    max_bytes=PBXPROJ_INDEX_CACHE_MAX_BYTES,
+)
+
+
+def get_pbxproj_index(data: bytes) -> PbxprojIndex:
+    """
+    Возвращает индекс project.pbxproj из кеша или строит его.
+    
+    Args:
+        data: Содержимое project.pbxproj
+    
+    Returns:
+        PbxprojIndex (не должен изменяться вызывающим кодом)
+    
+    Raises:
+        PbxprojParseError: Если файл не удалось разобрать
+    """
+    key = compute_bytes_hash(data)
+    index = pbxproj_index_cache.get(key)
+    if index is None:
+        index = build_index(data)
+        pbxproj_index_cache.put(key, index)
+    return index
+
+
+def splice(data: bytes, edits: Sequence[Tuple[int, int, bytes]]) -> bytes:
+    """
+    Заменяет диапазоны байт, не трогая остальной файл.
+    
+    Args:
+        data: Исходное содержимое
+        edits: Список (start, end, новые байты)
+    
+    Returns:
+        Новое содержимое
+    
+    Raises:
+        ValueError: Если диапазоны пересекаются
+    """
+    parts = []
+    pos = 0
+    for start, end, replacement in sorted(edits, key=lambda edit: edit[0]):
+        if start < pos:
+            raise ValueError(f"Пересекающиеся изменения на позиции {start}")
+        parts.append(data[pos:start])
+        parts.append(replacement)
+        pos = end
+    parts.append(data[pos:])
+    return b''.join(parts)
@@ -0,0 +1,172 @@
+"""Индекс файлов проекта, построенный за один обход дерева."""
+
+import os
+from dataclasses import dataclass, field
+from typing import AbstractSet, Dict, Iterable, List
+
+from telegram_xcode_bot.config import SCAN_IGNORED_DIRS
+from telegram_xcode_bot.logger import get_logger
+from telegram_xcode_bot.services.zip_fs import normalize_zip_path
+
+logger = get_logger(__name__)
+
+# Маркер пути к набору иконок приложения
+APPICONSET_MARKER = '/Assets.xcassets/AppIcon.appiconset/'
+
+
+def is_ignored_path(rel_path: str, ignored_dirs: AbstractSet[str] = SCAN_IGNORED_DIRS) -> bool:
+    """
+    Проверяет, лежит ли файл внутри игнорируемой директории.
+    
+    Args:
+        rel_path: Путь файла (posix) относительно корня проекта или архива
+        ignored_dirs: Имена игнорируемых директорий
+    
+    Returns:
+        True, если одна из директорий пути входит в ignored_dirs
+    """
+    if not ignored_dirs:
+        return False
+    return any(part in ignored_dirs for part in rel_path.split('/')[:-1])
+
+
+@dataclass
+class ProjectWorkspace:
+    """
+    Классифицированный список файлов проекта.
+    
+    Все пути хранятся относительными (posix) от root. Если root пустой,
+    индекс описывает записи архива и пути совпадают с именами записей.
+    Файлы внутри игнорируемых директорий (ignored_dirs) в индекс не попадают.
+    """
+    root: str = ''
+    ignored_dirs: AbstractSet[str] = SCAN_IGNORED_DIRS
+    files: List[str] = field(default_factory=list)
+    project_files: List[str] = field(default_factory=list)
+    swift_files: List[str] = field(default_factory=list)
+    # Директория AppIcon.appiconset -> None (упорядоченное множество)
+    appiconset_dirs: Dict[str, None] = field(default_factory=dict)
+    
+    @classmethod
+    def from_names(
+        cls,
+        names: Iterable[str],
+        root: str = '',
+        ignored_dirs: AbstractSet[str] = SCAN_IGNORED_DIRS
+    ) -> "ProjectWorkspace":
+        """
+        Строит индекс по готовому списку относительных путей (например, записей архива).
+        
+        Args:
+            names: Относительные пути файлов
+            root: Директория, от которой отсчитываются пути
+            ignored_dirs: Имена игнорируемых директорий
+        
+        Returns:
+            ProjectWorkspace
+        """
+        workspace = cls(root=root, ignored_dirs=ignored_dirs)
+        for name in names:
+            if not is_ignored_path(name, ignored_dirs):
+                workspace.add_file(name)
+        return workspace
+    
+    def add_file(self, rel_path: str) -> None:
+        """
+        Добавляет файл в индекс и относит его к нужным категориям.
+        
+        Args:
+            rel_path: Путь файла относительно root
+        """
+        self.files.append(rel_path)
+        if rel_path.rsplit('/', 1)[-1] == 'project.pbxproj':
+            self.project_files.append(rel_path)
+        elif rel_path.endswith('.swift'):
+            self.swift_files.append(rel_path)
+        
+        index = ('/' + rel_path).find(APPICONSET_MARKER)
+        if index != -1:
+            self.appiconset_dirs[rel_path[:index + len(APPICONSET_MARKER) - 2]] = None
+    
+    def path_for(self, rel_path: str) -> str:
+        """
+        Преобразует относительный путь в путь, пригодный для открытия.
+        
+        Args:
+            rel_path: Путь относительно root
+        
+        Returns:
+            Путь на диске или имя записи архива (если root пустой)
+        """
+        if not self.root:
+            return rel_path
+        return os.path.join(self.root, *rel_path.split('/'))
+    
+    def _relative_dir(self, directory: str) -> str:
+        """Возвращает директорию относительно root в виде posix пути."""
+        if self.root:
+            directory = os.path.relpath(directory, self.root).replace(os.sep, '/')
+        return normalize_zip_path(directory)
+    
+    def _select(self, rel_paths: Iterable[str], directory: str) -> List[str]:
+        """Отбирает пути, лежащие внутри directory, и преобразует их через path_for."""
+        prefix = self._relative_dir(directory)
+        if prefix == '..' or prefix.startswith('../'):
+            return []
+        if prefix:
+            prefix += '/'
+        return [self.path_for(p) for p in rel_paths if p.startswith(prefix)]
+    
+    def get_project_files(self, directory: str = '') -> List[str]:
+        """Возвращает пути project.pbxproj внутри directory."""
+        return self._select(self.project_files, directory or self.root)
+    
+    def get_swift_files(self, directory: str = '') -> List[str]:
+        """Возвращает пути файлов .swift внутри directory."""
+        return self._select(self.swift_files, directory or self.root)
+    
+    def get_appiconset_dirs(self, directory: str = '') -> List[str]:
+        """Возвращает пути директорий AppIcon.appiconset внутри directory."""
+        return self._select(self.appiconset_dirs, directory or self.root)
+
+
+def scan_workspace(root: str, ignored_dirs: AbstractSet[str] = SCAN_IGNORED_DIRS) -> ProjectWorkspace:
+    """
+    Обходит дерево директорий один раз (os.scandir) и строит индекс файлов.
+    
+    Записи каждой директории сортируются по имени, поэтому порядок
+    файлов в индексе не зависит от файловой системы. В игнорируемые
+    директории обход не заходит.
+    
+    Args:
+        root: Корневая директория
+        ignored_dirs: Имена игнорируемых директорий
+    
+    Returns:
+        ProjectWorkspace с путями относительно root
+    """
+    workspace = ProjectWorkspace(root=root, ignored_dirs=ignored_dirs)
+    stack = ['']
+    while stack:
+        rel_dir = stack.pop()
+        abs_dir = os.path.join(root, *rel_dir.split('/')) if rel_dir else root
+        try:
+            with os.scandir(abs_dir) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError as e:
+            logger.warning(f"Не удалось прочитать директорию {abs_dir}: {e}")
+            continue
+        
+        subdirs = []
+        for entry in entries:
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in ignored_dirs:
+                    subdirs.append(rel_path)
+            elif entry.is_file(follow_symlinks=False):
+                workspace.add_file(rel_path)
+        # Обход в прямом порядке: поддиректории в алфавитном порядке
+        stack.extend(reversed(subdirs))
+    
+    logger.info(f"Проиндексировано файлов: {len(workspace.files)} в {root}")
+    return workspace
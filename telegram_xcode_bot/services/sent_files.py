@@ -0,0 +1,77 @@
+"""Идентификаторы Telegram уже отправленных файлов по хешу их содержимого."""
+
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from telegram_xcode_bot.config import SENT_FILES_MAX_ENTRIES
+from telegram_xcode_bot.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class SentFileIndex:
+    """
+    LRU соответствие хеша содержимого файла и его file_id в Telegram.
+    
+    Файл, байт в байт совпадающий с уже отправленным, отправляется по file_id
+    без повторной загрузки. Все методы вызываются из event loop.
+    """
+    
+    def __init__(self, max_entries: int = SENT_FILES_MAX_ENTRIES):
+        """
+        Args:
+            max_entries: Максимальное количество запоминаемых файлов
+        """
+        self.max_entries = max_entries
+        self._file_ids: "OrderedDict[str, str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, content_hash: str) -> Optional[str]:
+        """
+        Возвращает file_id ранее отправленного файла.
+        
+        Args:
+            content_hash: Хеш содержимого файла
+        
+        Returns:
+            file_id или None
+        """
+        file_id = self._file_ids.get(content_hash)
+        if file_id is None:
+            self.misses += 1
+            return None
+        self._file_ids.move_to_end(content_hash)
+        self.hits += 1
+        return file_id
+    
+    def put(self, content_hash: str, file_id: str) -> None:
+        """
+        Запоминает file_id отправленного файла.
+        
+        Args:
+            content_hash: Хеш содержимого файла
+            file_id: Идентификатор файла, возвращённый Telegram
+        """
+        self._file_ids[content_hash] = file_id
+        self._file_ids.move_to_end(content_hash)
+        while len(self._file_ids) > self.max_entries:
+            self._file_ids.popitem(last=False)
+    
+    def invalidate(self, content_hash: str) -> None:
+        """
+        Забывает file_id, который Telegram больше не принимает.
+        
+        Args:
+            content_hash: Хеш содержимого файла
+        """
+        if self._file_ids.pop(content_hash, None) is not None:
+            logger.info(f"file_id для {content_hash[:12]} больше не действителен")
+    
+    def stats(self) -> Dict[str, int]:
+        """Возвращает статистику."""
+        return {"entries": len(self._file_ids), "hits": self.hits, "misses": self.misses}
+
+
+# Глобальный индекс отправленных файлов
+sent_files = SentFileIndex()
@@ -0,0 +1,138 @@
+"""LRU кеш прочитанной информации о проектах, ключ - хеш содержимого архива."""
+
+import dataclasses
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from telegram_xcode_bot.config import SNAPSHOT_CACHE_MAX_ENTRIES, SNAPSHOT_CACHE_MAX_BYTES
+from telegram_xcode_bot.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Приблизительно оценивает объём памяти, занимаемый объектом.
+    
+    Учитываются вложенные dataclass, списки, кортежи, словари и строки.
+    
+    Args:
+        value: Объект для оценки
+    
+    Returns:
+        Размер в байтах
+    """
+    size = sys.getsizeof(value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        size += sum(estimate_size(getattr(value, f.name)) for f in dataclasses.fields(value))
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item) for item in value)
+    elif isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    return size
+
+
+class SnapshotCache:
+    """
+    LRU кеш снимков проекта с ограничением по количеству записей и памяти.
+    
+    Ключ - хеш содержимого архива, поэтому один и тот же архив, загруженный
+    повторно или разными пользователями, разбирается только один раз.
+    Возвращаемые снимки нельзя изменять.
+    """
+    
+    def __init__(
+        self,
+        max_entries: int = SNAPSHOT_CACHE_MAX_ENTRIES,
+        max_bytes: int = SNAPSHOT_CACHE_MAX_BYTES
+    ):
+        """
+        Args:
+            max_entries: Максимальное количество снимков
+            max_bytes: Максимальный суммарный размер снимков в байтах
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Возвращает снимок по ключу и помечает его как недавно использованный.
+        
+        Args:
+            key: Хеш содержимого архива
+        
+        Returns:
+            Снимок или None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+    
+    def put(self, key: str, snapshot: Any) -> None:
+        """
+        Сохраняет снимок, вытесняя самые старые записи при превышении лимитов.
+        
+        Args:
+            key: Хеш содержимого архива
+            snapshot: Снимок проекта
+        """
+        size = estimate_size(snapshot)
+        if size > self.max_bytes:
+            logger.warning(f"Снимок {key[:12]} слишком велик для кеша: {size} байт")
+            return
+        
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total_bytes -= old[1]
+            self._entries[key] = (snapshot, size)
+            self._total_bytes += size
+            
+            while len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes:
+                evicted_key, (_, evicted_size) = self._entries.popitem(last=False)
+                self._total_bytes -= evicted_size
+                logger.info(f"Снимок {evicted_key[:12]} вытеснен из кеша")
+    
+    def invalidate(self, key: str) -> None:
+        """
+        Удаляет снимок из кеша.
+        
+        Args:
+            key: Хеш содержимого архива
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._total_bytes -= entry[1]
+    
+    def clear(self) -> None:
+        """Очищает кеш."""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+    
+    def stats(self) -> Dict[str, int]:
+        """Возвращает статистику кеша."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# Глобальный экземпляр кеша снимков
+snapshot_cache = SnapshotCache()
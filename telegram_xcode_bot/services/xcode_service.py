@@ -1,16 +1,61 @@
 """Сервис для работы с Xcode проектами."""
 
+import mmap
+import os
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Union
 from dataclasses import dataclass
 
 from telegram_xcode_bot.logger import get_logger
-from telegram_xcode_bot.exceptions import XcodeProjectError
+from telegram_xcode_bot.config import (
+    DATE_SCAN_WORKERS,
+    DATE_SCAN_PARALLEL_MIN_FILES,
+    DATE_SCAN_MMAP_MIN_BYTES,
+)
+from telegram_xcode_bot.exceptions import XcodeProjectError, PbxprojParseError
 from telegram_xcode_bot.utils.version_utils import increment_version, increment_build_number
+from telegram_xcode_bot.utils.disk_cache import write_file_atomic
+from telegram_xcode_bot.services.zip_fs import ZipFileSystem
+from telegram_xcode_bot.services.project_workspace import ProjectWorkspace, scan_workspace
+from telegram_xcode_bot.services.pbxproj_parser import (
+    PbxprojIndex,
+    get_pbxproj_index,
+    quote_value,
+    splice,
+)
 
 logger = get_logger(__name__)
 
+# Паттерн для поиска .date(from: "любые символы"); файлы сначала проверяются
+# поиском подстроки _DATE_MARKER, regex запускается только с найденной позиции
+_DATE_MARKER = b'.date(from:'
+_DATE_SEARCH_RE = re.compile(rb'\.date\(from:\s*"([^"]*)"\)')
+_DATE_REPLACE_RE = re.compile(r'(\.date\(from:\s*")([^"]*?)("\))')
+
+# Общий пул потоков для чтения файлов .swift (создаётся при первом использовании)
+_scan_executor: Optional[ThreadPoolExecutor] = None
+_scan_executor_lock = threading.Lock()
+
+# Build settings, которые бот читает и изменяет
+KNOWN_BUILD_SETTINGS: Tuple[str, ...] = (
+    'MARKETING_VERSION',
+    'CURRENT_PROJECT_VERSION',
+    'INFOPLIST_KEY_CFBundleDisplayName',
+    'PRODUCT_BUNDLE_IDENTIFIER',
+    'TARGETED_DEVICE_FAMILY',
+)
+
+# Значение build setting сразу после ключа: ' = значение;'
+_BUILD_SETTING_VALUE_RE = re.compile(r'\s*=\s*([^;]+);')
+
+# Все известные build settings одним проходом: ключ, разделитель, значение, ';'
+_BUILD_SETTING_EDIT_RE = re.compile(
+    r'(' + '|'.join(KNOWN_BUILD_SETTINGS) + r')(\s*=\s*)([^;]+)(;)'
+)
+
 
 @dataclass
 class ProjectInfo:
@@ -22,80 +67,229 @@ class ProjectInfo:
     activation_date: Optional[str] = None
 
 
-def read_project_versions(project_path: str) -> Tuple[Optional[str], Optional[str]]:
+@dataclass
+class ProjectEditPlan:
+    """Набор изменений build settings, применяемых к project.pbxproj за одну запись."""
+    increment_version: bool = False
+    new_name: Optional[str] = None
+    new_bundle_id: Optional[str] = None
+    add_ipad: bool = False
+    
+    def is_empty(self) -> bool:
+        """Проверяет, что план не содержит изменений."""
+        return not (self.increment_version or self.new_name or self.new_bundle_id or self.add_ipad)
+
+
+@dataclass
+class ProjectEditResult:
+    """Результат применения плана изменений к project.pbxproj."""
+    changed: bool = False
+    marketing_version: Optional[str] = None
+    build_version: Optional[str] = None
+    version_updated: bool = False
+    display_name_updated: bool = False
+    bundle_id_updated: bool = False
+    ipad_added: bool = False
+
+
+def _read_text(path: str, fs: Optional[ZipFileSystem] = None) -> str:
     """
-    Читает текущие версию и билд из project.pbxproj файла без изменения.
+    Читает текстовый файл с диска или из архива.
+    
+    Args:
+        path: Путь к файлу (внутри архива, если передан fs)
+        fs: Файловая система архива или None для чтения с диска
+    
+    Returns:
+        Содержимое файла
+    """
+    if fs is not None:
+        return fs.read_text(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _read_bytes(path: str, fs: Optional[ZipFileSystem] = None) -> bytes:
+    """Читает файл с диска или из архива без декодирования."""
+    if fs is not None:
+        return fs.read_bytes(path)
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _write_bytes(path: str, data: bytes) -> None:
+    """Записывает файл целиком, заменяя его (файл может быть жёсткой ссылкой)."""
+    write_file_atomic(path, data)
+
+
+def _load_index(data: bytes, project_path: str) -> Optional[PbxprojIndex]:
+    """
+    Возвращает индекс project.pbxproj или None, если в файле нет графа объектов.
+    
+    Args:
+        data: Содержимое project.pbxproj
+        project_path: Путь к файлу (для логов)
+    
+    Returns:
+        PbxprojIndex с конфигурациями сборки или None
+    """
+    try:
+        index = get_pbxproj_index(data)
+    except PbxprojParseError as e:
+        logger.warning(f"Не удалось разобрать {project_path}, используется поиск по тексту: {e}")
+        return None
+    return index if index.configurations else None
+
+
+def _list_swift_files(
+    project_dir: str,
+    fs: Optional[ZipFileSystem] = None,
+    workspace: Optional[ProjectWorkspace] = None
+) -> List[str]:
+    """
+    Возвращает файлы .swift внутри директории проекта.
+    
+    Args:
+        project_dir: Путь к директории проекта
+        fs: Файловая система архива, если поиск идёт без распаковки
+        workspace: Готовый индекс файлов проекта (без повторного обхода)
+    
+    Returns:
+        Список путей файлов .swift
+    """
+    if workspace is not None:
+        return workspace.get_swift_files(project_dir)
+    if fs is not None:
+        return ProjectWorkspace.from_names(fs.files()).get_swift_files(project_dir)
+    return scan_workspace(project_dir).get_swift_files()
+
+
+def scan_build_settings(content: str) -> Dict[str, str]:
+    """
+    Извлекает первые значения всех известных build settings из одного прочитанного файла.
+    
+    Вхождения ключей ищутся через str.find (поиск подстроки в C без прохода regex
+    по каждому символу), значение разбирается одним предкомпилированным паттерном
+    прямо с найденной позиции.
+    
+    Args:
+        content: Содержимое project.pbxproj
+    
+    Returns:
+        Словарь ключ -> значение (без кавычек) для найденных настроек
+    """
+    settings: Dict[str, str] = {}
+    for key in KNOWN_BUILD_SETTINGS:
+        pos = content.find(key)
+        while pos != -1:
+            match = _BUILD_SETTING_VALUE_RE.match(content, pos + len(key))
+            if match:
+                settings[key] = match.group(1).strip().strip('"')
+                break
+            pos = content.find(key, pos + 1)
+    return settings
+
+
+def _device_family_from_value(value: Optional[str]) -> Optional[str]:
+    """Преобразует значение TARGETED_DEVICE_FAMILY в название семейства устройств."""
+    if value is None:
+        return None
+    if value == "1":
+        return "iPhone"
+    elif value == "2":
+        return "iPad"
+    elif "1,2" in value or "2,1" in value:
+        return "Universal"
+    return None
+
+
+def read_project_settings(
+    project_path: str,
+    fs: Optional[ZipFileSystem] = None
+) -> Tuple[ProjectInfo, Optional[str]]:
+    """
+    Читает информацию о проекте и семейство устройств за одно чтение файла.
+    
+    Если файл удаётся разобрать в граф объектов, значения берутся из конфигураций
+    цели-приложения. Дата активации не ищется (см. read_project_info).
     
     Args:
         project_path: Путь к файлу project.pbxproj
+        fs: Файловая система архива, если файл читается без распаковки
     
     Returns:
-        Tuple (marketing_version, build_version)
+        Tuple (ProjectInfo, "iPhone" | "iPad" | "Universal" | None)
     """
     try:
-        with open(project_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        marketing_version = None
-        build_version = None
-        
-        # Ищем MARKETING_VERSION (например, MARKETING_VERSION = 1.0;)
-        marketing_match = re.search(r'MARKETING_VERSION\s*=\s*([^;]+);', content)
-        if marketing_match:
-            marketing_version = marketing_match.group(1).strip().strip('"')
-        
-        # Ищем CURRENT_PROJECT_VERSION (например, CURRENT_PROJECT_VERSION = 1;)
-        build_match = re.search(r'CURRENT_PROJECT_VERSION\s*=\s*([^;]+);', content)
-        if build_match:
-            build_version = build_match.group(1).strip().strip('"')
-        
-        return (marketing_version, build_version)
+        data = _read_bytes(project_path, fs)
+        index = _load_index(data, project_path)
+        if index is not None:
+            # Значения берутся из конфигураций цели-приложения, а не из первого совпадения
+            settings = {}
+            for key in KNOWN_BUILD_SETTINGS:
+                value = index.find_setting(key)
+                if value is not None:
+                    settings[key] = value
+        else:
+            settings = scan_build_settings(data.decode('utf-8'))
+        info = ProjectInfo(
+            marketing_version=settings.get('MARKETING_VERSION'),
+            build_version=settings.get('CURRENT_PROJECT_VERSION'),
+            display_name=settings.get('INFOPLIST_KEY_CFBundleDisplayName'),
+            bundle_id=settings.get('PRODUCT_BUNDLE_IDENTIFIER'),
+        )
+        return info, _device_family_from_value(settings.get('TARGETED_DEVICE_FAMILY'))
     except Exception as e:
-        logger.error(f"Ошибка при чтении версий из {project_path}: {e}")
-        return (None, None)
+        logger.error(f"Ошибка при чтении информации из {project_path}: {e}")
+        return ProjectInfo(), None
 
 
-def read_project_info(project_path: str) -> ProjectInfo:
+def read_project_versions(
+    project_path: str,
+    fs: Optional[ZipFileSystem] = None
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Читает текущие версию и билд из project.pbxproj файла без изменения.
+    
+    Args:
+        project_path: Путь к файлу project.pbxproj
+        fs: Файловая система архива, если файл читается без распаковки
+    
+    Returns:
+        Tuple (marketing_version, build_version)
+    """
+    info, _ = read_project_settings(project_path, fs)
+    return (info.marketing_version, info.build_version)
+
+
+def read_project_info(
+    project_path: str,
+    fs: Optional[ZipFileSystem] = None,
+    include_activation_date: bool = True,
+    workspace: Optional[ProjectWorkspace] = None
+) -> ProjectInfo:
     """
     Читает всю информацию из project.pbxproj файла и ищет дату активации.
     
     Args:
         project_path: Путь к файлу project.pbxproj
+        fs: Файловая система архива, если файл читается без распаковки
+        include_activation_date: Искать ли дату активации в файлах .swift
+        workspace: Готовый индекс файлов проекта (без повторного обхода)
     
     Returns:
         ProjectInfo с информацией о проекте
     """
     try:
-        with open(project_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        info = ProjectInfo()
-        
-        # Ищем MARKETING_VERSION
-        marketing_match = re.search(r'MARKETING_VERSION\s*=\s*([^;]+);', content)
-        if marketing_match:
-            info.marketing_version = marketing_match.group(1).strip().strip('"')
-        
-        # Ищем CURRENT_PROJECT_VERSION
-        build_match = re.search(r'CURRENT_PROJECT_VERSION\s*=\s*([^;]+);', content)
-        if build_match:
-            info.build_version = build_match.group(1).strip().strip('"')
-        
-        # Ищем INFOPLIST_KEY_CFBundleDisplayName
-        display_name_match = re.search(r'INFOPLIST_KEY_CFBundleDisplayName\s*=\s*([^;]+);', content)
-        if display_name_match:
-            info.display_name = display_name_match.group(1).strip().strip('"')
-        
-        # Ищем PRODUCT_BUNDLE_IDENTIFIER
-        bundle_id_match = re.search(r'PRODUCT_BUNDLE_IDENTIFIER\s*=\s*([^;]+);', content)
-        if bundle_id_match:
-            info.bundle_id = bundle_id_match.group(1).strip().strip('"')
+        info, _ = read_project_settings(project_path, fs)
         
         # Ищем дату активации в проекте (возвращаемся к корневой директории проекта)
-        project_dir = Path(project_path).parent.parent.parent
-        found, activation_date, _, _ = find_activation_date_in_project(str(project_dir))
-        if found:
-            info.activation_date = activation_date
+        if include_activation_date:
+            found, activation_date, _, _ = find_activation_date_in_project(
+                get_project_root(project_path), fs, workspace
+            )
+            if found:
+                info.activation_date = activation_date
         
         return info
     except Exception as e:
@@ -103,53 +297,139 @@ def read_project_info(project_path: str) -> ProjectInfo:
         return ProjectInfo()
 
 
-def update_project_file(project_path: str) -> Tuple[bool, Optional[str], Optional[str]]:
+def _planned_value(
+    key: str,
+    value: str,
+    plan: ProjectEditPlan,
+    result: ProjectEditResult
+) -> Optional[str]:
     """
-    Обновляет версию в project.pbxproj файле.
+    Вычисляет новое значение build setting по плану.
+    
+    Args:
+        key: Имя build setting
+        value: Текущее значение (без кавычек)
+        plan: План изменений
+        result: Результат, в который записываются новые версии
+    
+    Returns:
+        Новое значение в записи pbxproj или None, если настройка не меняется
+    """
+    if key == 'MARKETING_VERSION' and plan.increment_version:
+        result.marketing_version = increment_version(value)
+        return result.marketing_version
+    if key == 'CURRENT_PROJECT_VERSION' and plan.increment_version:
+        result.build_version = increment_build_number(value)
+        return result.build_version
+    if key == 'INFOPLIST_KEY_CFBundleDisplayName' and plan.new_name:
+        return quote_value(plan.new_name, force_quotes=True)
+    if key == 'PRODUCT_BUNDLE_IDENTIFIER' and plan.new_bundle_id:
+        return plan.new_bundle_id
+    if key == 'TARGETED_DEVICE_FAMILY' and plan.add_ipad and '2' not in value:
+        # Добавляем iPad: 1 -> "1,2" (если iPad уже есть, ничего не меняем)
+        return '"1,2"'
+    return None
+
+
+def _mark_updated(result: ProjectEditResult, key: str) -> None:
+    """Отмечает в результате, какая группа настроек изменилась."""
+    if key in ('MARKETING_VERSION', 'CURRENT_PROJECT_VERSION'):
+        result.version_updated = True
+    elif key == 'INFOPLIST_KEY_CFBundleDisplayName':
+        result.display_name_updated = True
+    elif key == 'PRODUCT_BUNDLE_IDENTIFIER':
+        result.bundle_id_updated = True
+    else:
+        result.ipad_added = True
+
+
+def _apply_plan_with_index(
+    data: bytes,
+    index: PbxprojIndex,
+    plan: ProjectEditPlan,
+    result: ProjectEditResult
+) -> bytes:
+    """Вставляет новые значения по позициям из индекса, не трогая остальной файл."""
+    edits = []
+    for key in KNOWN_BUILD_SETTINGS:
+        for _, value, (start, end) in index.iter_settings(key):
+            if not isinstance(value, str):
+                continue
+            new_value = _planned_value(key, value, plan, result)
+            if new_value is None:
+                continue
+            new_bytes = new_value.encode('utf-8')
+            if data[start:end] != new_bytes:
+                edits.append((start, end, new_bytes))
+                _mark_updated(result, key)
+    return splice(data, edits) if edits else data
+
+
+def _apply_plan_with_regex(content: str, plan: ProjectEditPlan, result: ProjectEditResult) -> str:
+    """Применяет план ко всем вхождениям настроек в тексте (файлы без графа объектов)."""
+    def replace_setting(match):
+        key, separator, raw_value, end = match.groups()
+        new_value = _planned_value(key, raw_value.strip().strip('"'), plan, result)
+        if new_value is None:
+            return match.group(0)
+        replaced = f'{key}{separator}{new_value}{end}'
+        if replaced != match.group(0):
+            _mark_updated(result, key)
+        return replaced
+    
+    return _BUILD_SETTING_EDIT_RE.sub(replace_setting, content)
+
+
+def apply_edit_plan(project_path: str, plan: ProjectEditPlan) -> ProjectEditResult:
+    """
+    Применяет все изменения плана к project.pbxproj за одно чтение и одну запись.
+    
+    Изменения вносятся во все XCBuildConfiguration, где задана настройка; новые
+    значения вставляются по позициям из индекса без пересборки файла.
     
     Args:
         project_path: Путь к файлу project.pbxproj
+        plan: План изменений
     
     Returns:
-        Tuple (успех, marketing_version, build_version)
+        ProjectEditResult (changed=False, если файл не изменился или произошла ошибка)
     """
+    result = ProjectEditResult()
+    if plan.is_empty():
+        return result
+    
     try:
-        with open(project_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        original_content = content
-        new_marketing_version = None
-        new_build_version = None
-        
-        # Обновляем MARKETING_VERSION
-        marketing_pattern = r'(MARKETING_VERSION\s*=\s*)([^;]+)(;)'
-        def replace_marketing(match):
-            nonlocal new_marketing_version
-            version = match.group(2).strip().strip('"')
-            new_version = increment_version(version)
-            new_marketing_version = new_version
-            return f'{match.group(1)}{new_version}{match.group(3)}'
-        content = re.sub(marketing_pattern, replace_marketing, content)
-        
-        # Обновляем CURRENT_PROJECT_VERSION
-        build_pattern = r'(CURRENT_PROJECT_VERSION\s*=\s*)([^;]+)(;)'
-        def replace_build(match):
-            nonlocal new_build_version
-            build = match.group(2).strip().strip('"')
-            new_build = increment_build_number(build)
-            new_build_version = new_build
-            return f'{match.group(1)}{new_build}{match.group(3)}'
-        content = re.sub(build_pattern, replace_build, content)
-        
-        if content != original_content:
-            with open(project_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+        data = _read_bytes(project_path)
+        index = _load_index(data, project_path)
+        if index is not None:
+            new_data = _apply_plan_with_index(data, index, plan, result)
+        else:
+            new_data = _apply_plan_with_regex(data.decode('utf-8'), plan, result).encode('utf-8')
+        
+        if new_data != data:
+            _write_bytes(project_path, new_data)
+            result.changed = True
             logger.info(f"Обновлен файл: {project_path}")
-            return (True, new_marketing_version, new_build_version)
-        return (False, None, None)
+        return result
     except Exception as e:
         logger.error(f"Ошибка при обновлении {project_path}: {e}")
-        return (False, None, None)
+        return ProjectEditResult()
+
+
+def update_project_file(project_path: str) -> Tuple[bool, Optional[str], Optional[str]]:
+    """
+    Обновляет версию в project.pbxproj файле.
+    
+    Args:
+        project_path: Путь к файлу project.pbxproj
+    
+    Returns:
+        Tuple (успех, marketing_version, build_version)
+    """
+    result = apply_edit_plan(project_path, ProjectEditPlan(increment_version=True))
+    if result.version_updated:
+        return (True, result.marketing_version, result.build_version)
+    return (False, None, None)
 
 
 def update_display_name(project_path: str, new_name: str) -> bool:
@@ -163,32 +443,10 @@ def update_display_name(project_path: str, new_name: str) -> bool:
     Returns:
         True если успешно обновлено
     """
-    try:
-        # Обновляем project.pbxproj
-        with open(project_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        original_content = content
-        
-        # Экранируем кавычки в новом имени
-        escaped_name = new_name.replace('"', '\\"')
-        display_name_pattern = r'(INFOPLIST_KEY_CFBundleDisplayName\s*=\s*)([^;]+)(;)'
-        
-        def replace_display_name(match):
-            return f'{match.group(1)}"{escaped_name}"{match.group(3)}'
-        
-        content = re.sub(display_name_pattern, replace_display_name, content)
-        
-        if content != original_content:
-            with open(project_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            logger.info(f"Обновлено название в файле: {project_path}")
-            return True
-        
-        return False
-    except Exception as e:
-        logger.error(f"Ошибка при обновлении названия в {project_path}: {e}")
-        return False
+    result = apply_edit_plan(project_path, ProjectEditPlan(new_name=new_name))
+    if result.display_name_updated:
+        logger.info(f"Обновлено название в файле: {project_path}")
+    return result.display_name_updated
 
 
 def update_bundle_id(project_path: str, new_bundle_id: str) -> bool:
@@ -202,62 +460,159 @@ def update_bundle_id(project_path: str, new_bundle_id: str) -> bool:
     Returns:
         True если успешно обновлено
     """
-    try:
-        with open(project_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        original_content = content
-        
-        bundle_id_pattern = r'(PRODUCT_BUNDLE_IDENTIFIER\s*=\s*)([^;]+)(;)'
-        
-        def replace_bundle_id(match):
-            return f'{match.group(1)}{new_bundle_id}{match.group(3)}'
-        
-        content = re.sub(bundle_id_pattern, replace_bundle_id, content)
-        
-        if content != original_content:
-            with open(project_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            logger.info(f"Обновлен Bundle ID в файле: {project_path}")
-            return True
-        return False
-    except Exception as e:
-        logger.error(f"Ошибка при обновлении Bundle ID в {project_path}: {e}")
-        return False
+    result = apply_edit_plan(project_path, ProjectEditPlan(new_bundle_id=new_bundle_id))
+    if result.bundle_id_updated:
+        logger.info(f"Обновлен Bundle ID в файле: {project_path}")
+    return result.bundle_id_updated
+
+
+def get_project_root(project_path: str) -> str:
+    """
+    Возвращает корневую директорию проекта по пути к project.pbxproj.
+    
+    Args:
+        project_path: Путь к файлу project.pbxproj
+    
+    Returns:
+        Директория, содержащая папку .xcodeproj
+    """
+    return str(Path(project_path).parent.parent.parent)
+
+
+def _match_date(buffer: Union[bytes, mmap.mmap]) -> Optional[Tuple[str, str]]:
+    """
+    Ищет .date(from: "...") в байтах файла.
+    
+    Args:
+        buffer: Содержимое файла (bytes или mmap)
+    
+    Returns:
+        Tuple (дата, полное совпадение) или None
+    """
+    pos = buffer.find(_DATE_MARKER)
+    while pos != -1:
+        match = _DATE_SEARCH_RE.match(buffer, pos)
+        if match:
+            return match.group(1).decode('utf-8'), match.group(0).decode('utf-8')
+        pos = buffer.find(_DATE_MARKER, pos + 1)
+    return None
+
+
+def _scan_file_for_date(path: str, fs: Optional[ZipFileSystem] = None) -> Optional[Tuple[str, str]]:
+    """
+    Проверяет один файл .swift на наличие даты активации.
+    
+    Файлы на диске от DATE_SCAN_MMAP_MIN_BYTES отображаются в память (mmap),
+    поэтому файлы без совпадений не копируются и не декодируются целиком.
+    
+    Args:
+        path: Путь к файлу
+        fs: Файловая система архива, если файл читается без распаковки
+    
+    Returns:
+        Tuple (дата, полное совпадение) или None
+    """
+    if fs is not None:
+        return _match_date(fs.read_bytes(path))
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < DATE_SCAN_MMAP_MIN_BYTES:
+            return _match_date(f.read())
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return _match_date(buffer)
+
+
+def _get_scan_executor() -> ThreadPoolExecutor:
+    """Возвращает общий пул потоков для сканирования файлов."""
+    global _scan_executor
+    with _scan_executor_lock:
+        if _scan_executor is None:
+            _scan_executor = ThreadPoolExecutor(
+                max_workers=DATE_SCAN_WORKERS,
+                thread_name_prefix="date-scan",
+            )
+        return _scan_executor
+
+
+def _scan_dates(
+    paths: List[str],
+    fs: Optional[ZipFileSystem] = None
+) -> List[Optional[Tuple[str, str]]]:
+    """
+    Сканирует файлы на наличие даты активации, при большом количестве - параллельно.
+    
+    Args:
+        paths: Пути файлов .swift
+        fs: Файловая система архива, если файлы читаются без распаковки
+    
+    Returns:
+        Результаты _scan_file_for_date в порядке paths
+    """
+    def scan(path: str) -> Optional[Tuple[str, str]]:
+        try:
+            return _scan_file_for_date(path, fs)
+        except Exception as e:
+            logger.warning(f"Ошибка при чтении файла {path}: {e}")
+            return None
+    
+    if len(paths) < DATE_SCAN_PARALLEL_MIN_FILES:
+        return [scan(path) for path in paths]
+    
+    # Файлы раздаются пачками: накладные расходы на задачу пула больше,
+    # чем проверка одного небольшого файла
+    chunk_size = max(DATE_SCAN_PARALLEL_MIN_FILES, len(paths) // (DATE_SCAN_WORKERS * 4))
+    chunks = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+    results = _get_scan_executor().map(lambda chunk: [scan(path) for path in chunk], chunks)
+    return [found for chunk_results in results for found in chunk_results]
+
+
+def find_activation_date_files(
+    project_dir: str,
+    fs: Optional[ZipFileSystem] = None,
+    workspace: Optional[ProjectWorkspace] = None
+) -> List[Tuple[str, str]]:
+    """
+    Находит все файлы .swift проекта, содержащие .date(from: "...").
+    
+    Args:
+        project_dir: Путь к директории проекта
+        fs: Файловая система архива, если поиск идёт без распаковки
+        workspace: Готовый индекс файлов проекта (без повторного обхода)
+    
+    Returns:
+        Список (путь_к_файлу, дата) в порядке обхода
+    """
+    swift_files = _list_swift_files(project_dir, fs, workspace)
+    return [
+        (swift_file, found[0])
+        for swift_file, found in zip(swift_files, _scan_dates(swift_files, fs))
+        if found is not None
+    ]
 
 
 def find_activation_date_in_project(
-    project_dir: str
+    project_dir: str,
+    fs: Optional[ZipFileSystem] = None,
+    workspace: Optional[ProjectWorkspace] = None
 ) -> Tuple[bool, Optional[str], Optional[str], Optional[str]]:
     """
     Ищет .date(from: "...") во всех файлах .swift проекта.
     
     Args:
         project_dir: Путь к директории проекта
+        fs: Файловая система архива, если поиск идёт без распаковки
+        workspace: Готовый индекс файлов проекта (без повторного обхода)
     
     Returns:
         Tuple (найдено, текущая_дата, путь_к_файлу, полное_совпадение)
     """
     try:
-        project_path = Path(project_dir)
-        swift_files = list(project_path.rglob('*.swift'))
+        swift_files = _list_swift_files(project_dir, fs, workspace)
         
-        # Паттерн для поиска .date(from: "любые символы")
-        date_pattern = r'\.date\(from:\s*"([^"]*)"\)'
-        
-        for swift_file in swift_files:
-            try:
-                with open(swift_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                match = re.search(date_pattern, content)
-                if match:
-                    current_date = match.group(1)
-                    logger.info(f"Найдена дата активации '{current_date}' в файле: {swift_file}")
-                    return (True, current_date, str(swift_file), match.group(0))
-            except Exception as e:
-                logger.warning(f"Ошибка при чтении файла {swift_file}: {e}")
-                continue
+        for swift_file, found in zip(swift_files, _scan_dates(swift_files, fs)):
+            if found is not None:
+                current_date, full_match = found
+                logger.info(f"Найдена дата активации '{current_date}' в файле: {swift_file}")
+                return (True, current_date, str(swift_file), full_match)
         
         logger.info("Дата активации не найдена в проекте")
         return (False, None, None, None)
@@ -266,41 +621,49 @@ def find_activation_date_in_project(
         return (False, None, None, None)
 
 
-def update_activation_date(project_dir: str, new_date: str) -> bool:
+def update_activation_date(
+    project_dir: str,
+    new_date: str,
+    workspace: Optional[ProjectWorkspace] = None
+) -> bool:
     """
     Обновляет дату активации в файлах .swift проекта.
     
+    Полностью читаются и перезаписываются только файлы, прошедшие быстрый
+    поиск подстроки; замена выполняется за один проход re.subn.
+    
     Args:
         project_dir: Путь к директории проекта
         new_date: Новая дата активации
+        workspace: Готовый индекс файлов проекта (без повторного обхода)
     
     Returns:
         True если успешно обновлено
     """
     try:
-        project_path = Path(project_dir)
-        swift_files = list(project_path.rglob('*.swift'))
-        
-        # Паттерн для поиска и замены .date(from: "любые символы")
-        date_pattern = r'(\.date\(from:\s*")([^"]*?)("\))'
+        swift_files = _list_swift_files(project_dir, workspace=workspace)
         
         updated = False
-        for swift_file in swift_files:
+        for swift_file, found in zip(swift_files, _scan_dates(swift_files)):
+            if found is None:
+                continue
             try:
                 with open(swift_file, 'r', encoding='utf-8') as f:
                     content = f.read()
                 
-                # Проверяем, есть ли паттерн в файле
-                if re.search(date_pattern, content):
-                    # Заменяем дату
-                    new_content = re.sub(date_pattern, rf'\g<1>{new_date}\g<3>', content)
-                    
-                    # Сохраняем файл
-                    with open(swift_file, 'w', encoding='utf-8') as f:
-                        f.write(new_content)
-                    
-                    logger.info(f"Обновлена дата активации на '{new_date}' в файле: {swift_file}")
-                    updated = True
+                # Заменяем дату
+                new_content, count = _DATE_REPLACE_RE.subn(
+                    lambda m: f'{m.group(1)}{new_date}{m.group(3)}', content
+                )
+                if count == 0:
+                    continue
+                
+                # Сохраняем файл
+                if new_content != content:
+                    _write_bytes(swift_file, new_content.encode('utf-8'))
+                
+                logger.info(f"Обновлена дата активации на '{new_date}' в файле: {swift_file}")
+                updated = True
             except Exception as e:
                 logger.warning(f"Ошибка при обновлении файла {swift_file}: {e}")
                 continue
@@ -311,33 +674,19 @@ def update_activation_date(project_dir: str, new_date: str) -> bool:
         return False
 
 
-def read_device_family(project_path: str) -> Optional[str]:
+def read_device_family(project_path: str, fs: Optional[ZipFileSystem] = None) -> Optional[str]:
     """
     Читает текущее значение TARGETED_DEVICE_FAMILY.
     
     Args:
         project_path: Путь к файлу project.pbxproj
+        fs: Файловая система архива, если файл читается без распаковки
     
     Returns:
         "iPhone" | "iPad" | "Universal" | None
     """
-    try:
-        with open(project_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        match = re.search(r'TARGETED_DEVICE_FAMILY\s*=\s*([^;]+);', content)
-        if match:
-            value = match.group(1).strip().strip('"')
-            if value == "1":
-                return "iPhone"
-            elif value == "2":
-                return "iPad"
-            elif "1,2" in value or "2,1" in value:
-                return "Universal"
-        return None
-    except Exception as e:
-        logger.error(f"Ошибка при чтении TARGETED_DEVICE_FAMILY: {e}")
-        return None
+    _, device_family = read_project_settings(project_path, fs)
+    return device_family
 
 
 def add_ipad_support(project_path: str) -> bool:
@@ -351,32 +700,7 @@ def add_ipad_support(project_path: str) -> bool:
     Returns:
         True если успешно обновлено
     """
-    try:
-        with open(project_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        original_content = content
-        
-        # Паттерн для TARGETED_DEVICE_FAMILY
-        device_family_pattern = r'(TARGETED_DEVICE_FAMILY\s*=\s*)([^;]+)(;)'
-        
-        def replace_device_family(match):
-            current_value = match.group(2).strip().strip('"')
-            # Если уже есть iPad (2 или 1,2), ничего не меняем
-            if '2' in current_value:
-                return match.group(0)
-            # Добавляем iPad: 1 -> "1,2"
-            return f'{match.group(1)}"1,2"{match.group(3)}'
-        
-        content = re.sub(device_family_pattern, replace_device_family, content)
-        
-        if content != original_content:
-            with open(project_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            logger.info(f"Добавлена поддержка iPad в файле: {project_path}")
-            return True
-        return False
-    except Exception as e:
-        logger.error(f"Ошибка при добавлении поддержки iPad в {project_path}: {e}")
-        return False
-
+    result = apply_edit_plan(project_path, ProjectEditPlan(add_ipad=True))
+    if result.ipad_added:
+        logger.info(f"Добавлена поддержка iPad в файле: {project_path}")
+    return result.ipad_added
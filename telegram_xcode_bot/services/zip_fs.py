@@ -0,0 +1,134 @@
+"""Виртуальная файловая система только для чтения поверх zip архива."""
+
+import fnmatch
+import posixpath
+import zipfile
+from typing import Dict, List, Optional
+
+from telegram_xcode_bot.logger import get_logger
+from telegram_xcode_bot.exceptions import ArchiveProcessingError
+
+logger = get_logger(__name__)
+
+
+def normalize_zip_path(path: str) -> str:
+    """
+    Приводит путь к виду имени записи архива (posix, без ведущих './' и '/').
+    
+    Args:
+        path: Путь внутри архива
+    
+    Returns:
+        Нормализованный путь ('' для корня архива)
+    """
+    path = str(path).replace('\\', '/')
+    normalized = posixpath.normpath(path) if path else ''
+    if normalized in ('.', '/'):
+        return ''
+    return normalized.lstrip('/')
+
+
+class ZipFileSystem:
+    """
+    Доступ к файлам архива без распаковки на диск.
+    
+    Пути задаются относительно корня архива. Читаются и распаковываются
+    только запрошенные записи, остальное берётся из центрального каталога.
+    """
+    
+    def __init__(self, zip_ref: zipfile.ZipFile, owns_zip: bool = False):
+        """
+        Args:
+            zip_ref: Открытый на чтение архив
+            owns_zip: Закрывать ли архив при закрытии файловой системы
+        """
+        self.zip_ref = zip_ref
+        self._owns_zip = owns_zip
+        self._files: Dict[str, zipfile.ZipInfo] = {
+            info.filename: info for info in zip_ref.infolist() if not info.is_dir()
+        }
+    
+    @classmethod
+    def open(cls, archive_path: str) -> "ZipFileSystem":
+        """
+        Открывает архив и создаёт для него файловую систему.
+        
+        Args:
+            archive_path: Путь к архиву
+        
+        Returns:
+            ZipFileSystem, закрывающая архив при close()
+        
+        Raises:
+            ArchiveProcessingError: Если архив повреждён
+        """
+        try:
+            return cls(zipfile.ZipFile(archive_path, 'r'), owns_zip=True)
+        except zipfile.BadZipFile:
+            logger.error("Поврежденный zip архив")
+            raise ArchiveProcessingError("Поврежденный zip архив")
+    
+    def close(self) -> None:
+        """Закрывает архив, если он принадлежит файловой системе."""
+        if self._owns_zip:
+            self.zip_ref.close()
+    
+    def __enter__(self) -> "ZipFileSystem":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+    
+    def files(self) -> List[str]:
+        """Возвращает имена всех файлов архива в порядке центрального каталога."""
+        return list(self._files)
+    
+    def is_file(self, path: str) -> bool:
+        """Проверяет, есть ли в архиве файл с указанным путём."""
+        return normalize_zip_path(path) in self._files
+    
+    def get_info(self, path: str) -> Optional[zipfile.ZipInfo]:
+        """Возвращает ZipInfo файла или None."""
+        return self._files.get(normalize_zip_path(path))
+    
+    def read_bytes(self, path: str) -> bytes:
+        """
+        Читает и распаковывает одну запись архива.
+        
+        Args:
+            path: Путь к файлу внутри архива
+        
+        Returns:
+            Содержимое файла
+        
+        Raises:
+            FileNotFoundError: Если файла нет в архиве
+        """
+        info = self.get_info(path)
+        if info is None:
+            raise FileNotFoundError(path)
+        return self.zip_ref.read(info)
+    
+    def read_text(self, path: str, encoding: str = 'utf-8') -> str:
+        """Читает запись архива как текст."""
+        return self.read_bytes(path).decode(encoding)
+    
+    def rglob(self, pattern: str, root: str = '') -> List[str]:
+        """
+        Ищет файлы по шаблону имени во всех поддиректориях root (аналог Path.rglob).
+        
+        Args:
+            pattern: Шаблон имени файла (например, '*.swift')
+            root: Директория внутри архива, с которой начинается поиск
+        
+        Returns:
+            Список путей найденных файлов
+        """
+        prefix = normalize_zip_path(root)
+        if prefix:
+            prefix += '/'
+        return [
+            name for name in self._files
+            if name.startswith(prefix)
+            and fnmatch.fnmatchcase(name.rsplit('/', 1)[-1], pattern)
+        ]
@@ -0,0 +1,431 @@
+"""Низкоуровневая перезапись zip архивов без повторного сжатия неизменённых файлов."""
+
+import copy
+import io
+import os
+import shutil
+import stat
+import struct
+import zipfile
+import zlib
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from telegram_xcode_bot.config import ARCHIVE_COMPRESS_WORKERS, ARCHIVE_PARALLEL_MIN_BYTES
+from telegram_xcode_bot.logger import get_logger
+from telegram_xcode_bot.exceptions import ArchiveProcessingError
+from telegram_xcode_bot.services.compression_policy import CompressionPolicy, compression_policy, set_compress_level
+from telegram_xcode_bot.services.parallel_deflate import CompressedEntry, compress_entries
+from telegram_xcode_bot.utils.cancellation import CancellationToken, raise_if_cancelled
+
+logger = get_logger(__name__)
+
+# Размер блока при копировании сырых данных
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# Бит 3 general purpose flag: CRC и размеры записаны после данных (data descriptor)
+_MASK_USE_DATA_DESCRIPTOR = 0x08
+
+# Идентификатор extra-поля Zip64
+_ZIP64_EXTRA_ID = 1
+
+# Атрибуты новых файлов: обычный файл rw-r--r--, создан в Unix
+NEW_FILE_EXTERNAL_ATTR = (stat.S_IFREG | 0o644) << 16
+_CREATE_SYSTEM_UNIX = 3
+
+# Время записи, если в исходном архиве нет ни одной записи (минимум формата zip)
+_DEFAULT_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+# Внутренние атрибуты ZipFile, через которые уже сжатые данные пишутся напрямую
+_RAW_WRITE_ATTRS = ('_seekable', 'start_dir', '_didModify', '_writecheck')
+
+
+def _raw_write_supported() -> bool:
+    """
+    Проверяет, что zipfile текущей версии Python содержит внутренние атрибуты для прямой записи.
+    
+    Returns:
+        True, если сжатые данные можно записывать без ZipFile.open(info, 'w')
+    """
+    with zipfile.ZipFile(io.BytesIO(), 'w') as probe:
+        return all(hasattr(probe, name) for name in _RAW_WRITE_ATTRS)
+
+
+# Если прямая запись недоступна, записи пересжимаются через публичный ZipFile.open(info, 'w')
+RAW_WRITE_SUPPORTED = _raw_write_supported()
+
+
+def _strip_zip64_extra(extra: bytes) -> bytes:
+    """
+    Удаляет из extra-поля записи Zip64 (при записи заголовка они формируются заново).
+    
+    Args:
+        extra: Исходное extra-поле
+    
+    Returns:
+        Extra-поле без записей Zip64
+    """
+    result = bytearray()
+    pos = 0
+    while pos + 4 <= len(extra):
+        xid, xlen = struct.unpack('<HH', extra[pos:pos + 4])
+        if xid != _ZIP64_EXTRA_ID:
+            result += extra[pos:pos + 4 + xlen]
+        pos += 4 + xlen
+    return bytes(result)
+
+
+def _seek_to_entry_data(source: zipfile.ZipFile, info: zipfile.ZipInfo) -> None:
+    """
+    Перемещает указатель исходного архива на начало сжатых данных записи.
+    
+    Args:
+        source: Открытый исходный архив
+        info: Запись центрального каталога
+    
+    Raises:
+        ArchiveProcessingError: Если локальный заголовок повреждён
+    """
+    source.fp.seek(info.header_offset)
+    header = source.fp.read(zipfile.sizeFileHeader)
+    if len(header) != zipfile.sizeFileHeader or header[:4] != zipfile.stringFileHeader:
+        raise ArchiveProcessingError(f"Повреждён локальный заголовок записи: {info.filename}")
+    fields = struct.unpack(zipfile.structFileHeader, header)
+    # Имя файла и extra-поле (индексы _FH_FILENAME_LENGTH и _FH_EXTRA_FIELD_LENGTH)
+    source.fp.seek(fields[10] + fields[11], os.SEEK_CUR)
+
+
+def copy_raw_entry(source: zipfile.ZipFile, target: zipfile.ZipFile, info: zipfile.ZipInfo) -> None:
+    """
+    Копирует запись из одного архива в другой без распаковки и повторного сжатия.
+    
+    Сжатые байты переносятся как есть, заголовок записывается заново
+    (без data descriptor, с известными CRC и размерами). Если прямая запись
+    недоступна (RAW_WRITE_SUPPORTED), запись распаковывается и сжимается заново.
+    
+    Args:
+        source: Исходный архив, открытый на чтение
+        target: Целевой архив, открытый на запись
+        info: Копируемая запись исходного архива
+    """
+    new_info = copy.copy(info)
+    new_info.flag_bits &= ~_MASK_USE_DATA_DESCRIPTOR
+    new_info.extra = _strip_zip64_extra(info.extra)
+    
+    if not RAW_WRITE_SUPPORTED:
+        with source.open(info) as src, target.open(new_info, 'w') as dest:
+            shutil.copyfileobj(src, dest, COPY_CHUNK_SIZE)
+        return
+    
+    _seek_to_entry_data(source, info)
+    
+    def chunks() -> Iterator[bytes]:
+        remaining = info.compress_size
+        while remaining > 0:
+            chunk = source.fp.read(min(COPY_CHUNK_SIZE, remaining))
+            if not chunk:
+                raise ArchiveProcessingError(f"Неожиданный конец данных записи: {info.filename}")
+            yield chunk
+            remaining -= len(chunk)
+    
+    _write_raw_entry(target, new_info, chunks())
+
+
+def _write_raw_entry(target: zipfile.ZipFile, info: zipfile.ZipInfo, chunks: Iterable[bytes]) -> None:
+    """
+    Записывает заголовок с известными CRC и размерами и уже сжатые данные.
+    
+    Args:
+        target: Целевой архив, открытый на запись
+        info: Заголовок записи
+        chunks: Сжатые данные
+    """
+    # Пишем напрямую в поток архива так же, как это делает ZipFile.mkdir
+    if target._seekable:
+        target.fp.seek(target.start_dir)
+    info.header_offset = target.fp.tell()
+    target._writecheck(info)
+    target._didModify = True
+    target.fp.write(info.FileHeader())
+    for chunk in chunks:
+        target.fp.write(chunk)
+    
+    target.filelist.append(info)
+    target.NameToInfo[info.filename] = info
+    target.start_dir = target.fp.tell()
+
+
+def write_compressed_entry(target: zipfile.ZipFile, entry: CompressedEntry) -> None:
+    """
+    Записывает в архив запись, сжатую заранее (см. compress_entries).
+    
+    Если прямая запись недоступна (RAW_WRITE_SUPPORTED), данные распаковываются
+    и сжимаются заново через ZipFile.open(info, 'w').
+    
+    Args:
+        target: Целевой архив, открытый на запись
+        entry: Сжатая запись
+    """
+    if not RAW_WRITE_SUPPORTED:
+        data = entry.data
+        if entry.info.compress_type == zipfile.ZIP_DEFLATED:
+            data = zlib.decompress(data, -15)
+        with target.open(entry.info, 'w') as dest:
+            dest.write(data)
+        return
+    if not entry.info.external_attr:
+        # Те же права по умолчанию, что ставит ZipFile.open(info, 'w')
+        entry.info.external_attr = 0o600 << 16
+    _write_raw_entry(target, entry.info, (entry.data,))
+
+
+def use_parallel_deflate(sizes: List[int], workers: int) -> bool:
+    """
+    Решает, сжимать ли файлы параллельно.
+    
+    Args:
+        sizes: Размеры сжимаемых файлов
+        workers: Доступное количество потоков
+    
+    Returns:
+        True, если файлов несколько и их суммарный размер оправдывает пул потоков
+        (и сжатые данные можно записать напрямую, см. RAW_WRITE_SUPPORTED)
+    """
+    return RAW_WRITE_SUPPORTED and workers > 1 and len(sizes) > 1 and sum(sizes) >= ARCHIVE_PARALLEL_MIN_BYTES
+
+
+def write_file_entries(
+    target: zipfile.ZipFile,
+    entries: List[Tuple[str, zipfile.ZipInfo]],
+    policy: Optional[CompressionPolicy] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    workers: int = ARCHIVE_COMPRESS_WORKERS
+) -> None:
+    """
+    Сжимает файлы в архив в заданном порядке, при большом объёме - в пуле потоков.
+    
+    Результат не зависит от количества потоков.
+    
+    Args:
+        target: Целевой архив, открытый на запись
+        entries: Пары (путь к файлу, заголовок записи)
+        policy: Политика сжатия (по умолчанию compression_policy)
+        cancel_token: Токен отмены, проверяется перед каждой записью
+        workers: Количество потоков сжатия
+    """
+    policy = policy or compression_policy
+    if use_parallel_deflate([os.path.getsize(path) for path, _ in entries], workers):
+        for entry in compress_entries(entries, policy, workers, cancel_token=cancel_token):
+            write_compressed_entry(target, entry)
+        return
+    for path, info in entries:
+        raise_if_cancelled(cancel_token)
+        compress_type, level = policy.choose(info.filename, path)
+        info.compress_type = compress_type
+        set_compress_level(info, level)
+        write_file_entry(target, path, info)
+
+
+def make_entry_info(
+    name: str,
+    template: Optional[zipfile.ZipInfo],
+    date_time: Tuple[int, int, int, int, int, int],
+    compress_type: int = zipfile.ZIP_DEFLATED,
+    compresslevel: Optional[int] = None
+) -> zipfile.ZipInfo:
+    """
+    Создаёт заголовок записи, не зависящий от файловой системы.
+    
+    Время, права и extra-поля берутся из исходной записи template, поэтому
+    одинаковые входные данные дают побайтно одинаковый архив.
+    
+    Args:
+        name: Имя записи
+        template: Исходная запись с тем же именем (None для новых файлов)
+        date_time: Время для новых файлов
+        compress_type: Метод сжатия (см. CompressionPolicy.choose)
+        compresslevel: Уровень сжатия deflate
+    
+    Returns:
+        ZipInfo для записи через ZipFile.open(info, 'w')
+    """
+    if template is None:
+        info = zipfile.ZipInfo(name, date_time=date_time)
+        info.external_attr = NEW_FILE_EXTERNAL_ATTR
+        info.create_system = _CREATE_SYSTEM_UNIX
+    else:
+        info = zipfile.ZipInfo(name, date_time=template.date_time)
+        info.external_attr = template.external_attr
+        info.create_system = template.create_system
+        info.comment = template.comment
+        info.extra = _strip_zip64_extra(template.extra)
+    info.compress_type = compress_type
+    set_compress_level(info, compresslevel)
+    return info
+
+
+def write_policy_entry(
+    target: zipfile.ZipFile,
+    file_path: str,
+    name: str,
+    template: Optional[zipfile.ZipInfo],
+    date_time: Tuple[int, int, int, int, int, int],
+    policy: CompressionPolicy
+) -> None:
+    """
+    Сжимает файл в архив способом, выбранным политикой сжатия.
+    
+    Args:
+        target: Целевой архив, открытый на запись
+        file_path: Путь к файлу
+        name: Имя записи
+        template: Исходная запись с тем же именем (None для новых файлов)
+        date_time: Время для новых файлов
+        policy: Политика сжатия
+    """
+    compress_type, level = policy.choose(name, file_path)
+    write_file_entry(target, file_path, make_entry_info(name, template, date_time, compress_type, level))
+
+
+def write_file_entry(target: zipfile.ZipFile, file_path: str, info: zipfile.ZipInfo) -> None:
+    """
+    Сжимает файл в архив под заданным заголовком.
+    
+    Args:
+        target: Целевой архив, открытый на запись
+        file_path: Путь к файлу
+        info: Заголовок записи (см. make_entry_info)
+    """
+    info.file_size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as source, target.open(info, 'w') as dest:
+        shutil.copyfileobj(source, dest, COPY_CHUNK_SIZE)
+
+
+def newest_date_time(infos: Iterable[zipfile.ZipInfo]) -> Tuple[int, int, int, int, int, int]:
+    """
+    Возвращает время самой новой записи архива (время для добавляемых файлов).
+    
+    Args:
+        infos: Записи исходного архива
+    
+    Returns:
+        Кортеж date_time
+    """
+    return max((info.date_time for info in infos), default=_DEFAULT_DATE_TIME)
+
+
+def file_matches_entry(file_path: str, info: zipfile.ZipInfo) -> bool:
+    """
+    Проверяет, совпадает ли файл на диске с записью архива (по размеру и CRC32).
+    
+    Args:
+        file_path: Путь к файлу
+        info: Запись архива
+    
+    Returns:
+        True если содержимое не изменилось
+    """
+    if os.path.getsize(file_path) != info.file_size:
+        return False
+    crc = 0
+    with open(file_path, 'rb') as f:
+        while True:
+            chunk = f.read(COPY_CHUNK_SIZE)
+            if not chunk:
+                break
+            crc = zlib.crc32(chunk, crc)
+    return crc == info.CRC
+
+
+def rewrite_archive(
+    archive_path: str,
+    output_path: str,
+    replacements: Dict[str, str],
+    removed: Optional[Set[str]] = None,
+    added: Optional[Iterable[str]] = None,
+    source_dir: Optional[str] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    policy: Optional[CompressionPolicy] = None,
+    workers: int = ARCHIVE_COMPRESS_WORKERS,
+) -> None:
+    """
+    Создаёт новый архив на основе исходного, заменяя только изменённые записи.
+    
+    Неизменённые записи копируются сжатыми байтами без распаковки,
+    изменённые и новые файлы сжимаются заново по политике сжатия
+    (уже сжатые форматы сохраняются как есть).
+    Результат детерминирован: записи идут в порядке исходного архива, новые -
+    в конце по алфавиту; время и права изменённых записей берутся из исходных,
+    новые записи получают время самой новой записи архива.
+    Если пересжимать нужно много данных, файлы сжимаются в пуле потоков
+    заранее, а записываются в том же порядке (результат не меняется).
+    
+    Args:
+        archive_path: Путь к исходному архиву
+        output_path: Путь для создания нового архива
+        replacements: Имя записи -> путь к файлу с новым содержимым
+        removed: Имена записей, которые нужно исключить
+        added: Имена новых записей (файлы берутся из source_dir)
+        source_dir: Директория, относительно которой ищутся новые файлы
+        cancel_token: Токен отмены, проверяется перед каждой записью
+        policy: Политика сжатия (по умолчанию compression_policy)
+        workers: Количество потоков сжатия
+    
+    Raises:
+        ArchiveProcessingError: При ошибке перезаписи архива
+        JobCancelledError: Если задача отменена
+    """
+    removed = removed or set()
+    added = sorted(added or [])
+    policy = policy or compression_policy
+    copied = 0
+    try:
+        with zipfile.ZipFile(archive_path, 'r') as zip_in, \
+                zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zip_out:
+            date_time = newest_date_time(zip_in.infolist())
+            kept = [info for info in zip_in.infolist() if info.filename not in removed]
+            
+            # Пересжимаемые файлы в порядке записи: замены по порядку архива, затем новые
+            to_compress = [
+                (replacements[info.filename], make_entry_info(info.filename, info, date_time))
+                for info in kept if info.filename in replacements
+            ] + [
+                (os.path.join(source_dir or '', name), make_entry_info(name, None, date_time))
+                for name in added
+            ]
+            compressed: Optional[Iterator[CompressedEntry]] = None
+            if use_parallel_deflate([os.path.getsize(path) for path, _ in to_compress], workers):
+                compressed = compress_entries(to_compress, policy, workers, cancel_token=cancel_token)
+            
+            try:
+                for info in kept:
+                    raise_if_cancelled(cancel_token)
+                    replacement = replacements.get(info.filename)
+                    if replacement is None:
+                        copy_raw_entry(zip_in, zip_out, info)
+                        copied += 1
+                    elif compressed is not None:
+                        write_compressed_entry(zip_out, next(compressed))
+                    else:
+                        write_policy_entry(zip_out, replacement, info.filename, info, date_time, policy)
+                
+                for name in added:
+                    raise_if_cancelled(cancel_token)
+                    path = os.path.join(source_dir or '', name)
+                    if compressed is not None:
+                        write_compressed_entry(zip_out, next(compressed))
+                    else:
+                        write_policy_entry(zip_out, path, name, None, date_time, policy)
+            finally:
+                # Останавливаем потоки сжатия, если запись прервана
+                if compressed is not None:
+                    compressed.close()
+        
+        logger.info(
+            f"Архив перезаписан: {output_path} (скопировано без сжатия: {copied}, "
+            f"заменено: {len(replacements)}, добавлено: {len(added)}, удалено: {len(removed)})"
+        )
+    except ArchiveProcessingError:
+        raise
+    except Exception as e:
+        logger.error(f"Ошибка при перезаписи архива: {e}")
+        raise ArchiveProcessingError(f"Не удалось создать архив: {str(e)}")
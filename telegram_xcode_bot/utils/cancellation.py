@@ -0,0 +1,197 @@
+"""Кооперативная отмена задач обработки архивов."""
+
+import asyncio
+import glob
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from typing import Dict, Optional
+
+from telegram_xcode_bot.config import JOB_CANCEL_CHECK_INTERVAL_SECONDS, JOB_TEMP_PREFIX
+from telegram_xcode_bot.exceptions import JobCancelledError
+from telegram_xcode_bot.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class CancellationToken:
+    """
+    Признак отмены задачи, который проверяется между записями архива и файлами.
+    
+    Токен сериализуется pickle и передаётся в процесс пула. В процессе бота
+    отмена видна сразу (cancel), в процессе пула - через файл-флаг
+    (signal_workers) или по истечении deadline. Временные директории задачи
+    создаются с префиксом токена, поэтому их можно удалить даже после
+    аварийного завершения процесса.
+    """
+    
+    def __init__(self, job_id: Optional[str] = None):
+        """
+        Args:
+            job_id: Идентификатор задачи (генерируется, если не передан)
+        """
+        self.job_id = job_id or uuid.uuid4().hex
+        # Директория для временных директорий задачи (None - системная временная директория)
+        self.temp_root: Optional[str] = None
+        # Время (time.time()), после которого задача считается отменённой
+        self.deadline: Optional[float] = None
+        self._cancelled = False
+        self._next_check = 0.0
+        self._event: Optional[asyncio.Event] = None
+    
+    def __getstate__(self) -> Dict:
+        state = self.__dict__.copy()
+        state['_event'] = None
+        state['_next_check'] = 0.0
+        return state
+    
+    @property
+    def flag_path(self) -> str:
+        """Путь к файлу-флагу отмены для процессов пула."""
+        return os.path.join(tempfile.gettempdir(), f"{JOB_TEMP_PREFIX}{self.job_id}.cancel")
+    
+    @property
+    def temp_prefix(self) -> str:
+        """Префикс временных директорий задачи."""
+        return f"{JOB_TEMP_PREFIX}{self.job_id}-"
+    
+    def set_timeout(self, timeout: float) -> None:
+        """
+        Задаёт срок, после которого процесс пула сам прекращает обработку.
+        
+        Args:
+            timeout: Секунды от текущего момента
+        """
+        self.deadline = time.time() + timeout
+    
+    def cancel(self) -> None:
+        """Отменяет задачу в текущем процессе и будит ожидающих."""
+        self._cancelled = True
+        if self._event is not None:
+            self._event.set()
+    
+    def signal_workers(self) -> None:
+        """Создаёт файл-флаг, по которому отмену увидит процесс пула."""
+        try:
+            with open(self.flag_path, 'w'):
+                pass
+        except OSError as e:
+            logger.warning(f"Не удалось создать флаг отмены {self.flag_path}: {e}")
+    
+    @property
+    def cancelled(self) -> bool:
+        """
+        Отменена ли задача.
+        
+        Файл-флаг и deadline проверяются не чаще раза в
+        JOB_CANCEL_CHECK_INTERVAL_SECONDS, поэтому свойство можно вызывать
+        на каждой записи архива.
+        """
+        if self._cancelled:
+            return True
+        now = time.monotonic()
+        if now < self._next_check:
+            return False
+        self._next_check = now + JOB_CANCEL_CHECK_INTERVAL_SECONDS
+        if (self.deadline is not None and time.time() >= self.deadline) or os.path.exists(self.flag_path):
+            self._cancelled = True
+        return self._cancelled
+    
+    def raise_if_cancelled(self) -> None:
+        """
+        Raises:
+            JobCancelledError: Если задача отменена
+        """
+        if self.cancelled:
+            raise JobCancelledError("Обработка архива отменена")
+    
+    async def wait(self) -> None:
+        """Ждёт вызова cancel в текущем процессе."""
+        if self._event is None:
+            self._event = asyncio.Event()
+            if self._cancelled:
+                self._event.set()
+        await self._event.wait()
+    
+    def make_temp_dir(self) -> str:
+        """Создаёт временную директорию задачи в temp_root или, если она недоступна, на диске."""
+        if self.temp_root is not None:
+            try:
+                return tempfile.mkdtemp(prefix=self.temp_prefix, dir=self.temp_root)
+            except OSError as e:
+                logger.warning(f"Не удалось создать директорию в {self.temp_root}, используется диск: {e}")
+        return tempfile.mkdtemp(prefix=self.temp_prefix)
+    
+    def cleanup(self) -> None:
+        """Удаляет файл-флаг и оставшиеся временные директории задачи."""
+        try:
+            os.unlink(self.flag_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Не удалось удалить флаг отмены {self.flag_path}: {e}")
+        roots = {tempfile.gettempdir()}
+        if self.temp_root is not None:
+            roots.add(self.temp_root)
+        for root in roots:
+            pattern = os.path.join(glob.escape(root), glob.escape(self.temp_prefix) + '*')
+            for path in glob.glob(pattern):
+                logger.info(f"Удалена временная директория прерванной задачи: {path}")
+                shutil.rmtree(path, ignore_errors=True)
+
+
+def raise_if_cancelled(cancel_token: Optional[CancellationToken]) -> None:
+    """
+    Проверяет токен отмены, если он передан.
+    
+    Args:
+        cancel_token: Токен отмены или None
+    
+    Raises:
+        JobCancelledError: Если задача отменена
+    """
+    if cancel_token is not None:
+        cancel_token.raise_if_cancelled()
+
+
+class ActiveJobs:
+    """Токены отмены выполняющихся задач по пользователям."""
+    
+    def __init__(self):
+        self._tokens: Dict[int, CancellationToken] = {}
+    
+    def register(self, user_id: int, token: CancellationToken) -> None:
+        """Регистрирует задачу пользователя."""
+        self._tokens[user_id] = token
+    
+    def is_active(self, user_id: int) -> bool:
+        """Проверяет, выполняется ли задача пользователя."""
+        return user_id in self._tokens
+    
+    def unregister(self, user_id: int, token: CancellationToken) -> None:
+        """Снимает регистрацию, если задача пользователя не была заменена."""
+        if self._tokens.get(user_id) is token:
+            del self._tokens[user_id]
+    
+    def cancel(self, user_id: int) -> bool:
+        """
+        Отменяет задачу пользователя.
+        
+        Args:
+            user_id: ID пользователя
+        
+        Returns:
+            True, если у пользователя была задача
+        """
+        token = self._tokens.get(user_id)
+        if token is None:
+            return False
+        logger.info(f"Пользователь {user_id} отменил обработку архива")
+        token.cancel()
+        return True
+
+
+# Глобальный реестр выполняющихся задач
+active_jobs = ActiveJobs()
@@ -0,0 +1,460 @@
+"""Дисковые кеши файлов и директорий с ограничением размера (LRU) и временем жизни записей."""
+
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from telegram_xcode_bot.logger import get_logger
+
+logger = get_logger(__name__)
+
+DATA_SUFFIX = '.data'
+META_SUFFIX = '.json'
+
+
+def link_or_copy(source: str, destination: str) -> None:
+    """
+    Заменяет destination жёсткой ссылкой на source или копией, если ссылка невозможна.
+    
+    Args:
+        source: Исходный файл
+        destination: Путь назначения (существующий файл заменяется)
+    """
+    link_path = f"{destination}.{uuid.uuid4().hex}.link"
+    try:
+        os.link(source, link_path)
+        os.replace(link_path, destination)
+    except OSError:
+        try:
+            os.unlink(link_path)
+        except OSError:
+            pass
+        shutil.copyfile(source, destination)
+
+
+def write_file_atomic(path: str, data: bytes) -> None:
+    """
+    Записывает файл через временный файл и os.replace.
+    
+    Файл мог быть жёсткой ссылкой на запись кеша: запись на месте изменила бы
+    общие данные, а замена создаёт новый файл и оставляет запись кеша целой.
+    
+    Args:
+        path: Путь к файлу
+        data: Новое содержимое
+    """
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+class DiskCache:
+    """
+    Кеш файлов в директории: ключ - имя записи, значение - файл и метаданные.
+    
+    Запись состоит из файла данных и JSON с метаданными; JSON записывается
+    последним, поэтому запись без него считается неполной. Все изменения
+    выполняются через os.replace, и кеш можно использовать из нескольких
+    процессов одновременно. Порядок LRU определяется временем изменения файла
+    данных, которое обновляется при каждом попадании.
+    """
+    
+    def __init__(self, directory: str, max_bytes: int, ttl_seconds: float, name: str = "кеш"):
+        """
+        Args:
+            directory: Директория кеша (создаётся при первой записи)
+            max_bytes: Максимальный суммарный размер файлов (0 - кеш отключён)
+            ttl_seconds: Время жизни записи с момента сохранения
+            name: Название кеша для логов
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.name = name
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @property
+    def enabled(self) -> bool:
+        """Включён ли кеш."""
+        return self.max_bytes > 0
+    
+    def _paths(self, key: str) -> Tuple[str, str]:
+        """Пути файла данных и метаданных записи."""
+        base = os.path.join(self.directory, key)
+        return base + DATA_SUFFIX, base + META_SUFFIX
+    
+    def _remove(self, key: str) -> None:
+        """Удаляет запись (сначала метаданные, чтобы запись сразу стала неполной)."""
+        data_path, meta_path = self._paths(key)
+        for path in (meta_path, data_path):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+    
+    def _count(self, hit: bool) -> None:
+        """Учитывает попадание или промах."""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+    
+    def get(self, key: str, destination: str) -> Optional[Dict[str, Any]]:
+        """
+        Копирует файл записи в destination и помечает запись как недавно использованную.
+        
+        Args:
+            key: Ключ записи
+            destination: Путь, по которому нужно получить файл
+        
+        Returns:
+            Метаданные записи или None, если записи нет или она устарела
+        """
+        if not self.enabled:
+            return None
+        data_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if time.time() - meta['stored_at'] > self.ttl_seconds:
+                logger.info(f"Запись {key[:12]} ({self.name}) устарела")
+                self._remove(key)
+                self._count(hit=False)
+                return None
+            link_or_copy(data_path, destination)
+            os.utime(data_path)
+        except (OSError, ValueError, KeyError):
+            # Записи нет или её одновременно вытеснил другой процесс
+            self._count(hit=False)
+            return None
+        self._count(hit=True)
+        return meta.get('metadata') or {}
+    
+    def put(self, key: str, source: str, metadata: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Сохраняет копию файла source и вытесняет старые записи при превышении лимита.
+        
+        Args:
+            key: Ключ записи
+            source: Файл для сохранения
+            metadata: Метаданные (сериализуемые в JSON)
+        
+        Returns:
+            True, если запись сохранена
+        """
+        if not self.enabled:
+            return False
+        size = os.path.getsize(source)
+        if size > self.max_bytes:
+            logger.warning(f"Файл {key[:12]} слишком велик для кеша ({self.name}): {size} байт")
+            return False
+        
+        os.makedirs(self.directory, exist_ok=True)
+        data_path, meta_path = self._paths(key)
+        suffix = f".{uuid.uuid4().hex}.tmp"
+        try:
+            link_or_copy(source, data_path + suffix)
+            os.replace(data_path + suffix, data_path)
+            with open(meta_path + suffix, 'w', encoding='utf-8') as f:
+                json.dump({'stored_at': time.time(), 'size': size, 'metadata': metadata or {}}, f)
+            os.replace(meta_path + suffix, meta_path)
+        finally:
+            for path in (data_path + suffix, meta_path + suffix):
+                if os.path.exists(path):
+                    os.unlink(path)
+        self.evict()
+        return True
+    
+    def _entries(self) -> List[Tuple[str, float, float, int]]:
+        """Записи кеша: (ключ, время сохранения, время использования, размер)."""
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return entries
+        for name in names:
+            if not name.endswith(META_SUFFIX):
+                continue
+            key = name[:-len(META_SUFFIX)]
+            data_path, meta_path = self._paths(key)
+            try:
+                with open(meta_path, 'r', encoding='utf-8') as f:
+                    stored_at = json.load(f)['stored_at']
+                stat = os.stat(data_path)
+            except (OSError, ValueError, KeyError):
+                continue
+            entries.append((key, stored_at, stat.st_mtime, stat.st_size))
+        return entries
+    
+    def evict(self) -> int:
+        """
+        Удаляет устаревшие записи, затем давно не использованные до соблюдения лимита.
+        
+        Returns:
+            Количество удалённых записей
+        """
+        now = time.time()
+        removed = 0
+        alive = []
+        for entry in self._entries():
+            if now - entry[1] > self.ttl_seconds:
+                self._remove(entry[0])
+                removed += 1
+            else:
+                alive.append(entry)
+        
+        total = sum(entry[3] for entry in alive)
+        alive.sort(key=lambda entry: entry[2])
+        for key, _, _, size in alive:
+            if total <= self.max_bytes:
+                break
+            self._remove(key)
+            total -= size
+            removed += 1
+            logger.info(f"Запись {key[:12]} вытеснена из кеша ({self.name})")
+        return removed
+    
+    def clear(self) -> None:
+        """Удаляет все записи."""
+        for entry in self._entries():
+            self._remove(entry[0])
+    
+    def stats(self) -> Dict[str, int]:
+        """Возвращает статистику кеша."""
+        entries = self._entries()
+        with self._lock:
+            return {
+                "entries": len(entries),
+                "bytes": sum(entry[3] for entry in entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def _directory_size(path: str) -> int:
+    """Суммарный размер файлов в директории."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for file in files:
+            total += os.path.getsize(os.path.join(root, file))
+    return total
+
+
+class DirectoryCache:
+    """
+    Кеш директорий: ключ - имя записи, значение - директория с файлами.
+    
+    Директория заполняется во временной директории и публикуется через
+    os.rename, после чего записываются метаданные; запись без них считается
+    неполной. Файлы записей связываются жёсткими ссылками в рабочие
+    директории задач, поэтому изменять их можно только заменой
+    (write_file_atomic). Время жизни отсчитывается от последнего использования,
+    порядок LRU определяется временем изменения файла метаданных.
+    """
+    
+    def __init__(self, directory: str, max_bytes: int, ttl_seconds: float, name: str = "кеш"):
+        """
+        Args:
+            directory: Директория кеша (создаётся при первой записи)
+            max_bytes: Максимальный суммарный размер файлов (0 - кеш отключён)
+            ttl_seconds: Время жизни записи с последнего использования
+            name: Название кеша для логов
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.name = name
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @property
+    def enabled(self) -> bool:
+        """Включён ли кеш."""
+        return self.max_bytes > 0
+    
+    def _paths(self, key: str) -> Tuple[str, str]:
+        """Пути директории и метаданных записи."""
+        base = os.path.join(self.directory, key)
+        return base, base + META_SUFFIX
+    
+    def _remove(self, key: str) -> None:
+        """Удаляет запись (сначала метаданные, чтобы запись сразу стала неполной)."""
+        dir_path, meta_path = self._paths(key)
+        try:
+            os.unlink(meta_path)
+        except FileNotFoundError:
+            pass
+        shutil.rmtree(dir_path, ignore_errors=True)
+    
+    def _count(self, hit: bool) -> None:
+        """Учитывает попадание или промах."""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+    
+    def get(self, key: str) -> Optional[str]:
+        """
+        Возвращает директорию записи и помечает запись как недавно использованную.
+        
+        Args:
+            key: Ключ записи
+        
+        Returns:
+            Путь к директории (только для чтения) или None, если записи нет или она устарела
+        """
+        if not self.enabled:
+            return None
+        dir_path, meta_path = self._paths(key)
+        try:
+            if time.time() - os.path.getmtime(meta_path) > self.ttl_seconds:
+                logger.info(f"Запись {key[:12]} ({self.name}) устарела")
+                self._remove(key)
+                self._count(hit=False)
+                return None
+            os.utime(meta_path)
+        except OSError:
+            self._count(hit=False)
+            return None
+        self._count(hit=True)
+        return dir_path
+    
+    def get_or_create(self, key: str, populate: Callable[[str], None]) -> Optional[str]:
+        """
+        Возвращает директорию записи, при промахе заполняет её функцией populate.
+        
+        Args:
+            key: Ключ записи
+            populate: Заполняет переданную пустую директорию
+        
+        Returns:
+            Путь к директории или None, если кеш отключён, запись не помещается
+            в лимит или её одновременно создаёт другой процесс
+        """
+        dir_path = self.get(key)
+        if dir_path is not None or not self.enabled:
+            return dir_path
+        
+        os.makedirs(self.directory, exist_ok=True)
+        dir_path, meta_path = self._paths(key)
+        suffix = f".{uuid.uuid4().hex}.tmp"
+        temp_dir = dir_path + suffix
+        os.mkdir(temp_dir)
+        try:
+            populate(temp_dir)
+            size = _directory_size(temp_dir)
+            if size > self.max_bytes:
+                logger.warning(f"Запись {key[:12]} слишком велика для кеша ({self.name}): {size} байт")
+                return None
+            try:
+                os.rename(temp_dir, dir_path)
+            except OSError:
+                # Запись уже опубликовал другой процесс
+                return None
+            with open(meta_path + suffix, 'w', encoding='utf-8') as f:
+                json.dump({'stored_at': time.time(), 'size': size}, f)
+            os.replace(meta_path + suffix, meta_path)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            if os.path.exists(meta_path + suffix):
+                os.unlink(meta_path + suffix)
+        self.evict()
+        return dir_path
+    
+    def _entries(self) -> List[Tuple[str, float, int]]:
+        """Записи кеша: (ключ, время использования, размер)."""
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return entries
+        for name in names:
+            if not name.endswith(META_SUFFIX):
+                continue
+            key = name[:-len(META_SUFFIX)]
+            _, meta_path = self._paths(key)
+            try:
+                with open(meta_path, 'r', encoding='utf-8') as f:
+                    size = json.load(f)['size']
+                used_at = os.path.getmtime(meta_path)
+            except (OSError, ValueError, KeyError):
+                continue
+            entries.append((key, used_at, size))
+        return entries
+    
+    def _remove_orphans(self, now: float) -> None:
+        """Удаляет директории без метаданных, оставшиеся после аварийного завершения процесса."""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+        for name in names:
+            path = os.path.join(self.directory, name)
+            if name.endswith(META_SUFFIX) or os.path.exists(path + META_SUFFIX):
+                continue
+            try:
+                if now - os.path.getmtime(path) <= self.ttl_seconds:
+                    continue
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    os.unlink(path)
+            except OSError:
+                pass
+    
+    def evict(self) -> int:
+        """
+        Удаляет устаревшие записи, затем давно не использованные до соблюдения лимита.
+        
+        Returns:
+            Количество удалённых записей
+        """
+        now = time.time()
+        removed = 0
+        alive = []
+        for entry in self._entries():
+            if now - entry[1] > self.ttl_seconds:
+                self._remove(entry[0])
+                removed += 1
+            else:
+                alive.append(entry)
+        self._remove_orphans(now)
+        
+        total = sum(entry[2] for entry in alive)
+        alive.sort(key=lambda entry: entry[1])
+        for key, _, size in alive:
+            if total <= self.max_bytes:
+                break
+            self._remove(key)
+            total -= size
+            removed += 1
+            logger.info(f"Запись {key[:12]} вытеснена из кеша ({self.name})")
+        return removed
+    
+    def stats(self) -> Dict[str, int]:
+        """Возвращает статистику кеша."""
+        entries = self._entries()
+        with self._lock:
+            return {
+                "entries": len(entries),
+                "bytes": sum(entry[2] for entry in entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
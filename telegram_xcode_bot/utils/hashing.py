@@ -0,0 +1,39 @@
+"""Функции вычисления хешей содержимого файлов."""
+
+import hashlib
+
+# Размер блока при чтении файла
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def compute_file_hash(file_path: str) -> str:
+    """
+    Вычисляет SHA-256 содержимого файла.
+    
+    Args:
+        file_path: Путь к файлу
+    
+    Returns:
+        Хеш в шестнадцатеричном виде
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        while True:
+            chunk = f.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def compute_bytes_hash(data: bytes) -> str:
+    """
+    Вычисляет SHA-256 байтовой строки.
+    
+    Args:
+        data: Данные
+    
+    Returns:
+        Хеш в шестнадцатеричном виде
+    """
+    return hashlib.sha256(data).hexdigest()
@@ -0,0 +1,247 @@
+"""Планировщик задач обработки архивов: общий лимит и очереди по размеру архива."""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Set
+
+from telegram_xcode_bot.config import (
+    JOB_MAX_CONCURRENT,
+    JOB_LARGE_LANE_SLOTS,
+    JOB_LARGE_ARCHIVE_BYTES,
+    JOB_MAX_QUEUED,
+    JOB_STATUS_INTERVAL_SECONDS,
+    JOB_DEFAULT_DURATION_SMALL_SECONDS,
+    JOB_DEFAULT_DURATION_LARGE_SECONDS,
+)
+from telegram_xcode_bot.exceptions import JobCancelledError, WorkerPoolBusyError
+from telegram_xcode_bot.logger import get_logger
+from telegram_xcode_bot.utils.cancellation import CancellationToken
+
+logger = get_logger(__name__)
+
+SMALL_LANE = 'small'
+LARGE_LANE = 'large'
+
+# Вес нового измерения в скользящем среднем длительности задач
+DURATION_SMOOTHING = 0.3
+
+
+@dataclass
+class QueueStatus:
+    """Положение задачи в очереди."""
+    # Номер в очереди (1 - следующая на запуск)
+    position: int
+    # Оценка времени до запуска в секундах
+    eta_seconds: float
+
+
+@dataclass(eq=False)
+class _Job:
+    """Задача в планировщике."""
+    size: int
+    lane: str
+    granted: asyncio.Future = field(repr=False)
+    started_at: Optional[float] = None
+
+
+class JobScheduler:
+    """
+    Допускает к обработке не больше max_concurrent архивов одновременно.
+    
+    Задачи делятся на две очереди по размеру архива. Большие архивы занимают
+    не больше large_lane_slots слотов, а освободившийся слот в первую очередь
+    получает малый архив, поэтому малые задачи не ждут за большими.
+    Внутри очереди порядок FIFO. Все методы вызываются из event loop.
+    """
+    
+    def __init__(
+        self,
+        max_concurrent: int = JOB_MAX_CONCURRENT,
+        large_lane_slots: int = JOB_LARGE_LANE_SLOTS,
+        large_job_bytes: int = JOB_LARGE_ARCHIVE_BYTES,
+        max_queued: int = JOB_MAX_QUEUED,
+        status_interval: float = JOB_STATUS_INTERVAL_SECONDS
+    ):
+        """
+        Args:
+            max_concurrent: Максимум одновременно обрабатываемых архивов
+            large_lane_slots: Сколько слотов могут занять большие архивы
+            large_job_bytes: Размер, начиная с которого архив считается большим
+            max_queued: Максимум задач в очередях, сверх него задачи отклоняются
+            status_interval: Период обновления положения в очереди (секунды)
+        """
+        self.max_concurrent = max(1, max_concurrent)
+        self.large_lane_slots = min(self.max_concurrent, max(1, large_lane_slots))
+        self.large_job_bytes = large_job_bytes
+        self.max_queued = max_queued
+        self.status_interval = status_interval
+        self._queues: Dict[str, Deque[_Job]] = {SMALL_LANE: deque(), LARGE_LANE: deque()}
+        self._running: Set[_Job] = set()
+        self._avg_duration: Dict[str, float] = {
+            SMALL_LANE: JOB_DEFAULT_DURATION_SMALL_SECONDS,
+            LARGE_LANE: JOB_DEFAULT_DURATION_LARGE_SECONDS,
+        }
+    
+    def lane_for(self, size: int) -> str:
+        """Возвращает очередь для архива заданного размера."""
+        return LARGE_LANE if size >= self.large_job_bytes else SMALL_LANE
+    
+    @property
+    def running(self) -> int:
+        """Количество выполняемых задач."""
+        return len(self._running)
+    
+    @property
+    def queued(self) -> int:
+        """Количество задач в очередях."""
+        return sum(len(queue) for queue in self._queues.values())
+    
+    def _can_start(self, lane: str) -> bool:
+        """Есть ли свободный слот для задачи из очереди lane."""
+        if len(self._running) >= self.max_concurrent:
+            return False
+        if lane == LARGE_LANE:
+            running_large = sum(1 for job in self._running if job.lane == LARGE_LANE)
+            return running_large < self.large_lane_slots
+        return True
+    
+    def _dispatch(self) -> None:
+        """Запускает задачи из очередей, пока есть свободные слоты (малые первыми)."""
+        while True:
+            for lane in (SMALL_LANE, LARGE_LANE):
+                queue = self._queues[lane]
+                if queue and self._can_start(lane):
+                    job = queue.popleft()
+                    job.started_at = time.monotonic()
+                    self._running.add(job)
+                    job.granted.set_result(None)
+                    break
+            else:
+                return
+    
+    def _finish(self, job: _Job) -> None:
+        """Освобождает слот задачи и обновляет оценку длительности."""
+        self._running.discard(job)
+        duration = time.monotonic() - job.started_at
+        self._avg_duration[job.lane] += DURATION_SMOOTHING * (duration - self._avg_duration[job.lane])
+        self._dispatch()
+    
+    def _jobs_ahead(self, job: _Job) -> List[_Job]:
+        """Задачи, которые будут запущены раньше job."""
+        queue = self._queues[job.lane]
+        ahead = []
+        for queued_job in queue:
+            if queued_job is job:
+                break
+            ahead.append(queued_job)
+        if job.lane == LARGE_LANE:
+            ahead.extend(self._queues[SMALL_LANE])
+        return ahead
+    
+    def status(self, job: _Job) -> QueueStatus:
+        """
+        Оценивает положение задачи в очереди.
+        
+        Время ожидания - остаток выполняемых задач плюс средняя длительность
+        задач впереди, поделённые на количество слотов.
+        
+        Args:
+            job: Задача в очереди
+        
+        Returns:
+            QueueStatus
+        """
+        now = time.monotonic()
+        ahead = self._jobs_ahead(job)
+        remaining = sum(
+            max(0.0, self._avg_duration[running.lane] - (now - running.started_at))
+            for running in self._running
+        )
+        work = remaining + sum(self._avg_duration[queued.lane] for queued in ahead)
+        return QueueStatus(position=len(ahead) + 1, eta_seconds=work / self.max_concurrent)
+    
+    async def _report(
+        self,
+        job: _Job,
+        on_status: Callable[[QueueStatus], Awaitable[None]]
+    ) -> None:
+        """Сообщает положение в очереди; ошибки уведомления не прерывают ожидание."""
+        try:
+            await on_status(self.status(job))
+        except Exception as e:
+            logger.warning(f"Не удалось сообщить положение в очереди: {e}")
+    
+    async def _acquire(
+        self,
+        size: int,
+        on_status: Optional[Callable[[QueueStatus], Awaitable[None]]],
+        cancel_token: Optional[CancellationToken]
+    ) -> _Job:
+        """Ставит задачу в очередь и ждёт свободного слота или отмены."""
+        job = _Job(size=size, lane=self.lane_for(size), granted=asyncio.get_running_loop().create_future())
+        queue = self._queues[job.lane]
+        queue.append(job)
+        self._dispatch()
+        if job.granted.done():
+            return job
+        
+        if self.queued > self.max_queued:
+            queue.remove(job)
+            logger.warning(f"Очередь обработки архивов переполнена: задач {self.queued}")
+            raise WorkerPoolBusyError("Очередь обработки архивов переполнена")
+        
+        logger.info(f"Архив ({size} байт) поставлен в очередь {job.lane}: позиция {self.status(job).position}")
+        waiters = {job.granted}
+        if cancel_token is not None:
+            waiters.add(asyncio.ensure_future(cancel_token.wait()))
+        try:
+            while not job.granted.done():
+                if cancel_token is not None and cancel_token.cancelled:
+                    raise JobCancelledError("Обработка архива отменена")
+                if on_status is not None:
+                    await self._report(job, on_status)
+                await asyncio.wait(waiters, timeout=self.status_interval, return_when=asyncio.FIRST_COMPLETED)
+        except BaseException:
+            # Ожидание прервано: освобождаем слот, если он уже выдан, иначе покидаем очередь
+            if job in self._running:
+                self._finish(job)
+            elif job in queue:
+                queue.remove(job)
+            raise
+        finally:
+            for waiter in waiters:
+                if waiter is not job.granted:
+                    waiter.cancel()
+        return job
+    
+    @asynccontextmanager
+    async def slot(
+        self,
+        size: int,
+        on_status: Optional[Callable[[QueueStatus], Awaitable[None]]] = None,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> AsyncIterator[None]:
+        """
+        Удерживает слот обработки на время блока async with.
+        
+        Args:
+            size: Размер архива в байтах (определяет очередь)
+            on_status: Вызывается, пока задача ждёт в очереди, каждые status_interval секунд
+            cancel_token: Токен отмены: отменённая задача покидает очередь
+        
+        Raises:
+            WorkerPoolBusyError: Если очереди переполнены
+            JobCancelledError: Если задача отменена, пока ждала в очереди
+        """
+        job = await self._acquire(size, on_status, cancel_token)
+        try:
+            yield
+        finally:
+            self._finish(job)
+
+
+# Глобальный экземпляр планировщика задач
+job_scheduler = JobScheduler()
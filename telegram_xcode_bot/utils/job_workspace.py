@@ -0,0 +1,213 @@
+"""Выбор места для рабочих директорий задач: память (tmpfs) или диск."""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from telegram_xcode_bot.config import (
+    JOB_RAM_DIR,
+    JOB_RAM_BUDGET_BYTES,
+    JOB_RAM_MARGIN_BYTES,
+    SMALL_ARCHIVE_MEMORY_BYTES,
+    SMALL_ARCHIVE_MEMORY_TOTAL_BYTES,
+    SMALL_ARCHIVE_MEMORY_TTL_SECONDS,
+)
+from telegram_xcode_bot.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Поддиректория в JOB_RAM_DIR для рабочих директорий задач
+_RAM_SUBDIR = "xcode-bot-jobs"
+
+
+class JobWorkspaces:
+    """
+    Распределяет рабочие директории задач между памятью и диском.
+    
+    Задача резервирует ожидаемый объём распакованных файлов. Если резерв
+    помещается в бюджет памяти с учётом уже выполняющихся задач, директория
+    задачи создаётся в RAM-директории (например, /dev/shm), иначе - во
+    временной директории на диске. Резерв снимается после завершения задачи.
+    reserve не блокирует event loop: файловая система проверяется один раз.
+    
+    Файлы задачи, которые связываются жёсткими ссылками с распакованной копией
+    архива, должны быть на одной файловой системе с ней: если копия на другой
+    файловой системе (по умолчанию - на диске), задача работает на диске.
+    
+    Небольшие архивы (входной и выходной) тоже хранятся в памяти, если
+    после них на tmpfs остаётся место для незанятой части бюджета задач и
+    файлы в памяти не превышают свой лимит. Файлы, не использовавшиеся дольше
+    file_ttl_seconds (архивы брошенных сессий), удаляются при выборе
+    директории для следующего файла.
+    """
+    
+    def __init__(
+        self,
+        ram_dir: Optional[str] = JOB_RAM_DIR,
+        budget_bytes: int = JOB_RAM_BUDGET_BYTES,
+        margin_bytes: int = JOB_RAM_MARGIN_BYTES,
+        small_file_bytes: int = SMALL_ARCHIVE_MEMORY_BYTES,
+        files_max_bytes: int = SMALL_ARCHIVE_MEMORY_TOTAL_BYTES,
+        file_ttl_seconds: float = SMALL_ARCHIVE_MEMORY_TTL_SECONDS
+    ):
+        """
+        Args:
+            ram_dir: Директория на tmpfs (None или пустая строка - только диск)
+            budget_bytes: Суммарный объём задач в памяти
+            margin_bytes: Запас к ожидаемому объёму на файлы, которые создаёт задача
+            small_file_bytes: Максимальный размер временного файла в памяти
+            files_max_bytes: Суммарный размер временных файлов в памяти
+            file_ttl_seconds: Через сколько секунд без использования файл в памяти удаляется
+        """
+        self.ram_dir = ram_dir
+        self.budget_bytes = budget_bytes
+        self.margin_bytes = margin_bytes
+        self.small_file_bytes = small_file_bytes
+        self.files_max_bytes = files_max_bytes
+        self.file_ttl_seconds = file_ttl_seconds
+        self._lock = threading.Lock()
+        self._ram_root: Optional[str] = None
+        self._ram_device: Optional[int] = None
+        self._checked = False
+        self.reserved_bytes = 0
+        self.ram_jobs = 0
+        self.disk_jobs = 0
+        self.ram_files = 0
+        self.expired_files = 0
+    
+    def _get_ram_root(self) -> Optional[str]:
+        """Создаёт поддиректорию задач в памяти при первом обращении; None, если память недоступна."""
+        if self._checked:
+            return self._ram_root
+        self._checked = True
+        if not self.ram_dir or self.budget_bytes <= 0:
+            return None
+        root = os.path.join(self.ram_dir, _RAM_SUBDIR)
+        try:
+            os.makedirs(root, exist_ok=True)
+            stat = os.statvfs(root)
+            self._ram_device = os.stat(root).st_dev
+        except OSError as e:
+            logger.warning(f"Директория {self.ram_dir} недоступна, задачи работают на диске: {e}")
+            return None
+        # Бюджет не больше свободного места на tmpfs
+        self.budget_bytes = min(self.budget_bytes, stat.f_bavail * stat.f_frsize)
+        self._ram_root = root
+        logger.info(f"Рабочие директории задач в памяти: {root}, бюджет {self.budget_bytes} байт")
+        return root
+    
+    @contextmanager
+    def reserve(self, expected_bytes: Optional[int], link_device: Optional[int] = None) -> Iterator[Optional[str]]:
+        """
+        Резервирует место для рабочей директории задачи.
+        
+        Args:
+            expected_bytes: Ожидаемый объём распакованных файлов (None - неизвестен, диск)
+            link_device: st_dev файловой системы, с файлами которой задача связывается
+                жёсткими ссылками (None - без ссылок)
+        
+        Yields:
+            Директория для временных директорий задачи или None (временная директория на диске)
+        """
+        size = None if expected_bytes is None else expected_bytes + self.margin_bytes
+        with self._lock:
+            root = self._get_ram_root() if size is not None else None
+            if link_device is not None and link_device != self._ram_device:
+                root = None
+            if root is not None and self.reserved_bytes + size <= self.budget_bytes:
+                self.reserved_bytes += size
+                self.ram_jobs += 1
+            else:
+                root = None
+                self.disk_jobs += 1
+        try:
+            yield root
+        finally:
+            if root is not None:
+                with self._lock:
+                    self.reserved_bytes -= size
+    
+    def _sweep_files(self, root: str) -> int:
+        """
+        Удаляет устаревшие файлы в памяти и считает размер оставшихся.
+        
+        Возраст считается от последнего использования по st_ctime: его обновляют
+        и отметка использования (touch_session_file - os.utime при каждом действии
+        пользователя), и создание жёсткой ссылки (pin_files для задачи).
+        Поддиректории (рабочие директории задач) не затрагиваются.
+        
+        Returns:
+            Суммарный размер оставшихся файлов (жёсткие ссылки считаются один раз)
+        """
+        expire_before = time.time() - self.file_ttl_seconds
+        inodes = {}
+        try:
+            entries = list(os.scandir(root))
+        except OSError:
+            return 0
+        for entry in entries:
+            try:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+                if stat.st_ctime < expire_before:
+                    os.unlink(entry.path)
+                    logger.info(f"Удалён устаревший файл в памяти: {entry.path}")
+                    with self._lock:
+                        self.expired_files += 1
+                    continue
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                logger.warning(f"Не удалось проверить файл {entry.path}: {e}")
+                continue
+            inodes[stat.st_ino] = stat.st_size
+        return sum(inodes.values())
+    
+    def file_dir(self, size: Optional[int]) -> Optional[str]:
+        """
+        Выбирает директорию для временного файла (выполняется вне event loop).
+        
+        Args:
+            size: Ожидаемый размер файла (None - неизвестен)
+        
+        Returns:
+            Директория в памяти или None (временная директория на диске)
+        """
+        with self._lock:
+            root = self._get_ram_root()
+            free_budget = self.budget_bytes - self.reserved_bytes
+        if root is None:
+            return None
+        # Каждый новый временный файл убирает из памяти файлы брошенных сессий
+        files_bytes = self._sweep_files(root)
+        if size is None or size > self.small_file_bytes or files_bytes + size > self.files_max_bytes:
+            return None
+        try:
+            stat = os.statvfs(root)
+        except OSError:
+            return None
+        # Файлы не занимают место, зарезервированное для рабочих директорий задач
+        if stat.f_bavail * stat.f_frsize - free_budget < size:
+            return None
+        with self._lock:
+            self.ram_files += 1
+        return root
+    
+    def stats(self) -> Dict[str, int]:
+        """Возвращает статистику размещения задач."""
+        with self._lock:
+            return {
+                "reserved_bytes": self.reserved_bytes,
+                "budget_bytes": self.budget_bytes,
+                "ram_jobs": self.ram_jobs,
+                "disk_jobs": self.disk_jobs,
+                "ram_files": self.ram_files,
+                "expired_files": self.expired_files,
+            }
+
+
+# Глобальный распределитель рабочих директорий задач
+job_workspaces = JobWorkspaces()
@@ -0,0 +1,109 @@
+"""Мониторинг задержки event loop."""
+
+import asyncio
+from typing import Dict, Optional
+
+from telegram_xcode_bot.config import LOOP_MONITOR_INTERVAL_SECONDS, LOOP_LAG_WARNING_SECONDS
+from telegram_xcode_bot.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class EventLoopLagMonitor:
+    """
+    Измеряет, насколько позже запланированного просыпается фоновая задача.
+    
+    Задача засыпает на interval секунд; превышение фактического времени сна
+    над interval - это время, в течение которого loop был занят синхронным
+    кодом и не обрабатывал другие обновления.
+    """
+    
+    def __init__(
+        self,
+        interval: float = LOOP_MONITOR_INTERVAL_SECONDS,
+        warning_threshold: float = LOOP_LAG_WARNING_SECONDS
+    ):
+        """
+        Args:
+            interval: Период проверки в секундах
+            warning_threshold: Задержка в секундах, при которой пишется предупреждение
+        """
+        self.interval = interval
+        self.warning_threshold = warning_threshold
+        self._task: Optional[asyncio.Task] = None
+        self.reset()
+    
+    def reset(self) -> None:
+        """Сбрасывает накопленную статистику."""
+        self.samples = 0
+        self.slow_samples = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+    
+    def record(self, lag: float) -> None:
+        """
+        Учитывает одно измерение задержки.
+        
+        Args:
+            lag: Задержка в секундах
+        """
+        lag = max(0.0, lag)
+        self.samples += 1
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        self.total_lag += lag
+        if lag >= self.warning_threshold:
+            self.slow_samples += 1
+            logger.warning(f"Event loop был заблокирован на {lag * 1000:.0f} мс")
+    
+    @property
+    def running(self) -> bool:
+        """Запущен ли мониторинг."""
+        return self._task is not None and not self._task.done()
+    
+    async def _run(self) -> None:
+        """Цикл измерений."""
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.record(loop.time() - started - self.interval)
+    
+    def start(self) -> None:
+        """Запускает мониторинг в текущем event loop."""
+        if self.running:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        logger.info(f"Мониторинг event loop запущен: период {self.interval}s")
+    
+    async def stop(self) -> None:
+        """Останавливает мониторинг и пишет итоговую статистику в лог."""
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        stats = self.stats()
+        logger.info(
+            f"Мониторинг event loop остановлен: измерений {stats['samples']}, "
+            f"максимальная задержка {stats['max_lag'] * 1000:.0f} мс, "
+            f"блокировок {stats['slow_samples']}"
+        )
+    
+    def stats(self) -> Dict[str, float]:
+        """Возвращает статистику задержек (в секундах)."""
+        return {
+            "samples": self.samples,
+            "slow_samples": self.slow_samples,
+            "last_lag": self.last_lag,
+            "max_lag": self.max_lag,
+            "avg_lag": self.total_lag / self.samples if self.samples else 0.0,
+        }
+
+
+# Глобальный экземпляр монитора event loop
+loop_monitor = EventLoopLagMonitor()
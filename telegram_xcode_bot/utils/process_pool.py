@@ -0,0 +1,426 @@
+"""Выделенный пул процессов для обработки архивов."""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from multiprocessing.connection import Connection
+from typing import Any, Callable, List, Optional, Set, TypeVar
+
+from telegram_xcode_bot.config import (
+    ARCHIVE_POOL_WORKERS,
+    ARCHIVE_POOL_MAX_QUEUE,
+    ARCHIVE_POOL_MAX_TASKS_PER_CHILD,
+    ARCHIVE_POOL_START_METHOD,
+    PROCESS_TIMEOUT_SECONDS,
+    JOB_CANCEL_GRACE_SECONDS,
+)
+from telegram_xcode_bot.exceptions import JobCancelledError, WorkerPoolBusyError
+from telegram_xcode_bot.logger import get_logger
+from telegram_xcode_bot.utils.async_helpers import run_blocking_io
+from telegram_xcode_bot.utils.cancellation import CancellationToken
+
+logger = get_logger(__name__)
+
+T = TypeVar('T')
+
+# Модули, которые импортируются в процессах заранее, чтобы первая задача не ждала импорта
+PRELOAD_MODULES = [
+    'PIL.Image',
+    'telegram_xcode_bot.services.archive_service',
+    'telegram_xcode_bot.services.icon_service',
+    'telegram_xcode_bot.services.xcode_service',
+]
+
+
+def _warm_up_worker() -> None:
+    """Инициализатор процесса: импортирует тяжёлые модули до первой задачи."""
+    import importlib
+    for module in PRELOAD_MODULES:
+        importlib.import_module(module)
+
+
+def _worker_main(conn: Connection, max_tasks: int) -> None:
+    """
+    Цикл процесса пула: получает задачи (функция, аргументы) и отправляет результаты.
+    
+    Процесс завершается после max_tasks задач (0 - без ограничения), по
+    сигналу None или при закрытии соединения.
+    
+    Args:
+        conn: Соединение с процессом бота
+        max_tasks: Количество задач до завершения процесса
+    """
+    _warm_up_worker()
+    conn.send(True)
+    completed = 0
+    while not max_tasks or completed < max_tasks:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        func, args, kwargs = task
+        try:
+            reply = (True, func(*args, **kwargs))
+        except Exception as e:
+            reply = (False, e)
+        try:
+            conn.send(reply)
+        except Exception as e:
+            # Результат или исключение не сериализуются pickle
+            conn.send((False, RuntimeError(f"Не удалось передать результат задачи: {e}")))
+        completed += 1
+
+
+def _get_mp_context(start_method: str) -> multiprocessing.context.BaseContext:
+    """
+    Возвращает контекст multiprocessing.
+    
+    fork не используется: копирование памяти бота с потоками небезопасно.
+    """
+    available = multiprocessing.get_all_start_methods()
+    if start_method not in available or start_method == 'fork':
+        start_method = 'forkserver' if 'forkserver' in available else 'spawn'
+    context = multiprocessing.get_context(start_method)
+    if start_method == 'forkserver':
+        # Процессы порождаются от сервера, в котором модули уже импортированы
+        context.set_forkserver_preload(PRELOAD_MODULES)
+    return context
+
+
+@dataclass(eq=False)
+class _Worker:
+    """Процесс пула и соединение с ним."""
+    process: multiprocessing.process.BaseProcess
+    conn: Connection
+    # Выполненные процессом задачи
+    tasks: int = 0
+
+
+class ArchiveWorkerPool:
+    """
+    Пул процессов для CPU-ёмкой обработки архивов.
+    
+    Каждый процесс пула независим и связан с ботом своим соединением, поэтому
+    процесс с отменённой задачей, не остановившейся через CancellationToken,
+    завершается отдельно: задачи в остальных процессах продолжают работу.
+    Ограничивает количество задач в очереди и пересоздаёт процессы после
+    max_tasks_per_child задач. Методы run/start/shutdown вызываются из event loop.
+    """
+    
+    def __init__(
+        self,
+        max_workers: int = ARCHIVE_POOL_WORKERS,
+        max_queue: int = ARCHIVE_POOL_MAX_QUEUE,
+        max_tasks_per_child: int = ARCHIVE_POOL_MAX_TASKS_PER_CHILD,
+        start_method: str = ARCHIVE_POOL_START_METHOD,
+        cancel_grace: float = JOB_CANCEL_GRACE_SECONDS
+    ):
+        """
+        Args:
+            max_workers: Количество процессов
+            max_queue: Сколько задач может ждать свободного процесса
+            max_tasks_per_child: Количество задач до перезапуска процесса (0 - без перезапуска)
+            start_method: Способ запуска процессов (forkserver или spawn)
+            cancel_grace: Сколько ждать добровольной остановки отменённой задачи
+        """
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.max_tasks_per_child = max(0, max_tasks_per_child or 0)
+        self.start_method = start_method
+        self.cancel_grace = cancel_grace
+        self._context: Optional[multiprocessing.context.BaseContext] = None
+        self._workers: Set[_Worker] = set()
+        self._idle: List[_Worker] = []
+        # Потоки, ожидающие запуска процессов и результатов задач
+        self._io: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._in_flight = 0
+    
+    @property
+    def in_flight(self) -> int:
+        """Количество выполняемых и ожидающих задач."""
+        return self._in_flight
+    
+    @property
+    def capacity(self) -> int:
+        """Максимальное количество задач в пуле (выполняемые + очередь)."""
+        return self.max_workers + self.max_queue
+    
+    def _get_io(self) -> ThreadPoolExecutor:
+        """Возвращает потоки ожидания, создавая их при первом обращении."""
+        if self._io is None:
+            self._io = ThreadPoolExecutor(max_workers=self.max_workers * 2, thread_name_prefix='archive-pool')
+        return self._io
+    
+    def _get_slots(self) -> asyncio.Semaphore:
+        """Семафор свободных процессов текущего event loop."""
+        loop = asyncio.get_running_loop()
+        if self._slots is None or (self._slots_loop is not loop and not self._in_flight):
+            self._slots = asyncio.Semaphore(self.max_workers)
+            self._slots_loop = loop
+        return self._slots
+    
+    def _spawn_worker(self) -> _Worker:
+        """
+        Запускает процесс и ждёт импорта модулей (выполняется в потоке).
+        
+        Raises:
+            BrokenProcessPool: Если процесс завершился при запуске
+        """
+        if self._context is None:
+            self._context = _get_mp_context(self.start_method)
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main, args=(child_conn, self.max_tasks_per_child), daemon=True
+        )
+        process.start()
+        child_conn.close()
+        try:
+            parent_conn.recv()
+        except EOFError:
+            parent_conn.close()
+            process.join()
+            raise BrokenProcessPool("Процесс пула обработки архивов не запустился")
+        return _Worker(process=process, conn=parent_conn)
+    
+    async def _take_worker(self) -> _Worker:
+        """Возвращает свободный процесс или запускает новый."""
+        while self._idle:
+            worker = self._idle.pop()
+            if worker.process.is_alive():
+                return worker
+            self._discard_worker(worker)
+        worker = await asyncio.get_running_loop().run_in_executor(self._get_io(), self._spawn_worker)
+        self._workers.add(worker)
+        return worker
+    
+    def _reap_worker(self, worker: _Worker) -> None:
+        """
+        Дожидается завершения процесса, чтобы он не остался зомби (выполняется в потоке).
+        
+        Процесс, не завершившийся за cancel_grace, завершается принудительно.
+        """
+        worker.process.join(timeout=self.cancel_grace)
+        if worker.process.is_alive():
+            worker.process.kill()
+            worker.process.join()
+    
+    def _discard_worker(self, worker: _Worker) -> None:
+        """Убирает процесс из пула и дожидается его завершения в фоне."""
+        self._workers.discard(worker)
+        worker.conn.close()
+        self._get_io().submit(self._reap_worker, worker)
+    
+    def _release_worker(self, worker: _Worker) -> None:
+        """Возвращает процесс в пул после задачи или убирает его после max_tasks_per_child задач."""
+        worker.tasks += 1
+        if self.max_tasks_per_child and worker.tasks >= self.max_tasks_per_child:
+            # Процесс завершается сам после последней задачи
+            self._discard_worker(worker)
+            return
+        self._idle.append(worker)
+    
+    def _kill_worker(self, worker: _Worker, result: "asyncio.Future") -> None:
+        """
+        Принудительно завершает один процесс; остальные процессы и их задачи не затрагиваются.
+        
+        Соединение закрывается после того, как поток ожидания результата получит EOF.
+        """
+        self._workers.discard(worker)
+        worker.process.kill()
+        self._get_io().submit(self._reap_worker, worker)
+        
+        def close(future: "asyncio.Future") -> None:
+            if not future.cancelled():
+                future.exception()  # EOFError завершённого процесса никто не ждёт
+            worker.conn.close()
+        
+        result.add_done_callback(close)
+        logger.warning(f"Процесс пула обработки архивов завершён принудительно: pid {worker.process.pid}")
+    
+    async def start(self) -> None:
+        """Запускает процессы заранее, чтобы первая задача не ждала импорта модулей."""
+        loop = asyncio.get_running_loop()
+        missing = self.max_workers - len(self._workers)
+        workers = await asyncio.gather(*(
+            loop.run_in_executor(self._get_io(), self._spawn_worker) for _ in range(missing)
+        ))
+        self._workers.update(workers)
+        self._idle.extend(workers)
+        logger.info(f"Пул обработки архивов запущен: процессов {self.max_workers}")
+    
+    async def _wait_step(
+        self,
+        future: "asyncio.Future",
+        cancel_wait: Optional["asyncio.Future"],
+        deadline: float
+    ) -> bool:
+        """Ждёт future, отмены или наступления deadline; True, если future завершён."""
+        waiters = {future} if cancel_wait is None else {future, cancel_wait}
+        remaining = max(0.0, deadline - asyncio.get_running_loop().time())
+        done, _ = await asyncio.wait(waiters, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+        return future in done
+    
+    def _raise_interrupted(self, func: Callable, timeout: float, cancel_wait: Optional["asyncio.Future"]) -> None:
+        """
+        Raises:
+            JobCancelledError: Если задача отменена через токен
+            TimeoutError: Иначе (истёк тайм-аут)
+        """
+        if cancel_wait is not None and cancel_wait.done():
+            raise JobCancelledError("Обработка архива отменена")
+        logger.error(f"Timeout executing {func.__name__} after {timeout}s")
+        raise TimeoutError(f"Операция превысила время ожидания ({timeout}s)")
+    
+    async def _stop_job(
+        self,
+        worker: _Worker,
+        result: "asyncio.Future",
+        cancel_token: Optional[CancellationToken]
+    ) -> None:
+        """
+        Останавливает задачу: сначала просит процесс прерваться через токен,
+        затем, если он не успел за JOB_CANCEL_GRACE_SECONDS, завершает этот процесс.
+        """
+        if cancel_token is not None:
+            await run_blocking_io(cancel_token.signal_workers, timeout=self.cancel_grace)
+            done, _ = await asyncio.wait({result}, timeout=self.cancel_grace)
+            if done:
+                try:
+                    result.result()
+                except (EOFError, OSError):
+                    self._discard_worker(worker)
+                else:
+                    # Задача прервалась сама: процесс можно использовать дальше
+                    self._release_worker(worker)
+                return
+        self._kill_worker(worker, result)
+    
+    async def run(
+        self,
+        func: Callable[..., T],
+        *args: Any,
+        timeout: float = PROCESS_TIMEOUT_SECONDS,
+        cancel_token: Optional[CancellationToken] = None,
+        **kwargs: Any
+    ) -> T:
+        """
+        Выполняет функцию в процессе пула.
+        
+        Функция и аргументы должны сериализоваться pickle (функции уровня модуля).
+        Если передан cancel_token, он передаётся в функцию именованным аргументом
+        cancel_token, а его срок задаётся в момент запуска задачи по оставшемуся
+        тайм-ауту (тайм-аут включает ожидание свободного процесса). При отмене
+        или тайм-ауте процесс сначала останавливается через токен, а если не
+        успевает - завершается только он.
+        
+        Args:
+            func: Функция для выполнения
+            *args: Позиционные аргументы функции
+            timeout: Тайм-аут в секундах
+            cancel_token: Токен отмены задачи
+            **kwargs: Именованные аргументы функции
+        
+        Returns:
+            Результат выполнения функции
+        
+        Raises:
+            WorkerPoolBusyError: Если очередь пула заполнена
+            JobCancelledError: Если задача отменена через cancel_token
+            TimeoutError: Если операция превысила тайм-аут
+            BrokenProcessPool: Если процесс пула аварийно завершился
+        """
+        if self._in_flight >= self.capacity:
+            logger.warning(f"Пул обработки архивов переполнен: задач {self._in_flight}")
+            raise WorkerPoolBusyError("Очередь обработки архивов переполнена")
+        
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+            kwargs['cancel_token'] = cancel_token
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        slots = self._get_slots()
+        self._in_flight += 1
+        cancel_wait = asyncio.ensure_future(cancel_token.wait()) if cancel_token is not None else None
+        slot = asyncio.ensure_future(slots.acquire())
+        try:
+            # Ожидание свободного процесса
+            try:
+                acquired = await self._wait_step(slot, cancel_wait, deadline)
+            finally:
+                if not slot.done() or slot.cancelled():
+                    slot.cancel()
+                    acquired = False
+            if not acquired:
+                self._raise_interrupted(func, timeout, cancel_wait)
+            
+            try:
+                worker = await self._take_worker()
+                if cancel_token is not None:
+                    # Процесс сам прекращает задачу к тому же сроку, что и ожидание здесь
+                    cancel_token.set_timeout(max(0.0, deadline - loop.time()))
+                try:
+                    worker.conn.send((func, args, kwargs))
+                except Exception:
+                    self._idle.append(worker)
+                    raise
+                result = loop.run_in_executor(self._get_io(), worker.conn.recv)
+                try:
+                    finished = await self._wait_step(result, cancel_wait, deadline)
+                except asyncio.CancelledError:
+                    await asyncio.shield(self._stop_job(worker, result, cancel_token))
+                    raise
+                
+                if not finished:
+                    await self._stop_job(worker, result, cancel_token)
+                    self._raise_interrupted(func, timeout, cancel_wait)
+                try:
+                    ok, value = result.result()
+                except (EOFError, OSError):
+                    self._discard_worker(worker)
+                    logger.error("Процесс пула обработки архивов аварийно завершился")
+                    raise BrokenProcessPool("Процесс пула обработки архивов аварийно завершился")
+                self._release_worker(worker)
+                if not ok:
+                    raise value
+                return value
+            finally:
+                slots.release()
+        finally:
+            if cancel_wait is not None:
+                cancel_wait.cancel()
+            self._in_flight -= 1
+    
+    def _stop_workers(self, workers: List[_Worker]) -> None:
+        """Просит процессы завершиться и завершает принудительно не успевшие (выполняется в потоке)."""
+        for worker in workers:
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+        for worker in workers:
+            self._reap_worker(worker)
+    
+    async def shutdown(self) -> None:
+        """Останавливает процессы пула."""
+        workers = list(self._workers)
+        self._workers.clear()
+        self._idle.clear()
+        if workers:
+            await asyncio.get_running_loop().run_in_executor(None, self._stop_workers, workers)
+            for worker in workers:
+                worker.conn.close()
+            logger.info("Пул обработки архивов остановлен")
+        if self._io is not None:
+            self._io.shutdown(wait=False)
+            self._io = None
+
+
+# Глобальный экземпляр пула обработки архивов
+archive_pool = ArchiveWorkerPool()
@@ -0,0 +1,142 @@
+"""Объединение одинаковых одновременно выполняющихся задач (single-flight)."""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, Optional, Set, TypeVar
+
+from telegram_xcode_bot.exceptions import JobCancelledError
+from telegram_xcode_bot.logger import get_logger
+from telegram_xcode_bot.utils.cancellation import CancellationToken
+
+logger = get_logger(__name__)
+
+T = TypeVar('T')
+
+
+@dataclass(eq=False)
+class _Flight(Generic[T]):
+    """Выполняющаяся задача и её участники."""
+    key: Hashable
+    task: "asyncio.Future[T]"
+    token: CancellationToken
+    # Участники, которые ещё не получили результат или не вышли
+    participants: int = 0
+    finalize: Optional[Callable[[T], Awaitable[None]]] = None
+
+
+class SingleFlight:
+    """
+    Выполняет задачу с данным ключом один раз для всех одновременных вызовов.
+    
+    Задача выполняется в отдельной asyncio задаче со своим токеном отмены.
+    Участник, отменивший свой токен, выходит из ожидания, а общая задача
+    отменяется, только когда вышли все участники. Когда последний участник
+    получил результат, вызывается finalize (например, удаление общего файла).
+    Задача, из которой вышли все участники, сразу забывается: новый вызов с тем
+    же ключом запускает её заново, а если отменённая задача всё же завершится
+    успешно, finalize вызывается без участников. Все методы вызываются из event loop.
+    """
+    
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        # Вызовы finalize для задач без участников (ссылки, чтобы задачи не собрал GC)
+        self._orphan_finalizers: Set["asyncio.Task[None]"] = set()
+    
+    @property
+    def in_flight(self) -> int:
+        """Количество выполняющихся задач."""
+        return len(self._flights)
+    
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        """Убирает завершённую задачу: новые вызовы с этим ключом запустят её заново."""
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.task.cancelled():
+            # Ошибка уже передана участникам (или все вышли): помечаем её полученной
+            flight.task.exception()
+    
+    @staticmethod
+    def _succeeded(flight: _Flight) -> bool:
+        """Проверяет, что задача завершилась с результатом."""
+        return not flight.task.cancelled() and flight.task.exception() is None
+    
+    async def _run_finalize(self, flight: _Flight) -> None:
+        """Вызывает finalize для задачи, результат которой никто не получил."""
+        try:
+            await flight.finalize(flight.task.result())
+        except Exception as e:
+            logger.warning(f"Не удалось завершить задачу {str(flight.key)[:12]} без участников: {e}")
+    
+    def _finalize_orphan(self, flight: _Flight) -> None:
+        """Колбэк завершения задачи, из которой вышли все участники."""
+        if flight.finalize is None or not self._succeeded(flight):
+            return
+        finalizer = asyncio.ensure_future(self._run_finalize(flight))
+        self._orphan_finalizers.add(finalizer)
+        finalizer.add_done_callback(self._orphan_finalizers.discard)
+    
+    async def _leave(self, flight: _Flight) -> None:
+        """Уменьшает число участников; последний вызывает finalize или отменяет задачу."""
+        flight.participants -= 1
+        if flight.participants:
+            return
+        if not flight.task.done():
+            logger.info("Все участники отменили задачу, задача останавливается")
+            flight.token.cancel()
+            # Новый вызов с этим ключом не должен присоединяться к отменённой задаче
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+            flight.task.add_done_callback(lambda _, flight=flight: self._finalize_orphan(flight))
+            return
+        if flight.finalize is not None and self._succeeded(flight):
+            await flight.finalize(flight.task.result())
+    
+    async def do(
+        self,
+        key: Hashable,
+        factory: Callable[[CancellationToken], Awaitable[T]],
+        cancel_token: Optional[CancellationToken] = None,
+        deliver: Optional[Callable[[T], Awaitable[Any]]] = None,
+        finalize: Optional[Callable[[T], Awaitable[None]]] = None
+    ) -> T:
+        """
+        Выполняет factory или присоединяется к уже выполняющейся задаче с тем же ключом.
+        
+        Args:
+            key: Ключ задачи (одинаковые ключи - одинаковый результат)
+            factory: Создаёт корутину задачи; получает общий токен отмены
+            cancel_token: Токен отмены участника
+            deliver: Вызывается для каждого участника с результатом (например, копирование файла)
+            finalize: Вызывается один раз, когда результат получили все участники
+        
+        Returns:
+            Результат задачи
+        
+        Raises:
+            JobCancelledError: Если участник отменил свой токен
+            Exception: Ошибка задачи передаётся всем участникам
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            token = CancellationToken()
+            flight = _Flight(key=key, task=asyncio.ensure_future(factory(token)), token=token, finalize=finalize)
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _, flight=flight: self._forget(key, flight))
+        else:
+            logger.info(f"Запрос присоединён к выполняющейся задаче {str(key)[:12]}")
+        flight.participants += 1
+        
+        cancel_wait = asyncio.ensure_future(cancel_token.wait()) if cancel_token is not None else None
+        try:
+            waiters = {flight.task} if cancel_wait is None else {flight.task, cancel_wait}
+            await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+            if not flight.task.done():
+                raise JobCancelledError("Обработка архива отменена")
+            result = flight.task.result()
+            if deliver is not None:
+                await deliver(result)
+            return result
+        finally:
+            if cancel_wait is not None:
+                cancel_wait.cancel()
+            await asyncio.shield(self._leave(flight))
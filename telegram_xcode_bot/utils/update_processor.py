@@ -0,0 +1,138 @@
+"""Параллельная обработка обновлений с сохранением порядка для каждого пользователя."""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Dict, Hashable, Optional, Tuple
+
+from telegram.ext import BaseUpdateProcessor
+
+from telegram_xcode_bot.config import MAX_CONCURRENT_UPDATES, UNSERIALIZED_CALLBACK_PREFIXES
+from telegram_xcode_bot.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def get_update_key(update: object) -> Optional[int]:
+    """
+    Возвращает ключ сериализации обновления.
+    
+    Args:
+        update: Обновление Telegram
+    
+    Returns:
+        ID пользователя или None, если обновление не связано с пользователем
+    """
+    user = getattr(update, 'effective_user', None)
+    return user.id if user is not None else None
+
+
+def is_unserialized_update(update: object, prefixes: Tuple[str, ...] = UNSERIALIZED_CALLBACK_PREFIXES) -> bool:
+    """
+    Проверяет, нужно ли обработать обновление вне очереди пользователя.
+    
+    Например, кнопка отмены должна сработать, пока обработчик этого же
+    пользователя ждёт архив.
+    
+    Args:
+        update: Обновление Telegram
+        prefixes: Префиксы callback_data таких кнопок
+    
+    Returns:
+        True, если callback_data начинается с одного из префиксов
+    """
+    query = getattr(update, 'callback_query', None)
+    data = getattr(query, 'data', None)
+    return bool(data) and data.startswith(prefixes)
+
+
+class KeyedLocks:
+    """
+    Набор asyncio.Lock по ключу.
+    
+    Блокировка создаётся при первом обращении и удаляется, когда её никто
+    не удерживает и не ждёт, поэтому словарь не растёт с числом пользователей.
+    Ожидающие получают блокировку в порядке обращения (FIFO).
+    """
+    
+    def __init__(self):
+        self._locks: Dict[Hashable, asyncio.Lock] = {}
+        # Сколько задач удерживает или ждёт блокировку
+        self._users: Dict[Hashable, int] = {}
+    
+    def __len__(self) -> int:
+        return len(self._locks)
+    
+    def is_locked(self, key: Hashable) -> bool:
+        """Удерживается ли блокировка ключа."""
+        lock = self._locks.get(key)
+        return lock is not None and lock.locked()
+    
+    @asynccontextmanager
+    async def hold(self, key: Hashable) -> AsyncIterator[None]:
+        """
+        Удерживает блокировку ключа на время блока async with.
+        
+        Args:
+            key: Ключ блокировки
+        """
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        self._users[key] = self._users.get(key, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._users[key] -= 1
+            if not self._users[key]:
+                del self._users[key]
+                del self._locks[key]
+
+
+class UserSerializedUpdateProcessor(BaseUpdateProcessor):
+    """
+    Обрабатывает обновления разных пользователей параллельно, а обновления
+    одного пользователя - строго по очереди, в порядке поступления.
+    
+    Обновления без пользователя и нажатия кнопок из UNSERIALIZED_CALLBACK_PREFIXES
+    (отмена) обрабатываются без блокировки. Ожидающие своей очереди обновления
+    занимают слот max_concurrent_updates, поэтому лимит выбирается с запасом:
+    тяжёлую работу ограничивает пул процессов.
+    """
+    
+    __slots__ = ("_user_locks",)
+    
+    def __init__(self, max_concurrent_updates: int = MAX_CONCURRENT_UPDATES):
+        """
+        Args:
+            max_concurrent_updates: Максимум одновременно обрабатываемых обновлений
+        """
+        super().__init__(max_concurrent_updates)
+        self._user_locks = KeyedLocks()
+    
+    @property
+    def user_locks(self) -> KeyedLocks:
+        """Блокировки пользователей."""
+        return self._user_locks
+    
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        """
+        Выполняет обработку обновления под блокировкой его пользователя.
+        
+        Args:
+            update: Обновление Telegram
+            coroutine: Корутина обработки обновления
+        """
+        key = get_update_key(update)
+        if key is None or is_unserialized_update(update):
+            await coroutine
+            return
+        
+        async with self._user_locks.hold(key):
+            await coroutine
+    
+    async def initialize(self) -> None:
+        """Ресурсы не требуются."""
+    
+    async def shutdown(self) -> None:
+        """Ресурсы не требуются."""
@@ -3,6 +3,7 @@
 import pytest
 import tempfile
 import os
+import zipfile
 from pathlib import Path
 
 
@@ -33,3 +34,22 @@ def sample_swift_content():
     let activationDate = formatter.date(from: "2026/01/31")
     '''
 
+
+
+@pytest.fixture
+def project_archive(temp_dir, sample_pbxproj_content, sample_swift_content):
+    """Zip архив с минимальной структурой Xcode проекта."""
+    archive_path = temp_dir / "project.zip"
+    contents_json = (
+        '{"images": [{"idiom": "universal", "platform": "ios", '
+        '"size": "1024x1024", "filename": "old.png"}], '
+        '"info": {"author": "xcode", "version": 1}}'
+    )
+    with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("TestApp/TestApp.xcodeproj/project.pbxproj", sample_pbxproj_content)
+        zf.writestr("TestApp/TestApp/ContentView.swift", "import SwiftUI\n")
+        zf.writestr("TestApp/TestApp/Activation.swift", sample_swift_content)
+        zf.writestr("TestApp/TestApp/Assets.xcassets/AppIcon.appiconset/Contents.json", contents_json)
+        zf.writestr("TestApp/TestApp/Assets.xcassets/AppIcon.appiconset/old.png", b"old icon")
+        zf.writestr("TestApp/TestApp/Resources/data.json", '{"items": []}\n' * 500)
+    return archive_path
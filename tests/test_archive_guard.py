@@ -0,0 +1,88 @@
+"""Тесты для модуля archive_guard."""
+
+import os
+import zipfile
+
+import pytest
+
+from telegram_xcode_bot.services import archive_service
+from telegram_xcode_bot.services.archive_guard import ArchiveGuard, archive_guard
+from telegram_xcode_bot.services.archive_service import extract_archive, extract_members, inspect_archive
+from telegram_xcode_bot.exceptions import ArchiveLimitError, ArchiveProcessingError
+
+
+def make_bomb(path, size=4 * 1024 * 1024):
+    """Создаёт архив с одним файлом из нулей (высокая степень сжатия)."""
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("zeros.bin", b"\0" * size)
+
+
+class TestArchiveGuard:
+    """Тесты для ArchiveGuard."""
+    
+    def test_project_archive_passes(self, project_archive):
+        """Обычный проект проходит проверку с лимитами по умолчанию."""
+        with zipfile.ZipFile(project_archive) as zf:
+            archive_guard.check(zf.infolist())
+    
+    def test_rejects_high_compression_ratio(self, temp_dir):
+        """Запись, сжатая в сотни раз, отклоняется по центральному каталогу."""
+        archive_path = temp_dir / "bomb.zip"
+        make_bomb(archive_path)
+        with zipfile.ZipFile(archive_path) as zf:
+            with pytest.raises(ArchiveLimitError):
+                ArchiveGuard().check(zf.infolist())
+    
+    def test_rejects_entry_count_total_and_depth(self, temp_dir):
+        """Проверяются количество записей, суммарный размер и глубина путей."""
+        archive_path = temp_dir / "many.zip"
+        with zipfile.ZipFile(archive_path, 'w') as zf:
+            for i in range(10):
+                zf.writestr(f"dir/file{i}.txt", b"x" * 100)
+            zf.writestr("/".join(["d"] * 8) + "/deep.txt", b"x")
+        with zipfile.ZipFile(archive_path) as zf:
+            infos = zf.infolist()
+            with pytest.raises(ArchiveLimitError, match="много файлов"):
+                ArchiveGuard(max_entries=5).check(infos)
+            with pytest.raises(ArchiveLimitError, match="распакованном"):
+                ArchiveGuard(max_total_bytes=500).check(infos)
+            with pytest.raises(ArchiveLimitError, match="вложенность"):
+                ArchiveGuard(max_depth=8).check(infos)
+            ArchiveGuard(max_depth=9).check(infos)
+    
+    def test_streaming_limit_removes_partial_file(self, temp_dir):
+        """Распаковка прерывается по фактическим байтам, недописанный файл удаляется."""
+        archive_path = temp_dir / "big.zip"
+        extract_dir = temp_dir / "extract"
+        with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_STORED) as zf:
+            zf.writestr("a.bin", os.urandom(3 * 1024 * 1024))
+        guard = ArchiveGuard(max_total_bytes=1024 * 1024)
+        with zipfile.ZipFile(archive_path) as zf:
+            info = zf.getinfo("a.bin")
+            with pytest.raises(ArchiveLimitError):
+                guard.extract_member(zf, info, str(extract_dir))
+            assert not (extract_dir / "a.bin").exists()
+            # Уже распакованные байты других записей учитываются
+            with pytest.raises(ArchiveLimitError):
+                ArchiveGuard(max_total_bytes=4 * 1024 * 1024).extract_member(
+                    zf, info, str(extract_dir), written=2 * 1024 * 1024
+                )
+    
+    def test_extraction_functions_use_guard(self, temp_dir, monkeypatch):
+        """extract_archive, extract_members и inspect_archive отклоняют zip-бомбу."""
+        archive_path = temp_dir / "bomb.zip"
+        extract_dir = temp_dir / "extract"
+        make_bomb(archive_path)
+        
+        with pytest.raises(ArchiveLimitError):
+            extract_archive(str(archive_path), str(extract_dir))
+        with pytest.raises(ArchiveProcessingError):
+            extract_members(str(archive_path), str(extract_dir), lambda name: True)
+        with pytest.raises(ArchiveLimitError):
+            inspect_archive(str(archive_path))
+        assert not (extract_dir / "zeros.bin").exists()
+        
+        # С ослабленными лимитами архив распаковывается целиком
+        monkeypatch.setattr(archive_service, "archive_guard", ArchiveGuard(max_ratio=10 ** 6))
+        extract_archive(str(archive_path), str(extract_dir))
+        assert (extract_dir / "zeros.bin").stat().st_size == 4 * 1024 * 1024
@@ -1,16 +1,30 @@
 """Тесты для модуля archive_service."""
 
 import pytest
+import glob
 import os
 import tempfile
 import zipfile
 from pathlib import Path
 
+from PIL import Image
+
+from telegram_xcode_bot.services import archive_service
 from telegram_xcode_bot.services.archive_service import (
     extract_archive,
+    extract_members,
+    extracted_copy_device,
     create_archive,
+    process_archive_with_actions,
+    inspect_archive,
+    get_project_snapshot,
+    make_job_key,
 )
-from telegram_xcode_bot.exceptions import ArchiveProcessingError
+from telegram_xcode_bot.services.snapshot_cache import snapshot_cache
+from telegram_xcode_bot.exceptions import ArchiveProcessingError, JobCancelledError
+from telegram_xcode_bot.utils.cancellation import CancellationToken
+from telegram_xcode_bot.utils.disk_cache import DirectoryCache, DiskCache
+from telegram_xcode_bot.utils.hashing import compute_file_hash
 
 
 class TestExtractArchive:
@@ -114,3 +128,269 @@ class TestCreateArchive:
         with zipfile.ZipFile(output_path, 'r') as zf:
             assert len(zf.namelist()) == 0
 
+
+
+class TestExtractMembers:
+    """Тесты для extract_members."""
+    
+    def test_extracts_only_selected_members(self, temp_dir, project_archive):
+        """Тест выборочной распаковки."""
+        extract_dir = temp_dir / "extract"
+        extract_dir.mkdir()
+        
+        extracted = extract_members(
+            str(project_archive), str(extract_dir), lambda name: name.endswith('.swift')
+        )
+        
+        assert sorted(extracted) == [
+            "TestApp/TestApp/Activation.swift",
+            "TestApp/TestApp/ContentView.swift",
+        ]
+        assert not (extract_dir / "TestApp" / "TestApp.xcodeproj").exists()
+
+
+class TestProcessArchiveWithActions:
+    """Тесты для process_archive_with_actions."""
+    
+    def test_untouched_entries_are_not_recompressed(self, temp_dir, project_archive):
+        """Тест, что неизменённые записи переносятся без пересжатия."""
+        output_path = temp_dir / "output.zip"
+        actions = {'increment_version': True, 'new_name': 'NewApp'}
+        
+        result = process_archive_with_actions(str(project_archive), str(output_path), actions)
+        
+        assert result.success is True
+        assert result.project_info.marketing_version == "2.0"
+        assert result.project_info.display_name == "NewApp"
+        assert result.project_info.activation_date == "2026/01/31"
+        
+        with zipfile.ZipFile(project_archive, 'r') as original, \
+                zipfile.ZipFile(output_path, 'r') as output:
+            assert output.namelist() == original.namelist()
+            pbxproj = output.read("TestApp/TestApp.xcodeproj/project.pbxproj").decode()
+            assert "MARKETING_VERSION = 2.0;" in pbxproj
+            # Неизменённые записи совпадают вплоть до CRC и сжатого размера
+            for name in ("TestApp/TestApp/Resources/data.json", "TestApp/TestApp/Activation.swift"):
+                assert output.read(name) == original.read(name)
+                assert output.getinfo(name).compress_size == original.getinfo(name).compress_size
+    
+    def test_icon_replacement_adds_and_removes_entries(self, temp_dir, project_archive):
+        """Тест замены иконки: старый файл удаляется, новый добавляется."""
+        icon_path = temp_dir / "icon.jpg"
+        Image.new('RGB', (1024, 1024), color='red').save(icon_path, 'JPEG')
+        output_path = temp_dir / "output.zip"
+        
+        result = process_archive_with_actions(
+            str(project_archive), str(output_path), {'new_icon_path': str(icon_path)}
+        )
+        
+        assert result.success is True
+        with zipfile.ZipFile(output_path, 'r') as output:
+            names = output.namelist()
+            appiconset = "TestApp/TestApp/Assets.xcassets/AppIcon.appiconset/"
+            assert appiconset + "old.png" not in names
+            assert appiconset + "AppIcon-1024.png" in names
+            assert b"AppIcon-1024.png" in output.read(appiconset + "Contents.json")
+    
+    def test_repeated_processing_is_byte_identical(self, temp_dir, project_archive):
+        """Тест, что одинаковые входные данные дают одинаковый архив и его хеш."""
+        icon_path = temp_dir / "icon.jpg"
+        Image.new('RGB', (1024, 1024), color='red').save(icon_path, 'JPEG')
+        actions = {'increment_version': True, 'new_icon_path': str(icon_path)}
+        
+        first = process_archive_with_actions(str(project_archive), str(temp_dir / "first.zip"), actions)
+        second = process_archive_with_actions(str(project_archive), str(temp_dir / "second.zip"), actions)
+        
+        assert (temp_dir / "first.zip").read_bytes() == (temp_dir / "second.zip").read_bytes()
+        assert first.output_hash == second.output_hash == compute_file_hash(str(temp_dir / "first.zip"))
+    
+    def test_ignored_directories_are_passed_through(self, temp_dir, project_archive, sample_swift_content):
+        """Тест, что файлы в Pods и .git не изменяются и переносятся как есть."""
+        archive_path = temp_dir / "with_pods.zip"
+        with zipfile.ZipFile(project_archive, 'r') as source, \
+                zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED) as target:
+            for info in source.infolist():
+                target.writestr(info, source.read(info))
+            target.writestr("TestApp/Pods/Lib/Lib.swift", sample_swift_content)
+            target.writestr("TestApp/Pods/Pods.xcodeproj/project.pbxproj", "MARKETING_VERSION = 1.0;")
+            target.writestr("TestApp/.git/objects/ab/cdef", b"\x00git")
+        output_path = temp_dir / "output.zip"
+        
+        snapshot = inspect_archive(str(archive_path))
+        assert snapshot.project_files == ["TestApp/TestApp.xcodeproj/project.pbxproj"]
+        assert snapshot.date_files == ["TestApp/TestApp/Activation.swift"]
+        
+        result = process_archive_with_actions(
+            str(archive_path),
+            str(output_path),
+            {'increment_version': True, 'new_activation_date': '2027/02/01'},
+        )
+        
+        assert result.success is True
+        with zipfile.ZipFile(archive_path, 'r') as original, \
+                zipfile.ZipFile(output_path, 'r') as output:
+            assert output.namelist() == original.namelist()
+            assert b"2027/02/01" in output.read("TestApp/TestApp/Activation.swift")
+            for name in (
+                "TestApp/Pods/Lib/Lib.swift",
+                "TestApp/Pods/Pods.xcodeproj/project.pbxproj",
+                "TestApp/.git/objects/ab/cdef",
+            ):
+                assert output.read(name) == original.read(name)
+    
+    def test_archive_without_project_files(self, temp_dir):
+        """Тест архива без project.pbxproj."""
+        archive_path = temp_dir / "empty.zip"
+        with zipfile.ZipFile(archive_path, 'w') as zf:
+            zf.writestr("readme.txt", "hello")
+        
+        result = process_archive_with_actions(
+            str(archive_path), str(temp_dir / "output.zip"), {'increment_version': True}
+        )
+        
+        assert result.success is False
+    
+    def test_cancelled_job_leaves_no_output(self, temp_dir, project_archive):
+        """Тест, что отменённая обработка удаляет частичный архив и временные файлы."""
+        token = CancellationToken()
+        token.cancel()
+        output_path = temp_dir / "output.zip"
+        output_path.write_bytes(b"partial")
+        
+        with pytest.raises(JobCancelledError):
+            process_archive_with_actions(
+                str(project_archive), str(output_path), {'increment_version': True}, cancel_token=token
+            )
+        
+        assert not output_path.exists()
+        assert not glob.glob(os.path.join(tempfile.gettempdir(), token.temp_prefix + '*'))
+    
+    
+    def test_result_cache_skips_processing(self, temp_dir, project_archive, monkeypatch):
+        """Тест, что повторная задача с тем же ключом берёт готовый архив из кеша."""
+        monkeypatch.setattr(
+            archive_service, 'result_cache', DiskCache(str(temp_dir / "cache"), 10 * 1024 * 1024, 60)
+        )
+        first = process_archive_with_actions(
+            str(project_archive), str(temp_dir / "first.zip"), {'increment_version': True}, cache_key="key"
+        )
+        
+        def fail(*args, **kwargs):
+            raise AssertionError("архив не должен распаковываться повторно")
+        
+        monkeypatch.setattr(archive_service, 'extract_members', fail)
+        second = process_archive_with_actions(
+            str(project_archive), str(temp_dir / "second.zip"), {'increment_version': True}, cache_key="key"
+        )
+        
+        assert second.success is True
+        assert second.project_info == first.project_info
+        assert (temp_dir / "second.zip").read_bytes() == (temp_dir / "first.zip").read_bytes()
+    
+    
+    def test_extract_cache_reuses_pristine_copy(self, temp_dir, project_archive, monkeypatch):
+        """Тест, что повторная обработка архива берёт файлы из распакованной копии и не меняет её."""
+        cache = DirectoryCache(str(temp_dir / "extracted"), 10 * 1024 * 1024, 60)
+        monkeypatch.setattr(archive_service, 'extract_cache', cache)
+        snapshot = inspect_archive(str(project_archive))
+        snapshot.archive_hash = compute_file_hash(str(project_archive))
+        actions = {'increment_version': True, 'new_activation_date': '2030/12/31'}
+        
+        expected = process_archive_with_actions(str(project_archive), str(temp_dir / "expected.zip"), actions)
+        first = process_archive_with_actions(
+            str(project_archive), str(temp_dir / "first.zip"), actions, snapshot=snapshot
+        )
+        
+        def fail(*args, **kwargs):
+            raise AssertionError("архив не должен распаковываться повторно")
+        
+        monkeypatch.setattr(archive_service, 'extract_members', fail)
+        second = process_archive_with_actions(
+            str(project_archive), str(temp_dir / "second.zip"), actions, snapshot=snapshot
+        )
+        
+        assert expected.success and first.success and second.success
+        assert (temp_dir / "first.zip").read_bytes() == (temp_dir / "expected.zip").read_bytes()
+        assert (temp_dir / "second.zip").read_bytes() == (temp_dir / "expected.zip").read_bytes()
+        # Изменения записывались заменой файлов, копия осталась исходной
+        pristine_dir = cache.get(snapshot.archive_hash)
+        assert extracted_copy_device(snapshot.archive_hash) == os.stat(pristine_dir).st_dev
+        assert extracted_copy_device("missing") is None
+        with zipfile.ZipFile(project_archive) as zf:
+            for name in ("TestApp/TestApp.xcodeproj/project.pbxproj", "TestApp/TestApp/Activation.swift"):
+                assert Path(pristine_dir, *name.split('/')).read_bytes() == zf.read(name)
+
+
+class TestInspectArchive:
+    """Тесты для inspect_archive и get_project_snapshot."""
+    
+    def test_inspect_archive(self, project_archive):
+        """Тест чтения информации о проекте без распаковки."""
+        snapshot = inspect_archive(str(project_archive))
+        
+        assert snapshot.project_files == ["TestApp/TestApp.xcodeproj/project.pbxproj"]
+        assert snapshot.project_info.marketing_version == "1.0"
+        assert snapshot.project_info.activation_date == "2026/01/31"
+        assert snapshot.activation_date == "2026/01/31"
+        assert snapshot.date_files == ["TestApp/TestApp/Activation.swift"]
+        assert snapshot.appiconset_dirs == ["TestApp/TestApp/Assets.xcassets/AppIcon.appiconset"]
+    
+    def test_inspect_archive_without_project(self, temp_dir):
+        """Тест архива без project.pbxproj."""
+        archive_path = temp_dir / "empty.zip"
+        with zipfile.ZipFile(archive_path, 'w') as zf:
+            zf.writestr("readme.txt", "hello")
+        
+        snapshot = inspect_archive(str(archive_path))
+        
+        assert snapshot.project_files == []
+        assert snapshot.project_info.marketing_version is None
+    
+    def test_get_project_snapshot_uses_cache(self, project_archive):
+        """Тест, что повторный запрос снимка не читает архив."""
+        snapshot_cache.clear()
+        
+        first = get_project_snapshot(str(project_archive))
+        assert first.archive_hash is not None
+        
+        # Портим архив: ответ всё равно должен прийти из кеша
+        second = get_project_snapshot("/nonexistent.zip", first.archive_hash)
+        assert second is first
+        snapshot_cache.clear()
+    
+    def test_process_with_snapshot(self, temp_dir, project_archive):
+        """Тест обработки архива с готовым снимком проекта."""
+        snapshot = inspect_archive(str(project_archive))
+        output_path = temp_dir / "output.zip"
+        
+        result = process_archive_with_actions(
+            str(project_archive),
+            str(output_path),
+            {'new_activation_date': '2030/12/31'},
+            snapshot=snapshot
+        )
+        
+        assert result.success is True
+        assert result.project_info.activation_date == "2030/12/31"
+        with zipfile.ZipFile(output_path, 'r') as output:
+            assert b'"2030/12/31"' in output.read("TestApp/TestApp/Activation.swift")
+
+
+class TestMakeJobKey:
+    """Тесты для make_job_key."""
+    
+    def test_equivalent_actions_share_key(self):
+        """Тест, что невыбранные действия и путь к иконке не влияют на ключ."""
+        first = {'increment_version': True, 'new_name': None, 'new_icon_path': '/tmp/a.png', 'add_ipad': False}
+        second = {'new_icon_path': '/tmp/b.png', 'increment_version': 1, 'new_bundle_id': None}
+        
+        assert make_job_key("hash", first, "icon") == make_job_key("hash", second, "icon")
+    
+    def test_key_depends_on_inputs(self):
+        """Тест, что ключ зависит от архива, действий и содержимого иконки."""
+        actions = {'new_name': 'App', 'new_icon_path': '/tmp/a.png'}
+        key = make_job_key("hash", actions, "icon")
+        
+        assert key != make_job_key("other", actions, "icon")
+        assert key != make_job_key("hash", actions, "other-icon")
+        assert key != make_job_key("hash", {'new_name': 'Other', 'new_icon_path': '/tmp/a.png'}, "icon")
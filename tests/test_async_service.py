@@ -0,0 +1,137 @@
+"""Тесты для модуля async_service."""
+
+import asyncio
+import os
+
+import pytest
+from PIL import Image
+
+from telegram_xcode_bot.services.async_service import (
+    convert_icon_to_jpeg,
+    create_temp_path,
+    inspect_image,
+    load_project_snapshot,
+    path_exists,
+    pin_files,
+    read_file_bytes,
+    remove_files,
+    run_shared_archive_job,
+)
+from telegram_xcode_bot.services.archive_service import ArchiveProcessResult
+from telegram_xcode_bot.services.xcode_service import ProjectInfo
+from telegram_xcode_bot.utils.hashing import compute_file_hash
+
+
+class TestFileOperations:
+    """Тесты для файловых операций."""
+    
+    def test_temp_file_lifecycle(self):
+        """Тест создания, чтения и удаления временного файла."""
+        async def scenario():
+            path = await create_temp_path(suffix='.zip')
+            assert path.endswith('.zip')
+            assert await path_exists(path)
+            assert await read_file_bytes(path) == b""
+            await remove_files(path, None)
+            return path
+        
+        path = asyncio.run(scenario())
+        assert not os.path.exists(path)
+    
+    def test_missing_files_are_ignored(self, temp_dir):
+        """Тест, что отсутствующие и пустые пути не вызывают ошибок."""
+        async def scenario():
+            await remove_files(str(temp_dir / "missing.zip"), None, "")
+            return await path_exists(None), await path_exists(str(temp_dir / "missing.zip"))
+        
+        assert asyncio.run(scenario()) == (False, False)
+    
+    def test_pinned_file_outlives_original(self, temp_dir):
+        """Тест, что закреплённый файл остаётся после удаления исходного."""
+        original = temp_dir / "archive.zip"
+        original.write_bytes(b"archive")
+        
+        async def scenario():
+            pinned, missing = await pin_files(str(original), None)
+            await remove_files(str(original))
+            return pinned, missing, await read_file_bytes(pinned)
+        
+        pinned, missing, data = asyncio.run(scenario())
+        
+        assert missing is None
+        assert data == b"archive"
+        assert os.path.dirname(pinned) == str(temp_dir) and pinned.endswith('.zip')
+        os.unlink(pinned)
+    
+    def test_pin_missing_file(self, temp_dir):
+        """Тест закрепления удалённого файла: ошибка без оставленных ссылок."""
+        async def scenario():
+            await pin_files(str(temp_dir / "missing.zip"))
+        
+        with pytest.raises(FileNotFoundError):
+            asyncio.run(scenario())
+        assert os.listdir(temp_dir) == []
+
+
+class TestRunSharedArchiveJob:
+    """Тесты для run_shared_archive_job."""
+    
+    def test_identical_jobs_run_once(self, temp_dir):
+        """Тест, что одинаковые задачи выполняются один раз и каждый участник получает свой файл."""
+        calls = []
+        
+        async def run_job(output_path, job_token):
+            calls.append(output_path)
+            await asyncio.sleep(0.01)
+            with open(output_path, 'wb') as f:
+                f.write(b"archive")
+            return ArchiveProcessResult(success=True, project_info=ProjectInfo())
+        
+        outputs = [str(temp_dir / f"out{i}.zip") for i in range(3)]
+        
+        async def scenario():
+            return await asyncio.gather(*[
+                run_shared_archive_job("key", output, run_job) for output in outputs
+            ])
+        
+        results = asyncio.run(scenario())
+        
+        assert len(calls) == 1
+        assert all(result.success for result in results)
+        for output in outputs:
+            with open(output, 'rb') as f:
+                assert f.read() == b"archive"
+        # Общий файл удалён после получения результата всеми участниками
+        assert not os.path.exists(calls[0])
+
+
+class TestLoadProjectSnapshot:
+    """Тесты для load_project_snapshot."""
+    
+    def test_computes_hash(self, project_archive):
+        """Тест чтения снимка с вычислением хеша архива."""
+        snapshot = asyncio.run(load_project_snapshot(str(project_archive)))
+        
+        assert snapshot.archive_hash == compute_file_hash(str(project_archive))
+        assert snapshot.project_info.marketing_version == "1.0"
+        assert snapshot.activation_date == "2026/01/31"
+
+
+class TestIconOperations:
+    """Тесты для операций с иконкой."""
+    
+    def test_inspect_and_convert_png(self, temp_dir):
+        """Тест чтения параметров PNG и конвертации в JPEG."""
+        image_path = str(temp_dir / "icon.png")
+        Image.new('RGBA', (16, 16), (255, 0, 0, 128)).save(image_path, 'PNG')
+        
+        async def scenario():
+            before = await inspect_image(image_path)
+            await convert_icon_to_jpeg(image_path)
+            after = await inspect_image(image_path)
+            return before, after
+        
+        before, after = asyncio.run(scenario())
+        
+        assert before == ('PNG', 16, 16, 'RGBA')
+        assert after == ('JPEG', 16, 16, 'RGB')
@@ -0,0 +1,101 @@
+"""Тесты для модуля cancellation."""
+
+import asyncio
+import os
+import pickle
+import time
+
+import pytest
+
+from telegram_xcode_bot.exceptions import JobCancelledError
+from telegram_xcode_bot.utils.cancellation import ActiveJobs, CancellationToken
+
+
+class TestCancellationToken:
+    """Тесты для CancellationToken."""
+    
+    def test_worker_copy_sees_flag_file(self):
+        """Тест, что копия токена в другом процессе видит отмену через файл-флаг."""
+        token = CancellationToken()
+        worker_copy = pickle.loads(pickle.dumps(token))
+        try:
+            worker_copy.raise_if_cancelled()
+            token.cancel()
+            assert token.cancelled
+            assert not pickle.loads(pickle.dumps(worker_copy)).cancelled
+            
+            token.signal_workers()
+            with pytest.raises(JobCancelledError):
+                pickle.loads(pickle.dumps(worker_copy)).raise_if_cancelled()
+        finally:
+            token.cleanup()
+        assert not os.path.exists(token.flag_path)
+    
+    def test_deadline(self):
+        """Тест отмены по истечении срока."""
+        token = CancellationToken()
+        token.set_timeout(-1)
+        assert token.cancelled
+    
+    def test_wait_wakes_on_cancel(self):
+        """Тест пробуждения ожидающих при отмене."""
+        async def scenario():
+            token = CancellationToken()
+            waiter = asyncio.ensure_future(token.wait())
+            await asyncio.sleep(0)
+            assert not waiter.done()
+            token.cancel()
+            await asyncio.wait_for(waiter, timeout=1)
+        
+        asyncio.run(scenario())
+    
+    def test_cleanup_removes_temp_dirs(self):
+        """Тест удаления временных директорий задачи."""
+        token = CancellationToken()
+        temp_dir = token.make_temp_dir()
+        with open(os.path.join(temp_dir, "partial.txt"), 'w') as f:
+            f.write("data")
+        
+        token.cleanup()
+        
+        assert not os.path.exists(temp_dir)
+    
+    def test_check_is_throttled(self, monkeypatch):
+        """Тест, что файл-флаг проверяется не на каждом вызове."""
+        token = CancellationToken()
+        calls = []
+        monkeypatch.setattr(os.path, 'exists', lambda path: calls.append(path) or False)
+        start = time.monotonic()
+        while time.monotonic() - start < 0.01:
+            assert not token.cancelled
+        assert len(calls) == 1
+
+
+class TestActiveJobs:
+    """Тесты для ActiveJobs."""
+    
+    def test_cancel_registered_job(self):
+        """Тест отмены зарегистрированной задачи пользователя."""
+        jobs = ActiveJobs()
+        token = CancellationToken()
+        
+        assert jobs.cancel(1) is False
+        jobs.register(1, token)
+        assert jobs.cancel(1) is True
+        assert token.cancelled
+        
+        jobs.unregister(1, token)
+        assert jobs.cancel(1) is False
+    
+    def test_is_active(self):
+        """Тест проверки выполняющейся задачи пользователя."""
+        jobs = ActiveJobs()
+        token = CancellationToken()
+        
+        assert jobs.is_active(1) is False
+        jobs.register(1, token)
+        assert jobs.is_active(1) is True
+        assert jobs.is_active(2) is False
+        
+        jobs.unregister(1, token)
+        assert jobs.is_active(1) is False
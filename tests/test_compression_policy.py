@@ -0,0 +1,75 @@
+"""Тесты для модуля compression_policy."""
+
+import os
+import random
+import zipfile
+
+import pytest
+
+from telegram_xcode_bot.exceptions import ConfigurationError
+from telegram_xcode_bot.services.archive_service import create_archive
+from telegram_xcode_bot.services.compression_policy import CompressionPolicy, check_compression_profile
+
+
+def _random_bytes(size):
+    """Несжимаемые данные (детерминированные для повторяемости тестов)."""
+    return random.Random(size).randbytes(size)
+
+
+class TestCompressionPolicy:
+    """Тесты для CompressionPolicy."""
+    
+    def test_known_compressed_types_are_stored(self, temp_dir):
+        """Тест, что уже сжатые форматы не сжимаются повторно."""
+        path = temp_dir / "icon.PNG"
+        path.write_bytes(b"x" * 1000)
+        
+        assert CompressionPolicy().choose("App/icon.PNG", str(path)) == (zipfile.ZIP_STORED, None)
+    
+    def test_sampling_detects_incompressible_data(self, temp_dir):
+        """Тест оценки сжимаемости файлов неизвестного типа по выборке."""
+        policy = CompressionPolicy(level=9, sample_min_bytes=1024, sample_bytes=512)
+        noise = temp_dir / "Assets.bin"
+        noise.write_bytes(_random_bytes(64 * 1024))
+        text = temp_dir / "data.json"
+        text.write_text('{"items": []}\n' * 5000)
+        
+        assert policy.choose("Assets.bin", str(noise)) == (zipfile.ZIP_STORED, None)
+        assert policy.choose("data.json", str(text)) == (zipfile.ZIP_DEFLATED, 9)
+    
+    def test_small_files_are_compressed_without_sampling(self, temp_dir):
+        """Тест, что маленькие файлы сжимаются без оценки."""
+        path = temp_dir / "small.bin"
+        path.write_bytes(_random_bytes(100))
+        
+        assert CompressionPolicy(level=1).choose("small.bin", str(path)) == (zipfile.ZIP_DEFLATED, 1)
+    
+    def test_create_archive_applies_policy(self, temp_dir):
+        """Тест, что create_archive сохраняет изображения без сжатия, а текст сжимает."""
+        source_dir = temp_dir / "source"
+        source_dir.mkdir()
+        (source_dir / "icon.png").write_bytes(_random_bytes(4096))
+        (source_dir / "main.swift").write_text("import SwiftUI\n" * 200)
+        output_path = temp_dir / "output.zip"
+        
+        create_archive(str(source_dir), str(output_path))
+        
+        with zipfile.ZipFile(output_path, 'r') as zf:
+            assert zf.getinfo("icon.png").compress_type == zipfile.ZIP_STORED
+            assert zf.getinfo("main.swift").compress_type == zipfile.ZIP_DEFLATED
+            assert zf.read("icon.png") == (source_dir / "icon.png").read_bytes()
+            assert zf.namelist() == sorted(os.listdir(source_dir))
+
+
+class TestCheckCompressionProfile:
+    """Тесты для check_compression_profile."""
+    
+    def test_known_profiles(self):
+        """Тест уровней известных профилей."""
+        assert check_compression_profile("fast") == 1
+        assert check_compression_profile("small") == 9
+    
+    def test_unknown_profile(self):
+        """Тест, что опечатка в профиле - ошибка конфигурации, а не уровень по умолчанию."""
+        with pytest.raises(ConfigurationError, match="balanse"):
+            check_compression_profile("balanse")
@@ -0,0 +1,60 @@
+"""Тесты для модуля content_store."""
+
+import os
+
+from telegram_xcode_bot.services.content_store import ContentStore
+
+
+class TestContentStore:
+    """Тесты для ContentStore."""
+    
+    def test_repeat_upload_is_reused(self, temp_dir):
+        """Тест получения ранее сохранённого архива по file_unique_id."""
+        store = ContentStore(str(temp_dir / "store"), 1024, 60)
+        source = temp_dir / "source.zip"
+        source.write_bytes(b"archive")
+        destination = str(temp_dir / "copy.zip")
+        
+        assert store.get("AgADBAAD", destination) is None
+        store.put("hash", str(source), "AgADBAAD")
+        
+        assert store.get("AgADBAAD", destination) == "hash"
+        assert (temp_dir / "copy.zip").read_bytes() == b"archive"
+    
+    def test_same_content_is_stored_once(self, temp_dir):
+        """Тест, что одинаковое содержимое под разными идентификаторами хранится один раз."""
+        store = ContentStore(str(temp_dir / "store"), 1024, 60)
+        source = temp_dir / "source.zip"
+        source.write_bytes(b"archive")
+        
+        store.put("hash", str(source), "first")
+        store.put("hash", str(source), "second")
+        
+        assert store.blobs.stats()["entries"] == 1
+        assert store.get("second", str(temp_dir / "copy.zip")) == "hash"
+    
+    def test_evicted_archive_drops_index_entry(self, temp_dir):
+        """Тест, что запись индекса удаляется, если архив вытеснен из хранилища."""
+        store = ContentStore(str(temp_dir / "store"), 10, 60)
+        first = temp_dir / "first.zip"
+        first.write_bytes(b"a" * 8)
+        os.utime(first, (1, 1))
+        second = temp_dir / "second.zip"
+        second.write_bytes(b"b" * 8)
+        
+        store.put("hash-a", str(first), "first")
+        store.put("hash-b", str(second), "second")
+        
+        assert store.get("first", str(temp_dir / "copy.zip")) is None
+        assert not os.path.exists(os.path.join(store.ids_dir, "first"))
+    
+    def test_unsafe_identifier_is_ignored(self, temp_dir):
+        """Тест, что идентификатор с недопустимыми символами не используется как путь."""
+        store = ContentStore(str(temp_dir / "store"), 1024, 60)
+        source = temp_dir / "source.zip"
+        source.write_bytes(b"archive")
+        
+        store.put("hash", str(source), "../escape")
+        
+        assert store.get("../escape", str(temp_dir / "copy.zip")) is None
+        assert not os.path.exists(str(temp_dir / "escape"))
@@ -0,0 +1,140 @@
+"""Тесты для модуля disk_cache."""
+
+import os
+import time
+
+import pytest
+
+from telegram_xcode_bot.utils.disk_cache import DirectoryCache, DiskCache, write_file_atomic
+
+
+def _write(path, data):
+    """Записывает данные в файл и возвращает путь строкой."""
+    path.write_bytes(data)
+    return str(path)
+
+
+class TestDiskCache:
+    """Тесты для DiskCache."""
+    
+    def test_put_and_get(self, temp_dir):
+        """Тест сохранения и получения файла с метаданными."""
+        cache = DiskCache(str(temp_dir / "cache"), 1024, 60)
+        source = _write(temp_dir / "source.bin", b"payload")
+        
+        assert cache.put("key", source, {"version": "1.0"}) is True
+        os.unlink(source)
+        destination = _write(temp_dir / "out.bin", b"")
+        
+        assert cache.get("key", destination) == {"version": "1.0"}
+        assert (temp_dir / "out.bin").read_bytes() == b"payload"
+        assert cache.get("missing", destination) is None
+        assert cache.stats() == {"entries": 1, "bytes": 7, "hits": 1, "misses": 1}
+    
+    def test_expired_entries_are_removed(self, temp_dir):
+        """Тест, что устаревшие записи не возвращаются и удаляются."""
+        cache = DiskCache(str(temp_dir / "cache"), 1024, 0.01)
+        cache.put("key", _write(temp_dir / "source.bin", b"payload"))
+        time.sleep(0.05)
+        
+        assert cache.get("key", str(temp_dir / "out.bin")) is None
+        assert cache.stats()["entries"] == 0
+    
+    def test_lru_eviction_by_size(self, temp_dir):
+        """Тест вытеснения давно не использованных записей при превышении лимита."""
+        cache = DiskCache(str(temp_dir / "cache"), 20, 60)
+        cache.put("a", _write(temp_dir / "a.bin", b"a" * 8))
+        cache.put("b", _write(temp_dir / "b.bin", b"b" * 8))
+        # Запись "a" использована позже "b"
+        past = time.time() - 10
+        os.utime(os.path.join(cache.directory, "b.data"), (past, past))
+        cache.get("a", str(temp_dir / "out.bin"))
+        
+        cache.put("c", _write(temp_dir / "c.bin", b"c" * 8))
+        
+        assert cache.get("b", str(temp_dir / "out.bin")) is None
+        assert cache.get("a", str(temp_dir / "out.bin")) is not None
+        assert cache.get("c", str(temp_dir / "out.bin")) is not None
+    
+    def test_disabled_and_oversized(self, temp_dir):
+        """Тест отключённого кеша и файла больше лимита."""
+        source = _write(temp_dir / "source.bin", b"payload")
+        
+        assert DiskCache(str(temp_dir / "off"), 0, 60).put("key", source) is False
+        assert DiskCache(str(temp_dir / "small"), 3, 60).put("key", source) is False
+
+
+def _populate(data):
+    """Функция заполнения директории одним файлом; считает вызовы."""
+    def populate(target):
+        populate.calls += 1
+        with open(os.path.join(target, "file.bin"), "wb") as f:
+            f.write(data)
+    populate.calls = 0
+    return populate
+
+
+class TestDirectoryCache:
+    """Тесты для DirectoryCache."""
+    
+    def test_populated_once(self, temp_dir):
+        """Тест, что директория заполняется при промахе и затем переиспользуется."""
+        cache = DirectoryCache(str(temp_dir / "cache"), 1024, 60)
+        populate = _populate(b"payload")
+        
+        first = cache.get_or_create("key", populate)
+        second = cache.get_or_create("key", populate)
+        
+        assert first == second
+        assert populate.calls == 1
+        with open(os.path.join(first, "file.bin"), "rb") as f:
+            assert f.read() == b"payload"
+        assert cache.stats() == {"entries": 1, "bytes": 7, "hits": 1, "misses": 1}
+        assert [name for name in os.listdir(cache.directory) if name.endswith(".tmp")] == []
+    
+    def test_expiry_and_lru_eviction(self, temp_dir):
+        """Тест вытеснения по времени простоя и по лимиту размера."""
+        cache = DirectoryCache(str(temp_dir / "cache"), 20, 60)
+        cache.get_or_create("a", _populate(b"a" * 8))
+        cache.get_or_create("b", _populate(b"b" * 8))
+        past = time.time() - 10
+        os.utime(os.path.join(cache.directory, "b.json"), (past, past))
+        
+        cache.get_or_create("c", _populate(b"c" * 8))
+        
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        
+        expiring = DirectoryCache(str(temp_dir / "expiring"), 1024, 0.01)
+        expiring.get_or_create("key", _populate(b"payload"))
+        time.sleep(0.05)
+        assert expiring.get("key") is None
+        assert not os.path.exists(os.path.join(expiring.directory, "key"))
+    
+    def test_oversized_and_failed_population(self, temp_dir):
+        """Тест, что слишком большая или недозаполненная директория не сохраняется."""
+        cache = DirectoryCache(str(temp_dir / "cache"), 3, 60)
+        assert cache.get_or_create("key", _populate(b"payload")) is None
+        
+        def fail(target):
+            raise RuntimeError("ошибка заполнения")
+        
+        with pytest.raises(RuntimeError):
+            DirectoryCache(str(temp_dir / "failing"), 1024, 60).get_or_create("key", fail)
+        assert os.listdir(temp_dir / "failing") == []
+        assert os.listdir(cache.directory) == []
+
+
+class TestWriteFileAtomic:
+    """Тесты для write_file_atomic."""
+    
+    def test_hardlinked_original_is_preserved(self, temp_dir):
+        """Тест, что замена файла не меняет его жёсткие ссылки."""
+        original = _write(temp_dir / "original.bin", b"old")
+        link = str(temp_dir / "link.bin")
+        os.link(original, link)
+        
+        write_file_atomic(link, b"new")
+        
+        assert (temp_dir / "link.bin").read_bytes() == b"new"
+        assert (temp_dir / "original.bin").read_bytes() == b"old"
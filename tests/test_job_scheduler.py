@@ -0,0 +1,155 @@
+"""Тесты для модуля job_scheduler."""
+
+import asyncio
+import os
+
+import pytest
+
+from telegram_xcode_bot.config import ARCHIVE_POOL_WORKERS, JOB_LARGE_LANE_SLOTS, JOB_MAX_CONCURRENT
+from telegram_xcode_bot.exceptions import JobCancelledError, WorkerPoolBusyError
+from telegram_xcode_bot.utils.cancellation import CancellationToken
+from telegram_xcode_bot.utils.job_scheduler import JobScheduler
+
+LARGE = 100
+SMALL = 1
+
+
+def _scheduler(**kwargs):
+    """Планировщик с порогом большого архива LARGE байт."""
+    kwargs.setdefault('large_job_bytes', LARGE)
+    kwargs.setdefault('status_interval', 0.01)
+    return JobScheduler(**kwargs)
+
+
+async def _job(scheduler, size, name, log, release, on_status=None, cancel_token=None):
+    """Задача, удерживающая слот до установки события release."""
+    async with scheduler.slot(size, on_status=on_status, cancel_token=cancel_token):
+        log.append(name)
+        await release.wait()
+
+
+class TestJobScheduler:
+    """Тесты для JobScheduler."""
+    
+    def test_global_limit_and_fifo(self):
+        """Тест общего лимита и порядка запуска внутри очереди."""
+        async def scenario():
+            scheduler = _scheduler(max_concurrent=1)
+            log, release = [], asyncio.Event()
+            tasks = [
+                asyncio.ensure_future(_job(scheduler, SMALL, name, log, release))
+                for name in ("a", "b", "c")
+            ]
+            await asyncio.sleep(0.05)
+            assert log == ["a"]
+            assert (scheduler.running, scheduler.queued) == (1, 2)
+            release.set()
+            await asyncio.gather(*tasks)
+            return log, scheduler
+        
+        log, scheduler = asyncio.run(scenario())
+        
+        assert log == ["a", "b", "c"]
+        assert (scheduler.running, scheduler.queued) == (0, 0)
+    
+    def test_small_job_is_not_stuck_behind_large(self):
+        """Тест, что малый архив получает слот, пока большие ждут в очереди."""
+        async def scenario():
+            scheduler = _scheduler(max_concurrent=2, large_lane_slots=1)
+            log, release = [], asyncio.Event()
+            large = [
+                asyncio.ensure_future(_job(scheduler, LARGE, f"large{i}", log, release))
+                for i in range(3)
+            ]
+            await asyncio.sleep(0.05)
+            small = asyncio.ensure_future(_job(scheduler, SMALL, "small", log, release))
+            await asyncio.sleep(0.05)
+            started = list(log)
+            release.set()
+            await asyncio.gather(*large, small)
+            return started
+        
+        assert asyncio.run(scenario()) == ["large0", "small"]
+    
+    @pytest.mark.skipif(bool(os.getenv("ARCHIVE_POOL_WORKERS")), reason="число процессов задано явно")
+    def test_default_config_reserves_small_slot(self):
+        """Тест, что по умолчанию большие архивы не занимают все слоты (и на одном ядре)."""
+        assert ARCHIVE_POOL_WORKERS >= 2
+        assert JOB_LARGE_LANE_SLOTS < JOB_MAX_CONCURRENT
+    
+    def test_reports_queue_position(self):
+        """Тест сообщения положения в очереди."""
+        async def scenario():
+            scheduler = _scheduler(max_concurrent=1)
+            log, release = [], asyncio.Event()
+            statuses = []
+            
+            async def on_status(status):
+                statuses.append(status)
+            
+            first = asyncio.ensure_future(_job(scheduler, SMALL, "a", log, release))
+            second = asyncio.ensure_future(_job(scheduler, SMALL, "b", log, release))
+            third = asyncio.ensure_future(_job(scheduler, SMALL, "c", log, release, on_status))
+            await asyncio.sleep(0.05)
+            release.set()
+            await asyncio.gather(first, second, third)
+            return statuses
+        
+        statuses = asyncio.run(scenario())
+        
+        assert statuses[0].position == 2
+        assert statuses[0].eta_seconds > 0
+    
+    def test_rejects_when_queue_is_full(self):
+        """Тест отказа при переполнении очередей."""
+        async def scenario():
+            scheduler = _scheduler(max_concurrent=1, max_queued=1)
+            log, release = [], asyncio.Event()
+            tasks = [
+                asyncio.ensure_future(_job(scheduler, SMALL, name, log, release))
+                for name in ("a", "b")
+            ]
+            await asyncio.sleep(0.05)
+            with pytest.raises(WorkerPoolBusyError):
+                await _job(scheduler, SMALL, "c", log, release)
+            release.set()
+            await asyncio.gather(*tasks)
+            return log
+        
+        assert asyncio.run(scenario()) == ["a", "b"]
+    
+    def test_cancelled_waiter_leaves_queue(self):
+        """Тест, что отменённая задача покидает очередь и не занимает слот."""
+        async def scenario():
+            scheduler = _scheduler(max_concurrent=1)
+            log, release = [], asyncio.Event()
+            first = asyncio.ensure_future(_job(scheduler, SMALL, "a", log, release))
+            waiting = asyncio.ensure_future(_job(scheduler, SMALL, "b", log, release))
+            await asyncio.sleep(0.05)
+            waiting.cancel()
+            await asyncio.gather(waiting, return_exceptions=True)
+            queued_after_cancel = scheduler.queued
+            release.set()
+            await first
+            return log, queued_after_cancel, scheduler.running
+        
+        assert asyncio.run(scenario()) == (["a"], 0, 0)
+    
+    def test_cancel_token_removes_waiter(self):
+        """Тест отмены ожидающей задачи через токен."""
+        async def scenario():
+            scheduler = _scheduler(max_concurrent=1, status_interval=10)
+            log, release = [], asyncio.Event()
+            token = CancellationToken()
+            first = asyncio.ensure_future(_job(scheduler, SMALL, "a", log, release))
+            waiting = asyncio.ensure_future(_job(scheduler, SMALL, "b", log, release, cancel_token=token))
+            await asyncio.sleep(0.05)
+            token.cancel()
+            with pytest.raises(JobCancelledError):
+                await asyncio.wait_for(waiting, timeout=1)
+            queued_after_cancel = scheduler.queued
+            release.set()
+            await first
+            return log, queued_after_cancel
+        
+        assert asyncio.run(scenario()) == (["a"], 0)
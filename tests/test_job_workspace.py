@@ -0,0 +1,221 @@
+"""Тесты для модуля job_workspace."""
+
+import asyncio
+import os
+import time
+
+import pytest
+
+from telegram_xcode_bot.config import EXTRACT_CACHE_DIR, JOB_RAM_DIR
+from telegram_xcode_bot.services import archive_service, async_service
+from telegram_xcode_bot.services.archive_service import inspect_archive
+from telegram_xcode_bot.services.async_service import create_temp_path, touch_session_file
+from telegram_xcode_bot.utils.cancellation import CancellationToken
+from telegram_xcode_bot.utils.disk_cache import DirectoryCache
+from telegram_xcode_bot.utils.job_workspace import JobWorkspaces
+
+
+class TestJobWorkspaces:
+    """Тесты для JobWorkspaces."""
+    
+    def test_reserves_memory_within_budget(self, temp_dir):
+        """Задачи размещаются в памяти, пока помещаются в бюджет, остальные - на диске."""
+        workspaces = JobWorkspaces(ram_dir=str(temp_dir), budget_bytes=1000, margin_bytes=100)
+        with workspaces.reserve(500) as first:
+            assert first is not None and first.startswith(str(temp_dir))
+            with workspaces.reserve(500) as second:
+                # 600 + 600 не помещаются в бюджет 1000
+                assert second is None
+            with workspaces.reserve(300) as third:
+                assert third == first
+                assert workspaces.stats()["reserved_bytes"] == 1000
+        stats = workspaces.stats()
+        assert stats["reserved_bytes"] == 0
+        assert stats["ram_jobs"] == 2
+        assert stats["disk_jobs"] == 1
+    
+    def test_unknown_size_and_missing_dir_use_disk(self, temp_dir):
+        """Неизвестный объём и недоступная директория - работа на диске."""
+        workspaces = JobWorkspaces(ram_dir=str(temp_dir), budget_bytes=1000, margin_bytes=0)
+        with workspaces.reserve(None) as root:
+            assert root is None
+        
+        (temp_dir / "file").write_text("x")
+        missing = JobWorkspaces(ram_dir=str(temp_dir / "file"), budget_bytes=1000, margin_bytes=0)
+        with missing.reserve(10) as root:
+            assert root is None
+    
+    def test_linked_job_stays_on_source_filesystem(self, temp_dir):
+        """Задача, связывающая файлы с копией на другой файловой системе, работает на диске."""
+        workspaces = JobWorkspaces(ram_dir=str(temp_dir), budget_bytes=1000, margin_bytes=0)
+        ram_device = os.stat(temp_dir).st_dev
+        with workspaces.reserve(10, link_device=ram_device + 1) as root:
+            assert root is None
+        with workspaces.reserve(10, link_device=ram_device) as root:
+            assert root is not None and root.startswith(str(temp_dir))
+        assert workspaces.stats()["disk_jobs"] == 1
+    
+    def test_small_files_in_memory(self, temp_dir):
+        """Небольшие файлы размещаются в памяти, большие и неизвестного размера - на диске."""
+        workspaces = JobWorkspaces(ram_dir=str(temp_dir), budget_bytes=1000, margin_bytes=0, small_file_bytes=100)
+        root = workspaces.file_dir(50)
+        assert root is not None and root.startswith(str(temp_dir))
+        assert workspaces.file_dir(101) is None
+        assert workspaces.file_dir(None) is None
+        assert workspaces.stats()["ram_files"] == 1
+    
+    def test_small_files_total_limit(self, temp_dir):
+        """Файлы в памяти не превышают свой суммарный лимит; жёсткие ссылки считаются один раз."""
+        workspaces = JobWorkspaces(
+            ram_dir=str(temp_dir), budget_bytes=1000, margin_bytes=0, small_file_bytes=100, files_max_bytes=100
+        )
+        root = workspaces.file_dir(10)
+        archive = os.path.join(root, "archive.zip")
+        with open(archive, 'wb') as f:
+            f.write(b"x" * 80)
+        os.link(archive, os.path.join(root, "pinned.zip"))
+        
+        assert workspaces.file_dir(50) is None
+        assert workspaces.file_dir(20) == root
+    
+    def test_expired_files_removed(self, temp_dir):
+        """Файлы брошенных сессий удаляются, рабочие директории задач остаются."""
+        workspaces = JobWorkspaces(
+            ram_dir=str(temp_dir), budget_bytes=1000, margin_bytes=0, small_file_bytes=100, file_ttl_seconds=0
+        )
+        root = workspaces.file_dir(10)
+        archive = os.path.join(root, "archive.zip")
+        with open(archive, 'wb') as f:
+            f.write(b"x" * 10)
+        os.mkdir(os.path.join(root, "job"))
+        
+        assert workspaces.file_dir(10) == root
+        assert not os.path.exists(archive)
+        assert os.path.isdir(os.path.join(root, "job"))
+        assert workspaces.stats()["expired_files"] == 1
+        
+        fresh = JobWorkspaces(ram_dir=str(temp_dir), budget_bytes=1000, margin_bytes=0, small_file_bytes=100)
+        with open(archive, 'wb') as f:
+            f.write(b"x" * 10)
+        assert fresh.file_dir(10) == root
+        assert os.path.exists(archive)
+    
+    def test_used_files_not_expired(self, temp_dir):
+        """Файл сессии, которым пользуются, не удаляется; неиспользуемый - удаляется."""
+        workspaces = JobWorkspaces(
+            ram_dir=str(temp_dir), budget_bytes=1000, margin_bytes=0, small_file_bytes=100, file_ttl_seconds=0.5
+        )
+        root = workspaces.file_dir(10)
+        used, abandoned = os.path.join(root, "used.zip"), os.path.join(root, "abandoned.zip")
+        for path in (used, abandoned):
+            with open(path, 'wb') as f:
+                f.write(b"x")
+        time.sleep(0.6)
+        
+        assert asyncio.run(touch_session_file(used)) is True
+        assert workspaces.file_dir(10) == root
+        assert os.path.exists(used)
+        assert not os.path.exists(abandoned)
+        assert asyncio.run(touch_session_file(abandoned)) is False
+    
+    def test_small_files_keep_job_budget(self, temp_dir, monkeypatch):
+        """Файлы не занимают место, необходимое для бюджета задач."""
+        workspaces = JobWorkspaces(ram_dir=str(temp_dir), budget_bytes=1000, margin_bytes=0, small_file_bytes=100)
+        
+        class FakeStat:
+            f_bavail = 1050
+            f_frsize = 1
+        
+        monkeypatch.setattr(os, "statvfs", lambda path: FakeStat())
+        assert workspaces.file_dir(50) is not None
+        assert workspaces.file_dir(60) is None
+        with workspaces.reserve(500):
+            # Зарезервированная часть бюджета уже учтена в свободном месте
+            assert workspaces.file_dir(60) is not None
+    
+    def test_create_temp_path_uses_memory(self, temp_dir, monkeypatch):
+        """create_temp_path создаёт небольшой файл в памяти."""
+        workspaces = JobWorkspaces(ram_dir=str(temp_dir), budget_bytes=1000, margin_bytes=0, small_file_bytes=100)
+        monkeypatch.setattr(async_service, "job_workspaces", workspaces)
+        
+        async def scenario():
+            return await create_temp_path(suffix='.zip', size=10), await create_temp_path(suffix='.zip', size=1000)
+        
+        small, large = asyncio.run(scenario())
+        try:
+            assert small.startswith(str(temp_dir))
+            assert not large.startswith(str(temp_dir))
+        finally:
+            os.unlink(small)
+            os.unlink(large)
+    
+    def test_token_uses_temp_root(self, temp_dir):
+        """Временные директории задачи создаются в temp_root и удаляются при cleanup."""
+        token = CancellationToken()
+        token.temp_root = str(temp_dir)
+        work_dir = token.make_temp_dir()
+        assert os.path.dirname(work_dir) == str(temp_dir)
+        token.cleanup()
+        assert not os.path.exists(work_dir)
+        
+        # Недоступная директория - временная директория на диске
+        token.temp_root = str(temp_dir / "missing")
+        work_dir = token.make_temp_dir()
+        try:
+            assert os.path.isdir(work_dir)
+        finally:
+            token.cleanup()
+        assert not os.path.exists(work_dir)
+    
+    def test_repeat_job_with_extracted_copy_runs_in_memory(self, temp_dir, project_archive, monkeypatch):
+        """Повторная задача с распакованной копией на той же файловой системе работает в памяти."""
+        workspaces = JobWorkspaces(ram_dir=str(temp_dir / "ram"), budget_bytes=64 * 1024 * 1024, margin_bytes=0)
+        monkeypatch.setattr(async_service, "job_workspaces", workspaces)
+        monkeypatch.setattr(
+            archive_service, "extract_cache", DirectoryCache(str(temp_dir / "ram" / "extracted"), 10 * 1024 * 1024, 60)
+        )
+        roots = []
+        
+        class InlinePool:
+            """Выполняет задачу в текущем процессе (подменённые кеши видны задаче)."""
+            
+            async def run(self, func, *args, timeout=None, cancel_token=None, **kwargs):
+                roots.append(cancel_token.temp_root)
+                return func(*args, cancel_token=cancel_token, **kwargs)
+        
+        monkeypatch.setattr(async_service, "archive_pool", InlinePool())
+        
+        def fail(*args, **kwargs):
+            raise AssertionError("архив не должен распаковываться повторно")
+        
+        async def scenario():
+            snapshot = await async_service.load_project_snapshot(str(project_archive))
+            results = []
+            for name in ("first.zip", "second.zip"):
+                token = CancellationToken()
+                results.append(await async_service.process_archive_job(
+                    str(project_archive), str(temp_dir / name), {'increment_version': True},
+                    snapshot=snapshot, cancel_token=token
+                ))
+                # Повторная задача связывает файлы с копией, а не распаковывает архив
+                monkeypatch.setattr(archive_service, "extract_members", fail)
+            return results
+        
+        results = asyncio.run(scenario())
+        
+        assert all(result.success for result in results)
+        assert roots[0] is not None and roots[1] == roots[0]
+        assert workspaces.stats()["ram_jobs"] == 2
+        assert workspaces.stats()["disk_jobs"] == 0
+    
+    @pytest.mark.skipif(bool(os.getenv("EXTRACT_CACHE_DIR")), reason="директория копий задана явно")
+    def test_default_extract_cache_next_to_ram_workspace(self):
+        """По умолчанию распакованные копии хранятся на файловой системе рабочих директорий в памяти."""
+        if not (JOB_RAM_DIR and os.path.isdir(JOB_RAM_DIR) and os.access(JOB_RAM_DIR, os.W_OK)):
+            pytest.skip("директория в памяти недоступна")
+        assert EXTRACT_CACHE_DIR.startswith(JOB_RAM_DIR)
+    
+    def test_snapshot_estimates_work_bytes(self, project_archive):
+        """Снимок проекта содержит объём файлов, которые распакует обработка."""
+        snapshot = inspect_archive(str(project_archive))
+        assert snapshot.work_bytes > 0
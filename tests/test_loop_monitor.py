@@ -0,0 +1,54 @@
+"""Тесты для модуля loop_monitor."""
+
+import asyncio
+import time
+
+from telegram_xcode_bot.utils.async_helpers import run_blocking_io
+from telegram_xcode_bot.utils.loop_monitor import EventLoopLagMonitor
+
+
+def _measure(blocking_call):
+    """Запускает монитор на время выполнения blocking_call и возвращает статистику."""
+    async def scenario():
+        monitor = EventLoopLagMonitor(interval=0.02, warning_threshold=0.1)
+        monitor.start()
+        try:
+            await asyncio.sleep(0.05)
+            await blocking_call()
+            await asyncio.sleep(0.05)
+        finally:
+            await monitor.stop()
+        return monitor.stats()
+    
+    return asyncio.run(scenario())
+
+
+class TestEventLoopLagMonitor:
+    """Тесты для EventLoopLagMonitor."""
+    
+    def test_detects_blocking_call(self):
+        """Тест, что синхронный вызов в loop фиксируется как задержка."""
+        async def blocking():
+            time.sleep(0.3)
+        
+        stats = _measure(blocking)
+        
+        assert stats["max_lag"] >= 0.2
+        assert stats["slow_samples"] >= 1
+    
+    def test_offloaded_call_keeps_loop_responsive(self):
+        """Тест, что вызов, вынесенный в поток, не блокирует loop."""
+        async def offloaded():
+            await run_blocking_io(time.sleep, 0.3, timeout=5)
+        
+        stats = _measure(offloaded)
+        
+        assert stats["samples"] >= 10
+        assert stats["max_lag"] < 0.1
+        assert stats["slow_samples"] == 0
+    
+    def test_stop_without_start(self):
+        """Тест остановки незапущенного монитора."""
+        monitor = EventLoopLagMonitor()
+        asyncio.run(monitor.stop())
+        assert not monitor.running
@@ -0,0 +1,111 @@
+"""Тесты для модуля parallel_deflate."""
+
+import hashlib
+import os
+import random
+import zipfile
+
+import pytest
+
+from telegram_xcode_bot.config import (
+    ARCHIVE_COMPRESS_WORKERS,
+    ARCHIVE_PARALLEL_MAX_BUFFER_BYTES,
+    ARCHIVE_PARALLEL_MIN_BYTES,
+    ARCHIVE_POOL_WORKERS,
+)
+from telegram_xcode_bot.services import zip_rewriter
+from telegram_xcode_bot.services.compression_policy import CompressionPolicy
+from telegram_xcode_bot.services.parallel_deflate import compress_entries
+from telegram_xcode_bot.services.zip_rewriter import rewrite_archive, write_file_entries
+
+
+def _make_files(directory, count=12):
+    """Создаёт файлы разных типов и размеров."""
+    rng = random.Random(7)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(count):
+        path = directory / (f"file{i:02d}.png" if i % 4 == 0 else f"file{i:02d}.swift")
+        if i % 4 == 0:
+            path.write_bytes(rng.randbytes(20000))
+        else:
+            path.write_text(f"let value{i} = compute()\n" * rng.randint(100, 3000))
+        paths.append(path)
+    return paths
+
+
+def _build(output_path, paths, workers):
+    """Записывает файлы в архив через write_file_entries."""
+    entries = [(str(path), zipfile.ZipInfo(path.name, date_time=(2020, 1, 1, 0, 0, 0))) for path in paths]
+    with zipfile.ZipFile(output_path, 'w') as zf:
+        write_file_entries(zf, entries, CompressionPolicy(level=6), workers=workers)
+    return hashlib.sha256(output_path.read_bytes()).hexdigest()
+
+
+class TestCompressEntries:
+    """Тесты для compress_entries."""
+    
+    def test_results_keep_input_order(self, temp_dir):
+        """Тест, что результаты отдаются в исходном порядке при малом буфере."""
+        paths = _make_files(temp_dir / "src")
+        entries = [(str(path), zipfile.ZipInfo(path.name)) for path in paths]
+        
+        names = [entry.info.filename for entry in compress_entries(entries, CompressionPolicy(), 4, max_buffer_bytes=1)]
+        
+        assert names == [path.name for path in paths]
+    
+    @pytest.mark.skipif(
+        bool(os.getenv("ARCHIVE_COMPRESS_WORKERS") or os.getenv("ARCHIVE_POOL_WORKERS")),
+        reason="потоки или процессы заданы явно"
+    )
+    def test_default_budget_shared_by_pool(self):
+        """Тест, что по умолчанию потоки и буфер сжатия делятся между процессами пула."""
+        assert ARCHIVE_COMPRESS_WORKERS == max(1, (os.cpu_count() or 1) // ARCHIVE_POOL_WORKERS)
+        total_buffer = ARCHIVE_PARALLEL_MAX_BUFFER_BYTES * ARCHIVE_POOL_WORKERS
+        assert total_buffer <= max(128 * 1024 * 1024, ARCHIVE_PARALLEL_MIN_BYTES * ARCHIVE_POOL_WORKERS)
+
+
+class TestParallelWriter:
+    """Тесты параллельной записи архива."""
+    
+    def test_parallel_output_matches_sequential(self, temp_dir, monkeypatch):
+        """Тест, что параллельно собранный архив побайтно совпадает с последовательным."""
+        monkeypatch.setattr(zip_rewriter, 'ARCHIVE_PARALLEL_MIN_BYTES', 0)
+        paths = _make_files(temp_dir / "src")
+        
+        sequential = _build(temp_dir / "sequential.zip", paths, workers=1)
+        parallel = _build(temp_dir / "parallel.zip", paths, workers=4)
+        
+        assert parallel == sequential
+        with zipfile.ZipFile(temp_dir / "parallel.zip") as zf:
+            assert zf.testzip() is None
+            assert zf.getinfo("file00.png").compress_type == zipfile.ZIP_STORED
+            assert zf.read("file01.swift") == paths[1].read_bytes()
+    
+    def test_rewrite_archive_parallel_matches_sequential(self, temp_dir, monkeypatch):
+        """Тест, что rewrite_archive даёт одинаковый результат при любом количестве потоков."""
+        monkeypatch.setattr(zip_rewriter, 'ARCHIVE_PARALLEL_MIN_BYTES', 0)
+        paths = _make_files(temp_dir / "work" / "App")
+        source = temp_dir / "source.zip"
+        with zipfile.ZipFile(source, 'w', zipfile.ZIP_DEFLATED) as zf:
+            for path in paths[:8]:
+                zf.writestr(f"App/{path.name}", b"old")
+            zf.writestr("App/keep.txt", "keep")
+        
+        replacements = {f"App/{path.name}": str(path) for path in paths[:8]}
+        added = [f"App/{path.name}" for path in paths[8:]]
+        digests = []
+        for workers in (1, 4):
+            output = temp_dir / f"out{workers}.zip"
+            rewrite_archive(
+                str(source), str(output), replacements,
+                added=added, source_dir=str(temp_dir / "work"), workers=workers
+            )
+            digests.append(hashlib.sha256(output.read_bytes()).hexdigest())
+        
+        assert digests[0] == digests[1]
+        with zipfile.ZipFile(temp_dir / "out4.zip") as zf:
+            assert zf.testzip() is None
+            assert zf.read("App/keep.txt") == b"keep"
+            assert zf.read(added[-1]) == paths[-1].read_bytes()
+            assert os.path.basename(zf.namelist()[-1]) == paths[-1].name
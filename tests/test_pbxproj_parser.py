@@ -0,0 +1,252 @@
+"""Тесты для модуля pbxproj_parser."""
+
+import pytest
+
+from telegram_xcode_bot.exceptions import PbxprojParseError
+from telegram_xcode_bot.services.pbxproj_parser import (
+    build_index,
+    get_pbxproj_index,
+    parse_plist,
+    pbxproj_index_cache,
+    quote_value,
+    splice,
+)
+from telegram_xcode_bot.services.xcode_service import (
+    ProjectEditPlan,
+    apply_edit_plan,
+    read_project_settings,
+)
+
+
+# Проект с целью тестов, конфигурации которой идут в файле раньше конфигураций приложения
+SAMPLE_PROJECT = b'''// !$*UTF8*$!
+{
+	archiveVersion = 1;
+	classes = {
+	};
+	objectVersion = 56;
+	objects = {
+
+/* Begin PBXNativeTarget section */
+		AA0000000000000000000001 /* AppTests */ = {
+			isa = PBXNativeTarget;
+			buildConfigurationList = CC0000000000000000000001 /* Build configuration list for PBXNativeTarget "AppTests" */;
+			name = AppTests;
+			productType = "com.apple.product-type.bundle.unit-test";
+		};
+		AA0000000000000000000002 /* App */ = {
+			isa = PBXNativeTarget;
+			buildConfigurationList = CC0000000000000000000002 /* Build configuration list for PBXNativeTarget "App" */;
+			name = App;
+			productType = "com.apple.product-type.application";
+		};
+/* End PBXNativeTarget section */
+
+/* Begin PBXProject section */
+		DD0000000000000000000001 /* Project object */ = {
+			isa = PBXProject;
+			buildConfigurationList = CC0000000000000000000003 /* Build configuration list for PBXProject "App" */;
+		};
+/* End PBXProject section */
+
+/* Begin PBXShellScriptBuildPhase section */
+		EE0000000000000000000001 /* Run Script */ = {
+			isa = PBXShellScriptBuildPhase;
+			shellScript = "echo \\"MARKETING_VERSION = 0.0;\\"\\n";
+		};
+/* End PBXShellScriptBuildPhase section */
+
+/* Begin XCBuildConfiguration section */
+		BB0000000000000000000001 /* Debug */ = {
+			isa = XCBuildConfiguration;
+			buildSettings = {
+				MARKETING_VERSION = 9.0;
+				PRODUCT_BUNDLE_IDENTIFIER = com.example.app.tests;
+			};
+			name = Debug;
+		};
+		BB0000000000000000000002 /* Debug */ = {
+			isa = XCBuildConfiguration;
+			buildSettings = {
+				CURRENT_PROJECT_VERSION = 3;
+				INFOPLIST_KEY_CFBundleDisplayName = "My \\"App\\"";
+				LD_RUNPATH_SEARCH_PATHS = (
+					"$(inherited)",
+					"@executable_path/Frameworks",
+				);
+				MARKETING_VERSION = 1.2;
+				PRODUCT_BUNDLE_IDENTIFIER = com.example.app;
+				TARGETED_DEVICE_FAMILY = 1;
+			};
+			name = Debug;
+		};
+		BB0000000000000000000003 /* Release */ = {
+			isa = XCBuildConfiguration;
+			buildSettings = {
+				MARKETING_VERSION = 1.2;
+				PRODUCT_BUNDLE_IDENTIFIER = com.example.app;
+				TARGETED_DEVICE_FAMILY = "1,2";
+			};
+			name = Release;
+		};
+		BB0000000000000000000004 /* Debug */ = {
+			isa = XCBuildConfiguration;
+			buildSettings = {
+				SDKROOT = iphoneos;
+			};
+			name = Debug;
+		};
+/* End XCBuildConfiguration section */
+
+/* Begin XCConfigurationList section */
+		CC0000000000000000000001 /* Build configuration list for PBXNativeTarget "AppTests" */ = {
+			isa = XCConfigurationList;
+			buildConfigurations = (
+				BB0000000000000000000001 /* Debug */,
+			);
+			defaultConfigurationName = Debug;
+		};
+		CC0000000000000000000002 /* Build configuration list for PBXNativeTarget "App" */ = {
+			isa = XCConfigurationList;
+			buildConfigurations = (
+				BB0000000000000000000002 /* Debug */,
+				BB0000000000000000000003 /* Release */,
+			);
+			defaultConfigurationName = Release;
+		};
+		CC0000000000000000000003 /* Build configuration list for PBXProject "App" */ = {
+			isa = XCConfigurationList;
+			buildConfigurations = (
+				BB0000000000000000000004 /* Debug */,
+			);
+			defaultConfigurationName = Debug;
+		};
+/* End XCConfigurationList section */
+	};
+	rootObject = DD0000000000000000000001 /* Project object */;
+}
+'''
+
+
+class TestParsePlist:
+    """Тесты для parse_plist."""
+    
+    def test_values_and_spans(self):
+        """Тест разбора значений и позиций."""
+        data = b'{ a = "x y"; b = (1, "2",); c = { d = e; }; /* comment */ f = <0a0b>; }'
+        
+        root = parse_plist(data)
+        
+        assert root == {"a": "x y", "b": ["1", "2"], "c": {"d": "e"}, "f": b"\x0a\x0b"}
+        start, end = root.spans["a"]
+        assert data[start:end] == b'"x y"'
+        assert root["c"].spans["d"] == (data.index(b"e;"), data.index(b"e;") + 1)
+    
+    def test_invalid_plist(self):
+        """Тест некорректного файла."""
+        with pytest.raises(PbxprojParseError):
+            parse_plist(b'{ a = b ')
+
+
+class TestBuildIndex:
+    """Тесты для build_index и get_pbxproj_index."""
+    
+    def test_object_graph(self):
+        """Тест графа целей и конфигураций."""
+        index = build_index(SAMPLE_PROJECT)
+        
+        assert [t.name for t in index.targets] == ["AppTests", "App"]
+        app = index.application_targets()[0]
+        assert app.configuration_list.default_name == "Release"
+        assert [c.name for c in app.configurations] == ["Debug", "Release"]
+        assert index.project_configuration_list.configurations[0].get("SDKROOT") == "iphoneos"
+        assert app.configurations[0].get("INFOPLIST_KEY_CFBundleDisplayName") == 'My "App"'
+        
+        start, end = app.configurations[0].span("MARKETING_VERSION")
+        assert SAMPLE_PROJECT[start:end] == b"1.2"
+    
+    def test_application_target_is_preferred(self):
+        """Тест, что значения берутся из цели-приложения, а не из первого совпадения."""
+        index = build_index(SAMPLE_PROJECT)
+        
+        assert index.find_setting("MARKETING_VERSION") == "1.2"
+        assert index.find_setting("PRODUCT_BUNDLE_IDENTIFIER") == "com.example.app"
+        assert index.find_setting("SDKROOT") == "iphoneos"
+    
+    def test_full_parse_fallback(self):
+        """Тест полного разбора, если isa не первый ключ объекта."""
+        data = SAMPLE_PROJECT.replace(
+            b"\t\t\tisa = PBXProject;\n\t\t\tbuildConfigurationList",
+            b"\t\t\tattributes = { };\n\t\t\tisa = PBXProject;\n\t\t\tbuildConfigurationList",
+        )
+        
+        index = build_index(data)
+        
+        assert len(index.targets) == 2
+        assert index.project_configuration_list is not None
+    
+    def test_index_is_cached(self):
+        """Тест кеширования индекса по содержимому."""
+        pbxproj_index_cache.clear()
+        hits = pbxproj_index_cache.stats()["hits"]
+        
+        assert get_pbxproj_index(SAMPLE_PROJECT) is get_pbxproj_index(SAMPLE_PROJECT)
+        assert pbxproj_index_cache.stats()["hits"] == hits + 1
+        pbxproj_index_cache.clear()
+
+
+class TestSplice:
+    """Тесты для splice и quote_value."""
+    
+    def test_splice(self):
+        """Тест замены диапазонов."""
+        assert splice(b"a = 1; b = 2;", [(11, 12, b"3"), (4, 5, b"10")]) == b"a = 10; b = 3;"
+    
+    def test_overlapping_edits(self):
+        """Тест пересекающихся изменений."""
+        with pytest.raises(ValueError):
+            splice(b"abcdef", [(0, 3, b"x"), (2, 4, b"y")])
+    
+    def test_quote_value(self):
+        """Тест форматирования значений."""
+        assert quote_value("com.example.app") == "com.example.app"
+        assert quote_value("My App") == '"My App"'
+        assert quote_value('a"b', force_quotes=True) == '"a\\"b"'
+
+
+class TestEditsWithIndex:
+    """Тесты чтения и изменения project.pbxproj через индекс."""
+    
+    def test_read_project_settings(self, temp_dir):
+        """Тест чтения информации цели-приложения."""
+        project_path = temp_dir / "project.pbxproj"
+        project_path.write_bytes(SAMPLE_PROJECT)
+        
+        info, device_family = read_project_settings(str(project_path))
+        
+        assert info.marketing_version == "1.2"
+        assert info.build_version == "3"
+        assert info.display_name == 'My "App"'
+        assert info.bundle_id == "com.example.app"
+        assert device_family == "iPhone"
+    
+    def test_edits_touch_only_build_settings(self, temp_dir):
+        """Тест, что изменения вносятся только в buildSettings."""
+        project_path = temp_dir / "project.pbxproj"
+        project_path.write_bytes(SAMPLE_PROJECT)
+        plan = ProjectEditPlan(increment_version=True, new_name="New", add_ipad=True)
+        
+        result = apply_edit_plan(str(project_path), plan)
+        
+        assert result.changed and result.version_updated and result.ipad_added
+        data = project_path.read_bytes()
+        assert data.count(b"MARKETING_VERSION = 2.2;") == 2
+        assert b"MARKETING_VERSION = 10.0;" in data
+        assert b'MARKETING_VERSION = 0.0;' in data
+        assert b"CURRENT_PROJECT_VERSION = 4;" in data
+        assert b'INFOPLIST_KEY_CFBundleDisplayName = "New";' in data
+        assert data.count(b'TARGETED_DEVICE_FAMILY = "1,2";') == 2
+        # Остальной текст не пересобирается
+        assert b'"@executable_path/Frameworks",\n\t\t\t\t);' in data
+        assert len(data) - len(SAMPLE_PROJECT) == len(b'"1,2"') - len(b"1") + len(b"10.0") - len(b"9.0") \
+            + len(b'"New"') - len(b'"My \\"App\\""')
@@ -0,0 +1,220 @@
+"""Тесты для модуля process_pool."""
+
+import asyncio
+import os
+import time
+
+import pytest
+
+from telegram_xcode_bot.exceptions import JobCancelledError, WorkerPoolBusyError
+from telegram_xcode_bot.utils.cancellation import CancellationToken
+from telegram_xcode_bot.utils.process_pool import ArchiveWorkerPool
+from telegram_xcode_bot.utils.version_utils import increment_version
+
+
+def _wait_for_cancel(cancel_token):
+    """Задача, которая работает до отмены и проверяет токен."""
+    while True:
+        cancel_token.raise_if_cancelled()
+        time.sleep(0.01)
+
+
+def _sleep_and_return(delay, value):
+    """Медленная задача без токена отмены."""
+    time.sleep(delay)
+    return value
+
+
+def _sleep_with_token(delay, value, cancel_token):
+    """Медленная задача, которая проверяет токен отмены."""
+    finish = time.monotonic() + delay
+    while time.monotonic() < finish:
+        cancel_token.raise_if_cancelled()
+        time.sleep(0.01)
+    return value
+
+
+def _getpid_after(delay):
+    """Возвращает pid процесса после паузы."""
+    time.sleep(delay)
+    return os.getpid()
+
+
+def _ignore_cancel(cancel_token):
+    """Задача, которая не проверяет токен отмены."""
+    time.sleep(60)
+
+
+class TestArchiveWorkerPool:
+    """Тесты для ArchiveWorkerPool."""
+    
+    def test_runs_in_separate_process(self):
+        """Тест выполнения задачи в отдельном процессе."""
+        async def scenario():
+            pool = ArchiveWorkerPool(max_workers=1, max_queue=1)
+            try:
+                await pool.start()
+                pid = await pool.run(os.getpid)
+                version = await pool.run(increment_version, "1.0")
+                return pid, version
+            finally:
+                await pool.shutdown()
+        
+        pid, version = asyncio.run(scenario())
+        
+        assert pid != os.getpid()
+        assert version == "2.0"
+    
+    def test_queue_limit(self):
+        """Тест отказа при переполнении очереди."""
+        async def scenario():
+            pool = ArchiveWorkerPool(max_workers=1, max_queue=0)
+            try:
+                await pool.start()
+                running = asyncio.ensure_future(pool.run(time.sleep, 0.5))
+                await asyncio.sleep(0)
+                assert pool.in_flight == 1
+                with pytest.raises(WorkerPoolBusyError):
+                    await pool.run(os.getpid)
+                await running
+                assert pool.in_flight == 0
+            finally:
+                await pool.shutdown()
+        
+        asyncio.run(scenario())
+    
+    def test_timeout(self):
+        """Тест тайм-аута задачи."""
+        async def scenario():
+            pool = ArchiveWorkerPool(max_workers=1, max_queue=0)
+            try:
+                with pytest.raises(TimeoutError):
+                    await pool.run(time.sleep, 1, timeout=0.1)
+                assert pool.in_flight == 0
+            finally:
+                await pool.shutdown()
+        
+        asyncio.run(scenario())
+    
+    def test_cooperative_cancel(self):
+        """Тест остановки задачи через токен отмены без завершения процесса."""
+        async def scenario():
+            pool = ArchiveWorkerPool(max_workers=1, max_queue=1, cancel_grace=5)
+            token = CancellationToken()
+            try:
+                await pool.start()
+                pid = await pool.run(os.getpid)
+                running = asyncio.ensure_future(pool.run(_wait_for_cancel, cancel_token=token))
+                await asyncio.sleep(0.3)
+                token.cancel()
+                with pytest.raises(JobCancelledError):
+                    await running
+                return pid, await pool.run(os.getpid)
+            finally:
+                await pool.shutdown()
+                token.cleanup()
+        
+        started = time.monotonic()
+        pid_before, pid_after = asyncio.run(scenario())
+        
+        assert pid_before == pid_after
+        assert time.monotonic() - started < 5
+    
+    def test_uncooperative_job_is_killed_without_neighbours(self):
+        """Тест завершения только процесса с зависшей задачей: соседняя задача не прерывается."""
+        async def scenario():
+            pool = ArchiveWorkerPool(max_workers=2, max_queue=1, cancel_grace=0.2)
+            token = CancellationToken()
+            neighbour_token = CancellationToken()
+            try:
+                await pool.start()
+                stuck = asyncio.ensure_future(pool.run(_ignore_cancel, cancel_token=token))
+                # Соседняя задача с коротким тайм-аутом и своим токеном
+                neighbour = asyncio.ensure_future(pool.run(
+                    _sleep_with_token, 1.0, "done", timeout=3, cancel_token=neighbour_token
+                ))
+                await asyncio.sleep(0.3)
+                token.cancel()
+                with pytest.raises(JobCancelledError):
+                    await stuck
+                assert not neighbour.done()
+                result = await neighbour
+                # Вместо завершённого процесса запускается новый
+                pids = await asyncio.gather(pool.run(_getpid_after, 0.2), pool.run(_getpid_after, 0.2))
+                return result, pids
+            finally:
+                await pool.shutdown()
+                token.cleanup()
+                neighbour_token.cleanup()
+        
+        started = time.monotonic()
+        result, pids = asyncio.run(scenario())
+        
+        assert result == "done"
+        assert len(set(pids)) == 2 and os.getpid() not in pids
+        assert time.monotonic() - started < 10
+    
+    def test_neighbour_deadline_starts_at_dispatch(self):
+        """Тест срока токена задачи, ожидавшей свободного процесса: отсчитывается оставшийся тайм-аут."""
+        async def scenario():
+            pool = ArchiveWorkerPool(max_workers=1, max_queue=1)
+            token = CancellationToken()
+            try:
+                await pool.start()
+                first = asyncio.ensure_future(pool.run(_sleep_and_return, 0.5, "first"))
+                second = asyncio.ensure_future(pool.run(
+                    _sleep_with_token, 0.5, "second", timeout=2, cancel_token=token
+                ))
+                return await first, await second
+            finally:
+                await pool.shutdown()
+                token.cleanup()
+        
+        assert asyncio.run(scenario()) == ("first", "second")
+    
+    def test_worker_recycled_after_max_tasks(self):
+        """Тест перезапуска процесса после max_tasks_per_child задач."""
+        async def scenario():
+            pool = ArchiveWorkerPool(max_workers=1, max_queue=0, max_tasks_per_child=2)
+            try:
+                await pool.start()
+                return [await pool.run(os.getpid) for _ in range(3)]
+            finally:
+                await pool.shutdown()
+        
+        pids = asyncio.run(scenario())
+        
+        assert pids[0] == pids[1]
+        assert pids[2] != pids[0]
+    
+    @pytest.mark.skipif(not os.path.isdir("/proc"), reason="нужна /proc")
+    def test_retired_workers_are_reaped(self):
+        """Тест, что пересозданные и принудительно завершённые процессы не остаются зомби."""
+        async def scenario():
+            # При spawn процессы - прямые потомки бота (при forkserver их дожидается сервер)
+            pool = ArchiveWorkerPool(
+                max_workers=1, max_queue=0, max_tasks_per_child=1, start_method='spawn', cancel_grace=0.5
+            )
+            try:
+                # Зомби остаётся в /proc, пока его не дождётся родитель. Проверки идут до
+                # запуска следующего процесса: при старте multiprocessing сам дожидается завершённых
+                recycled = await pool.run(os.getpid)
+                await asyncio.sleep(1)
+                recycled_left = os.path.exists(f"/proc/{recycled}")
+                
+                # Задача без токена отмены завершается вместе с процессом по тайм-ауту
+                job = asyncio.ensure_future(pool.run(time.sleep, 5, timeout=0.5))
+                await asyncio.sleep(0.2)
+                killed = next(iter(pool._workers)).process.pid
+                with pytest.raises(TimeoutError):
+                    await job
+                await asyncio.sleep(1)
+                killed_left = os.path.exists(f"/proc/{killed}")
+                return recycled_left, killed_left
+            finally:
+                await pool.shutdown()
+        
+        recycled_left, killed_left = asyncio.run(scenario())
+        
+        assert not recycled_left
+        assert not killed_left
@@ -0,0 +1,88 @@
+"""Тесты для модуля project_workspace."""
+
+import os
+
+from telegram_xcode_bot.services.project_workspace import ProjectWorkspace, scan_workspace
+
+
+class TestScanWorkspace:
+    """Тесты для scan_workspace."""
+    
+    def test_classifies_files(self, temp_dir):
+        """Тест классификации файлов за один обход."""
+        files = [
+            "App/App.xcodeproj/project.pbxproj",
+            "App/Sources/b.swift",
+            "App/Sources/a.swift",
+            "App/Assets.xcassets/AppIcon.appiconset/Contents.json",
+            "App/Assets.xcassets/AppIcon.appiconset/icon.png",
+            "App/README.md",
+        ]
+        for name in files:
+            path = temp_dir.joinpath(*name.split('/'))
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("x")
+        
+        workspace = scan_workspace(str(temp_dir))
+        
+        assert sorted(workspace.files) == sorted(files)
+        assert workspace.project_files == ["App/App.xcodeproj/project.pbxproj"]
+        assert workspace.swift_files == ["App/Sources/a.swift", "App/Sources/b.swift"]
+        assert workspace.get_appiconset_dirs() == [
+            os.path.join(str(temp_dir), "App", "Assets.xcassets", "AppIcon.appiconset")
+        ]
+    
+    def test_ignored_directories_are_skipped(self, temp_dir):
+        """Тест, что игнорируемые директории не обходятся."""
+        for name in ["App/View.swift", "Pods/Lib/Lib.swift", "App/build/Gen.swift"]:
+            path = temp_dir.joinpath(*name.split('/'))
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("x")
+        
+        assert scan_workspace(str(temp_dir)).files == ["App/View.swift"]
+        assert len(scan_workspace(str(temp_dir), ignored_dirs=frozenset()).files) == 3
+    
+    def test_empty_directory(self, temp_dir):
+        """Тест пустой директории."""
+        workspace = scan_workspace(str(temp_dir))
+        
+        assert workspace.files == []
+        assert workspace.get_project_files() == []
+
+
+class TestProjectWorkspace:
+    """Тесты для ProjectWorkspace."""
+    
+    def test_from_names(self):
+        """Тест индекса по именам записей архива."""
+        workspace = ProjectWorkspace.from_names([
+            "A/A.xcodeproj/project.pbxproj",
+            "B/B.xcodeproj/project.pbxproj",
+            "B/View.swift",
+        ])
+        
+        assert workspace.get_project_files() == [
+            "A/A.xcodeproj/project.pbxproj",
+            "B/B.xcodeproj/project.pbxproj",
+        ]
+        assert workspace.get_project_files("B") == ["B/B.xcodeproj/project.pbxproj"]
+        assert workspace.get_swift_files("A") == []
+    
+    def test_from_names_skips_ignored(self):
+        """Тест, что записи внутри игнорируемых директорий не индексируются."""
+        workspace = ProjectWorkspace.from_names([
+            "App/App.xcodeproj/project.pbxproj",
+            "App/App.xcodeproj/xcuserdata/user.xcuserdatad/x.swift",
+            "Carthage/Checkouts/Lib/Lib.xcodeproj/project.pbxproj",
+        ])
+        
+        assert workspace.files == ["App/App.xcodeproj/project.pbxproj"]
+    
+    def test_paths_relative_to_root(self, temp_dir):
+        """Тест преобразования путей относительно root."""
+        workspace = ProjectWorkspace.from_names(["App/View.swift"], root=str(temp_dir))
+        
+        assert workspace.get_swift_files(str(temp_dir / "App")) == [
+            os.path.join(str(temp_dir), "App", "View.swift")
+        ]
+        assert workspace.get_swift_files(str(temp_dir.parent)) == []
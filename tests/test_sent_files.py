@@ -0,0 +1,78 @@
+"""Тесты для модуля sent_files и повторной отправки архивов."""
+
+import asyncio
+from types import SimpleNamespace
+
+from telegram.error import BadRequest
+
+from telegram_xcode_bot.handlers import helpers
+from telegram_xcode_bot.handlers.helpers import reply_with_archive
+from telegram_xcode_bot.services.sent_files import SentFileIndex
+
+
+class FakeMessage:
+    """Сообщение, запоминающее отправленные документы."""
+    
+    def __init__(self, reject_file_ids=False):
+        self.sent = []
+        self.reject_file_ids = reject_file_ids
+    
+    async def reply_document(self, document, caption=None, filename=None):
+        if isinstance(document, str) and self.reject_file_ids:
+            raise BadRequest("Wrong file identifier")
+        self.sent.append(document)
+        return SimpleNamespace(document=SimpleNamespace(file_id=f"file-{len(self.sent)}"))
+
+
+class TestSentFileIndex:
+    """Тесты для SentFileIndex."""
+    
+    def test_lru_eviction(self):
+        """Тест вытеснения давно не использованных file_id."""
+        index = SentFileIndex(max_entries=2)
+        index.put("a", "file-a")
+        index.put("b", "file-b")
+        index.get("a")
+        index.put("c", "file-c")
+        
+        assert index.get("b") is None
+        assert index.get("a") == "file-a"
+        assert index.get("c") == "file-c"
+    
+    def test_invalidate(self):
+        """Тест удаления недействительного file_id."""
+        index = SentFileIndex()
+        index.put("a", "file-a")
+        index.invalidate("a")
+        
+        assert index.get("a") is None
+
+
+class TestReplyWithArchive:
+    """Тесты для reply_with_archive."""
+    
+    def test_identical_archive_is_sent_by_file_id(self, temp_dir, monkeypatch):
+        """Тест, что одинаковый архив загружается один раз, а затем отправляется по file_id."""
+        monkeypatch.setattr(helpers, 'sent_files', SentFileIndex())
+        archive = temp_dir / "out.zip"
+        archive.write_bytes(b"archive")
+        message = FakeMessage()
+        
+        asyncio.run(reply_with_archive(message, str(archive), "source.zip", "caption"))
+        asyncio.run(reply_with_archive(message, str(archive), "source.zip", "caption"))
+        
+        assert message.sent == [b"archive", "file-1"]
+    
+    def test_rejected_file_id_falls_back_to_upload(self, temp_dir, monkeypatch):
+        """Тест повторной загрузки, если Telegram не принял сохранённый file_id."""
+        index = SentFileIndex()
+        monkeypatch.setattr(helpers, 'sent_files', index)
+        archive = temp_dir / "out.zip"
+        archive.write_bytes(b"archive")
+        message = FakeMessage(reject_file_ids=True)
+        
+        asyncio.run(reply_with_archive(message, str(archive), "source.zip", "caption"))
+        asyncio.run(reply_with_archive(message, str(archive), "source.zip", "caption"))
+        
+        assert message.sent == [b"archive", b"archive"]
+        assert index.stats()["entries"] == 1
@@ -0,0 +1,184 @@
+"""Тесты для модуля single_flight."""
+
+import asyncio
+
+import pytest
+
+from telegram_xcode_bot.exceptions import JobCancelledError
+from telegram_xcode_bot.utils.cancellation import CancellationToken
+from telegram_xcode_bot.utils.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    """Тесты для SingleFlight."""
+    
+    def test_concurrent_calls_share_one_execution(self):
+        """Тест, что одновременные вызовы с одним ключом выполняют задачу один раз."""
+        async def scenario():
+            flight = SingleFlight()
+            calls, release = [], asyncio.Event()
+            
+            async def job(token):
+                calls.append(token)
+                await release.wait()
+                return "result"
+            
+            waiters = [asyncio.ensure_future(flight.do("key", job)) for _ in range(3)]
+            await asyncio.sleep(0.01)
+            assert flight.in_flight == 1
+            release.set()
+            results = await asyncio.gather(*waiters)
+            return results, len(calls), flight.in_flight
+        
+        assert asyncio.run(scenario()) == (["result"] * 3, 1, 0)
+    
+    def test_different_keys_run_separately(self):
+        """Тест, что разные ключи выполняются независимо."""
+        async def scenario():
+            flight = SingleFlight()
+            
+            async def job(token):
+                await asyncio.sleep(0.01)
+                return object()
+            
+            first, second = await asyncio.gather(flight.do("a", job), flight.do("b", job))
+            return first is not second
+        
+        assert asyncio.run(scenario())
+    
+    def test_error_is_shared(self):
+        """Тест передачи ошибки задачи всем участникам."""
+        async def scenario():
+            flight = SingleFlight()
+            
+            async def job(token):
+                await asyncio.sleep(0.01)
+                raise ValueError("broken")
+            
+            return await asyncio.gather(flight.do("key", job), flight.do("key", job), return_exceptions=True)
+        
+        results = asyncio.run(scenario())
+        
+        assert all(isinstance(result, ValueError) for result in results)
+    
+    def test_cancelled_participant_does_not_stop_others(self):
+        """Тест, что отмена одного участника не прерывает задачу для остальных."""
+        async def scenario():
+            flight = SingleFlight()
+            release = asyncio.Event()
+            tokens = []
+            
+            async def job(token):
+                tokens.append(token)
+                await release.wait()
+                return "result"
+            
+            own_token = CancellationToken()
+            leaving = asyncio.ensure_future(flight.do("key", job, cancel_token=own_token))
+            staying = asyncio.ensure_future(flight.do("key", job))
+            await asyncio.sleep(0.01)
+            own_token.cancel()
+            with pytest.raises(JobCancelledError):
+                await asyncio.wait_for(leaving, timeout=1)
+            assert not tokens[0].cancelled
+            release.set()
+            return await staying
+        
+        assert asyncio.run(scenario()) == "result"
+    
+    def test_job_is_cancelled_when_all_participants_leave(self):
+        """Тест отмены задачи, когда её отменили все участники."""
+        async def scenario():
+            flight = SingleFlight()
+            tokens = []
+            
+            async def job(token):
+                tokens.append(token)
+                await token.wait()
+                raise JobCancelledError("cancelled")
+            
+            own_tokens = [CancellationToken(), CancellationToken()]
+            waiters = [asyncio.ensure_future(flight.do("key", job, cancel_token=t)) for t in own_tokens]
+            await asyncio.sleep(0.01)
+            for token in own_tokens:
+                token.cancel()
+            await asyncio.gather(*waiters, return_exceptions=True)
+            await asyncio.sleep(0.01)
+            return tokens[0].cancelled, flight.in_flight
+        
+        assert asyncio.run(scenario()) == (True, 0)
+    
+    def test_finalize_after_all_deliveries(self):
+        """Тест, что finalize вызывается один раз после получения результата всеми участниками."""
+        async def scenario():
+            flight = SingleFlight()
+            events = []
+            
+            async def job(token):
+                await asyncio.sleep(0.01)
+                return "result"
+            
+            async def deliver(result):
+                events.append("deliver")
+            
+            async def finalize(result):
+                events.append("finalize")
+            
+            await asyncio.gather(*[
+                flight.do("key", job, deliver=deliver, finalize=finalize) for _ in range(2)
+            ])
+            return events
+        
+        assert asyncio.run(scenario()) == ["deliver", "deliver", "finalize"]
+    
+    def test_new_call_after_all_left_starts_new_job(self):
+        """Тест, что вызов после выхода всех участников не присоединяется к отменённой задаче."""
+        async def scenario():
+            flight = SingleFlight()
+            calls = []
+            
+            async def job(token):
+                calls.append(token)
+                if len(calls) == 1:
+                    await token.wait()
+                    await asyncio.sleep(0.05)
+                    raise JobCancelledError("cancelled")
+                return "result"
+            
+            own_token = CancellationToken()
+            leaving = asyncio.ensure_future(flight.do("key", job, cancel_token=own_token))
+            await asyncio.sleep(0.01)
+            own_token.cancel()
+            with pytest.raises(JobCancelledError):
+                await leaving
+            assert flight.in_flight == 0
+            result = await flight.do("key", job)
+            await asyncio.sleep(0.1)
+            return result, len(calls)
+        
+        assert asyncio.run(scenario()) == ("result", 2)
+    
+    def test_finalize_when_job_finishes_without_participants(self):
+        """Тест, что результат задачи, завершившейся после выхода всех участников, освобождается."""
+        async def scenario():
+            flight = SingleFlight()
+            finalized = []
+            
+            async def job(token):
+                # Задача не успевает остановиться и завершается успешно
+                await asyncio.sleep(0.05)
+                return "result"
+            
+            async def finalize(result):
+                finalized.append(result)
+            
+            own_token = CancellationToken()
+            leaving = asyncio.ensure_future(flight.do("key", job, cancel_token=own_token, finalize=finalize))
+            await asyncio.sleep(0.01)
+            own_token.cancel()
+            with pytest.raises(JobCancelledError):
+                await leaving
+            await asyncio.sleep(0.1)
+            return finalized
+        
+        assert asyncio.run(scenario()) == ["result"]
@@ -0,0 +1,61 @@
+"""Тесты для модуля snapshot_cache."""
+
+from telegram_xcode_bot.services.snapshot_cache import SnapshotCache, estimate_size
+from telegram_xcode_bot.services.xcode_service import ProjectInfo
+
+
+class TestSnapshotCache:
+    """Тесты для SnapshotCache."""
+    
+    def test_get_and_put(self):
+        """Тест сохранения и получения снимка."""
+        cache = SnapshotCache(max_entries=10, max_bytes=1024 * 1024)
+        info = ProjectInfo(marketing_version="1.0")
+        
+        assert cache.get("hash") is None
+        cache.put("hash", info)
+        
+        assert cache.get("hash") is info
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+    
+    def test_evicts_least_recently_used(self):
+        """Тест вытеснения по количеству записей."""
+        cache = SnapshotCache(max_entries=2, max_bytes=1024 * 1024)
+        cache.put("a", ProjectInfo())
+        cache.put("b", ProjectInfo())
+        cache.get("a")
+        cache.put("c", ProjectInfo())
+        
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+        assert cache.get("c") is not None
+    
+    def test_evicts_by_memory(self):
+        """Тест вытеснения по объёму памяти."""
+        item = ProjectInfo(display_name="x" * 1000)
+        size = estimate_size(item)
+        cache = SnapshotCache(max_entries=100, max_bytes=size * 2)
+        
+        cache.put("a", item)
+        cache.put("b", ProjectInfo(display_name="y" * 1000))
+        cache.put("c", ProjectInfo(display_name="z" * 1000))
+        
+        assert cache.get("a") is None
+        assert cache.stats()["bytes"] <= size * 2
+    
+    def test_too_large_snapshot_is_not_cached(self):
+        """Тест, что слишком большой снимок не попадает в кеш."""
+        cache = SnapshotCache(max_entries=10, max_bytes=100)
+        cache.put("a", ProjectInfo(display_name="x" * 1000))
+        
+        assert cache.get("a") is None
+    
+    def test_invalidate(self):
+        """Тест удаления записи."""
+        cache = SnapshotCache()
+        cache.put("a", ProjectInfo())
+        cache.invalidate("a")
+        
+        assert cache.get("a") is None
+        assert cache.stats()["bytes"] == 0
@@ -0,0 +1,89 @@
+"""Тесты для модуля update_processor."""
+
+import asyncio
+from types import SimpleNamespace
+
+from telegram_xcode_bot.utils.update_processor import UserSerializedUpdateProcessor
+
+
+def _update(user_id=None, data=None):
+    """Минимальное обновление с effective_user и callback_query."""
+    user = SimpleNamespace(id=user_id) if user_id is not None else None
+    query = SimpleNamespace(data=data) if data is not None else None
+    return SimpleNamespace(effective_user=user, callback_query=query)
+
+
+async def _handler(log, name, delay):
+    """Обработчик, записывающий начало и конец выполнения."""
+    log.append(f"{name}:start")
+    await asyncio.sleep(delay)
+    log.append(f"{name}:end")
+
+
+def _run(updates):
+    """Обрабатывает обновления параллельно, как Application, и возвращает журнал."""
+    async def scenario():
+        processor = UserSerializedUpdateProcessor(max_concurrent_updates=16)
+        log = []
+        async with processor:
+            await asyncio.gather(*(
+                processor.process_update(update, _handler(log, name, delay))
+                for update, name, delay in updates
+            ))
+        return log, len(processor.user_locks)
+    
+    return asyncio.run(scenario())
+
+
+class TestUserSerializedUpdateProcessor:
+    """Тесты для UserSerializedUpdateProcessor."""
+    
+    def test_same_user_is_serialized_in_order(self):
+        """Тест, что обновления одного пользователя выполняются по очереди."""
+        log, locks_left = _run([
+            (_update(1), "a1", 0.05),
+            (_update(1), "a2", 0.0),
+            (_update(1), "a3", 0.0),
+        ])
+        
+        assert log == ["a1:start", "a1:end", "a2:start", "a2:end", "a3:start", "a3:end"]
+        assert locks_left == 0
+    
+    def test_different_users_run_concurrently(self):
+        """Тест, что медленное обновление одного пользователя не блокирует другого."""
+        log, _ = _run([
+            (_update(1), "slow", 0.1),
+            (_update(2), "fast", 0.0),
+        ])
+        
+        assert log.index("fast:end") < log.index("slow:end")
+    
+    def test_updates_without_user_are_not_locked(self):
+        """Тест обработки обновлений без пользователя."""
+        log, locks_left = _run([
+            (_update(), "x", 0.05),
+            (_update(), "y", 0.0),
+        ])
+        
+        assert log.index("y:end") < log.index("x:end")
+        assert locks_left == 0
+    
+    def test_cancel_button_bypasses_user_queue(self):
+        """Тест, что кнопка отмены обрабатывается, пока обновление пользователя ещё выполняется."""
+        log, locks_left = _run([
+            (_update(1, "get_archive_1"), "job", 0.1),
+            (_update(1, "cancel_job_1"), "cancel", 0.0),
+        ])
+        
+        assert log.index("cancel:end") < log.index("job:end")
+        assert locks_left == 0
+    
+    def test_repeated_get_archive_waits_in_user_queue(self):
+        """Тест, что повторное нажатие 'Получить архив' обрабатывается после первого."""
+        log, locks_left = _run([
+            (_update(1, "get_archive_1"), "job", 0.05),
+            (_update(1, "get_archive_1"), "repeat", 0.0),
+        ])
+        
+        assert log == ["job:start", "job:end", "repeat:start", "repeat:end"]
+        assert locks_left == 0
@@ -3,7 +3,21 @@
 import pytest
 import tempfile
 import os
-from telegram_xcode_bot.services.xcode_service import ProjectInfo
+from unittest.mock import patch
+
+from telegram_xcode_bot.services import xcode_service
+from telegram_xcode_bot.services.xcode_service import (
+    ProjectInfo,
+    ProjectEditPlan,
+    apply_edit_plan,
+    update_display_name,
+    add_ipad_support,
+    scan_build_settings,
+    read_project_settings,
+    find_activation_date_files,
+    find_activation_date_in_project,
+    update_activation_date,
+)
 from telegram_xcode_bot.utils.version_utils import increment_version, increment_build_number
 
 
@@ -73,3 +87,141 @@ class TestIncrementBuildNumber:
         assert increment_build_number("abc") == "abc"  # Возвращает оригинал
         assert increment_build_number("") == ""
 
+
+class TestApplyEditPlan:
+    """Тесты для apply_edit_plan."""
+    
+    def test_all_edits_in_single_write(self, temp_dir, sample_pbxproj_content):
+        """Тест, что все изменения применяются за одну запись файла."""
+        project_path = temp_dir / "project.pbxproj"
+        project_path.write_text(sample_pbxproj_content + "    TARGETED_DEVICE_FAMILY = 1;\n")
+        plan = ProjectEditPlan(
+            increment_version=True,
+            new_name='New "App"',
+            new_bundle_id="com.new.app",
+            add_ipad=True,
+        )
+        
+        with patch.object(xcode_service, "_write_bytes", wraps=xcode_service._write_bytes) as write_mock:
+            result = apply_edit_plan(str(project_path), plan)
+        
+        assert write_mock.call_count == 1
+        assert result.changed is True
+        assert result.marketing_version == "2.0"
+        assert result.build_version == "2"
+        assert result.display_name_updated and result.bundle_id_updated and result.ipad_added
+        content = project_path.read_text()
+        assert "MARKETING_VERSION = 2.0;" in content
+        assert "CURRENT_PROJECT_VERSION = 2;" in content
+        assert 'INFOPLIST_KEY_CFBundleDisplayName = "New \\"App\\"";' in content
+        assert "PRODUCT_BUNDLE_IDENTIFIER = com.new.app;" in content
+        assert 'TARGETED_DEVICE_FAMILY = "1,2";' in content
+    
+    def test_only_requested_settings_change(self, temp_dir, sample_pbxproj_content):
+        """Тест, что не запрошенные в плане настройки не изменяются."""
+        project_path = temp_dir / "project.pbxproj"
+        project_path.write_text(sample_pbxproj_content)
+        
+        assert update_display_name(str(project_path), "Other") is True
+        
+        content = project_path.read_text()
+        assert 'INFOPLIST_KEY_CFBundleDisplayName = "Other";' in content
+        assert "MARKETING_VERSION = 1.0;" in content
+        assert "PRODUCT_BUNDLE_IDENTIFIER = com.test.app;" in content
+    
+    def test_no_write_when_nothing_changes(self, temp_dir):
+        """Тест, что файл не перезаписывается, если iPad уже поддерживается."""
+        project_path = temp_dir / "project.pbxproj"
+        project_path.write_text('TARGETED_DEVICE_FAMILY = "1,2";\n')
+        
+        assert add_ipad_support(str(project_path)) is False
+        assert apply_edit_plan(str(project_path), ProjectEditPlan()).changed is False
+
+
+class TestScanBuildSettings:
+    """Тесты для scan_build_settings и read_project_settings."""
+    
+    def test_first_assignment_wins(self):
+        """Тест, что берётся первое присваивание, а упоминания без '=' пропускаются."""
+        content = (
+            "/* MARKETING_VERSION comment */\n"
+            "MARKETING_VERSION = \"1.2\";\n"
+            "MARKETING_VERSION = 9.9;\n"
+            "TARGETED_DEVICE_FAMILY = \"1,2\";\n"
+        )
+        
+        assert scan_build_settings(content) == {
+            "MARKETING_VERSION": "1.2",
+            "TARGETED_DEVICE_FAMILY": "1,2",
+        }
+    
+    def test_info_and_device_family_together(self, temp_dir, sample_pbxproj_content):
+        """Тест чтения ProjectInfo и семейства устройств за одно чтение."""
+        project_path = temp_dir / "project.pbxproj"
+        project_path.write_text(sample_pbxproj_content + "    TARGETED_DEVICE_FAMILY = 1;\n")
+        
+        info, device_family = read_project_settings(str(project_path))
+        
+        assert info == ProjectInfo(
+            marketing_version="1.0",
+            build_version="1",
+            display_name="TestApp",
+            bundle_id="com.test.app",
+        )
+        assert device_family == "iPhone"
+    
+    def test_missing_file(self, temp_dir):
+        """Тест чтения несуществующего файла."""
+        info, device_family = read_project_settings(str(temp_dir / "missing.pbxproj"))
+        
+        assert info == ProjectInfo()
+        assert device_family is None
+
+
+class TestActivationDateScan:
+    """Тесты поиска и замены даты активации."""
+    
+    @pytest.fixture
+    def swift_project(self, temp_dir):
+        """Проект с множеством файлов .swift, один из которых большой."""
+        sources = temp_dir / "App" / "Sources"
+        sources.mkdir(parents=True)
+        for i in range(40):
+            (sources / f"File{i:02d}.swift").write_text(f"struct File{i} {{}}\n")
+        # Подстрока без кавычек не считается датой
+        (sources / "Decoy.swift").write_text("let d = formatter.date(from: value)\n")
+        big = "// padding\n" * 20000 + 'let date = formatter.date(from: "2026/01/31")\n'
+        (sources / "Big.swift").write_text(big)
+        (sources / "Other.swift").write_text('let x = f.date(from: "2025/05/05")\n')
+        return temp_dir / "App"
+    
+    def test_finds_dates_in_order(self, swift_project):
+        """Тест, что найдены все файлы с датой в порядке обхода."""
+        matches = find_activation_date_files(str(swift_project))
+        
+        assert [(os.path.basename(path), date) for path, date in matches] == [
+            ("Big.swift", "2026/01/31"),
+            ("Other.swift", "2025/05/05"),
+        ]
+        found, date, path, full_match = find_activation_date_in_project(str(swift_project))
+        assert found is True
+        assert date == "2026/01/31"
+        assert full_match == '.date(from: "2026/01/31")'
+    
+    def test_update_rewrites_only_matching_files(self, swift_project):
+        """Тест, что перезаписываются только файлы с датой."""
+        untouched = swift_project / "Sources" / "File00.swift"
+        mtime = untouched.stat().st_mtime_ns
+        
+        assert update_activation_date(str(swift_project), "2030/12/\\1") is True
+        
+        assert 'date(from: "2030/12/\\1")' in (swift_project / "Sources" / "Big.swift").read_text()
+        assert 'date(from: "2030/12/\\1")' in (swift_project / "Sources" / "Other.swift").read_text()
+        assert untouched.stat().st_mtime_ns == mtime
+    
+    def test_no_dates(self, temp_dir):
+        """Тест проекта без даты активации."""
+        (temp_dir / "View.swift").write_text("import SwiftUI\n")
+        
+        assert find_activation_date_in_project(str(temp_dir))[0] is False
+        assert update_activation_date(str(temp_dir), "2030/01/01") is False
@@ -0,0 +1,75 @@
+"""Тесты для модуля zip_fs."""
+
+import pytest
+
+from telegram_xcode_bot.services.zip_fs import ZipFileSystem, normalize_zip_path
+from telegram_xcode_bot.services.xcode_service import (
+    read_project_info,
+    read_device_family,
+    find_activation_date_in_project,
+)
+from telegram_xcode_bot.exceptions import ArchiveProcessingError
+
+
+class TestNormalizeZipPath:
+    """Тесты для normalize_zip_path."""
+    
+    def test_root_variants(self):
+        """Тест путей, обозначающих корень архива."""
+        assert normalize_zip_path('') == ''
+        assert normalize_zip_path('.') == ''
+        assert normalize_zip_path('/') == ''
+    
+    def test_relative_paths(self):
+        """Тест нормализации относительных путей."""
+        assert normalize_zip_path('./App/file.swift') == 'App/file.swift'
+        assert normalize_zip_path('App\\file.swift') == 'App/file.swift'
+
+
+class TestZipFileSystem:
+    """Тесты для ZipFileSystem."""
+    
+    def test_rglob_and_read(self, project_archive):
+        """Тест поиска и чтения файлов без распаковки."""
+        with ZipFileSystem.open(str(project_archive)) as fs:
+            assert fs.rglob('project.pbxproj') == ["TestApp/TestApp.xcodeproj/project.pbxproj"]
+            assert sorted(fs.rglob('*.swift', 'TestApp/TestApp')) == [
+                "TestApp/TestApp/Activation.swift",
+                "TestApp/TestApp/ContentView.swift",
+            ]
+            assert fs.rglob('*.swift', 'Other') == []
+            assert fs.read_text("TestApp/TestApp/ContentView.swift") == "import SwiftUI\n"
+            assert fs.is_file("TestApp/TestApp/ContentView.swift")
+            assert not fs.is_file("TestApp/TestApp")
+    
+    def test_read_missing_file(self, project_archive):
+        """Тест чтения отсутствующего файла."""
+        with ZipFileSystem.open(str(project_archive)) as fs:
+            with pytest.raises(FileNotFoundError):
+                fs.read_bytes("missing.txt")
+    
+    def test_corrupted_archive(self, temp_dir):
+        """Тест открытия повреждённого архива."""
+        corrupted = temp_dir / "corrupted.zip"
+        corrupted.write_text("not a zip file")
+        
+        with pytest.raises(ArchiveProcessingError):
+            ZipFileSystem.open(str(corrupted))
+    
+    def test_xcode_readers_work_on_archive(self, project_archive):
+        """Тест чтения информации о проекте через файловую систему архива."""
+        with ZipFileSystem.open(str(project_archive)) as fs:
+            project_file = fs.rglob('project.pbxproj')[0]
+            info = read_project_info(project_file, fs)
+            found, date, file_path, _ = find_activation_date_in_project('', fs)
+            device_family = read_device_family(project_file, fs)
+        
+        assert info.marketing_version == "1.0"
+        assert info.build_version == "1"
+        assert info.display_name == "TestApp"
+        assert info.bundle_id == "com.test.app"
+        assert info.activation_date == "2026/01/31"
+        assert found is True
+        assert date == "2026/01/31"
+        assert file_path == "TestApp/TestApp/Activation.swift"
+        assert device_family is None
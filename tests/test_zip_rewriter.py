@@ -0,0 +1,193 @@
+"""Тесты для модуля zip_rewriter."""
+
+import hashlib
+import os
+import zipfile
+
+import pytest
+
+from telegram_xcode_bot.services import zip_rewriter
+from telegram_xcode_bot.services.compression_policy import CompressionPolicy
+from telegram_xcode_bot.services.parallel_deflate import compress_entry
+from telegram_xcode_bot.services.zip_rewriter import (
+    copy_raw_entry,
+    file_matches_entry,
+    make_entry_info,
+    rewrite_archive,
+    write_compressed_entry,
+)
+
+
+def _raw_entry_bytes(archive_path, name):
+    """Возвращает сжатые байты записи архива."""
+    with zipfile.ZipFile(archive_path, 'r') as zf:
+        info = zf.getinfo(name)
+        zf.fp.seek(info.header_offset + 26)
+        name_len = int.from_bytes(zf.fp.read(2), 'little')
+        extra_len = int.from_bytes(zf.fp.read(2), 'little')
+        zf.fp.seek(name_len + extra_len, 1)
+        return zf.fp.read(info.compress_size)
+
+
+@pytest.fixture
+def source_archive(temp_dir):
+    """Архив с несколькими записями разных типов сжатия."""
+    archive_path = temp_dir / "source.zip"
+    with zipfile.ZipFile(archive_path, 'w') as zf:
+        zf.writestr("App/Assets/big.json", "{\"key\": \"value\"}\n" * 1000, zipfile.ZIP_DEFLATED)
+        zf.writestr("App/stored.bin", b"\x00\x01\x02" * 100, zipfile.ZIP_STORED)
+        zf.writestr("App/App.xcodeproj/project.pbxproj", "MARKETING_VERSION = 1.0;", zipfile.ZIP_DEFLATED)
+        zf.writestr("App/Empty/", "")
+    return archive_path
+
+
+class TestCopyRawEntry:
+    """Тесты для copy_raw_entry."""
+    
+    def test_copied_entries_are_readable(self, temp_dir, source_archive):
+        """Тест, что скопированные без пересжатия записи читаются корректно."""
+        output_path = temp_dir / "output.zip"
+        with zipfile.ZipFile(source_archive, 'r') as zip_in, \
+                zipfile.ZipFile(output_path, 'w') as zip_out:
+            for info in zip_in.infolist():
+                copy_raw_entry(zip_in, zip_out, info)
+        
+        with zipfile.ZipFile(source_archive, 'r') as original, \
+                zipfile.ZipFile(output_path, 'r') as copied:
+            assert copied.testzip() is None
+            assert copied.namelist() == original.namelist()
+            for name in original.namelist():
+                assert copied.read(name) == original.read(name)
+                assert copied.getinfo(name).compress_type == original.getinfo(name).compress_type
+    
+    def test_compressed_bytes_are_preserved(self, temp_dir, source_archive):
+        """Тест, что сжатые данные переносятся байт в байт."""
+        output_path = temp_dir / "output.zip"
+        with zipfile.ZipFile(source_archive, 'r') as zip_in, \
+                zipfile.ZipFile(output_path, 'w') as zip_out:
+            copy_raw_entry(zip_in, zip_out, zip_in.getinfo("App/Assets/big.json"))
+        
+        assert _raw_entry_bytes(output_path, "App/Assets/big.json") == \
+            _raw_entry_bytes(source_archive, "App/Assets/big.json")
+
+
+class TestRewriteArchive:
+    """Тесты для rewrite_archive."""
+    
+    def test_replace_remove_and_add(self, temp_dir, source_archive):
+        """Тест замены, удаления и добавления записей."""
+        replacement = temp_dir / "project.pbxproj"
+        replacement.write_text("MARKETING_VERSION = 2.0;")
+        new_file = temp_dir / "work" / "App" / "new.txt"
+        new_file.parent.mkdir(parents=True)
+        new_file.write_text("new")
+        
+        output_path = temp_dir / "output.zip"
+        rewrite_archive(
+            str(source_archive),
+            str(output_path),
+            {"App/App.xcodeproj/project.pbxproj": str(replacement)},
+            removed={"App/stored.bin"},
+            added=["App/new.txt"],
+            source_dir=str(temp_dir / "work"),
+        )
+        
+        with zipfile.ZipFile(output_path, 'r') as zf:
+            assert zf.testzip() is None
+            assert zf.namelist() == [
+                "App/Assets/big.json",
+                "App/App.xcodeproj/project.pbxproj",
+                "App/Empty/",
+                "App/new.txt",
+            ]
+            assert zf.read("App/App.xcodeproj/project.pbxproj") == b"MARKETING_VERSION = 2.0;"
+            assert zf.read("App/new.txt") == b"new"
+        
+        assert _raw_entry_bytes(output_path, "App/Assets/big.json") == \
+            _raw_entry_bytes(source_archive, "App/Assets/big.json")
+    
+    
+    def test_output_is_deterministic(self, temp_dir, source_archive):
+        """Тест, что время файлов на диске и порядок новых файлов не влияют на результат."""
+        replacement = temp_dir / "project.pbxproj"
+        replacement.write_text("MARKETING_VERSION = 2.0;")
+        work_dir = temp_dir / "work" / "App"
+        work_dir.mkdir(parents=True)
+        (work_dir / "b.txt").write_text("b")
+        (work_dir / "a.txt").write_text("a")
+        
+        digests = []
+        for run, added in enumerate((["App/b.txt", "App/a.txt"], ["App/a.txt", "App/b.txt"])):
+            for path in (replacement, work_dir / "a.txt", work_dir / "b.txt"):
+                os.utime(path, (1_000_000_000 + run * 86400,) * 2)
+            output_path = temp_dir / f"output{run}.zip"
+            rewrite_archive(
+                str(source_archive),
+                str(output_path),
+                {"App/App.xcodeproj/project.pbxproj": str(replacement)},
+                added=added,
+                source_dir=str(temp_dir / "work"),
+            )
+            digests.append(hashlib.sha256(output_path.read_bytes()).hexdigest())
+        
+        assert digests[0] == digests[1]
+        with zipfile.ZipFile(source_archive, 'r') as original, \
+                zipfile.ZipFile(temp_dir / "output0.zip", 'r') as output:
+            name = "App/App.xcodeproj/project.pbxproj"
+            assert output.getinfo(name).date_time == original.getinfo(name).date_time
+            assert output.getinfo(name).external_attr == original.getinfo(name).external_attr
+            assert output.namelist()[-2:] == ["App/a.txt", "App/b.txt"]
+    
+    def test_fallback_without_raw_write(self, temp_dir, source_archive, monkeypatch):
+        """Тест пересжатия через ZipFile.open, если внутренних атрибутов zipfile нет."""
+        def raw_write_unavailable(*args, **kwargs):
+            raise AssertionError("прямая запись недоступна")
+        
+        monkeypatch.setattr(zip_rewriter, 'RAW_WRITE_SUPPORTED', False)
+        monkeypatch.setattr(zip_rewriter, '_write_raw_entry', raw_write_unavailable)
+        monkeypatch.setattr(zip_rewriter, 'ARCHIVE_PARALLEL_MIN_BYTES', 0)
+        replacement = temp_dir / "project.pbxproj"
+        replacement.write_text("MARKETING_VERSION = 2.0;")
+        new_file = temp_dir / "work" / "App" / "new.txt"
+        new_file.parent.mkdir(parents=True)
+        new_file.write_text("new " * 100)
+        
+        output_path = temp_dir / "output.zip"
+        rewrite_archive(
+            str(source_archive),
+            str(output_path),
+            {"App/App.xcodeproj/project.pbxproj": str(replacement)},
+            added=["App/new.txt"],
+            source_dir=str(temp_dir / "work"),
+            workers=2,
+        )
+        info = make_entry_info("App/compressed.txt", None, (2020, 1, 1, 0, 0, 0))
+        entry = compress_entry(str(new_file), info, CompressionPolicy(level=6))
+        with zipfile.ZipFile(output_path, 'a') as zf:
+            write_compressed_entry(zf, entry)
+        
+        with zipfile.ZipFile(source_archive, 'r') as original, \
+                zipfile.ZipFile(output_path, 'r') as zf:
+            assert zf.testzip() is None
+            for name in ("App/Assets/big.json", "App/stored.bin", "App/Empty/"):
+                assert zf.read(name) == original.read(name)
+                assert zf.getinfo(name).compress_type == original.getinfo(name).compress_type
+            assert zf.read("App/App.xcodeproj/project.pbxproj") == b"MARKETING_VERSION = 2.0;"
+            assert zf.read("App/new.txt") == zf.read("App/compressed.txt") == b"new " * 100
+
+
+class TestFileMatchesEntry:
+    """Тесты для file_matches_entry."""
+    
+    def test_detects_changes(self, temp_dir, source_archive):
+        """Тест сравнения файла с записью архива по размеру и CRC."""
+        with zipfile.ZipFile(source_archive, 'r') as zf:
+            info = zf.getinfo("App/App.xcodeproj/project.pbxproj")
+        
+        same = temp_dir / "same.pbxproj"
+        same.write_text("MARKETING_VERSION = 1.0;")
+        changed = temp_dir / "changed.pbxproj"
+        changed.write_text("MARKETING_VERSION = 3.0;")
+        
+        assert file_matches_entry(str(same), info) is True
+        assert file_matches_entry(str(changed), info) is False